@@ -0,0 +1,83 @@
+"""Initial schema: users, patients, logs, mfa_codes
+
+Revision ID: 0001_initial_schema
+Revises:
+Create Date: 2026-10-16 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0001_initial_schema"
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "users",
+        sa.Column("user_id", sa.Integer(), primary_key=True),
+        sa.Column("username", sa.String(length=100), nullable=False),
+        sa.Column("email", sa.String(length=255), nullable=False),
+        sa.Column("hashed_password", sa.String(length=255), nullable=False),
+        sa.Column("role", sa.String(length=50), nullable=False),
+        sa.Column("is_active", sa.Boolean(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("gdpr_consent", sa.Boolean(), nullable=False),
+        sa.Column("gdpr_consent_date", sa.DateTime(), nullable=True),
+        sa.CheckConstraint("role IN ('admin', 'doctor', 'receptionist', 'user')", name="check_role"),
+    )
+    op.create_index("ix_users_user_id", "users", ["user_id"])
+    op.create_index("ix_users_username", "users", ["username"], unique=True)
+    op.create_index("ix_users_email", "users", ["email"], unique=True)
+
+    op.create_table(
+        "patients",
+        sa.Column("patient_id", sa.Integer(), primary_key=True),
+        sa.Column("name", sa.String(length=255), nullable=False),
+        sa.Column("contact", sa.String(length=255), nullable=True),
+        sa.Column("diagnosis", sa.Text(), nullable=True),
+        sa.Column("anonymized_name", sa.String(length=255), nullable=True),
+        sa.Column("anonymized_contact", sa.String(length=255), nullable=True),
+        sa.Column("date_added", sa.DateTime(), nullable=False),
+    )
+    op.create_index("ix_patients_patient_id", "patients", ["patient_id"])
+
+    op.create_table(
+        "logs",
+        sa.Column("log_id", sa.Integer(), primary_key=True),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.user_id", ondelete="SET NULL"), nullable=True),
+        sa.Column("role", sa.String(length=50), nullable=True),
+        sa.Column("action", sa.String(length=255), nullable=False),
+        sa.Column("timestamp", sa.DateTime(), nullable=False),
+        sa.Column("details", sa.Text(), nullable=True),
+    )
+    op.create_index("ix_logs_log_id", "logs", ["log_id"])
+    op.create_index("ix_logs_timestamp", "logs", ["timestamp"])
+
+    op.create_table(
+        "mfa_codes",
+        sa.Column("mfa_id", sa.Integer(), primary_key=True),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.user_id", ondelete="CASCADE"), nullable=False),
+        sa.Column("hashed_code", sa.String(length=255), nullable=False),
+        sa.Column("temp_token", sa.String(length=255), nullable=False),
+        sa.Column("expires_at", sa.DateTime(), nullable=False),
+        sa.Column("used", sa.Boolean(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+    )
+    op.create_index("ix_mfa_codes_mfa_id", "mfa_codes", ["mfa_id"])
+    op.create_index("ix_mfa_codes_user_id", "mfa_codes", ["user_id"])
+    op.create_index("ix_mfa_codes_temp_token", "mfa_codes", ["temp_token"], unique=True)
+    op.create_index("ix_mfa_codes_expires_at", "mfa_codes", ["expires_at"])
+
+
+def downgrade() -> None:
+    op.drop_table("mfa_codes")
+    op.drop_table("logs")
+    op.drop_table("patients")
+    op.drop_table("users")
@@ -0,0 +1,29 @@
+"""Composite indexes for audit-log query patterns
+
+Revision ID: 0002_log_composite_indexes
+Revises: 0001_initial_schema
+Create Date: 2026-10-16 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0002_log_composite_indexes"
+down_revision: Union[str, None] = "0001_initial_schema"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index("ix_logs_role_timestamp", "logs", ["role", "timestamp"])
+    op.create_index("ix_logs_user_id_timestamp", "logs", ["user_id", "timestamp"])
+    op.create_index("ix_logs_action_timestamp", "logs", ["action", "timestamp"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_logs_action_timestamp", table_name="logs")
+    op.drop_index("ix_logs_user_id_timestamp", table_name="logs")
+    op.drop_index("ix_logs_role_timestamp", table_name="logs")
@@ -0,0 +1,72 @@
+"""Daily log rollup table maintained by triggers, backfilled from logs
+
+Revision ID: 0003_log_daily_rollup
+Revises: 0002_log_composite_indexes
+Create Date: 2026-10-16 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0003_log_daily_rollup"
+down_revision: Union[str, None] = "0002_log_composite_indexes"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _key(row: str) -> tuple[str, str, str]:
+    return (
+        f"date({row}.timestamp)",
+        f"COALESCE(NULLIF({row}.role, ''), 'unknown')",
+        f"CASE WHEN instr({row}.action, '_') > 0 "
+        f"THEN substr({row}.action, 1, instr({row}.action, '_') - 1) ELSE {row}.action END",
+    )
+
+
+def upgrade() -> None:
+    op.create_table(
+        "log_daily_rollup",
+        sa.Column("day", sa.Date(), primary_key=True),
+        sa.Column("role", sa.String(length=50), primary_key=True),
+        sa.Column("action_type", sa.String(length=255), primary_key=True),
+        sa.Column("count", sa.Integer(), nullable=False),
+    )
+
+    day, role, action_type = _key("logs")
+    op.execute(
+        "INSERT INTO log_daily_rollup (day, role, action_type, count) "
+        f"SELECT {day}, {role}, {action_type}, COUNT(*) FROM logs GROUP BY 1, 2, 3"
+    )
+
+    new_day, new_role, new_type = _key("NEW")
+    old_day, old_role, old_type = _key("OLD")
+    old_match = f"day = {old_day} AND role = {old_role} AND action_type = {old_type}"
+    op.execute(
+        f"""
+        CREATE TRIGGER trg_logs_rollup_insert AFTER INSERT ON logs
+        BEGIN
+            INSERT INTO log_daily_rollup (day, role, action_type, count)
+            VALUES ({new_day}, {new_role}, {new_type}, 1)
+            ON CONFLICT (day, role, action_type) DO UPDATE SET count = count + 1;
+        END
+        """
+    )
+    op.execute(
+        f"""
+        CREATE TRIGGER trg_logs_rollup_delete AFTER DELETE ON logs
+        BEGIN
+            UPDATE log_daily_rollup SET count = count - 1 WHERE {old_match};
+            DELETE FROM log_daily_rollup WHERE {old_match} AND count <= 0;
+        END
+        """
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER IF EXISTS trg_logs_rollup_delete")
+    op.execute("DROP TRIGGER IF EXISTS trg_logs_rollup_insert")
+    op.drop_table("log_daily_rollup")
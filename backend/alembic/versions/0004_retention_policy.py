@@ -0,0 +1,34 @@
+"""Persisted audit-log retention policy
+
+Revision ID: 0004_retention_policy
+Revises: 0003_log_daily_rollup
+Create Date: 2026-10-16 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0004_retention_policy"
+down_revision: Union[str, None] = "0003_log_daily_rollup"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "retention_policy",
+        sa.Column("policy_id", sa.Integer(), primary_key=True),
+        sa.Column("retention_days", sa.Integer(), nullable=False),
+        sa.Column("enabled", sa.Boolean(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+        sa.Column("updated_by", sa.Integer(), sa.ForeignKey("users.user_id", ondelete="SET NULL"), nullable=True),
+        sa.CheckConstraint("policy_id = 1", name="check_single_policy"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("retention_policy")
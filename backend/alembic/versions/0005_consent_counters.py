@@ -0,0 +1,94 @@
+"""Consent counters and daily consent history maintained by triggers on users
+
+Revision ID: 0005_consent_counters
+Revises: 0004_retention_policy
+Create Date: 2026-10-16 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0005_consent_counters"
+down_revision: Union[str, None] = "0004_retention_policy"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+UPSERT_TODAY = (
+    "INSERT INTO consent_daily (day, total_users, consented_users) "
+    "SELECT date('now'), total_users, consented_users FROM consent_counters WHERE counter_id = 1 "
+    "ON CONFLICT (day) DO UPDATE SET "
+    "total_users = excluded.total_users, consented_users = excluded.consented_users"
+)
+
+
+def _update_counters(sign: str, row: str) -> str:
+    return (
+        f"UPDATE consent_counters SET "
+        f"total_users = total_users {sign} ({row}.is_active = 1), "
+        f"consented_users = consented_users {sign} ({row}.is_active = 1 AND {row}.gdpr_consent = 1) "
+        "WHERE counter_id = 1"
+    )
+
+
+def upgrade() -> None:
+    op.create_table(
+        "consent_counters",
+        sa.Column("counter_id", sa.Integer(), primary_key=True),
+        sa.Column("total_users", sa.Integer(), nullable=False),
+        sa.Column("consented_users", sa.Integer(), nullable=False),
+        sa.CheckConstraint("counter_id = 1", name="check_single_counter"),
+    )
+    op.create_table(
+        "consent_daily",
+        sa.Column("day", sa.Date(), primary_key=True),
+        sa.Column("total_users", sa.Integer(), nullable=False),
+        sa.Column("consented_users", sa.Integer(), nullable=False),
+    )
+
+    op.execute(
+        "INSERT INTO consent_counters (counter_id, total_users, consented_users) "
+        "SELECT 1, COALESCE(SUM(is_active = 1), 0), COALESCE(SUM(is_active = 1 AND gdpr_consent = 1), 0) FROM users"
+    )
+    op.execute(UPSERT_TODAY)
+
+    op.execute(
+        f"""
+        CREATE TRIGGER trg_users_consent_insert AFTER INSERT ON users
+        BEGIN
+            {_update_counters("+", "NEW")};
+            {UPSERT_TODAY};
+        END
+        """
+    )
+    op.execute(
+        f"""
+        CREATE TRIGGER trg_users_consent_update AFTER UPDATE OF is_active, gdpr_consent ON users
+        WHEN NEW.is_active IS NOT OLD.is_active OR NEW.gdpr_consent IS NOT OLD.gdpr_consent
+        BEGIN
+            {_update_counters("-", "OLD")};
+            {_update_counters("+", "NEW")};
+            {UPSERT_TODAY};
+        END
+        """
+    )
+    op.execute(
+        f"""
+        CREATE TRIGGER trg_users_consent_delete AFTER DELETE ON users
+        BEGIN
+            {_update_counters("-", "OLD")};
+            {UPSERT_TODAY};
+        END
+        """
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER IF EXISTS trg_users_consent_delete")
+    op.execute("DROP TRIGGER IF EXISTS trg_users_consent_update")
+    op.execute("DROP TRIGGER IF EXISTS trg_users_consent_insert")
+    op.drop_table("consent_daily")
+    op.drop_table("consent_counters")
@@ -0,0 +1,34 @@
+"""Scheduler job leases
+
+Revision ID: 0006_scheduler_leases
+Revises: 0005_consent_counters
+Create Date: 2026-10-16 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0006_scheduler_leases"
+down_revision: Union[str, None] = "0005_consent_counters"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "scheduler_leases",
+        sa.Column("job_name", sa.String(length=100), primary_key=True),
+        sa.Column("owner", sa.String(length=255), nullable=True),
+        sa.Column("leased_until", sa.DateTime(), nullable=True),
+        sa.Column("last_run_at", sa.DateTime(), nullable=True),
+        sa.Column("last_outcome", sa.String(length=20), nullable=True),
+        sa.Column("last_duration_ms", sa.Float(), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("scheduler_leases")
@@ -0,0 +1,25 @@
+"""Index patients.date_added for keyset pagination
+
+Revision ID: 0007_patient_date_added_index
+Revises: 0006_scheduler_leases
+Create Date: 2026-10-16 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0007_patient_date_added_index"
+down_revision: Union[str, None] = "0006_scheduler_leases"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index("ix_patients_date_added", "patients", ["date_added"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_patients_date_added", table_name="patients")
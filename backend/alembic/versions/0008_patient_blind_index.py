@@ -0,0 +1,85 @@
+"""Blind-index columns and name-prefix token table for patient search
+
+Revision ID: 0008_patient_blind_index
+Revises: 0007_patient_date_added_index
+Create Date: 2026-10-16 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0008_patient_blind_index"
+down_revision: Union[str, None] = "0007_patient_date_added_index"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SYNC_TOKENS = (
+    "DELETE FROM patient_name_tokens WHERE patient_id = NEW.patient_id; "
+    "INSERT OR IGNORE INTO patient_name_tokens (token, patient_id) "
+    "SELECT value, NEW.patient_id FROM json_each(COALESCE(NEW.name_tokens, '[]'))"
+)
+
+
+def upgrade() -> None:
+    # Existing rows stay NULL until the blind_index_backfill job reaches them
+    op.add_column("patients", sa.Column("name_bidx", sa.String(length=64), nullable=True))
+    op.add_column("patients", sa.Column("contact_bidx", sa.String(length=64), nullable=True))
+    op.add_column("patients", sa.Column("name_tokens", sa.Text(), nullable=True))
+    op.create_index("ix_patients_name_bidx", "patients", ["name_bidx"])
+    op.create_index("ix_patients_contact_bidx", "patients", ["contact_bidx"])
+
+    op.create_table(
+        "patient_name_tokens",
+        sa.Column("token", sa.String(length=64), primary_key=True),
+        sa.Column(
+            "patient_id",
+            sa.Integer(),
+            sa.ForeignKey("patients.patient_id", ondelete="CASCADE"),
+            primary_key=True,
+        ),
+        sqlite_with_rowid=False,
+    )
+
+    op.execute(
+        f"""
+        CREATE TRIGGER trg_patients_tokens_insert AFTER INSERT ON patients
+        WHEN NEW.name_tokens IS NOT NULL
+        BEGIN
+            {SYNC_TOKENS};
+        END
+        """
+    )
+    op.execute(
+        f"""
+        CREATE TRIGGER trg_patients_tokens_update AFTER UPDATE OF name_tokens ON patients
+        WHEN NEW.name_tokens IS NOT OLD.name_tokens
+        BEGIN
+            {SYNC_TOKENS};
+        END
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER trg_patients_tokens_delete AFTER DELETE ON patients
+        BEGIN
+            DELETE FROM patient_name_tokens WHERE patient_id = OLD.patient_id;
+        END
+        """
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER IF EXISTS trg_patients_tokens_delete")
+    op.execute("DROP TRIGGER IF EXISTS trg_patients_tokens_update")
+    op.execute("DROP TRIGGER IF EXISTS trg_patients_tokens_insert")
+    op.drop_table("patient_name_tokens")
+    op.drop_index("ix_patients_contact_bidx", table_name="patients")
+    op.drop_index("ix_patients_name_bidx", table_name="patients")
+    with op.batch_alter_table("patients") as batch_op:
+        batch_op.drop_column("name_tokens")
+        batch_op.drop_column("contact_bidx")
+        batch_op.drop_column("name_bidx")
@@ -0,0 +1,47 @@
+"""Index patient_name_tokens.patient_id; the insert trigger no longer deletes
+
+Revision ID: 0009_patient_name_tokens_patient_index
+Revises: 0008_patient_blind_index
+Create Date: 2026-10-16 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0009_patient_name_tokens_patient_index"
+down_revision: Union[str, None] = "0008_patient_blind_index"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INSERT_TOKENS = (
+    "INSERT OR IGNORE INTO patient_name_tokens (token, patient_id) "
+    "SELECT value, NEW.patient_id FROM json_each(COALESCE(NEW.name_tokens, '[]'))"
+)
+
+
+def _create_insert_trigger(body: str) -> None:
+    op.execute("DROP TRIGGER IF EXISTS trg_patients_tokens_insert")
+    op.execute(
+        f"""
+        CREATE TRIGGER trg_patients_tokens_insert AFTER INSERT ON patients
+        WHEN NEW.name_tokens IS NOT NULL
+        BEGIN
+            {body};
+        END
+        """
+    )
+
+
+def upgrade() -> None:
+    # Without it every per-patient delete in the update/delete triggers scans the table
+    op.create_index("ix_patient_name_tokens_patient_id", "patient_name_tokens", ["patient_id"])
+    # A new patient has no tokens to delete
+    _create_insert_trigger(INSERT_TOKENS)
+
+
+def downgrade() -> None:
+    _create_insert_trigger(f"DELETE FROM patient_name_tokens WHERE patient_id = NEW.patient_id; {INSERT_TOKENS}")
+    op.drop_index("ix_patient_name_tokens_patient_id", table_name="patient_name_tokens")
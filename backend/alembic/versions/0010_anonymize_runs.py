@@ -0,0 +1,48 @@
+"""Checkpointed anonymize-all runs
+
+Revision ID: 0010_anonymize_runs
+Revises: 0009_patient_name_tokens_patient_index
+Create Date: 2026-10-16 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0010_anonymize_runs"
+down_revision: Union[str, None] = "0009_patient_name_tokens_patient_index"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "anonymize_runs",
+        sa.Column("run_id", sa.Integer(), primary_key=True),
+        sa.Column("status", sa.String(length=20), nullable=False),
+        sa.Column("owner", sa.String(length=255), nullable=True),
+        sa.Column("started_by", sa.Integer(), sa.ForeignKey("users.user_id", ondelete="SET NULL"), nullable=True),
+        sa.Column("started_at", sa.DateTime(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+        sa.Column("finished_at", sa.DateTime(), nullable=True),
+        sa.Column("last_patient_id", sa.Integer(), nullable=False),
+        sa.Column("processed", sa.Integer(), nullable=False),
+        sa.Column("total", sa.Integer(), nullable=True),
+        sa.Column("rows_per_second", sa.Float(), nullable=True),
+        sa.Column("error", sa.Text(), nullable=True),
+    )
+    op.create_index(
+        "uq_anonymize_runs_running",
+        "anonymize_runs",
+        ["status"],
+        unique=True,
+        sqlite_where=sa.text("status = 'running'"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("uq_anonymize_runs_running", table_name="anonymize_runs")
+    op.drop_table("anonymize_runs")
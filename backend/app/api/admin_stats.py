@@ -1,26 +1,67 @@
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Literal, Optional
 from collections import defaultdict
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from sqlalchemy import func, and_
 
-from app.db.session import get_db_session
+from app.core.config import settings
+from app.core.response_cache import dashboard_cache
+from app.db.session import get_async_db_session, get_session
 from app.db import models
 from app.services import auth_service
+from app.services.activity_counters import activity_counters, counter_key
+from app.services.audit_writer import audit_writer
+from app.services.consent_service import consent_history, consent_percentage, consent_totals
 from app.services.logging_service import log_action
+from app.services.retention_service import (
+    retention_policy_cache,
+    retention_preview,
+    retention_purges,
+    save_retention_policy,
+)
+from app.services.stats_stream import SubscriberLimitReached, event_stream, stats_broadcaster
 
 router = APIRouter()
 
 
 class ActivityStatsResponse(BaseModel):
     """Activity statistics for charts"""
-    days: list[str]  # Date labels
-    actions_per_day: list[int]  # Count of actions per day
+    days: list[str]  # Date labels (first day of each bucket)
+    actions_per_day: list[int]  # Count of actions per bucket
     actions_by_role: dict[str, int]  # Actions grouped by role
     actions_by_type: dict[str, int]  # Actions grouped by action type
+    granularity: str = "daily"
+
+
+class RecentActivityResponse(BaseModel):
+    """Activity for the last hours, answered from the in-memory counters"""
+    granularity: str
+    window_start: datetime
+    buckets: list[str]  # Bucket start times (UTC)
+    actions: list[int]  # Count of actions per bucket
+    actions_by_role: dict[str, int]
+    actions_by_type: dict[str, int]
+    total: int
+
+
+class ActivityCountMismatch(BaseModel):
+    role: str
+    action_type: str
+    counters: int
+    database: int
+
+
+class ActivityConsistencyResponse(BaseModel):
+    window_start: datetime
+    counters_total: int
+    database_total: int
+    consistent: bool
+    mismatches: list[ActivityCountMismatch]
 
 
 class RetentionSettings(BaseModel):
@@ -33,6 +74,21 @@ class RetentionSettingsResponse(BaseModel):
     enabled: bool
     next_purge_date: Optional[datetime] = None
     logs_to_delete: int = 0
+    purge_job_id: Optional[str] = None  # Set when an update started a background purge
+
+
+class RetentionJobResponse(BaseModel):
+    job_id: str
+    status: str  # queued | running | completed | failed
+    retention_days: int
+    cutoff: datetime
+    deleted: int
+    batches: int
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    rows_per_second: Optional[float] = None
+    error: Optional[str] = None
 
 
 class RetentionUpdate(BaseModel):
@@ -47,214 +103,341 @@ class ConsentStatsResponse(BaseModel):
     last_updated: datetime
 
 
+class ConsentHistoryResponse(BaseModel):
+    """End-of-day consent totals for charts"""
+    days: list[str]
+    total_users: list[int]
+    consented_users: list[int]
+    consent_percentage: list[float]
+
+
 @router.get("/stats/activity", response_model=ActivityStatsResponse)
-async def get_activity_stats(
-    days: int = Query(7, ge=1, le=30, description="Number of days to analyze (7 or 30)"),
+def get_activity_stats(
+    request: Request,
+    days: int = Query(7, ge=1, le=365, description="Number of days to analyze"),
+    granularity: Literal["daily", "weekly"] = Query("daily", description="Bucket size for actions_per_day"),
     current_user: models.User = Depends(auth_service.require_role("admin")),
-    db: Session = Depends(get_db_session),
-) -> ActivityStatsResponse:
+    db: Session = Depends(get_session),
+) -> Response:
     """
     Get real-time activity statistics for charts.
     Admin only. Returns anonymized data (no PII).
+    Reads the log_daily_rollup table, so cost is bounded by days x roles x action types.
+    Served through the dashboard response cache: repeated polls within the TTL get the
+    cached body (or 304), and every poll is still logged.
     """
-    end_date = datetime.utcnow()
-    start_date = end_date - timedelta(days=days)
-    
-    # Get logs in date range
-    logs = db.query(models.Log).filter(
-        and_(
-            models.Log.timestamp >= start_date,
-            models.Log.timestamp <= end_date
-        )
+    return dashboard_cache.respond(
+        request,
+        current_user.role,
+        lambda: _build_activity_stats(days, granularity, db),
+        audit=lambda: log_action(
+            user_id=current_user.user_id,
+            role=current_user.role,
+            action="view_stats",
+            details=f"Viewed activity stats for last {days} days"
+        ),
+    )
+
+
+def _build_activity_stats(days: int, granularity: str, db: Session) -> ActivityStatsResponse:
+    end_day = datetime.utcnow().date()
+    start_day = end_day - timedelta(days=days)
+
+    rollup = models.LogDailyRollup
+    rows = db.query(rollup.day, rollup.role, rollup.action_type, rollup.count).filter(
+        and_(rollup.day >= start_day, rollup.day <= end_day)
     ).all()
-    
-    # Group by day
+
     actions_per_day_dict = defaultdict(int)
     actions_by_role_dict = defaultdict(int)
     actions_by_type_dict = defaultdict(int)
-    
-    for log in logs:
-        # Group by day
-        day_key = log.timestamp.strftime("%Y-%m-%d")
-        actions_per_day_dict[day_key] += 1
-        
-        # Group by role
-        role = log.role or "unknown"
-        actions_by_role_dict[role] += 1
-        
-        # Group by action type
-        action_type = log.action.split("_")[0] if "_" in log.action else log.action
-        actions_by_type_dict[action_type] += 1
-    
-    # Generate day labels for the period
+
+    step = 7 if granularity == "weekly" else 1
+    for day, role, action_type, count in rows:
+        # Bucket by day, or by 7-day windows starting at start_day
+        bucket = start_day + timedelta(days=(day - start_day).days // step * step)
+        actions_per_day_dict[bucket] += count
+        actions_by_role_dict[role] += count
+        actions_by_type_dict[action_type] += count
+
+    # Generate bucket labels for the period
     days_list = []
     actions_count_list = []
-    current = start_date
-    while current <= end_date:
-        day_str = current.strftime("%Y-%m-%d")
-        days_list.append(day_str)
-        actions_count_list.append(actions_per_day_dict[day_str])
-        current += timedelta(days=1)
+    current = start_day
+    while current <= end_day:
+        days_list.append(current.strftime("%Y-%m-%d"))
+        actions_count_list.append(actions_per_day_dict[current])
+        current += timedelta(days=step)
     
-    # Log action
+    return ActivityStatsResponse(
+        days=days_list,
+        actions_per_day=actions_count_list,
+        actions_by_role=dict(actions_by_role_dict),
+        actions_by_type=dict(actions_by_type_dict),
+        granularity=granularity,
+    )
+
+
+@router.get("/stats/activity/recent", response_model=RecentActivityResponse)
+def get_recent_activity(
+    hours: int = Query(24, ge=1, le=720, description="Number of hours to analyze"),
+    granularity: Literal["minute", "hour"] = Query("hour", description="Bucket size"),
+    current_user: models.User = Depends(auth_service.require_role("admin")),
+) -> RecentActivityResponse:
+    """
+    Activity for the last hours from the in-memory counters; no database reads.
+    Admin only. Minute buckets cover the last ACTIVITY_COUNTER_MINUTES minutes.
+    """
+    max_hours = activity_counters.max_minute_hours if granularity == "minute" else activity_counters.max_hours
+    if hours > max_hours:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"{granularity} granularity covers at most {max_hours} hours",
+        )
+
     log_action(
         user_id=current_user.user_id,
         role=current_user.role,
         action="view_stats",
-        details=f"Viewed activity stats for last {days} days",
-        db=db
+        details=f"Viewed recent activity for last {hours} hours"
     )
-    
-    return ActivityStatsResponse(
-        days=days_list,
-        actions_per_day=actions_count_list,
-        actions_by_role=dict(actions_by_role_dict),
-        actions_by_type=dict(actions_by_type_dict)
+
+    return RecentActivityResponse(granularity=granularity, **activity_counters.window(hours, granularity))
+
+
+@router.get("/stats/stream")
+async def stream_stats(
+    current_user: models.User = Depends(auth_service.require_role("admin")),
+    db: AsyncSession = Depends(get_async_db_session),
+) -> StreamingResponse:
+    """
+    Server-Sent Events stream of dashboard statistics. Admin only.
+    Sends a "snapshot" event, then "delta" events with today's activity increments
+    and changed consent totals, computed once per tick for all subscribers.
+    """
+    # The stream may stay open for hours; hand the auth lookup's connection back to the pool
+    await db.close()
+    try:
+        subscription, snapshot = await stats_broadcaster.subscribe()
+    except SubscriberLimitReached:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many statistics stream subscribers",
+            headers={"Retry-After": "30"},
+        )
+
+    log_action(
+        user_id=current_user.user_id,
+        role=current_user.role,
+        action="view_stats_stream",
+        details="Subscribed to dashboard statistics stream"
+    )
+
+    return StreamingResponse(
+        event_stream(stats_broadcaster, subscription, snapshot, settings.STATS_STREAM_HEARTBEAT_SECONDS),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get("/admin/stats/activity/consistency", response_model=ActivityConsistencyResponse)
+def check_activity_counters(
+    hours: int = Query(24, ge=1, le=720, description="Number of hours to compare"),
+    current_user: models.User = Depends(auth_service.require_role("admin")),
+    db: Session = Depends(get_session),
+) -> ActivityConsistencyResponse:
+    """
+    Compare the in-memory activity counters with the logs table over the last hours.
+    Admin only. Mismatches point at rows written outside log_action or lost on restart.
+    """
+    hours = min(hours, activity_counters.max_hours)
+    now = datetime.utcnow()
+    window_start = (now - timedelta(hours=hours - 1)).replace(minute=0, second=0, microsecond=0)
+
+    # Queued audit rows are already counted in memory; let them reach the table first
+    audit_writer.flush(timeout=2.0)
+    counters = activity_counters.totals_by_key(window_start, now)
+    rows = db.query(models.Log.role, models.Log.action, func.count()).filter(
+        and_(models.Log.timestamp >= window_start, models.Log.timestamp <= now)
+    ).group_by(models.Log.role, models.Log.action).all()
+
+    database = defaultdict(int)
+    for role, action, count in rows:
+        database[counter_key(role, action)] += count
+
+    mismatches = [
+        ActivityCountMismatch(
+            role=role,
+            action_type=action_type,
+            counters=counters.get((role, action_type), 0),
+            database=database.get((role, action_type), 0),
+        )
+        for role, action_type in sorted(set(counters) | set(database))
+        if counters.get((role, action_type), 0) != database.get((role, action_type), 0)
+    ]
+
+    log_action(
+        user_id=current_user.user_id,
+        role=current_user.role,
+        action="check_activity_counters",
+        details=f"Compared activity counters with logs for last {hours} hours, {len(mismatches)} mismatches"
+    )
+
+    return ActivityConsistencyResponse(
+        window_start=window_start,
+        counters_total=sum(counters.values()),
+        database_total=sum(database.values()),
+        consistent=not mismatches,
+        mismatches=mismatches,
     )
 
 
 @router.get("/admin/retention", response_model=RetentionSettingsResponse)
-async def get_retention_settings(
+def get_retention_settings(
+    request: Request,
     current_user: models.User = Depends(auth_service.require_role("admin")),
-    db: Session = Depends(get_db_session),
-) -> RetentionSettingsResponse:
+    db: Session = Depends(get_session),
+) -> Response:
     """
     Get current data retention settings and next purge info.
     Admin only.
     """
-    # Get retention settings from config or database
-    # For now, we'll use a simple approach with a settings table
-    # In production, this should be in a dedicated settings table
-    from app.core.config import settings
-    
-    # Default retention (could be stored in DB)
-    retention_days = 90  # Default
-    enabled = True
-    
-    # Calculate next purge date
-    next_purge_date = None
-    logs_to_delete = 0
-    
-    if enabled:
-        cutoff_date = datetime.utcnow() - timedelta(days=retention_days)
-        logs_to_delete = db.query(models.Log).filter(
-            models.Log.timestamp < cutoff_date
-        ).count()
-        
-        # Next purge would be scheduled (e.g., daily at midnight)
-        # For now, show when oldest log would be purged
-        oldest_log = db.query(models.Log).order_by(models.Log.timestamp.asc()).first()
-        if oldest_log and oldest_log.timestamp < cutoff_date:
-            next_purge_date = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=1)
-        elif oldest_log:
-            # When the oldest log will expire
-            next_purge_date = oldest_log.timestamp + timedelta(days=retention_days)
-    
+    return dashboard_cache.respond(request, current_user.role, lambda: _build_retention_settings(db))
+
+
+def _build_retention_settings(db: Session) -> RetentionSettingsResponse:
+    policy = retention_policy_cache.get(db)
+    next_purge_date, logs_to_delete = retention_preview(db, policy)
     return RetentionSettingsResponse(
-        retention_days=retention_days,
-        enabled=enabled,
+        retention_days=policy.retention_days,
+        enabled=policy.enabled,
         next_purge_date=next_purge_date,
         logs_to_delete=logs_to_delete
     )
 
 
 @router.post("/admin/retention", response_model=RetentionSettingsResponse)
-async def update_retention_settings(
+def update_retention_settings(
     payload: RetentionUpdate,
     current_user: models.User = Depends(auth_service.require_role("admin")),
-    db: Session = Depends(get_db_session),
+    db: Session = Depends(get_session),
 ) -> RetentionSettingsResponse:
     """
     Update data retention settings.
-    Admin only. This will trigger a cleanup job.
+    Admin only. Old logs are purged by a background job; poll
+    /admin/retention/jobs/{purge_job_id} for its progress.
     """
-    retention_days = payload.retention_days
-    enabled = payload.enabled
-    
-    # In production, store this in a settings table
-    # For now, we'll apply it immediately
-    
-    if enabled:
-        cutoff_date = datetime.utcnow() - timedelta(days=retention_days)
-        deleted_count = db.query(models.Log).filter(
-            models.Log.timestamp < cutoff_date
-        ).delete()
-        db.commit()
-        
-        log_action(
-            user_id=current_user.user_id,
-            role=current_user.role,
-            action="update_retention",
-            details=f"Updated retention to {retention_days} days, deleted {deleted_count} old logs",
-            db=db
-        )
-    else:
-        deleted_count = 0
-        log_action(
-            user_id=current_user.user_id,
-            role=current_user.role,
-            action="update_retention",
-            details=f"Disabled retention policy",
-            db=db
-        )
-    
-    # Calculate next purge
-    next_purge_date = None
-    logs_to_delete = 0
-    
-    if enabled:
-        cutoff_date = datetime.utcnow() - timedelta(days=retention_days)
-        logs_to_delete = db.query(models.Log).filter(
-            models.Log.timestamp < cutoff_date
-        ).count()
-        
-        oldest_log = db.query(models.Log).order_by(models.Log.timestamp.asc()).first()
-        if oldest_log:
-            next_purge_date = oldest_log.timestamp + timedelta(days=retention_days)
-    
+    policy = save_retention_policy(db, payload.retention_days, payload.enabled, current_user.user_id)
+    log_action(
+        user_id=current_user.user_id,
+        role=current_user.role,
+        action="update_retention",
+        details=(
+            f"Updated retention to {policy.retention_days} days"
+            if policy.enabled else "Disabled retention policy"
+        ),
+        db=db
+    )
+    # Policy and audit row commit together
+    db.commit()
+    retention_policy_cache.set(policy)
+    dashboard_cache.invalidate("get_retention_settings")
+
+    purge_job_id = None
+    if policy.enabled:
+        purge_job_id = retention_purges.start(policy.retention_days).job_id
+
+    next_purge_date, logs_to_delete = retention_preview(db, policy)
     return RetentionSettingsResponse(
-        retention_days=retention_days,
-        enabled=enabled,
+        retention_days=policy.retention_days,
+        enabled=policy.enabled,
         next_purge_date=next_purge_date,
-        logs_to_delete=logs_to_delete
+        logs_to_delete=logs_to_delete,
+        purge_job_id=purge_job_id,
     )
 
 
+@router.get("/admin/retention/jobs/{job_id}", response_model=RetentionJobResponse)
+def get_retention_job(
+    job_id: str,
+    current_user: models.User = Depends(auth_service.require_role("admin")),
+) -> RetentionJobResponse:
+    """
+    Progress of a background retention purge. Admin only.
+    """
+    job = retention_purges.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Retention job not found")
+    return RetentionJobResponse(**job.to_dict())
+
+
 @router.get("/admin/consent-stats", response_model=ConsentStatsResponse)
-async def get_consent_stats(
+def get_consent_stats(
+    request: Request,
     current_user: models.User = Depends(auth_service.require_role("admin")),
-    db: Session = Depends(get_db_session),
-) -> ConsentStatsResponse:
+    db: Session = Depends(get_session),
+) -> Response:
     """
     Get GDPR consent statistics.
     Shows percentage of users who have consented to data processing.
     Admin only.
     """
-    # Get total active users
-    total_users = db.query(models.User).filter(models.User.is_active == True).count()
-    
-    # Query users with GDPR consent
-    consented_users = db.query(models.User).filter(
-        and_(
-            models.User.is_active == True,
-            models.User.gdpr_consent == True
-        )
-    ).count()
-    
-    consent_percentage = (consented_users / total_users * 100) if total_users > 0 else 0.0
-    
-    log_action(
-        user_id=current_user.user_id,
-        role=current_user.role,
-        action="view_consent_stats",
-        details=f"Viewed consent statistics",
-        db=db
+    return dashboard_cache.respond(
+        request,
+        current_user.role,
+        lambda: _build_consent_stats(db),
+        audit=lambda: log_action(
+            user_id=current_user.user_id,
+            role=current_user.role,
+            action="view_consent_stats",
+            details="Viewed consent statistics"
+        ),
     )
+
+
+def _build_consent_stats(db: Session) -> ConsentStatsResponse:
+    # Maintained by triggers on users: one primary-key lookup however many users there are
+    total_users, consented_users = consent_totals(db)
     
     return ConsentStatsResponse(
         total_users=total_users,
         consented_users=consented_users,
-        consent_percentage=round(consent_percentage, 2),
+        consent_percentage=consent_percentage(total_users, consented_users),
         last_updated=datetime.utcnow()
     )
 
+
+@router.get("/admin/consent-stats/history", response_model=ConsentHistoryResponse)
+def get_consent_history(
+    request: Request,
+    days: int = Query(30, ge=1, le=365, description="Number of days to include"),
+    current_user: models.User = Depends(auth_service.require_role("admin")),
+    db: Session = Depends(get_session),
+) -> Response:
+    """
+    Daily consent rate over the last `days` days, read from consent_daily.
+    Admin only.
+    """
+    return dashboard_cache.respond(
+        request,
+        current_user.role,
+        lambda: _build_consent_history(db, days),
+        audit=lambda: log_action(
+            user_id=current_user.user_id,
+            role=current_user.role,
+            action="view_consent_stats",
+            details=f"Viewed consent history for {days} days"
+        ),
+    )
+
+
+def _build_consent_history(db: Session, days: int) -> ConsentHistoryResponse:
+    end = datetime.utcnow().date()
+    history = consent_history(db, end - timedelta(days=days), end)
+
+    return ConsentHistoryResponse(
+        days=[day.isoformat() for day, _, _ in history],
+        total_users=[total for _, total, _ in history],
+        consented_users=[consented for _, _, consented in history],
+        consent_percentage=[consent_percentage(total, consented) for _, total, consented in history],
+    )
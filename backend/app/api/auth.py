@@ -4,12 +4,14 @@ from typing import Any
 
 from fastapi import APIRouter, Depends, HTTPException, status
 from pydantic import BaseModel, Field, EmailStr, field_validator
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db.session import get_db_session
+from app.core.response_cache import dashboard_cache
+from app.db.session import get_async_db_session
 from app.db import models
 from app.services import auth_service, email_service
-from app.services.logging_service import log_action
+from app.services.logging_service import log_action_async
 from app.core.config import settings
 
 router = APIRouter()
@@ -80,15 +82,15 @@ class UserMeResponse(BaseModel):
 @router.post("/register", response_model=RegisterResponse, status_code=status.HTTP_201_CREATED)
 async def register(
     payload: RegisterRequest,
-    db: Session = Depends(get_db_session),
+    db: AsyncSession = Depends(get_async_db_session),
 ) -> RegisterResponse:
     """
     Register a new user with default role 'user'.
     """
     # Check if username already exists
-    existing_user = db.query(models.User).filter(
-        models.User.username == payload.username
-    ).first()
+    existing_user = await db.scalar(
+        select(models.User).where(models.User.username == payload.username)
+    )
     if existing_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -96,9 +98,9 @@ async def register(
         )
     
     # Check if email already exists
-    existing_email = db.query(models.User).filter(
-        models.User.email == payload.email
-    ).first()
+    existing_email = await db.scalar(
+        select(models.User).where(models.User.email == payload.email)
+    )
     if existing_email:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -116,17 +118,19 @@ async def register(
         created_at=datetime.utcnow()
     )
     db.add(user)
-    db.commit()
-    db.refresh(user)
+    await db.flush()
     
-    # Log registration
-    log_action(
+    # Log registration (committed together with the new user)
+    await log_action_async(
         user_id=user.user_id,
         role=user.role,
         action="register",
         details=f"User registered: {payload.username}",
         db=db
     )
+    await db.commit()
+    dashboard_cache.invalidate("get_consent_stats")
+    dashboard_cache.invalidate("get_consent_history")
     
     return RegisterResponse(
         message="User registered successfully",
@@ -138,25 +142,27 @@ async def register(
 @router.post("/login", response_model=LoginResponse, status_code=status.HTTP_200_OK)
 async def login(
     payload: LoginRequest,
-    db: Session = Depends(get_db_session),
+    db: AsyncSession = Depends(get_async_db_session),
 ) -> LoginResponse:
     """
     Login with username/email and password. Returns temp_token for MFA verification.
     """
     # Find user by username or email
-    user = db.query(models.User).filter(
-        (models.User.username == payload.username_or_email) |
-        (models.User.email == payload.username_or_email)
-    ).first()
+    user = await db.scalar(
+        select(models.User).where(
+            (models.User.username == payload.username_or_email) |
+            (models.User.email == payload.username_or_email)
+        )
+    )
     
     if not user:
-        # Log failed login attempt (no user_id)
-        log_action(
+        # Log failed login attempt (no user_id); out of band so it survives the 401
+        await log_action_async(
             user_id=None,
             role=None,
             action="login_failed",
             details=f"Failed login attempt for: {payload.username_or_email}",
-            db=db
+            out_of_band=True
         )
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -171,12 +177,12 @@ async def login(
     
     # Verify password
     if not auth_service.verify_password(payload.password, user.hashed_password):
-        log_action(
+        await log_action_async(
             user_id=user.user_id,
             role=user.role,
             action="login_failed",
             details="Invalid password",
-            db=db
+            out_of_band=True
         )
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -195,12 +201,12 @@ async def login(
         )
     
     # Log MFA send
-    log_action(
+    await log_action_async(
         user_id=user.user_id,
         role=user.role,
         action="mfa_send",
         details="MFA code sent to user email",
-        db=db
+        out_of_band=True
     )
     
     return LoginResponse(
@@ -213,7 +219,7 @@ async def login(
 @router.post("/mfa-verify", response_model=MFAVerifyResponse, status_code=status.HTTP_200_OK)
 async def mfa_verify(
     payload: MFAVerifyRequest,
-    db: Session = Depends(get_db_session),
+    db: AsyncSession = Depends(get_async_db_session),
 ) -> MFAVerifyResponse:
     """
     Verify MFA code and return JWT access token.
@@ -229,19 +235,19 @@ async def mfa_verify(
         expires_at = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
         
         # Log successful MFA verification and login
-        log_action(
+        await log_action_async(
             user_id=user.user_id,
             role=user.role,
             action="mfa_verify",
             details="MFA code verified successfully",
-            db=db
+            out_of_band=True
         )
-        log_action(
+        await log_action_async(
             user_id=user.user_id,
             role=user.role,
             action="login",
             details="User logged in successfully",
-            db=db
+            out_of_band=True
         )
         
         return MFAVerifyResponse(
@@ -264,17 +270,17 @@ async def mfa_verify(
 @router.post("/logout", response_model=LogoutResponse, status_code=status.HTTP_200_OK)
 async def logout(
     current_user: models.User = Depends(auth_service.get_current_user),
-    db: Session = Depends(get_db_session),
+    db: AsyncSession = Depends(get_async_db_session),
 ) -> LogoutResponse:
     """
     Logout user. Client should delete token from storage.
     """
-    log_action(
+    await log_action_async(
         user_id=current_user.user_id,
         role=current_user.role,
         action="logout",
         details="User logged out",
-        db=db
+        out_of_band=True
     )
     
     return LogoutResponse(message=f"User {current_user.username} logged out successfully")
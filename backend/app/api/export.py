@@ -4,18 +4,22 @@ from datetime import datetime
 from typing import Optional
 
 from fastapi import APIRouter, Depends, Query, HTTPException, Response, status
+from sqlalchemy import tuple_
 from sqlalchemy.orm import Session
 
-from app.db.session import get_db_session
+from app.api.logs import apply_log_filters
+from app.db.session import get_session
 from app.db import models
 from app.services import auth_service, anonymize_service
 from app.services.logging_service import log_action
 
 router = APIRouter()
 
+LOG_EXPORT_BATCH_SIZE = 1000
+
 
 @router.get("/", status_code=status.HTTP_200_OK)
-async def export_csv(
+def export_csv(
     type: str = Query(..., description="Export type: 'patients' or 'logs'"),
     raw: bool = Query(False, description="Export raw data (admin only, for patients)"),
     role: Optional[str] = Query(None, description="Filter logs by role"),
@@ -24,16 +28,16 @@ async def export_csv(
     date_from: Optional[str] = Query(None, description="Filter logs from date (YYYY-MM-DD)"),
     date_to: Optional[str] = Query(None, description="Filter logs to date (YYYY-MM-DD)"),
     current_user: models.User = Depends(auth_service.require_role("admin")),
-    db: Session = Depends(get_db_session),
+    db: Session = Depends(get_session),
 ) -> Response:
     """
     Export data to CSV. Admin only.
     Supports exporting patients or logs with filtering.
     """
     if type == "patients":
-        return await _export_patients_csv(raw, current_user, db)
+        return _export_patients_csv(raw, current_user, db)
     elif type == "logs":
-        return await _export_logs_csv(role, user_id, action, date_from, date_to, current_user, db)
+        return _export_logs_csv(role, user_id, action, date_from, date_to, current_user, db)
     else:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -41,7 +45,7 @@ async def export_csv(
         )
 
 
-async def _export_patients_csv(raw: bool, current_user: models.User, db: Session) -> Response:
+def _export_patients_csv(raw: bool, current_user: models.User, db: Session) -> Response:
     """Export patients to CSV."""
     patients = db.query(models.Patient).order_by(models.Patient.date_added.desc()).all()
     
@@ -51,16 +55,14 @@ async def _export_patients_csv(raw: bool, current_user: models.User, db: Session
     # Write header
     writer.writerow(["patient_id", "name", "contact", "diagnosis", "date_added"])
     
+    # Admin can see raw data: decrypt every name and contact in one parallel batch,
+    # bypassing the raw-view cache, which a full export would only flush
+    decrypted = anonymize_service.decrypt_patients(patients) if raw else None
+    
     # Write data
-    for patient in patients:
-        if raw:
-            # Admin can see raw data
-            try:
-                name = anonymize_service.decrypt_field(patient.anonymized_name) if patient.anonymized_name else patient.name
-                contact = anonymize_service.decrypt_field(patient.anonymized_contact) if patient.anonymized_contact else patient.contact
-            except Exception:
-                name = patient.name
-                contact = patient.contact
+    for index, patient in enumerate(patients):
+        if decrypted is not None:
+            name, contact = decrypted[index]
         else:
             # Anonymized data
             name = patient.anonymized_name or f"ANON_{patient.patient_id}"
@@ -79,8 +81,7 @@ async def _export_patients_csv(raw: bool, current_user: models.User, db: Session
         user_id=current_user.user_id,
         role=current_user.role,
         action="export_csv",
-        details=f"Exported {len(patients)} patients (raw={raw})",
-        db=db
+        details=f"Exported {len(patients)} patients (raw={raw})"
     )
     
     # Update last sync time
@@ -96,7 +97,7 @@ async def _export_patients_csv(raw: bool, current_user: models.User, db: Session
     return Response(content=csv_content, media_type="text/csv", headers=headers)
 
 
-async def _export_logs_csv(
+def _export_logs_csv(
     role: Optional[str],
     user_id: Optional[int],
     action: Optional[str],
@@ -106,36 +107,8 @@ async def _export_logs_csv(
     db: Session
 ) -> Response:
     """Export logs to CSV with filtering."""
-    query = db.query(models.Log)
-    
-    # Apply filters (same as logs endpoint)
-    if role:
-        query = query.filter(models.Log.role == role)
-    if user_id:
-        query = query.filter(models.Log.user_id == user_id)
-    if action:
-        query = query.filter(models.Log.action.ilike(f"%{action}%"))
-    if date_from:
-        try:
-            date_from_obj = datetime.strptime(date_from, "%Y-%m-%d")
-            query = query.filter(models.Log.timestamp >= date_from_obj)
-        except ValueError:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Invalid date_from format. Use YYYY-MM-DD"
-            )
-    if date_to:
-        try:
-            date_to_obj = datetime.strptime(date_to, "%Y-%m-%d")
-            date_to_obj = date_to_obj.replace(hour=23, minute=59, second=59)
-            query = query.filter(models.Log.timestamp <= date_to_obj)
-        except ValueError:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Invalid date_to format. Use YYYY-MM-DD"
-            )
-    
-    logs = query.order_by(models.Log.timestamp.desc()).all()
+    # Same filters as the logs endpoint
+    query = apply_log_filters(db.query(models.Log), role, user_id, action, date_from, date_to)
     
     output = io.StringIO()
     writer = csv.writer(output)
@@ -143,24 +116,40 @@ async def _export_logs_csv(
     # Write header
     writer.writerow(["log_id", "user_id", "role", "action", "timestamp", "details"])
     
-    # Write data
-    for log in logs:
-        writer.writerow([
-            log.log_id,
-            log.user_id or "",
-            log.role or "",
-            log.action,
-            log.timestamp.isoformat() if log.timestamp else "",
-            log.details or ""
-        ])
+    # Write data, newest first, in keyset batches: each statement reads at most
+    # LOG_EXPORT_BATCH_SIZE rows past the previous batch and nothing piles up in the session
+    exported = 0
+    cursor = None
+    while True:
+        batch_query = query
+        if cursor is not None:
+            batch_query = batch_query.filter(tuple_(models.Log.timestamp, models.Log.log_id) < cursor)
+        logs = (
+            batch_query.order_by(models.Log.timestamp.desc(), models.Log.log_id.desc())
+            .limit(LOG_EXPORT_BATCH_SIZE)
+            .all()
+        )
+        for log in logs:
+            writer.writerow([
+                log.log_id,
+                log.user_id or "",
+                log.role or "",
+                log.action,
+                log.timestamp.isoformat() if log.timestamp else "",
+                log.details or ""
+            ])
+        exported += len(logs)
+        if len(logs) < LOG_EXPORT_BATCH_SIZE:
+            break
+        cursor = tuple_(logs[-1].timestamp, logs[-1].log_id)
+        db.expunge_all()
     
     # Log action
     log_action(
         user_id=current_user.user_id,
         role=current_user.role,
         action="export_csv",
-        details=f"Exported {len(logs)} log entries",
-        db=db
+        details=f"Exported {exported} log entries"
     )
     
     # Update last sync time
@@ -1,12 +1,13 @@
 from datetime import datetime
 from fastapi import APIRouter, Depends, HTTPException, status
 from pydantic import BaseModel
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db.session import get_db_session
+from app.core.response_cache import dashboard_cache
+from app.db.session import get_async_db_session
 from app.db import models
 from app.services import auth_service
-from app.services.logging_service import log_action
+from app.services.logging_service import log_action_async
 
 router = APIRouter()
 
@@ -29,7 +30,7 @@ class ConsentAcceptResponse(BaseModel):
 @router.get("/consent/status", response_model=ConsentStatusResponse)
 async def get_consent_status(
     current_user: models.User = Depends(auth_service.get_current_user),
-    db: Session = Depends(get_db_session),
+    db: AsyncSession = Depends(get_async_db_session),
 ) -> ConsentStatusResponse:
     """
     Get current user's GDPR consent status.
@@ -45,7 +46,7 @@ async def get_consent_status(
 async def accept_consent(
     payload: ConsentAcceptRequest,
     current_user: models.User = Depends(auth_service.get_current_user),
-    db: Session = Depends(get_db_session),
+    db: AsyncSession = Depends(get_async_db_session),
 ) -> ConsentAcceptResponse:
     """
     Accept or withdraw GDPR consent.
@@ -57,15 +58,16 @@ async def accept_consent(
     else:
         current_user.gdpr_consent_date = None
     
-    db.commit()
-    
-    log_action(
+    await log_action_async(
         user_id=current_user.user_id,
         role=current_user.role,
         action="update_gdpr_consent",
         details=f"GDPR consent set to {payload.accepted}",
         db=db
     )
+    await db.commit()
+    dashboard_cache.invalidate("get_consent_stats")
+    dashboard_cache.invalidate("get_consent_history")
     
     return ConsentAcceptResponse(
         success=True,
@@ -88,7 +90,7 @@ class ConsentResponse(BaseModel):
 async def update_consent_legacy(
     payload: ConsentRequest,
     current_user: models.User = Depends(auth_service.get_current_user),
-    db: Session = Depends(get_db_session),
+    db: AsyncSession = Depends(get_async_db_session),
 ) -> ConsentResponse:
     """
     Legacy endpoint - use /api/consent/accept instead.
@@ -100,15 +102,16 @@ async def update_consent_legacy(
     else:
         current_user.gdpr_consent_date = None
     
-    db.commit()
-    
-    log_action(
+    await log_action_async(
         user_id=current_user.user_id,
         role=current_user.role,
         action="update_gdpr_consent",
         details=f"GDPR consent set to {payload.consent}",
         db=db
     )
+    await db.commit()
+    dashboard_cache.invalidate("get_consent_stats")
+    dashboard_cache.invalidate("get_consent_history")
     
     return ConsentResponse(
         success=True,
@@ -119,7 +122,7 @@ async def update_consent_legacy(
 @router.get("/gdpr/consent", response_model=ConsentResponse)
 async def get_consent_legacy(
     current_user: models.User = Depends(auth_service.get_current_user),
-    db: Session = Depends(get_db_session),
+    db: AsyncSession = Depends(get_async_db_session),
 ) -> ConsentResponse:
     """
     Legacy endpoint - use /api/consent/status instead.
@@ -1,15 +1,20 @@
 from datetime import datetime
 from typing import Optional
 
-from fastapi import APIRouter, Depends, Query, HTTPException, status
+from fastapi import APIRouter, Depends, Header, Query, HTTPException, status
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from sqlalchemy import and_, or_
 
-from app.db.session import get_db_session
+from app.core.config import settings
+from app.db.session import get_async_db_session, get_session
 from app.db import models
 from app.services import auth_service
+from app.services.log_tail import log_tail_notifier, tail_logs
 from app.services.logging_service import log_action
+from app.services.stats_stream import SubscriberLimitReached
 
 router = APIRouter()
 
@@ -33,30 +38,32 @@ class LogsResponse(BaseModel):
     page_size: int
 
 
-@router.get("/", response_model=LogsResponse)
-async def list_logs(
-    role: Optional[str] = Query(None, description="Filter by role"),
-    user_id: Optional[int] = Query(None, description="Filter by user_id"),
-    action: Optional[str] = Query(None, description="Filter by action"),
-    date_from: Optional[str] = Query(None, description="Filter from date (YYYY-MM-DD)"),
-    date_to: Optional[str] = Query(None, description="Filter to date (YYYY-MM-DD)"),
-    page: int = Query(1, ge=1, description="Page number"),
-    page_size: int = Query(50, ge=1, le=100, description="Items per page"),
-    current_user: models.User = Depends(auth_service.require_role("admin")),
-    db: Session = Depends(get_db_session),
-) -> LogsResponse:
+def apply_log_filters(
+    query,
+    role: Optional[str],
+    user_id: Optional[int],
+    action: Optional[str],
+    date_from: Optional[str],
+    date_to: Optional[str],
+    action_prefix: Optional[str] = None,
+):
     """
-    List audit logs with filtering and pagination. Admin only.
+    Apply the audit-log filters shared by the logs list and the CSV export.
+    role/user_id are equality filters so they can use the (role, timestamp)
+    and (user_id, timestamp) indexes together with ORDER BY timestamp.
+    action is a case-insensitive substring match and cannot use an index;
+    action_prefix matches actions starting with it, as a range on the
+    (action, timestamp) index.
     """
-    query = db.query(models.Log)
-    
-    # Apply filters
     if role:
         query = query.filter(models.Log.role == role)
     if user_id:
         query = query.filter(models.Log.user_id == user_id)
     if action:
         query = query.filter(models.Log.action.ilike(f"%{action}%"))
+    if action_prefix:
+        # U+10FFFF sorts after every character that can follow the prefix
+        query = query.filter(models.Log.action >= action_prefix, models.Log.action < action_prefix + "\U0010ffff")
     if date_from:
         try:
             date_from_obj = datetime.strptime(date_from, "%Y-%m-%d")
@@ -77,6 +84,26 @@ async def list_logs(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Invalid date_to format. Use YYYY-MM-DD"
             )
+    return query
+
+
+@router.get("/", response_model=LogsResponse)
+def list_logs(
+    role: Optional[str] = Query(None, description="Filter by role"),
+    user_id: Optional[int] = Query(None, description="Filter by user_id"),
+    action: Optional[str] = Query(None, description="Filter by action"),
+    action_prefix: Optional[str] = Query(None, description="Filter by action prefix (case-sensitive, indexed)"),
+    date_from: Optional[str] = Query(None, description="Filter from date (YYYY-MM-DD)"),
+    date_to: Optional[str] = Query(None, description="Filter to date (YYYY-MM-DD)"),
+    page: int = Query(1, ge=1, description="Page number"),
+    page_size: int = Query(50, ge=1, le=100, description="Items per page"),
+    current_user: models.User = Depends(auth_service.require_role("admin")),
+    db: Session = Depends(get_session),
+) -> LogsResponse:
+    """
+    List audit logs with filtering and pagination. Admin only.
+    """
+    query = apply_log_filters(db.query(models.Log), role, user_id, action, date_from, date_to, action_prefix)
     
     # Get total count
     total = query.count()
@@ -90,8 +117,7 @@ async def list_logs(
         user_id=current_user.user_id,
         role=current_user.role,
         action="view_logs",
-        details=f"Viewed logs page {page} (filters: role={role}, user_id={user_id}, action={action})",
-        db=db
+        details=f"Viewed logs page {page} (filters: role={role}, user_id={user_id}, action={action})"
     )
     
     return LogsResponse(
@@ -100,3 +126,52 @@ async def list_logs(
         page=page,
         page_size=page_size
     )
+
+
+@router.get("/tail")
+async def tail_logs_stream(
+    after_id: Optional[int] = Query(None, ge=0, description="Stream rows after this log_id (default: only new rows)"),
+    role: Optional[str] = Query(None, description="Filter by role"),
+    user_id: Optional[int] = Query(None, description="Filter by user_id"),
+    action: Optional[str] = Query(None, description="Filter by action"),
+    last_event_id: Optional[int] = Header(None, description="Resume point sent by reconnecting SSE clients"),
+    current_user: models.User = Depends(auth_service.require_role("admin")),
+    db: AsyncSession = Depends(get_async_db_session),
+) -> StreamingResponse:
+    """
+    Server-Sent Events tail of the audit log. Admin only.
+    Sends a "log" event (id: log_id) for every committed row after after_id that
+    matches the same role/user_id/action filters as the logs list.
+    """
+    # The stream may stay open for hours; hand the auth lookup's connection back to the pool
+    await db.close()
+    try:
+        wakeup = log_tail_notifier.register()
+    except SubscriberLimitReached:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many audit log tail subscribers",
+            headers={"Retry-After": "30"},
+        )
+
+    log_action(
+        user_id=current_user.user_id,
+        role=current_user.role,
+        action="tail_logs",
+        details=f"Started audit log tail (filters: role={role}, user_id={user_id}, action={action})"
+    )
+
+    return StreamingResponse(
+        tail_logs(
+            log_tail_notifier,
+            wakeup,
+            after_id if after_id is not None else last_event_id,
+            lambda statement: apply_log_filters(statement, role, user_id, action, None, None),
+            lambda entry: LogEntry.model_validate(entry).model_dump(mode="json"),
+            heartbeat_seconds=settings.STATS_STREAM_HEARTBEAT_SECONDS,
+            poll_seconds=settings.LOG_TAIL_POLL_SECONDS,
+            batch_size=settings.LOG_TAIL_BATCH_SIZE,
+        ),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
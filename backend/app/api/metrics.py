@@ -0,0 +1,106 @@
+from fastapi import APIRouter, Depends
+
+from app.core.request_metrics import get_request_metrics
+from app.core.response_cache import dashboard_cache
+from app.db import models
+from app.db.instrumentation import get_route_query_metrics
+from app.db.session import get_pool_metrics
+from app.services import auth_service
+from app.services.audit_writer import audit_writer
+from app.services.decrypt_cache import decrypt_cache
+from app.services.job_scheduler import job_scheduler
+from app.services.log_tail import log_tail_notifier
+from app.services.stats_stream import stats_broadcaster
+
+router = APIRouter()
+
+
+@router.get("/db-pools")
+async def get_db_pool_metrics(
+    current_user: models.User = Depends(auth_service.require_role("admin")),
+) -> dict[str, dict[str, int]]:
+    """
+    Connection pool counters per pool (write, read, async). Admin only.
+    """
+    return get_pool_metrics()
+
+
+@router.get("/queries")
+async def get_query_metrics(
+    current_user: models.User = Depends(auth_service.require_role("admin")),
+) -> dict[str, dict[str, float]]:
+    """
+    SQL statement count, DB time and rows per route, aggregated since startup. Admin only.
+    """
+    return get_route_query_metrics()
+
+
+@router.get("/audit-writer")
+async def get_audit_writer_metrics(
+    current_user: models.User = Depends(auth_service.require_role("admin")),
+) -> dict:
+    """
+    Audit writer queue depth, flush latency and write/drop counters. Admin only.
+    """
+    return audit_writer.get_metrics()
+
+
+@router.get("/http")
+async def get_http_metrics(
+    current_user: models.User = Depends(auth_service.require_role("admin")),
+) -> dict:
+    """
+    Latency histograms, request/response bytes and status counts per route,
+    plus requests in flight. Admin only.
+    """
+    return get_request_metrics()
+
+
+@router.get("/response-cache")
+async def get_response_cache_metrics(
+    current_user: models.User = Depends(auth_service.require_role("admin")),
+) -> dict:
+    """
+    Dashboard response cache hits, 304s, misses and evictions. Admin only.
+    """
+    return dashboard_cache.get_metrics()
+
+
+@router.get("/decrypt-cache")
+async def get_decrypt_cache_metrics(
+    current_user: models.User = Depends(auth_service.require_role("admin")),
+) -> dict:
+    """
+    Decrypted patient field cache hits, misses, evictions and size. Admin only.
+    """
+    return decrypt_cache.get_metrics()
+
+
+@router.get("/stats-stream")
+async def get_stats_stream_metrics(
+    current_user: models.User = Depends(auth_service.require_role("admin")),
+) -> dict:
+    """
+    Statistics stream subscribers, snapshots computed, deltas sent and slow-client resyncs. Admin only.
+    """
+    return stats_broadcaster.get_metrics()
+
+
+@router.get("/log-tail")
+async def get_log_tail_metrics(
+    current_user: models.User = Depends(auth_service.require_role("admin")),
+) -> dict:
+    """
+    Audit log tail subscribers, commit notifications and rejected connections. Admin only.
+    """
+    return log_tail_notifier.get_metrics()
+
+
+@router.get("/scheduler")
+async def get_scheduler_metrics(
+    current_user: models.User = Depends(auth_service.require_role("admin")),
+) -> dict:
+    """
+    Scheduled jobs with their next run, run/failure/skip counts and durations. Admin only.
+    """
+    return job_scheduler.get_metrics()
@@ -1,17 +1,27 @@
+import asyncio
+import base64
+import io
+import tempfile
+import threading
 from datetime import datetime
-from typing import Optional
+from typing import Iterator, Optional, Union
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
+from sqlalchemy import select, tuple_
 from sqlalchemy.orm import Session
 
-from app.db.session import get_db_session
+from app.core.config import settings
+from app.db.session import ReadSessionLocal, get_session
 from app.db import models
-from app.services import anonymize_service, auth_service
+from app.services import anonymize_service, auth_service, import_service
 from app.services.logging_service import log_action
 
 router = APIRouter()
 
+PATIENT_PAGE_SIZE = 50
+
 
 class PatientBase(BaseModel):
     name: str = Field(..., min_length=1, max_length=255)
@@ -30,6 +40,13 @@ class PatientOut(BaseModel):
         from_attributes = True
 
 
+class PatientPage(BaseModel):
+    patients: list[PatientOut]
+    next_cursor: Optional[str] = None
+    limit: int
+    total: Optional[int] = None
+
+
 class PatientCreate(PatientBase):
     pass
 
@@ -40,27 +57,186 @@ class PatientUpdate(BaseModel):
     diagnosis: Optional[str] = None
 
 
+class PatientImportError(BaseModel):
+    line: int
+    error: str
+
+
+class PatientImportResult(BaseModel):
+    imported: int
+    rejected: int
+    errors: list[PatientImportError]
+    errors_truncated: bool = False
+
+
 class AnonymizeRequest(BaseModel):
     patient_id: Optional[int] = None  # None means anonymize all
+    background: bool = False  # anonymize all: return at once and report through /anonymize/status
 
 
 class AnonymizeResponse(BaseModel):
     message: str
     anonymized_count: int
+    run_id: Optional[int] = None
+
+
+class AnonymizeStatus(BaseModel):
+    run_id: int
+    status: str
+    processed: int
+    total: Optional[int] = None
+    percent: float
+    rows_per_second: Optional[float] = None
+    eta_seconds: Optional[float] = None
+    last_patient_id: int
+    started_at: datetime
+    updated_at: datetime
+    finished_at: Optional[datetime] = None
+    error: Optional[str] = None
+
+
+def encode_patient_cursor(patient: models.Patient) -> str:
+    """Opaque keyset cursor: the (date_added, patient_id) of the last row on a page."""
+    raw = f"{patient.date_added.isoformat()}|{patient.patient_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_patient_cursor(cursor: str) -> tuple[datetime, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        date_text, id_text = raw.split("|")
+        return datetime.fromisoformat(date_text), int(id_text)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
 
 
-@router.get("/", response_model=list[PatientOut])
-async def list_patients(
+def apply_patient_cursor(query, cursor: Optional[str]):
+    """Rows strictly after the cursor in (date_added, patient_id) DESC order."""
+    if not cursor:
+        return query
+    cursor_date, cursor_id = decode_patient_cursor(cursor)
+    return query.filter(
+        tuple_(models.Patient.date_added, models.Patient.patient_id) < tuple_(cursor_date, cursor_id)
+    )
+
+
+def stream_patients(
+    statement,
+    role: str,
+    raw: bool,
+    ndjson: bool,
+    user_id: int,
+    batch_size: Optional[int] = None,
+) -> Iterator[bytes]:
+    """
+    Encode the patients selected by statement as they are read, batch_size rows
+    at a time: NDJSON lines, or the chunks of one JSON array. Only one batch is
+    in memory at once, whatever the number of patients.
+
+    The request's session is closed before a streamed body is sent, so this
+    opens its own read session for the lifetime of the stream.
+    """
+    batch_size = batch_size or settings.PATIENT_STREAM_BATCH_SIZE
+    streamed = 0
+    try:
+        if not ndjson:
+            yield b"["
+        with ReadSessionLocal() as db:
+            # Plain rows rather than ORM entities: nothing accumulates in the identity map
+            result = db.execute(statement.execution_options(yield_per=batch_size))
+            for rows in result.partitions():
+                encoded = [
+                    PatientOut(**data).model_dump_json()
+                    # The decrypt cache is for patients admins reopen, not for a full scan
+                    for data in anonymize_service.get_anonymized_patients_data(rows, role, raw, use_cache=False)
+                    if data
+                ]
+                if ndjson:
+                    chunk = "".join(f"{line}\n" for line in encoded)
+                else:
+                    chunk = ("," if streamed else "") + ",".join(encoded)
+                streamed += len(encoded)
+                yield chunk.encode()
+        if not ndjson:
+            yield b"]"
+    finally:
+        # Also runs when the client disconnects mid-stream
+        log_action(
+            user_id=user_id,
+            role=role,
+            action="view_patients",
+            details=f"Streamed {streamed} patients (raw={raw})"
+        )
+
+
+def apply_patient_filters(
+    query,
+    date_from: Optional[str],
+    date_to: Optional[str],
+    diagnosis: Optional[str],
+):
+    """
+    Apply the patient list filters. The date range narrows the date_added index
+    range; diagnosis is a substring match checked on the rows the index walk
+    visits, so it stops as soon as a page is full.
+    """
+    if date_from:
+        try:
+            query = query.filter(models.Patient.date_added >= datetime.strptime(date_from, "%Y-%m-%d"))
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid date_from format. Use YYYY-MM-DD"
+            )
+    if date_to:
+        try:
+            # Include entire day
+            date_to_obj = datetime.strptime(date_to, "%Y-%m-%d").replace(hour=23, minute=59, second=59, microsecond=999999)
+            query = query.filter(models.Patient.date_added <= date_to_obj)
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid date_to format. Use YYYY-MM-DD"
+            )
+    if diagnosis:
+        query = query.filter(models.Patient.diagnosis.ilike(f"%{diagnosis}%"))
+    return query
+
+
+@router.get("/", response_model=Union[PatientPage, list[PatientOut]])
+def list_patients(
     raw: bool = Query(False, description="Return raw data (admin only)"),
+    limit: Optional[int] = Query(None, ge=1, le=200, description="Patients per page (default 50)"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    date_from: Optional[str] = Query(None, description="Added on or after (YYYY-MM-DD)"),
+    date_to: Optional[str] = Query(None, description="Added on or before (YYYY-MM-DD)"),
+    diagnosis: Optional[str] = Query(None, description="Diagnosis contains"),
+    include_total: bool = Query(False, description="Also count all matching patients"),
+    stream: bool = Query(False, description="Stream every matching patient as one JSON array"),
+    accept: Optional[str] = Header(None),
     current_user: models.User = Depends(auth_service.get_current_user),
-    db: Session = Depends(get_db_session),
-) -> list[PatientOut]:
+    db: Session = Depends(get_session),
+) -> Union[PatientPage, StreamingResponse]:
     """
-    List patients with role-based data filtering.
+    List patients newest first, one page at a time, with role-based data filtering.
     - Admin: can see raw or anonymized data based on ?raw=true
     - Doctor: sees anonymized data only
     - Receptionist: sees non-sensitive fields only
     - User: no access
+
+    Passing limit, cursor or include_total returns a PatientPage, keyset-
+    paginated on (date_added, patient_id): pass next_cursor back as ?cursor=
+    for the following page. The count behind `total` touches every matching
+    row, so it is only run when include_total=true.
+
+    Without any of them the response keeps the original shape, a bare list of
+    every matching patient, streamed as one JSON array like ?stream=true.
+    With Accept: application/x-ndjson (one patient per line) or ?stream=true,
+    every patient after the cursor that matches the filters is streamed as it
+    is read; limit and include_total do not apply.
     """
     # Check access
     if current_user.role not in ["admin", "doctor", "receptionist"]:
@@ -76,33 +252,148 @@ async def list_patients(
             detail="Only admin can request raw data"
         )
     
-    patients = db.query(models.Patient).order_by(models.Patient.date_added.desc()).all()
+    ndjson = "application/x-ndjson" in (accept or "")
+    paged = limit is not None or cursor is not None or include_total
+    if ndjson or stream or not paged:
+        statement = select(
+            models.Patient.patient_id,
+            models.Patient.name,
+            models.Patient.contact,
+            models.Patient.diagnosis,
+            models.Patient.anonymized_name,
+            models.Patient.anonymized_contact,
+            models.Patient.date_added,
+        )
+        statement = apply_patient_cursor(apply_patient_filters(statement, date_from, date_to, diagnosis), cursor)
+        statement = statement.order_by(models.Patient.date_added.desc(), models.Patient.patient_id.desc())
+        # Hand the auth lookup's connection back before a potentially long stream
+        db.close()
+        return StreamingResponse(
+            stream_patients(statement, current_user.role, raw, ndjson, current_user.user_id),
+            media_type="application/x-ndjson" if ndjson else "application/json",
+        )
+
+    limit = limit or PATIENT_PAGE_SIZE
+    query = apply_patient_filters(db.query(models.Patient), date_from, date_to, diagnosis)
+    total = query.count() if include_total else None
+
+    query = apply_patient_cursor(query, cursor)
+    # One extra row tells us whether there is a next page
+    patients = (
+        query.order_by(models.Patient.date_added.desc(), models.Patient.patient_id.desc())
+        .limit(limit + 1)
+        .all()
+    )
+    has_more = len(patients) > limit
+    patients = patients[:limit]
     
     # Transform based on role
-    result = []
-    for patient in patients:
-        data = anonymize_service.get_anonymized_patient_data(patient, current_user.role, raw)
-        if data:  # Only include if user has access
-            result.append(PatientOut(**data))
+    result = [
+        PatientOut(**data)
+        for data in anonymize_service.get_anonymized_patients_data(patients, current_user.role, raw)
+        if data  # Only include if user has access
+    ]
     
     # Log view action (aggregated to avoid DOS)
     log_action(
         user_id=current_user.user_id,
         role=current_user.role,
         action="view_patients",
-        details=f"Viewed {len(result)} patients (raw={raw})",
-        db=db
+        details=f"Viewed {len(result)} patients (raw={raw})"
+    )
+    
+    return PatientPage(
+        patients=result,
+        next_cursor=encode_patient_cursor(patients[-1]) if has_more else None,
+        limit=limit,
+        total=total,
+    )
+
+
+@router.get("/search", response_model=list[PatientOut])
+def search_patients(
+    name: Optional[str] = Query(None, max_length=255, description="Name, or the beginnings of its words"),
+    contact: Optional[str] = Query(None, max_length=255, description="Exact phone number or email"),
+    exact: bool = Query(False, description="Match the whole name instead of word prefixes"),
+    raw: bool = Query(False, description="Return raw data (admin only)"),
+    limit: int = Query(20, ge=1, le=100),
+    current_user: models.User = Depends(auth_service.get_current_user),
+    db: Session = Depends(get_session),
+) -> list[PatientOut]:
+    """
+    Find patients by name and/or contact, newest first, through the keyed
+    blind index: the search terms are normalized and HMAC'd exactly as
+    mask_patient indexes a patient, so each term is one index lookup and no
+    plaintext is stored or decrypted to match.
+
+    Every word of `name` must begin a word of the patient's name; words are
+    matched on at most BLIND_INDEX_MAX_PREFIX characters, and words shorter
+    than BLIND_INDEX_MIN_PREFIX only match whole words. Patients not yet
+    reached by the blind-index backfill are not found.
+    """
+    if current_user.role not in ["admin", "doctor", "receptionist"]:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Access denied. Insufficient permissions."
+        )
+    
+    if raw and current_user.role != "admin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only admin can request raw data"
+        )
+    
+    normalized_name = anonymize_service.normalize_name(name)
+    normalized_contact = anonymize_service.normalize_contact(contact)
+    if not normalized_name and not normalized_contact:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Provide a name or contact to search for"
+        )
+    
+    query = db.query(models.Patient)
+    if normalized_name and exact:
+        query = query.filter(models.Patient.name_bidx == anonymize_service.blind_index("name", normalized_name))
+    elif normalized_name:
+        for word in set(normalized_name.split()):
+            token = anonymize_service.blind_index("name-prefix", word[:settings.BLIND_INDEX_MAX_PREFIX])
+            query = query.filter(models.Patient.patient_id.in_(
+                select(models.PatientNameToken.patient_id).where(models.PatientNameToken.token == token)
+            ))
+    if normalized_contact:
+        query = query.filter(
+            models.Patient.contact_bidx == anonymize_service.blind_index("contact", normalized_contact)
+        )
+    patients = (
+        query.order_by(models.Patient.date_added.desc(), models.Patient.patient_id.desc())
+        .limit(limit)
+        .all()
+    )
+    
+    result = [
+        PatientOut(**data)
+        for data in anonymize_service.get_anonymized_patients_data(patients, current_user.role, raw)
+        if data
+    ]
+    
+    # The search terms are patient data, so only the fields searched are logged
+    fields = " and ".join(field for field, value in (("name", normalized_name), ("contact", normalized_contact)) if value)
+    log_action(
+        user_id=current_user.user_id,
+        role=current_user.role,
+        action="search_patients",
+        details=f"Searched patients by {fields}: {len(result)} results (raw={raw})"
     )
     
     return result
 
 
 @router.get("/{patient_id}", response_model=PatientOut)
-async def get_patient(
+def get_patient(
     patient_id: int,
     raw: bool = Query(False, description="Return raw data (admin only)"),
     current_user: models.User = Depends(auth_service.get_current_user),
-    db: Session = Depends(get_db_session),
+    db: Session = Depends(get_session),
 ) -> PatientOut:
     """
     Get a single patient by ID with role-based data filtering.
@@ -137,18 +428,17 @@ async def get_patient(
         user_id=current_user.user_id,
         role=current_user.role,
         action="view_patient",
-        details=f"Viewed patient {patient_id}",
-        db=db
+        details=f"Viewed patient {patient_id}"
     )
     
     return PatientOut(**data)
 
 
 @router.post("/", response_model=PatientOut, status_code=status.HTTP_201_CREATED)
-async def create_patient(
+def create_patient(
     payload: PatientCreate,
     current_user: models.User = Depends(auth_service.require_role("admin", "receptionist")),
-    db: Session = Depends(get_db_session),
+    db: Session = Depends(get_session),
 ) -> PatientOut:
     """
     Create a new patient. Only admin and receptionist can create patients.
@@ -168,15 +458,12 @@ async def create_patient(
         date_added=datetime.utcnow()
     )
     db.add(patient)
-    db.commit()
-    db.refresh(patient)
+    db.flush()
     
-    # Anonymize immediately
+    # Anonymize immediately (masking fallbacks need the new patient_id)
     anonymize_service.mask_patient(patient)
-    db.commit()
-    db.refresh(patient)
     
-    # Log action
+    # Log action (committed together with the patient)
     log_action(
         user_id=current_user.user_id,
         role=current_user.role,
@@ -184,18 +471,80 @@ async def create_patient(
         details=f"Added patient {patient.patient_id}",
         db=db
     )
+    db.commit()
+    db.refresh(patient)
     
     # Return based on role
     data = anonymize_service.get_anonymized_patient_data(patient, current_user.role, raw=False)
     return PatientOut(**data)
 
 
+@router.post("/import", response_model=PatientImportResult)
+async def import_patients(
+    request: Request,
+    current_user: models.User = Depends(auth_service.require_role("admin", "receptionist")),
+) -> PatientImportResult:
+    """
+    Bulk-create patients from the request body: CSV (Content-Type: text/csv,
+    header row with name and optional contact, diagnosis columns) or NDJSON
+    (application/x-ndjson, one {"name", "contact", "diagnosis"} object per
+    line). Only admin and receptionist can import.
+
+    Valid rows are imported and invalid ones reported by line number; one
+    audit entry summarizes the import.
+    """
+    source_format = import_service.IMPORT_FORMATS.get(
+        (request.headers.get("content-type") or "").split(";")[0].strip().lower()
+    )
+    if source_format is None:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="Send text/csv or application/x-ndjson"
+        )
+    
+    # Spool the upload (to disk past 1 MiB) so rows are parsed as a stream, not one big string
+    with tempfile.SpooledTemporaryFile(max_size=1048576) as spool:
+        size = 0
+        async for chunk in request.stream():
+            size += len(chunk)
+            if size > settings.PATIENT_IMPORT_MAX_BYTES:
+                raise HTTPException(
+                    status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                    detail=f"Import is larger than {settings.PATIENT_IMPORT_MAX_BYTES} bytes"
+                )
+            spool.write(chunk)
+        spool.seek(0)
+        
+        text = io.TextIOWrapper(spool, encoding="utf-8-sig", newline="")
+        result: dict = {"imported": 0, "rejected": 0}
+        try:
+            rows = (import_service.read_csv_rows if source_format == "csv" else import_service.read_ndjson_rows)(text)
+            await asyncio.to_thread(import_service.import_patients, rows, result)
+        except ValueError as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Import stopped after {result['imported']} patients: {e}"
+            )
+        finally:
+            text.detach()
+            # Also records the batches committed before a failure
+            log_action(
+                user_id=current_user.user_id,
+                role=current_user.role,
+                action="import_patients",
+                details=f"Imported {result['imported']} patients from {source_format} "
+                f"({result['rejected']} rows rejected)"
+            )
+    
+    return PatientImportResult(**result)
+
+
 @router.put("/{patient_id}", response_model=PatientOut)
-async def update_patient(
+def update_patient(
     patient_id: int,
     payload: PatientUpdate,
     current_user: models.User = Depends(auth_service.require_role("admin", "receptionist")),
-    db: Session = Depends(get_db_session),
+    db: Session = Depends(get_session),
 ) -> PatientOut:
     """
     Update a patient. Only admin and receptionist can update patients.
@@ -219,9 +568,6 @@ async def update_patient(
     if payload.name is not None or payload.contact is not None:
         anonymize_service.mask_patient(patient)
     
-    db.commit()
-    db.refresh(patient)
-    
     # Log action
     log_action(
         user_id=current_user.user_id,
@@ -230,22 +576,44 @@ async def update_patient(
         details=f"Updated patient {patient_id}",
         db=db
     )
+    db.commit()
+    db.refresh(patient)
     
     # Return based on role
     data = anonymize_service.get_anonymized_patient_data(patient, current_user.role, raw=False)
     return PatientOut(**data)
 
 
+def run_anonymize_and_log(run_id: int, user_id: int, role: str) -> int:
+    """Run a claimed anonymize-all run and write its audit entry, whether it completes or fails."""
+    try:
+        return anonymize_service.run_anonymize_all(run_id)
+    finally:
+        # A failed run keeps its checkpoint (status "failed", error) and the next request resumes it
+        run = anonymize_service.get_anonymize_status(run_id)
+        log_action(
+            user_id=user_id,
+            role=role,
+            action="anonymize",
+            details=f"Anonymization run {run_id} {run['status']}: "
+            f"{run['processed']} of {run['total']} patient(s) anonymized"
+        )
+
+
 @router.post("/anonymize", response_model=AnonymizeResponse)
-async def anonymize_patients(
+def anonymize_patients(
     payload: AnonymizeRequest,
+    response: Response,
     current_user: models.User = Depends(auth_service.require_role("admin")),
-    db: Session = Depends(get_db_session),
+    db: Session = Depends(get_session),
 ) -> AnonymizeResponse:
     """
     Anonymize patient data. Admin only.
     If patient_id is provided, anonymize that patient only.
-    If patient_id is None, anonymize all patients.
+    If patient_id is None, anonymize all pending patients in checkpointed
+    chunks, resuming the previous run if it failed or its worker died; with
+    background=true this returns 202 at once and progress is read from
+    GET /api/patients/anonymize/status. 409 while another run is in progress.
     """
     if payload.patient_id:
         # Anonymize single patient
@@ -256,22 +624,62 @@ async def anonymize_patients(
                 detail="Patient not found"
             )
         anonymize_service.mask_patient(patient)
+        
+        # Log action
+        log_action(
+            user_id=current_user.user_id,
+            role=current_user.role,
+            action="anonymize",
+            details=f"Anonymized 1 patient(s) (patient_id={payload.patient_id})",
+            db=db
+        )
         db.commit()
-        count = 1
-    else:
-        # Anonymize all patients
-        count = anonymize_service.anonymize_all_patients(db)
+        return AnonymizeResponse(message="Successfully anonymized 1 patient(s)", anonymized_count=1)
     
-    # Log action
-    log_action(
-        user_id=current_user.user_id,
-        role=current_user.role,
-        action="anonymize",
-        details=f"Anonymized {count} patient(s)" + (f" (patient_id={payload.patient_id})" if payload.patient_id else ""),
-        db=db
-    )
+    # The run commits chunk by chunk on its own sessions
+    db.close()
+    try:
+        run_id = anonymize_service.claim_anonymize_run(current_user.user_id)
+    except anonymize_service.AnonymizeRunActive as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(e)
+        )
+    
+    if payload.background:
+        threading.Thread(
+            target=run_anonymize_and_log,
+            args=(run_id, current_user.user_id, current_user.role),
+            name=f"anonymize-run-{run_id}",
+            daemon=True,  # an interrupted run is resumed from its checkpoint
+        ).start()
+        response.status_code = status.HTTP_202_ACCEPTED
+        return AnonymizeResponse(
+            message=f"Anonymization run {run_id} started",
+            anonymized_count=0,
+            run_id=run_id
+        )
     
+    count = run_anonymize_and_log(run_id, current_user.user_id, current_user.role)
     return AnonymizeResponse(
         message=f"Successfully anonymized {count} patient(s)",
-        anonymized_count=count
+        anonymized_count=count,
+        run_id=run_id
     )
+
+
+@router.get("/anonymize/status", response_model=AnonymizeStatus)
+def anonymize_status(
+    current_user: models.User = Depends(auth_service.require_role("admin")),
+) -> AnonymizeStatus:
+    """
+    Progress of the latest anonymize-all run: patients processed of total,
+    throughput (rows/s over the current attempt) and an ETA while running.
+    """
+    run = anonymize_service.get_anonymize_status()
+    if run is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No anonymization run yet"
+        )
+    return AnonymizeStatus(**run)
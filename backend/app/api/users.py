@@ -3,7 +3,8 @@ from pydantic import BaseModel
 from sqlalchemy.orm import Session
 from typing import Optional
 
-from app.db.session import get_db_session
+from app.core.response_cache import dashboard_cache
+from app.db.session import get_session
 from app.db import models
 from app.services import auth_service
 from app.services.logging_service import log_action
@@ -27,10 +28,10 @@ class UserRoleUpdate(BaseModel):
 
 
 @router.get("/", response_model=list[UserOut], status_code=status.HTTP_200_OK)
-async def list_users(
+def list_users(
     search: Optional[str] = Query(None, description="Search by username or email"),
     current_user: models.User = Depends(auth_service.require_role("admin")),
-    db: Session = Depends(get_db_session),
+    db: Session = Depends(get_session),
 ) -> list[UserOut]:
     """
     List all users. Admin only.
@@ -52,19 +53,18 @@ async def list_users(
         user_id=current_user.user_id,
         role=current_user.role,
         action="view_users",
-        details=f"Listed {len(users)} users" + (f" (search: {search})" if search else ""),
-        db=db
+        details=f"Listed {len(users)} users" + (f" (search: {search})" if search else "")
     )
     
     return [UserOut.model_validate(user) for user in users]
 
 
 @router.put("/{user_id}/role", response_model=UserOut, status_code=status.HTTP_200_OK)
-async def update_user_role(
+def update_user_role(
     user_id: int,
     payload: UserRoleUpdate,
     current_user: models.User = Depends(auth_service.require_role("admin")),
-    db: Session = Depends(get_db_session),
+    db: Session = Depends(get_session),
 ) -> UserOut:
     """
     Update user role. Admin only.
@@ -95,10 +95,7 @@ async def update_user_role(
     
     old_role = user.role
     user.role = payload.role
-    db.commit()
-    db.refresh(user)
-    
-    # Log action
+    # Log action (committed together with the change)
     log_action(
         user_id=current_user.user_id,
         role=current_user.role,
@@ -106,15 +103,17 @@ async def update_user_role(
         details=f"Changed user {user_id} role from {old_role} to {payload.role}",
         db=db
     )
+    db.commit()
+    db.refresh(user)
     
     return UserOut.model_validate(user)
 
 
 @router.put("/{user_id}/activate", response_model=UserOut, status_code=status.HTTP_200_OK)
-async def toggle_user_active(
+def toggle_user_active(
     user_id: int,
     current_user: models.User = Depends(auth_service.require_role("admin")),
-    db: Session = Depends(get_db_session),
+    db: Session = Depends(get_session),
 ) -> UserOut:
     """
     Toggle user active status. Admin only.
@@ -133,10 +132,7 @@ async def toggle_user_active(
         )
     
     user.is_active = not user.is_active
-    db.commit()
-    db.refresh(user)
-    
-    # Log action
+    # Log action (committed together with the change)
     log_action(
         user_id=current_user.user_id,
         role=current_user.role,
@@ -144,5 +140,9 @@ async def toggle_user_active(
         details=f"Set user {user_id} active status to {user.is_active}",
         db=db
     )
+    db.commit()
+    dashboard_cache.invalidate("get_consent_stats")
+    dashboard_cache.invalidate("get_consent_history")
+    db.refresh(user)
     
     return UserOut.model_validate(user)
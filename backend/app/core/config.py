@@ -30,6 +30,102 @@ class Settings(BaseSettings):
     MFA_CODE_EXPIRE_MINUTES: int = Field(5, env="MFA_CODE_EXPIRE_MINUTES")
     MFA_CODE_LENGTH: int = 6
     
+    # SQLite connection profile (applied as PRAGMAs on every new connection)
+    SQLITE_JOURNAL_MODE: str = Field("WAL", env="SQLITE_JOURNAL_MODE")
+    SQLITE_SYNCHRONOUS: str = Field("NORMAL", env="SQLITE_SYNCHRONOUS")
+    SQLITE_MMAP_SIZE: int = Field(268435456, env="SQLITE_MMAP_SIZE")  # 256 MiB
+    SQLITE_CACHE_SIZE: int = Field(-65536, env="SQLITE_CACHE_SIZE")  # negative = KiB, i.e. 64 MiB
+    SQLITE_BUSY_TIMEOUT_MS: int = Field(5000, env="SQLITE_BUSY_TIMEOUT_MS")
+    SQLITE_TEMP_STORE: str = Field("MEMORY", env="SQLITE_TEMP_STORE")
+    DB_ASYNC_POOL_SIZE: int = Field(20, env="DB_ASYNC_POOL_SIZE")
+    DB_READ_POOL_SIZE: int = Field(8, env="DB_READ_POOL_SIZE")
+    DB_READ_POOL_MAX_OVERFLOW: int = Field(8, env="DB_READ_POOL_MAX_OVERFLOW")
+
+    # Audit writer (batched, group-committed inserts from a background thread)
+    AUDIT_WRITER_ENABLED: bool = Field(True, env="AUDIT_WRITER_ENABLED")
+    AUDIT_QUEUE_MAX_SIZE: int = Field(10000, env="AUDIT_QUEUE_MAX_SIZE")
+    AUDIT_BATCH_SIZE: int = Field(200, env="AUDIT_BATCH_SIZE")
+    AUDIT_FLUSH_INTERVAL_MS: int = Field(50, env="AUDIT_FLUSH_INTERVAL_MS")
+    AUDIT_QUEUE_FULL_POLICY: str = Field("block", env="AUDIT_QUEUE_FULL_POLICY")  # block | inline | drop
+    AUDIT_QUEUE_BLOCK_TIMEOUT_MS: int = Field(100, env="AUDIT_QUEUE_BLOCK_TIMEOUT_MS")
+    AUDIT_WRITE_RETRIES: int = Field(3, env="AUDIT_WRITE_RETRIES")
+    AUDIT_RETRY_BACKOFF_MS: int = Field(50, env="AUDIT_RETRY_BACKOFF_MS")  # doubled after each attempt
+    AUDIT_DEAD_LETTER_PATH: str = Field("backend/logs/audit_dead_letter.jsonl", env="AUDIT_DEAD_LETTER_PATH")
+
+    # Audit file log (JSON lines, rotated by size or time, gzipped segments)
+    AUDIT_LOG_MAX_BYTES: int = Field(10485760, env="AUDIT_LOG_MAX_BYTES")  # 10 MiB
+    AUDIT_LOG_ROTATE_WHEN: str = Field("midnight", env="AUDIT_LOG_ROTATE_WHEN")
+    AUDIT_LOG_BACKUP_COUNT: int = Field(14, env="AUDIT_LOG_BACKUP_COUNT")
+
+    # In-memory activity counters (ring buffers of per-minute and per-hour buckets)
+    ACTIVITY_COUNTER_MINUTES: int = Field(1440, env="ACTIVITY_COUNTER_MINUTES")  # 24 hours
+    ACTIVITY_COUNTER_HOURS: int = Field(720, env="ACTIVITY_COUNTER_HOURS")  # 30 days
+
+    # Admin dashboard response cache (TTL + LRU, ETag/304)
+    DASHBOARD_CACHE_TTL_SECONDS: int = Field(30, env="DASHBOARD_CACHE_TTL_SECONDS")
+    DASHBOARD_CACHE_MAX_ENTRIES: int = Field(256, env="DASHBOARD_CACHE_MAX_ENTRIES")
+
+    # Dashboard statistics SSE stream
+    STATS_STREAM_INTERVAL_SECONDS: float = Field(2.0, env="STATS_STREAM_INTERVAL_SECONDS")
+    STATS_STREAM_HEARTBEAT_SECONDS: float = Field(15.0, env="STATS_STREAM_HEARTBEAT_SECONDS")
+    STATS_STREAM_MAX_SUBSCRIBERS: int = Field(20, env="STATS_STREAM_MAX_SUBSCRIBERS")
+    STATS_STREAM_QUEUE_SIZE: int = Field(32, env="STATS_STREAM_QUEUE_SIZE")
+
+    # Retention policy (persisted in retention_policy; this is the default until an admin saves one)
+    RETENTION_DEFAULT_DAYS: int = Field(90, env="RETENTION_DEFAULT_DAYS")
+    RETENTION_POLICY_CACHE_SECONDS: int = Field(60, env="RETENTION_POLICY_CACHE_SECONDS")
+    RETENTION_PURGE_TIME: str = Field("02:00", env="RETENTION_PURGE_TIME")  # Daily, UTC
+
+    # Retention purge (bounded batches, one short transaction each)
+    RETENTION_PURGE_BATCH_SIZE: int = Field(5000, env="RETENTION_PURGE_BATCH_SIZE")
+    RETENTION_PURGE_PAUSE_MS: int = Field(20, env="RETENTION_PURGE_PAUSE_MS")
+
+    # Live audit-log tail stream
+    LOG_TAIL_POLL_SECONDS: float = Field(1.0, env="LOG_TAIL_POLL_SECONDS")
+    LOG_TAIL_BATCH_SIZE: int = Field(200, env="LOG_TAIL_BATCH_SIZE")
+    LOG_TAIL_MAX_SUBSCRIBERS: int = Field(20, env="LOG_TAIL_MAX_SUBSCRIBERS")
+
+    # Streamed patient listing (NDJSON / JSON array): rows read and encoded per batch
+    PATIENT_STREAM_BATCH_SIZE: int = Field(500, env="PATIENT_STREAM_BATCH_SIZE")
+
+    # Bulk patient import (CSV / NDJSON): rows per executemany and commit
+    PATIENT_IMPORT_BATCH_SIZE: int = Field(1000, env="PATIENT_IMPORT_BATCH_SIZE")
+    PATIENT_IMPORT_MAX_BYTES: int = Field(52428800, env="PATIENT_IMPORT_MAX_BYTES")  # 50 MiB
+    PATIENT_IMPORT_MAX_ERRORS: int = Field(100, env="PATIENT_IMPORT_MAX_ERRORS")  # errors listed in the response
+
+    # Batched Fernet decryption for raw patient reads and exports
+    DECRYPT_POOL: str = Field("process", env="DECRYPT_POOL")  # process | thread
+    DECRYPT_WORKERS: int = Field(0, env="DECRYPT_WORKERS")  # 0 = one per CPU
+    DECRYPT_CHUNK_SIZE: int = Field(2000, env="DECRYPT_CHUNK_SIZE")
+    DECRYPT_PARALLEL_THRESHOLD: int = Field(5000, env="DECRYPT_PARALLEL_THRESHOLD")
+
+    # Chunked anonymize-all runs (checkpointed per chunk, resumable)
+    ANONYMIZE_CHUNK_SIZE: int = Field(1000, env="ANONYMIZE_CHUNK_SIZE")
+    ANONYMIZE_STALE_SECONDS: int = Field(300, env="ANONYMIZE_STALE_SECONDS")  # a running run idle this long is taken over
+
+    # Decrypted-value cache for admin raw patient views (0 entries disables it)
+    DECRYPT_CACHE_MAX_ENTRIES: int = Field(10000, env="DECRYPT_CACHE_MAX_ENTRIES")
+    DECRYPT_CACHE_MAX_BYTES: int = Field(4194304, env="DECRYPT_CACHE_MAX_BYTES")  # 4 MiB
+    DECRYPT_CACHE_TTL_SECONDS: int = Field(300, env="DECRYPT_CACHE_TTL_SECONDS")
+
+    # Patient search blind index (keyed HMAC tokens; empty key = derived from SECRET_KEY)
+    BLIND_INDEX_KEY: str = Field("", env="BLIND_INDEX_KEY")
+    BLIND_INDEX_MIN_PREFIX: int = Field(3, env="BLIND_INDEX_MIN_PREFIX")
+    BLIND_INDEX_MAX_PREFIX: int = Field(12, env="BLIND_INDEX_MAX_PREFIX")
+    BLIND_INDEX_BACKFILL_BATCH_SIZE: int = Field(1000, env="BLIND_INDEX_BACKFILL_BATCH_SIZE")
+
+    # In-process job scheduler (cron expressions are evaluated in UTC)
+    SCHEDULER_ENABLED: bool = Field(True, env="SCHEDULER_ENABLED")
+    SCHEDULER_JITTER_SECONDS: int = Field(30, env="SCHEDULER_JITTER_SECONDS")
+    SCHEDULER_LEASE_SECONDS: int = Field(3600, env="SCHEDULER_LEASE_SECONDS")
+    ROLLUP_CATCHUP_CRON: str = Field("30 2 * * *", env="ROLLUP_CATCHUP_CRON")
+    CONSENT_RECONCILIATION_CRON: str = Field("0 3 * * *", env="CONSENT_RECONCILIATION_CRON")
+    MFA_CLEANUP_CRON: str = Field("*/15 * * * *", env="MFA_CLEANUP_CRON")
+    BACKUP_CRON: str = Field("0 1 * * *", env="BACKUP_CRON")
+    BACKUP_KEEP_COUNT: int = Field(14, env="BACKUP_KEEP_COUNT")
+    SQLITE_MAINTENANCE_CRON: str = Field("30 3 * * *", env="SQLITE_MAINTENANCE_CRON")
+    BLIND_INDEX_BACKFILL_CRON: str = Field("15 4 * * *", env="BLIND_INDEX_BACKFILL_CRON")
+
     # Server metadata
     SERVER_START_TIME: datetime | None = None
     LAST_SYNC_TIME: datetime | None = None
@@ -48,6 +144,9 @@ def get_settings() -> Settings:
         db_path = (project_root / db_path).resolve()
     db_path.parent.mkdir(parents=True, exist_ok=True)
     settings.DB_PATH = str(db_path)
+    dead_letter_path = Path(settings.AUDIT_DEAD_LETTER_PATH)
+    if not dead_letter_path.is_absolute():
+        settings.AUDIT_DEAD_LETTER_PATH = str((project_root / dead_letter_path).resolve())
     return settings
 
 
@@ -0,0 +1,193 @@
+"""
+Per-route HTTP request metrics.
+
+RequestMetricsMiddleware is a pure ASGI middleware: it wraps receive/send
+instead of buffering the response, so StreamingResponse bodies pass through
+chunk by chunk. Latency is measured until the last body chunk is sent and
+recorded into fixed-bucket histograms per route, alongside request/response
+byte counts and the number of requests in flight.
+"""
+import bisect
+import logging
+import threading
+import time
+from typing import Optional
+
+from app.services.logging_service import audit_logger
+
+# Upper bounds in milliseconds; a final implicit bucket holds everything slower
+LATENCY_BUCKETS_MS: tuple[float, ...] = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram; observe() is a bisect and two additions."""
+
+    __slots__ = ("counts", "count", "sum_ms", "max_ms")
+
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.count = 0
+        self.sum_ms = 0.0
+        self.max_ms = 0.0
+
+    def observe(self, value_ms: float) -> None:
+        self.counts[bisect.bisect_left(LATENCY_BUCKETS_MS, value_ms)] += 1
+        self.count += 1
+        self.sum_ms += value_ms
+        if value_ms > self.max_ms:
+            self.max_ms = value_ms
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Upper bound of the bucket holding the q-quantile (None if empty or past the last bound)."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for bound, bucket_count in zip(LATENCY_BUCKETS_MS, self.counts):
+            seen += bucket_count
+            if seen >= rank:
+                return bound
+        return None
+
+    def snapshot(self) -> dict:
+        buckets = {f"le_{bound:g}": count for bound, count in zip(LATENCY_BUCKETS_MS, self.counts)}
+        buckets["le_inf"] = self.counts[-1]
+        return {
+            "count": self.count,
+            "sum_ms": round(self.sum_ms, 3),
+            "avg_ms": round(self.sum_ms / self.count, 3) if self.count else None,
+            "max_ms": round(self.max_ms, 3),
+            "p50_ms": self.quantile(0.5),
+            "p95_ms": self.quantile(0.95),
+            "p99_ms": self.quantile(0.99),
+            "buckets": buckets,
+        }
+
+
+class RouteMetrics:
+    __slots__ = ("latency", "request_bytes", "response_bytes", "status_classes")
+
+    def __init__(self):
+        self.latency = LatencyHistogram()
+        self.request_bytes = 0
+        self.response_bytes = 0
+        self.status_classes: dict[str, int] = {}
+
+
+route_request_metrics: dict[str, RouteMetrics] = {}
+_in_flight = 0
+_max_in_flight = 0
+_metrics_lock = threading.Lock()
+
+
+def _enter_request() -> None:
+    global _in_flight, _max_in_flight
+    with _metrics_lock:
+        _in_flight += 1
+        if _in_flight > _max_in_flight:
+            _max_in_flight = _in_flight
+
+
+def _exit_request(route_key: str, elapsed_ms: float, status_code: int, request_bytes: int, response_bytes: int) -> None:
+    global _in_flight
+    status_class = f"{status_code // 100}xx" if status_code else "aborted"
+    with _metrics_lock:
+        _in_flight -= 1
+        metrics = route_request_metrics.get(route_key)
+        if metrics is None:
+            metrics = route_request_metrics[route_key] = RouteMetrics()
+        metrics.latency.observe(elapsed_ms)
+        metrics.request_bytes += request_bytes
+        metrics.response_bytes += response_bytes
+        metrics.status_classes[status_class] = metrics.status_classes.get(status_class, 0) + 1
+
+
+def get_request_metrics() -> dict:
+    """In-flight gauge plus per-route latency histograms, byte totals and status counts."""
+    with _metrics_lock:
+        routes = {}
+        for key, metrics in route_request_metrics.items():
+            requests = metrics.latency.count or 1
+            routes[key] = {
+                "latency": metrics.latency.snapshot(),
+                "request_bytes": metrics.request_bytes,
+                "response_bytes": metrics.response_bytes,
+                "avg_response_bytes": round(metrics.response_bytes / requests, 1),
+                "status": dict(metrics.status_classes),
+            }
+        return {
+            "in_flight": _in_flight,
+            "max_in_flight": _max_in_flight,
+            "bucket_bounds_ms": list(LATENCY_BUCKETS_MS),
+            "routes": routes,
+        }
+
+
+def reset_request_metrics() -> None:
+    global _max_in_flight
+    with _metrics_lock:
+        route_request_metrics.clear()
+        _max_in_flight = _in_flight
+
+
+class RequestMetricsMiddleware:
+    """
+    Pure ASGI middleware recording latency, sizes and in-flight requests per
+    route, and writing the request/response audit debug lines (path, method,
+    status, duration; no bodies or query strings, so no PHI).
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        log_debug = audit_logger.isEnabledFor(logging.DEBUG)
+        if log_debug:
+            audit_logger.debug("Request received", extra={"path": scope["path"], "method": scope["method"]})
+
+        request_bytes = 0
+        response_bytes = 0
+        status_code = 0
+        finished = False
+
+        async def receive_counting():
+            nonlocal request_bytes
+            message = await receive()
+            if message["type"] == "http.request":
+                request_bytes += len(message.get("body", b""))
+            return message
+
+        async def send_counting(message):
+            nonlocal response_bytes, status_code, finished
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            elif message["type"] == "http.response.body":
+                response_bytes += len(message.get("body", b""))
+                if not message.get("more_body", False):
+                    finished = True
+            await send(message)
+
+        _enter_request()
+        try:
+            await self.app(scope, receive_counting, send_counting)
+        finally:
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            route = scope.get("route")
+            route_key = f"{scope['method']} {getattr(route, 'path', None) or '<unmatched>'}"
+            # A response that never sent its final chunk was aborted mid-stream
+            _exit_request(route_key, elapsed_ms, status_code if finished else 0, request_bytes, response_bytes)
+            if log_debug:
+                audit_logger.debug(
+                    "Response sent",
+                    extra={
+                        "path": scope["path"],
+                        "status_code": status_code,
+                        "duration_ms": round(elapsed_ms, 3),
+                        "response_bytes": response_bytes,
+                    },
+                )
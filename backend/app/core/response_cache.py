@@ -0,0 +1,132 @@
+"""
+TTL response cache for polled admin dashboard endpoints.
+
+Entries are keyed by route name, query parameters and the caller's role, hold
+the serialized JSON body with a strong ETag, and are evicted least recently
+used once the cache is full. Hits are answered with the cached body, or with
+304 Not Modified when the client already holds the same ETag. The body is
+shared across callers with the same key, but the audit callback runs for every
+request, so each viewer is logged whether or not the body came from the cache.
+"""
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Optional
+
+from fastapi import Request, Response, status
+from fastapi.encoders import jsonable_encoder
+
+from app.core.config import settings
+
+
+class CachedResponse:
+    __slots__ = ("body", "etag", "expires_at")
+
+    def __init__(self, body: bytes, etag: str, expires_at: float):
+        self.body = body
+        self.etag = etag
+        self.expires_at = expires_at
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [value.strip() for value in if_none_match.split(",")]
+    # Weak comparison, as required for If-None-Match
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+
+class ResponseCache:
+    def __init__(self, ttl_seconds: float = 30, max_entries: int = 256, clock: Callable[[], float] = time.monotonic):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._clock = clock
+        self._entries: OrderedDict[tuple, CachedResponse] = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "not_modified": 0, "misses": 0, "evictions": 0, "invalidations": 0}
+
+    def get(self, key: tuple) -> Optional[CachedResponse]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry.expires_at <= self._clock():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key: tuple, content: Any) -> CachedResponse:
+        body = json.dumps(jsonable_encoder(content), separators=(",", ":")).encode("utf-8")
+        etag = f'"{hashlib.sha1(body).hexdigest()}"'
+        entry = CachedResponse(body, etag, self._clock() + self.ttl_seconds)
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+        return entry
+
+    def invalidate(self, route_name: Optional[str] = None) -> int:
+        """Drop every entry for a route, by endpoint name (all entries when None)."""
+        with self._lock:
+            keys = [key for key in self._entries if route_name is None or key[0] == route_name]
+            for key in keys:
+                del self._entries[key]
+            self._stats["invalidations"] += len(keys)
+        return len(keys)
+
+    def respond(
+        self,
+        request: Request,
+        role: Optional[str],
+        build: Callable[[], Any],
+        audit: Optional[Callable[[], None]] = None,
+    ) -> Response:
+        """
+        Serve request from the cache, calling build() only on a miss. build must be
+        free of per-caller side effects; audit() is called on every request (miss,
+        hit or 304) so the audit trail records each viewer.
+        """
+        route = request.scope.get("route")
+        route_name = getattr(route, "name", None) or request.url.path
+        key = (route_name, tuple(sorted(request.query_params.multi_items())), role)
+        entry = self.get(key)
+        if entry is None:
+            self._count("misses")
+            entry = self.set(key, build())
+        else:
+            self._count("hits")
+        if audit is not None:
+            audit()
+
+        headers = {
+            "ETag": entry.etag,
+            # no-cache: browsers revalidate every poll (a cheap 304), so every view reaches audit()
+            "Cache-Control": "private, no-cache",
+        }
+        if etag_matches(request.headers.get("if-none-match"), entry.etag):
+            self._count("not_modified")
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        return Response(content=entry.body, media_type="application/json", headers=headers)
+
+    def get_metrics(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = len(self._entries)
+        stats["capacity"] = self.max_entries
+        stats["ttl_seconds"] = self.ttl_seconds
+        return stats
+
+    def _count(self, key: str) -> None:
+        with self._lock:
+            self._stats[key] += 1
+
+
+dashboard_cache = ResponseCache(
+    ttl_seconds=settings.DASHBOARD_CACHE_TTL_SECONDS,
+    max_entries=settings.DASHBOARD_CACHE_MAX_ENTRIES,
+)
@@ -0,0 +1,173 @@
+"""
+Per-request SQL instrumentation.
+
+Cursor events on every application engine attribute statement count, DB time
+and rows to the request being served (tracked in a ContextVar). The ASGI
+middleware reports them as a Server-Timing header and aggregates them per route.
+"""
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+class QueryStats:
+    """Counters for the statements issued within one scope (a request or a test block)."""
+
+    __slots__ = ("count", "db_time", "rows", "statements")
+
+    def __init__(self, keep_statements: bool = False):
+        self.count = 0
+        self.db_time = 0.0
+        self.rows = 0
+        self.statements: Optional[list[str]] = [] if keep_statements else None
+
+    def server_timing(self) -> str:
+        return f'db;dur={self.db_time * 1000:.3f};desc="{self.count} queries, {self.rows} rows"'
+
+
+_current_stats: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+_collectors: list[QueryStats] = []
+_collectors_lock = threading.Lock()
+
+route_query_metrics: dict[str, dict[str, float]] = {}
+_route_metrics_lock = threading.Lock()
+
+
+def _record_rows(rows: int) -> None:
+    stats = _current_stats.get()
+    if stats is not None:
+        stats.rows += rows
+    for collector in _collectors:
+        collector.rows += rows
+
+
+class CountingCursor(sqlite3.Cursor):
+    """sqlite3 cursor that reports how many rows each fetch returned."""
+
+    def fetchone(self):
+        row = super().fetchone()
+        if row is not None:
+            _record_rows(1)
+        return row
+
+    def fetchmany(self, *args, **kwargs):
+        rows = super().fetchmany(*args, **kwargs)
+        _record_rows(len(rows))
+        return rows
+
+    def fetchall(self):
+        rows = super().fetchall()
+        _record_rows(len(rows))
+        return rows
+
+
+class CountingConnection(sqlite3.Connection):
+    """sqlite3 connection handing out CountingCursor; pass as connect_args["factory"]."""
+
+    def cursor(self, factory=CountingCursor):
+        return super().cursor(factory)
+
+
+def instrument_engine(engine: Engine) -> None:
+    """
+    Attribute statement count and time on this engine to the current request.
+    Rows are counted by CountingCursor for pysqlite engines; aiosqlite fetches on
+    its own worker thread, so async statements only contribute count and time.
+    """
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        context._query_start_time = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - context._query_start_time
+        # DML reports affected rows; SELECT rows are counted as they are fetched
+        affected = cursor.rowcount if cursor.description is None and cursor.rowcount > 0 else 0
+        targets = list(_collectors)
+        stats = _current_stats.get()
+        if stats is not None:
+            targets.append(stats)
+        for target in targets:
+            target.count += 1
+            target.db_time += elapsed
+            target.rows += affected
+            if target.statements is not None:
+                target.statements.append(statement)
+
+
+@contextmanager
+def collect_queries():
+    """Count every statement issued on any instrumented engine, from any thread, within the block."""
+    stats = QueryStats(keep_statements=True)
+    with _collectors_lock:
+        _collectors.append(stats)
+    try:
+        yield stats
+    finally:
+        with _collectors_lock:
+            _collectors.remove(stats)
+
+
+def record_route_stats(route_key: str, stats: QueryStats) -> None:
+    with _route_metrics_lock:
+        metrics = route_query_metrics.setdefault(
+            route_key,
+            {"requests": 0, "queries": 0, "db_time_ms": 0.0, "rows": 0, "max_queries": 0},
+        )
+        metrics["requests"] += 1
+        metrics["queries"] += stats.count
+        metrics["db_time_ms"] += stats.db_time * 1000
+        metrics["rows"] += stats.rows
+        metrics["max_queries"] = max(metrics["max_queries"], stats.count)
+
+
+def get_route_query_metrics() -> dict[str, dict[str, float]]:
+    """Per-route totals plus per-request averages."""
+    with _route_metrics_lock:
+        snapshot = {key: dict(values) for key, values in route_query_metrics.items()}
+    for values in snapshot.values():
+        requests = values["requests"] or 1
+        values["avg_queries"] = round(values["queries"] / requests, 2)
+        values["avg_db_time_ms"] = round(values["db_time_ms"] / requests, 3)
+        values["db_time_ms"] = round(values["db_time_ms"], 3)
+    return snapshot
+
+
+class QueryStatsMiddleware:
+    """
+    Pure ASGI middleware: opens a QueryStats scope per HTTP request, adds a
+    Server-Timing header when the response starts and records per-route totals.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats()
+        token = _current_stats.set(stats)
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", stats.server_timing().encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current_stats.reset(token)
+            route = scope.get("route")
+            route_path = getattr(route, "path", None) or "<unmatched>"
+            record_route_stats(f"{scope['method']} {route_path}", stats)
@@ -1,6 +1,6 @@
 from datetime import datetime
 
-from sqlalchemy import Column, DateTime, Integer, String, Text, ForeignKey, Boolean, CheckConstraint
+from sqlalchemy import Column, Date, DateTime, Float, Integer, String, Text, ForeignKey, Boolean, CheckConstraint, Index, DDL, event, text
 from sqlalchemy.orm import declarative_base, relationship
 
 Base = declarative_base()
@@ -34,7 +34,67 @@ class Patient(Base):
     diagnosis = Column(Text, nullable=True)
     anonymized_name = Column(String(255), nullable=True)
     anonymized_contact = Column(String(255), nullable=True)
-    date_added = Column(DateTime, default=datetime.utcnow, nullable=False)
+    # Serves the keyset-paginated patient list; SQLite appends the rowid
+    # (patient_id) to every index, so ORDER BY date_added, patient_id needs no sort
+    date_added = Column(DateTime, default=datetime.utcnow, nullable=False, index=True)
+    # Blind index for search (keyed HMAC of the normalized values, never plaintext);
+    # NULL until anonymize_service.apply_blind_index has run for the row
+    name_bidx = Column(String(64), nullable=True, index=True)
+    contact_bidx = Column(String(64), nullable=True, index=True)
+    # JSON array of name-prefix tokens, copied into patient_name_tokens by the triggers below
+    name_tokens = Column(Text, nullable=True)
+
+
+class PatientNameToken(Base):
+    """
+    One row per (name-prefix token, patient). The primary key is the search
+    index: a prefix lookup is a single b-tree range on token.
+    """
+    __tablename__ = "patient_name_tokens"
+
+    token = Column(String(64), primary_key=True)
+    patient_id = Column(Integer, ForeignKey("patients.patient_id", ondelete="CASCADE"), primary_key=True)
+
+    __table_args__ = (
+        # Serves the per-patient deletes in the triggers below
+        Index("ix_patient_name_tokens_patient_id", "patient_id"),
+        {"sqlite_with_rowid": False},
+    )
+
+
+def _patient_token_triggers() -> list[str]:
+    insert_tokens = (
+        "INSERT OR IGNORE INTO patient_name_tokens (token, patient_id) "
+        "SELECT value, NEW.patient_id FROM json_each(COALESCE(NEW.name_tokens, '[]'))"
+    )
+    return [
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_patients_tokens_insert AFTER INSERT ON patients
+        WHEN NEW.name_tokens IS NOT NULL
+        BEGIN
+            {insert_tokens};
+        END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_patients_tokens_update AFTER UPDATE OF name_tokens ON patients
+        WHEN NEW.name_tokens IS NOT OLD.name_tokens
+        BEGIN
+            DELETE FROM patient_name_tokens WHERE patient_id = NEW.patient_id;
+            {insert_tokens};
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_patients_tokens_delete AFTER DELETE ON patients
+        BEGIN
+            DELETE FROM patient_name_tokens WHERE patient_id = OLD.patient_id;
+        END
+        """,
+    ]
+
+
+# Tokens are written as one column on patients so mask_patient adds no statements
+for _statement in _patient_token_triggers():
+    event.listen(Base.metadata, "after_create", DDL(_statement).execute_if(dialect="sqlite"))
 
 
 class Log(Base):
@@ -48,6 +108,222 @@ class Log(Base):
     details = Column(Text, nullable=True)
     user = relationship("User", back_populates="logs")
 
+    __table_args__ = (
+        # Serve the audit-log filters with ORDER BY timestamp, and the
+        # ON DELETE SET NULL lookup on user_id when a user is removed.
+        Index("ix_logs_role_timestamp", "role", "timestamp"),
+        Index("ix_logs_user_id_timestamp", "user_id", "timestamp"),
+        Index("ix_logs_action_timestamp", "action", "timestamp"),
+    )
+
+
+class LogDailyRollup(Base):
+    """
+    Log counts per (day, role, action type), kept in step with the logs table by
+    the triggers below. Activity statistics read this instead of scanning logs.
+    """
+    __tablename__ = "log_daily_rollup"
+
+    day = Column(Date, primary_key=True)
+    role = Column(String(50), primary_key=True)  # "unknown" when the log has no role
+    action_type = Column(String(255), primary_key=True)  # action up to the first "_"
+    count = Column(Integer, nullable=False, default=0)
+
+
+def log_rollup_key_sql(row: str) -> tuple[str, str, str]:
+    """SQL for the (day, role, action_type) rollup key of a logs row (NEW, OLD or logs)."""
+    return (
+        f"date({row}.timestamp)",
+        f"COALESCE(NULLIF({row}.role, ''), 'unknown')",
+        f"CASE WHEN instr({row}.action, '_') > 0 "
+        f"THEN substr({row}.action, 1, instr({row}.action, '_') - 1) ELSE {row}.action END",
+    )
+
+
+def _rollup_triggers() -> list[str]:
+    new_day, new_role, new_type = log_rollup_key_sql("NEW")
+    old_day, old_role, old_type = log_rollup_key_sql("OLD")
+    old_match = f"day = {old_day} AND role = {old_role} AND action_type = {old_type}"
+    return [
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_logs_rollup_insert AFTER INSERT ON logs
+        BEGIN
+            INSERT INTO log_daily_rollup (day, role, action_type, count)
+            VALUES ({new_day}, {new_role}, {new_type}, 1)
+            ON CONFLICT (day, role, action_type) DO UPDATE SET count = count + 1;
+        END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_logs_rollup_delete AFTER DELETE ON logs
+        BEGIN
+            UPDATE log_daily_rollup SET count = count - 1 WHERE {old_match};
+            DELETE FROM log_daily_rollup WHERE {old_match} AND count <= 0;
+        END
+        """,
+    ]
+
+
+def log_rollup_backfill_sql(where: str = "") -> str:
+    """INSERT ... SELECT rebuilding rollup rows from logs (optionally filtered by a WHERE clause)."""
+    day, role, action_type = log_rollup_key_sql("logs")
+    return (
+        "INSERT INTO log_daily_rollup (day, role, action_type, count) "
+        f"SELECT {day}, {role}, {action_type}, COUNT(*) FROM logs {where} "
+        "GROUP BY 1, 2, 3"
+    )
+
+
+# The triggers reference both tables, so attach them once the whole schema exists.
+# An empty rollup next to existing logs (a database created before the table) is backfilled.
+for _statement in _rollup_triggers() + [
+    log_rollup_backfill_sql("WHERE NOT EXISTS (SELECT 1 FROM log_daily_rollup)")
+]:
+    event.listen(Base.metadata, "after_create", DDL(_statement).execute_if(dialect="sqlite"))
+
+
+class ConsentCounter(Base):
+    """
+    Single-row totals of active and consenting active users, kept in step with
+    the users table by the triggers below so consent statistics never scan users.
+    """
+    __tablename__ = "consent_counters"
+
+    counter_id = Column(Integer, primary_key=True, default=1)
+    total_users = Column(Integer, nullable=False, default=0)
+    consented_users = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        CheckConstraint("counter_id = 1", name="check_single_counter"),
+    )
+
+
+class ConsentDaily(Base):
+    """End-of-day consent totals (UTC), written by the same triggers on every change."""
+    __tablename__ = "consent_daily"
+
+    day = Column(Date, primary_key=True)
+    total_users = Column(Integer, nullable=False)
+    consented_users = Column(Integer, nullable=False)
+
+
+def consent_daily_upsert_sql(day: str = "date('now')") -> str:
+    """Copy the current counters into the consent_daily row for day."""
+    return (
+        "INSERT INTO consent_daily (day, total_users, consented_users) "
+        f"SELECT {day}, total_users, consented_users FROM consent_counters WHERE counter_id = 1 "
+        "ON CONFLICT (day) DO UPDATE SET "
+        "total_users = excluded.total_users, consented_users = excluded.consented_users"
+    )
+
+
+def _consent_counter_update_sql(sign: str, row: str) -> str:
+    return (
+        f"UPDATE consent_counters SET "
+        f"total_users = total_users {sign} ({row}.is_active = 1), "
+        f"consented_users = consented_users {sign} ({row}.is_active = 1 AND {row}.gdpr_consent = 1) "
+        "WHERE counter_id = 1"
+    )
+
+
+def _consent_triggers() -> list[str]:
+    upsert_today = consent_daily_upsert_sql()
+    return [
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_users_consent_insert AFTER INSERT ON users
+        BEGIN
+            {_consent_counter_update_sql("+", "NEW")};
+            {upsert_today};
+        END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_users_consent_update AFTER UPDATE OF is_active, gdpr_consent ON users
+        WHEN NEW.is_active IS NOT OLD.is_active OR NEW.gdpr_consent IS NOT OLD.gdpr_consent
+        BEGIN
+            {_consent_counter_update_sql("-", "OLD")};
+            {_consent_counter_update_sql("+", "NEW")};
+            {upsert_today};
+        END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_users_consent_delete AFTER DELETE ON users
+        BEGIN
+            {_consent_counter_update_sql("-", "OLD")};
+            {upsert_today};
+        END
+        """,
+    ]
+
+
+CONSENT_COUNTER_SEED_SQL = (
+    "INSERT OR IGNORE INTO consent_counters (counter_id, total_users, consented_users) "
+    "SELECT 1, COALESCE(SUM(is_active = 1), 0), COALESCE(SUM(is_active = 1 AND gdpr_consent = 1), 0) FROM users"
+)
+
+# Seed the counter row from existing users (no-op once it exists), then attach the triggers
+for _statement in [CONSENT_COUNTER_SEED_SQL] + _consent_triggers():
+    event.listen(Base.metadata, "after_create", DDL(_statement).execute_if(dialect="sqlite"))
+
+
+
+class RetentionPolicy(Base):
+    """Single-row audit-log retention policy, shared by the admin API and the scheduled purge."""
+    __tablename__ = "retention_policy"
+
+    policy_id = Column(Integer, primary_key=True, default=1)
+    retention_days = Column(Integer, nullable=False)
+    enabled = Column(Boolean, default=True, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+    updated_by = Column(Integer, ForeignKey("users.user_id", ondelete="SET NULL"), nullable=True)
+
+    __table_args__ = (
+        CheckConstraint("policy_id = 1", name="check_single_policy"),
+    )
+
+
+class SchedulerLease(Base):
+    """
+    Per-job lease for the in-process scheduler. Only the worker holding an
+    unexpired lease runs the job; last_run_at is the occurrence it last ran,
+    used for missed-run catch-up and to stop two workers running the same one.
+    """
+    __tablename__ = "scheduler_leases"
+
+    job_name = Column(String(100), primary_key=True)
+    owner = Column(String(255), nullable=True)
+    leased_until = Column(DateTime, nullable=True)
+    last_run_at = Column(DateTime, nullable=True)
+    last_outcome = Column(String(20), nullable=True)
+    last_duration_ms = Column(Float, nullable=True)
+
+
+class AnonymizeRun(Base):
+    """
+    Checkpoint and progress of a chunked anonymize-all run. last_patient_id
+    and processed are committed with each chunk's masked rows, so a run that
+    failed or whose process died resumes after its last chunk. updated_at is
+    the heartbeat: a "running" row not updated for ANONYMIZE_STALE_SECONDS
+    belongs to a dead process and may be taken over.
+    """
+    __tablename__ = "anonymize_runs"
+
+    run_id = Column(Integer, primary_key=True)
+    status = Column(String(20), nullable=False, default="running")  # running | completed | failed
+    owner = Column(String(255), nullable=True)  # host:pid working on it
+    started_by = Column(Integer, ForeignKey("users.user_id", ondelete="SET NULL"), nullable=True)
+    started_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    finished_at = Column(DateTime, nullable=True)
+    last_patient_id = Column(Integer, nullable=False, default=0)
+    processed = Column(Integer, nullable=False, default=0)
+    total = Column(Integer, nullable=True)  # processed + pending when the run last (re)started
+    rows_per_second = Column(Float, nullable=True)
+    error = Column(Text, nullable=True)
+
+    __table_args__ = (
+        # At most one run in progress
+        Index("uq_anonymize_runs_running", "status", unique=True, sqlite_where=text("status = 'running'")),
+    )
+
 
 class MFACode(Base):
     __tablename__ = "mfa_codes"
@@ -1,12 +1,154 @@
-from contextlib import contextmanager
+import threading
+from contextlib import asynccontextmanager, contextmanager
+from typing import Optional
 
-from sqlalchemy import create_engine
+from fastapi import Request
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
 
 from app.core.config import settings
+from app.db.instrumentation import CountingConnection, instrument_engine
 
-engine = create_engine(f"sqlite:///{settings.DB_PATH}", connect_args={"check_same_thread": False})
+
+def get_sqlite_pragmas() -> dict[str, object]:
+    """
+    Per-connection PRAGMA profile built from settings.
+    WAL lets readers proceed while a writer commits, and synchronous=NORMAL
+    only fsyncs the WAL at checkpoints instead of on every commit.
+    """
+    return {
+        "journal_mode": settings.SQLITE_JOURNAL_MODE,
+        "synchronous": settings.SQLITE_SYNCHRONOUS,
+        "mmap_size": settings.SQLITE_MMAP_SIZE,
+        "cache_size": settings.SQLITE_CACHE_SIZE,
+        "busy_timeout": settings.SQLITE_BUSY_TIMEOUT_MS,
+        "temp_store": settings.SQLITE_TEMP_STORE,
+    }
+
+
+def apply_sqlite_pragmas(engine: Engine, pragmas: dict[str, object]) -> None:
+    """Register a connect hook that applies the PRAGMA profile to every new DBAPI connection."""
+
+    @event.listens_for(engine, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name}={value}")
+        finally:
+            cursor.close()
+
+
+def create_db_engine(db_path: Optional[str] = None, pragmas: Optional[dict[str, object]] = None) -> Engine:
+    """
+    Create a SQLite engine with the tuned connection profile.
+    Shared by the app session, scripts/init_db.py and the test fixtures.
+    """
+    engine = create_engine(
+        f"sqlite:///{db_path or settings.DB_PATH}",
+        connect_args={"check_same_thread": False, "factory": CountingConnection},
+    )
+    apply_sqlite_pragmas(engine, get_sqlite_pragmas() if pragmas is None else pragmas)
+    return engine
+
+
+def create_read_engine(db_path: Optional[str] = None, pool_size: Optional[int] = None) -> Engine:
+    """
+    Create an engine whose pooled connections are opened with mode=ro and
+    PRAGMA query_only, so heavy admin reads never take the write lock.
+    journal_mode is a database-level setting and is left to the writer.
+    """
+    pragmas = {name: value for name, value in get_sqlite_pragmas().items() if name != "journal_mode"}
+    pragmas["query_only"] = "ON"
+    read_engine = create_engine(
+        f"sqlite:///file:{db_path or settings.DB_PATH}?mode=ro&uri=true",
+        connect_args={"check_same_thread": False, "factory": CountingConnection},
+        pool_size=pool_size or settings.DB_READ_POOL_SIZE,
+        max_overflow=settings.DB_READ_POOL_MAX_OVERFLOW,
+    )
+    apply_sqlite_pragmas(read_engine, pragmas)
+    return read_engine
+
+
+def track_pool_metrics(engine: Engine, name: str) -> None:
+    """Count pool checkouts/checkins/connects for the engine under the given pool name."""
+    counters = pool_metrics.setdefault(name, {"connects": 0, "checkouts": 0, "checkins": 0})
+    pools[name] = engine.pool
+
+    # Pool events fire on whichever thread checks a connection out or in
+    def _count(key: str) -> None:
+        with pool_metrics_lock:
+            counters[key] += 1
+
+    @event.listens_for(engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        _count("connects")
+
+    @event.listens_for(engine, "checkout")
+    def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+        _count("checkouts")
+
+    @event.listens_for(engine, "checkin")
+    def _on_checkin(dbapi_connection, connection_record):
+        _count("checkins")
+
+
+def get_pool_metrics() -> dict[str, dict[str, int]]:
+    """Snapshot of per-pool counters plus current pool occupancy."""
+    with pool_metrics_lock:
+        counters_by_pool = {name: dict(counters) for name, counters in pool_metrics.items()}
+    snapshot = {}
+    for name, counters in counters_by_pool.items():
+        pool = pools[name]
+        snapshot[name] = {
+            **counters,
+            "checked_out": pool.checkedout(),
+            "size": pool.size(),
+            # QueuePool counts up from -size; only connections beyond pool_size are overflow
+            "overflow": max(pool.overflow(), 0),
+        }
+    return snapshot
+
+
+def create_async_db_engine(
+    db_path: Optional[str] = None,
+    pragmas: Optional[dict[str, object]] = None,
+    pool_size: Optional[int] = None,
+) -> AsyncEngine:
+    """
+    Create an aiosqlite-backed engine with the same connection profile.
+    Queries run on aiosqlite's worker thread, so awaiting them yields the event loop.
+    """
+    async_engine = create_async_engine(
+        f"sqlite+aiosqlite:///{db_path or settings.DB_PATH}",
+        pool_size=pool_size or settings.DB_ASYNC_POOL_SIZE,
+        max_overflow=0,
+    )
+    apply_sqlite_pragmas(async_engine.sync_engine, get_sqlite_pragmas() if pragmas is None else pragmas)
+    return async_engine
+
+
+pool_metrics: dict[str, dict[str, int]] = {}
+pool_metrics_lock = threading.Lock()
+pools = {}
+
+engine = create_db_engine()
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+track_pool_metrics(engine, "write")
+instrument_engine(engine)
+
+read_engine = create_read_engine()
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+track_pool_metrics(read_engine, "read")
+instrument_engine(read_engine)
+
+async_engine = create_async_db_engine()
+# expire_on_commit=False: attributes of committed objects stay readable without an implicit (blocking) refresh
+AsyncSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+track_pool_metrics(async_engine.sync_engine, "async")
+instrument_engine(async_engine.sync_engine)
 
 
 def get_db_session():
@@ -17,6 +159,36 @@ def get_db_session():
         db.close()
 
 
+def get_read_session():
+    """Session on the read-only pool, for routes that never write through it."""
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+READ_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+
+
+def get_session(request: Request):
+    """
+    Session routed by HTTP method: reads (GET/HEAD/OPTIONS) get the read-only
+    pool, everything else the write pool. Routes depend on this rather than
+    picking a pool; a read route that writes fails loudly (query_only).
+    """
+    db = ReadSessionLocal() if request.method in READ_METHODS else SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+async def get_async_db_session():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
 @contextmanager
 def session_scope():
     session = SessionLocal()
@@ -29,3 +201,13 @@ def session_scope():
     finally:
         session.close()
 
+
+@asynccontextmanager
+async def async_session_scope():
+    async with AsyncSessionLocal() as session:
+        try:
+            yield session
+            await session.commit()
+        except Exception:
+            await session.rollback()
+            raise
@@ -1,15 +1,22 @@
 from datetime import datetime
 from pathlib import Path
 
-from fastapi import FastAPI, Request, Depends
+from fastapi import FastAPI, Depends
 from fastapi.middleware.cors import CORSMiddleware
 from sqlalchemy import text
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.api import auth, export, logs, patients, users, admin_stats, gdpr
+from app.api import auth, export, logs, patients, users, admin_stats, gdpr, metrics
 from app.core.config import settings
-from app.db.session import get_db_session
-from app.services.logging_service import audit_logger
+from app.core.request_metrics import RequestMetricsMiddleware
+from app.db.instrumentation import QueryStatsMiddleware
+from app.db.session import get_async_db_session, session_scope
+from app.services.activity_counters import activity_counters
+from app.services.anonymize_service import shutdown_decrypt_pool
+from app.services.audit_writer import audit_writer
+from app.services.job_scheduler import job_scheduler
+from app.services.stats_stream import stats_broadcaster
+from app.services.logging_service import stop_audit_log_listener
 
 try:
     from scripts.init_db import initialize_database
@@ -38,27 +45,34 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing"],
 )
-
-
-@app.middleware("http")
-async def audit_logging_middleware(request: Request, call_next):
-    """Stub middleware showing where request/response audit logging should occur."""
-    # TODO: Replace with structured logging that excludes PHI and sensitive data.
-    audit_logger.debug("Request received", extra={"path": request.url.path, "method": request.method})
-    response = await call_next(request)
-    audit_logger.debug(
-        "Response sent",
-        extra={"status_code": response.status_code, "path": request.url.path},
-    )
-    return response
+app.add_middleware(QueryStatsMiddleware)
+app.add_middleware(RequestMetricsMiddleware)
 
 
 @app.on_event("startup")
 async def startup_event() -> None:
     run_db_initialization()
+    # Seed the in-memory activity counters from the logs table
+    with session_scope() as db:
+        activity_counters.seed(db)
     # Set server start time
     settings.SERVER_START_TIME = datetime.utcnow()
+    # Maintenance jobs; workers coordinate through scheduler_leases so each run happens once
+    if settings.SCHEDULER_ENABLED:
+        await job_scheduler.start()
+
+
+@app.on_event("shutdown")
+async def shutdown_event() -> None:
+    await job_scheduler.stop()
+    await stats_broadcaster.stop()
+    # Drain queued audit rows before the process exits
+    audit_writer.stop()
+    # Flush queued file-log records and stop the listener thread
+    stop_audit_log_listener()
+    shutdown_decrypt_pool()
 
 
 @app.get("/", tags=["health"])
@@ -67,14 +81,14 @@ async def root() -> dict[str, str]:
 
 
 @app.get("/api/health", tags=["health"])
-async def health_check(db: Session = Depends(get_db_session)) -> dict:
+async def health_check(db: AsyncSession = Depends(get_async_db_session)) -> dict:
     """
     Health check endpoint. Returns system status and database connectivity.
     """
     db_ok = False
     try:
         # Test database connection
-        db.execute(text("SELECT 1"))
+        await db.execute(text("SELECT 1"))
         db_ok = True
     except Exception:
         pass
@@ -110,4 +124,5 @@ app.include_router(logs.router, prefix="/api/logs", tags=["logs"])
 app.include_router(export.router, prefix="/api/export", tags=["export"])
 app.include_router(admin_stats.router, prefix="/api", tags=["admin"])
 app.include_router(gdpr.router, prefix="/api", tags=["gdpr"])
+app.include_router(metrics.router, prefix="/api/admin/metrics", tags=["metrics"])
 
@@ -0,0 +1,188 @@
+"""
+Process-local activity counters for real-time dashboard statistics.
+
+Two ring buffers of time buckets (per minute and per hour) hold counts keyed by
+(role, action type). log_action bumps them as events are recorded; rows that
+join a caller's transaction are only counted once that transaction commits.
+Reads walk a fixed number of buckets, so their cost does not grow with the
+size of the logs table. The rings are seeded from the logs table at startup.
+"""
+import threading
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import event, func
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db import models
+
+_EPOCH = datetime(1970, 1, 1)
+_PENDING_KEY = "activity_counters_pending"
+
+
+def action_type(action: str) -> str:
+    """Action prefix up to the first "_", as used by the activity charts and log_daily_rollup."""
+    return action.split("_")[0] if "_" in action else action
+
+
+def counter_key(role: Optional[str], action: str) -> tuple[str, str]:
+    return (role or "unknown", action_type(action))
+
+
+class _Ring:
+    """Fixed number of time buckets of `width` seconds; slot i holds bucket index i mod size."""
+
+    __slots__ = ("width", "size", "starts", "counts", "latest")
+
+    def __init__(self, width: int, size: int):
+        self.width = width
+        self.size = size
+        self.starts = [-1] * size
+        self.counts: list[Optional[dict]] = [None] * size
+        self.latest = -1
+
+    def add(self, index: int, key: tuple[str, str], amount: int) -> None:
+        if index <= self.latest - self.size:
+            return  # older than the oldest bucket still held
+        slot = index % self.size
+        if self.starts[slot] != index:
+            if self.starts[slot] > index:
+                return
+            self.starts[slot] = index
+            self.counts[slot] = {}
+        counts = self.counts[slot]
+        counts[key] = counts.get(key, 0) + amount
+        if index > self.latest:
+            self.latest = index
+
+    def buckets(self, last: int, count: int) -> list[tuple[int, dict]]:
+        """(bucket index, counts) for the `count` buckets ending at bucket index `last`."""
+        result = []
+        for index in range(last - count + 1, last + 1):
+            slot = index % self.size
+            counts = self.counts[slot] if self.starts[slot] == index else None
+            result.append((index, dict(counts) if counts else {}))
+        return result
+
+
+class ActivityCounters:
+    def __init__(self, minute_buckets: int = 1440, hour_buckets: int = 720):
+        self._lock = threading.Lock()
+        self._minute_buckets = minute_buckets
+        self._hour_buckets = hour_buckets
+        self._minutes = _Ring(60, self._minute_buckets)
+        self._hours = _Ring(3600, self._hour_buckets)
+
+    @property
+    def max_hours(self) -> int:
+        return self._hour_buckets
+
+    @property
+    def max_minute_hours(self) -> int:
+        """Longest window (in hours) that can be served at minute granularity."""
+        return self._minute_buckets // 60
+
+    def record(self, role: Optional[str], action: str, timestamp: Optional[datetime] = None, amount: int = 1) -> None:
+        seconds = ((timestamp or datetime.utcnow()) - _EPOCH).total_seconds()
+        key = counter_key(role, action)
+        with self._lock:
+            self._minutes.add(int(seconds // 60), key, amount)
+            self._hours.add(int(seconds // 3600), key, amount)
+
+    def record_row(self, row: dict) -> None:
+        self.record(row["role"], row["action"], row["timestamp"])
+
+    def record_on_commit(self, session, row: dict) -> None:
+        """Count a row added to session once its transaction commits (dropped on rollback)."""
+        session.info.setdefault(_PENDING_KEY, []).append(row)
+
+    def window(self, hours: int, granularity: str = "hour", now: Optional[datetime] = None) -> dict:
+        """
+        Counts for the last `hours` hours (the current, partial bucket included),
+        as a series per bucket plus totals by role and action type.
+        """
+        if granularity == "minute":
+            ring, width, count = self._minutes, 60, hours * 60
+        else:
+            ring, width, count = self._hours, 3600, hours
+        seconds = ((now or datetime.utcnow()) - _EPOCH).total_seconds()
+        with self._lock:
+            buckets = ring.buckets(int(seconds // width), count)
+
+        labels, series = [], []
+        by_role: dict[str, int] = {}
+        by_type: dict[str, int] = {}
+        for index, counts in buckets:
+            labels.append((_EPOCH + timedelta(seconds=index * width)).isoformat())
+            series.append(sum(counts.values()))
+            for (role, kind), amount in counts.items():
+                by_role[role] = by_role.get(role, 0) + amount
+                by_type[kind] = by_type.get(kind, 0) + amount
+        return {
+            "window_start": labels[0],
+            "buckets": labels,
+            "actions": series,
+            "actions_by_role": by_role,
+            "actions_by_type": by_type,
+            "total": sum(series),
+        }
+
+    def totals_by_key(self, since: datetime, now: Optional[datetime] = None) -> dict[tuple[str, str], int]:
+        """Counts per (role, action type) from the hour bucket containing `since` up to now."""
+        now = now or datetime.utcnow()
+        first = int((since - _EPOCH).total_seconds() // 3600)
+        last = int((now - _EPOCH).total_seconds() // 3600)
+        totals: dict[tuple[str, str], int] = {}
+        with self._lock:
+            buckets = self._hours.buckets(last, last - first + 1)
+        for _, counts in buckets:
+            for key, amount in counts.items():
+                totals[key] = totals.get(key, 0) + amount
+        return totals
+
+    def seed(self, db: Session, now: Optional[datetime] = None) -> int:
+        """Rebuild both rings from the logs table; returns the number of log rows counted."""
+        now = now or datetime.utcnow()
+        minute_rows = _grouped_log_counts(db, "%Y-%m-%d %H:%M:00", now - timedelta(minutes=self._minute_buckets))
+        hour_rows = _grouped_log_counts(db, "%Y-%m-%d %H:00:00", now - timedelta(hours=self._hour_buckets))
+
+        minutes, hours = _Ring(60, self._minute_buckets), _Ring(3600, self._hour_buckets)
+        for ring, width, rows in ((minutes, 60, minute_rows), (hours, 3600, hour_rows)):
+            for bucket, role, action, amount in rows:
+                seconds = (datetime.fromisoformat(bucket) - _EPOCH).total_seconds()
+                ring.add(int(seconds // width), counter_key(role, action), amount)
+        with self._lock:
+            self._minutes, self._hours = minutes, hours
+        return sum(row[3] for row in hour_rows)
+
+
+def _grouped_log_counts(db: Session, bucket_format: str, since: datetime) -> list:
+    bucket = func.strftime(bucket_format, models.Log.timestamp)
+    return (
+        db.query(bucket, models.Log.role, models.Log.action, func.count())
+        .filter(models.Log.timestamp >= since)
+        .group_by(bucket, models.Log.role, models.Log.action)
+        .all()
+    )
+
+
+activity_counters = ActivityCounters(
+    minute_buckets=settings.ACTIVITY_COUNTER_MINUTES,
+    hour_buckets=settings.ACTIVITY_COUNTER_HOURS,
+)
+
+
+@event.listens_for(Session, "after_commit")
+def _count_committed_rows(session) -> None:
+    pending = session.info.pop(_PENDING_KEY, None)
+    if pending:
+        for row in pending:
+            activity_counters.record_row(row)
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _discard_uncommitted_rows(session, transaction) -> None:
+    # Runs after after_commit; anything still pending was rolled back or closed
+    if transaction.parent is None:
+        session.info.pop(_PENDING_KEY, None)
@@ -1,11 +1,30 @@
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Optional, Sequence
+import hashlib
+import hmac
+import json
+import multiprocessing
+import os
+import re
+import socket
+import threading
+import time
+import unicodedata
+
 from cryptography.fernet import Fernet, InvalidToken
+from sqlalchemy import and_, func, or_, select, update
+from sqlalchemy.exc import IntegrityError
 from app.core.config import settings
+from app.services.decrypt_cache import DecryptCache, decrypt_cache
 import logging
 
 logger = logging.getLogger(__name__)
 
 # Initialize Fernet cipher
 _fernet: Fernet | None = None
+# Set in pool workers, which may not see the parent's settings
+_blind_index_key: bytes | None = None
 
 
 def get_fernet() -> Fernet:
@@ -50,11 +69,270 @@ def decrypt_field(encrypted_value: str) -> str:
         raise
 
 
+def _decrypt_chunk(tokens: list[Optional[str]]) -> list[Optional[str]]:
+    """Decrypt tokens in order; None for empty or undecryptable values."""
+    fernet = get_fernet()
+    decrypted: list[Optional[str]] = []
+    for token in tokens:
+        if not token:
+            decrypted.append(None)
+            continue
+        try:
+            decrypted.append(fernet.decrypt(token.encode()).decode())
+        except InvalidToken:
+            decrypted.append(None)
+    return decrypted
+
+
+def _init_decrypt_worker(key: str, index_key: Optional[bytes] = None) -> None:
+    global _fernet, _blind_index_key
+    _fernet = Fernet(key.encode())
+    _blind_index_key = index_key
+
+
+_decrypt_pool: Executor | None = None
+_decrypt_pool_lock = threading.Lock()
+
+
+def get_decrypt_pool() -> Executor:
+    """
+    Shared pool for large decrypt (and bulk import mask) batches, created on first use.
+    Fernet's HMAC and AES calls hold the GIL, so the default pool uses
+    processes (spawned, so the app's threads are not forked into them).
+    """
+    global _decrypt_pool
+    with _decrypt_pool_lock:
+        if _decrypt_pool is None:
+            workers = settings.DECRYPT_WORKERS or os.cpu_count() or 1
+            if settings.DECRYPT_POOL == "thread":
+                _decrypt_pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="decrypt")
+            else:
+                _decrypt_pool = ProcessPoolExecutor(
+                    max_workers=workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_decrypt_worker,
+                    initargs=(settings.FERNET_KEY, get_blind_index_key()),
+                )
+        return _decrypt_pool
+
+
+def shutdown_decrypt_pool() -> None:
+    global _decrypt_pool
+    with _decrypt_pool_lock:
+        pool, _decrypt_pool = _decrypt_pool, None
+    if pool is not None:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+def decrypt_fields(
+    tokens: Sequence[Optional[str]],
+    chunk_size: Optional[int] = None,
+    executor: Optional[Executor] = None,
+    cache: Optional[DecryptCache] = None,
+) -> list[Optional[str]]:
+    """
+    Decrypt a batch of Fernet tokens, preserving order.
+    Returns None for empty or undecryptable tokens so callers can fall back per value.
+
+    Batches of at least DECRYPT_PARALLEL_THRESHOLD tokens (or any batch when an
+    executor is passed) are split into chunk_size chunks decrypted on the pool;
+    smaller ones are not worth the hand-off and are decrypted inline. With a
+    cache, only the tokens it does not hold are decrypted.
+    """
+    tokens = list(tokens)
+    decrypted: list[Optional[str]] = [None] * len(tokens)
+    pending = list(range(len(tokens)))
+    if cache is not None and cache.enabled:
+        pending = []
+        for index, token in enumerate(tokens):
+            if token:
+                decrypted[index] = cache.get(token)
+                if decrypted[index] is None:
+                    pending.append(index)
+    missing = [tokens[index] for index in pending]
+
+    if executor is None and (len(missing) < settings.DECRYPT_PARALLEL_THRESHOLD or settings.DECRYPT_WORKERS == 1):
+        results = _decrypt_chunk(missing)
+    else:
+        executor = executor or get_decrypt_pool()
+        chunk_size = chunk_size or settings.DECRYPT_CHUNK_SIZE
+        chunks = [missing[start:start + chunk_size] for start in range(0, len(missing), chunk_size)]
+        results = []
+        # Executor.map yields results in submission order
+        for part in executor.map(_decrypt_chunk, chunks):
+            results.extend(part)
+
+    for index, plaintext in zip(pending, results):
+        decrypted[index] = plaintext
+        if cache is not None and plaintext is not None:
+            cache.put(tokens[index], plaintext)
+    return decrypted
+
+
+def decrypt_patients(
+    patients: Sequence,
+    executor: Optional[Executor] = None,
+    cache: Optional[DecryptCache] = None,
+) -> list[tuple[Optional[str], Optional[str]]]:
+    """
+    (name, contact) in clear for each patient, in order, with one batched decrypt.
+    Values that are not encrypted or fail to decrypt fall back to the stored plaintext.
+    """
+    tokens: list[Optional[str]] = []
+    for patient in patients:
+        tokens.append(patient.anonymized_name)
+        tokens.append(patient.anonymized_contact)
+    decrypted = decrypt_fields(tokens, executor=executor, cache=cache)
+    return [
+        (decrypted[2 * i] or patient.name, decrypted[2 * i + 1] or patient.contact)
+        for i, patient in enumerate(patients)
+    ]
+
+
+def get_blind_index_key() -> bytes:
+    """HMAC key for the search blind index; derived from SECRET_KEY when BLIND_INDEX_KEY is unset."""
+    if _blind_index_key is not None:
+        return _blind_index_key
+    if settings.BLIND_INDEX_KEY:
+        return settings.BLIND_INDEX_KEY.encode()
+    return hmac.new(settings.SECRET_KEY.encode(), b"patient-blind-index", hashlib.sha256).digest()
+
+
+def normalize_name(value: Optional[str]) -> str:
+    """Case- and width-folded name with single spaces between words."""
+    return " ".join(unicodedata.normalize("NFKC", value or "").casefold().split())
+
+
+def normalize_contact(value: Optional[str]) -> str:
+    """Email addresses case-folded; anything else (phone numbers) reduced to its digits."""
+    folded = "".join(unicodedata.normalize("NFKC", value or "").casefold().split())
+    if "@" in folded:
+        return folded
+    return re.sub(r"\D", "", folded) or folded
+
+
+def blind_index(kind: str, normalized: str, key: Optional[bytes] = None) -> str:
+    """Keyed token for a normalized value; kind keeps name, prefix and contact tokens apart."""
+    digest = hmac.new(key or get_blind_index_key(), f"{kind}:{normalized}".encode(), hashlib.sha256)
+    return digest.hexdigest()[:32]
+
+
+def name_prefix_terms(normalized: str) -> list[str]:
+    """
+    The prefixes indexed for a normalized name: each word cut at
+    BLIND_INDEX_MIN_PREFIX..BLIND_INDEX_MAX_PREFIX characters. Words shorter
+    than the minimum are indexed whole.
+    """
+    terms: set[str] = set()
+    for word in normalized.split():
+        longest = min(len(word), settings.BLIND_INDEX_MAX_PREFIX)
+        for length in range(min(settings.BLIND_INDEX_MIN_PREFIX, longest), longest + 1):
+            terms.add(word[:length])
+    return sorted(terms)
+
+
+def blind_index_values(name: Optional[str], contact: Optional[str]) -> dict:
+    """
+    The search columns of a patient (name_bidx, contact_bidx, name_tokens) from
+    its plaintext name and contact. Only HMAC outputs are stored; the
+    patient_name_tokens rows follow name_tokens through triggers.
+    """
+    key = get_blind_index_key()
+    normalized_name = normalize_name(name)
+    normalized_contact = normalize_contact(contact)
+    return {
+        "name_bidx": blind_index("name", normalized_name, key) if normalized_name else None,
+        "contact_bidx": blind_index("contact", normalized_contact, key) if normalized_contact else None,
+        "name_tokens": json.dumps(
+            sorted({blind_index("name-prefix", term, key) for term in name_prefix_terms(normalized_name)})
+        ),
+    }
+
+
+def apply_blind_index(patient, name: Optional[str], contact: Optional[str]) -> None:
+    """Set the search columns of a patient from its plaintext name and contact."""
+    for column, value in blind_index_values(name, contact).items():
+        setattr(patient, column, value)
+
+
+def _mask_chunk(pairs: list[tuple[Optional[str], Optional[str]]]) -> list[dict]:
+    """Encrypted name/contact and blind index for each (name, contact), in order."""
+    fernet = get_fernet()
+    masked = []
+    for name, contact in pairs:
+        values = blind_index_values(name, contact)
+        values["anonymized_name"] = fernet.encrypt(name.encode()).decode() if name else None
+        values["anonymized_contact"] = fernet.encrypt(contact.encode()).decode() if contact else None
+        masked.append(values)
+    return masked
+
+
+def mask_values(
+    pairs: Sequence[tuple[Optional[str], Optional[str]]],
+    chunk_size: Optional[int] = None,
+    executor: Optional[Executor] = None,
+) -> list[dict]:
+    """
+    The columns mask_patient sets, for many (name, contact) pairs at once and
+    without Patient objects (bulk inserts), in order. Goes to the decrypt pool
+    under the same rules as decrypt_fields, counting two fields per pair.
+    """
+    pairs = list(pairs)
+    if executor is None and (2 * len(pairs) < settings.DECRYPT_PARALLEL_THRESHOLD or settings.DECRYPT_WORKERS == 1):
+        return _mask_chunk(pairs)
+    executor = executor or get_decrypt_pool()
+    chunk_size = chunk_size or settings.DECRYPT_CHUNK_SIZE
+    masked: list[dict] = []
+    for part in executor.map(_mask_chunk, [pairs[start:start + chunk_size] for start in range(0, len(pairs), chunk_size)]):
+        masked.extend(part)
+    return masked
+
+
+def backfill_blind_indexes(batch_size: Optional[int] = None, rebuild: bool = False) -> int:
+    """
+    Compute the blind index for patients that have none (or for every patient
+    with rebuild=True, after BLIND_INDEX_KEY changes), batch_size rows per
+    short transaction in patient_id order. Returns the number of patients indexed.
+    """
+    from app.db import models
+    from app.db.session import session_scope
+
+    batch_size = batch_size or settings.BLIND_INDEX_BACKFILL_BATCH_SIZE
+    last_id, indexed = 0, 0
+    while True:
+        with session_scope() as db:
+            query = db.query(models.Patient).filter(models.Patient.patient_id > last_id)
+            if not rebuild:
+                query = query.filter(models.Patient.name_bidx.is_(None))
+            patients = query.order_by(models.Patient.patient_id).limit(batch_size).all()
+            if not patients:
+                break
+            for patient, (name, contact) in zip(patients, decrypt_patients(patients)):
+                apply_blind_index(patient, name, contact)
+            last_id = patients[-1].patient_id
+        indexed += len(patients)
+    return indexed
+
+
+def run_blind_index_backfill() -> int:
+    """
+    Scheduled entry point: index patients created before the blind index
+    existed (or imported without going through mask_patient).
+    """
+    indexed = backfill_blind_indexes()
+    print(f"[SEARCH] Blind-indexed {indexed} patients")
+    return indexed
+
+
 def mask_patient(patient) -> None:
     """
     Anonymize patient data by encrypting sensitive fields.
-    Stores encrypted values in anonymized_name and anonymized_contact.
+    Stores encrypted values in anonymized_name and anonymized_contact,
+    and refreshes the search blind index.
     """
+    # The tokens being replaced must not keep their plaintext in the raw-view cache
+    decrypt_cache.discard(patient.anonymized_name)
+    decrypt_cache.discard(patient.anonymized_contact)
     if patient.name:
         try:
             patient.anonymized_name = encrypt_field(patient.name)
@@ -74,24 +352,212 @@ def mask_patient(patient) -> None:
             else:
                 patient.anonymized_contact = "XXX-XXX-XXXX"
 
+    apply_blind_index(patient, patient.name, patient.contact)
+
+
+class AnonymizeRunActive(Exception):
+    """Raised when another live process is already running anonymize-all."""
+
 
-def anonymize_all_patients(db) -> int:
+def _pending_patients_filter(models):
+    # Patients without an encrypted name, or with a contact that was never encrypted
+    return or_(
+        models.Patient.anonymized_name.is_(None),
+        models.Patient.anonymized_name == "",
+        and_(
+            models.Patient.contact.isnot(None),
+            models.Patient.contact != "",
+            or_(models.Patient.anonymized_contact.is_(None), models.Patient.anonymized_contact == ""),
+        ),
+    )
+
+
+def claim_anonymize_run(user_id: Optional[int] = None, owner: Optional[str] = None) -> int:
     """
-    Anonymize all patients in the database.
-    Returns count of anonymized patients.
+    Start an anonymize-all run, or take over the latest one if it failed or
+    its process stopped heartbeating; returns its run_id. Raises
+    AnonymizeRunActive while another process is still working on a run.
     """
     from app.db import models
-    
-    patients = db.query(models.Patient).all()
-    count = 0
-    
-    for patient in patients:
-        if not patient.anonymized_name or not patient.anonymized_contact:
-            mask_patient(patient)
-            count += 1
-    
-    db.commit()
-    return count
+    from app.db.session import session_scope
+
+    owner = owner or f"{socket.gethostname()}:{os.getpid()}"
+    now = datetime.utcnow()
+    stale_before = now - timedelta(seconds=settings.ANONYMIZE_STALE_SECONDS)
+    run_table = models.AnonymizeRun
+    with session_scope() as db:
+        run = db.query(run_table).order_by(run_table.run_id.desc()).first()
+        if run is not None and run.status in ("running", "failed"):
+            # Conditional so two processes cannot both take over the same run
+            claimed = db.execute(
+                update(run_table)
+                .where(
+                    run_table.run_id == run.run_id,
+                    run_table.updated_at == run.updated_at,
+                    or_(run_table.status == "failed", run_table.updated_at < stale_before),
+                )
+                .values(status="running", owner=owner, updated_at=now, error=None, rows_per_second=None)
+            ).rowcount
+            if not claimed:
+                raise AnonymizeRunActive(f"Anonymization run {run.run_id} is in progress")
+            remaining = (
+                db.query(func.count(models.Patient.patient_id))
+                .filter(models.Patient.patient_id > run.last_patient_id, _pending_patients_filter(models))
+                .scalar()
+            )
+            db.execute(update(run_table).where(run_table.run_id == run.run_id).values(total=run.processed + remaining))
+            return run.run_id
+
+        total = db.query(func.count(models.Patient.patient_id)).filter(_pending_patients_filter(models)).scalar()
+        run = run_table(
+            status="running", owner=owner, started_by=user_id, started_at=now, updated_at=now,
+            last_patient_id=0, processed=0, total=total,
+        )
+        db.add(run)
+        try:
+            db.flush()
+        except IntegrityError:
+            # Another process inserted its running row first (uq_anonymize_runs_running)
+            raise AnonymizeRunActive("An anonymization run is in progress")
+        return run.run_id
+
+
+def _finish_anonymize_run(run_id: int, status: str, error: Optional[str] = None) -> None:
+    from app.db import models
+    from app.db.session import session_scope
+
+    now = datetime.utcnow()
+    with session_scope() as db:
+        db.execute(
+            update(models.AnonymizeRun)
+            .where(models.AnonymizeRun.run_id == run_id)
+            .values(status=status, error=error, updated_at=now, finished_at=now if status == "completed" else None)
+        )
+
+
+def run_anonymize_all(run_id: int, chunk_size: Optional[int] = None, executor: Optional[Executor] = None) -> int:
+    """
+    Anonymize the pending patients of a claimed run, walking patient_id after
+    its checkpoint. Each window of chunk_size * workers patients is masked on
+    the decrypt pool in one call; every chunk_size rows are then written with
+    one executemany, in the same transaction as the run's new checkpoint and
+    throughput. Returns the number of patients anonymized by this call.
+
+    On an error the run is marked failed and the error re-raised; masked
+    chunks stay committed and claim_anonymize_run resumes after them.
+    """
+    from app.db import models
+    from app.db.session import ReadSessionLocal, session_scope
+
+    chunk_size = chunk_size or settings.ANONYMIZE_CHUNK_SIZE
+    window_size = chunk_size * max(1, settings.DECRYPT_WORKERS or os.cpu_count() or 1)
+    run_table = models.AnonymizeRun
+    started = time.monotonic()
+    anonymized = 0
+    try:
+        with session_scope() as db:
+            last_id = db.get(run_table, run_id).last_patient_id
+        while True:
+            with ReadSessionLocal() as db:
+                window = db.execute(
+                    select(
+                        models.Patient.patient_id, models.Patient.name, models.Patient.contact,
+                        models.Patient.anonymized_name, models.Patient.anonymized_contact,
+                    )
+                    .where(models.Patient.patient_id > last_id, _pending_patients_filter(models))
+                    .order_by(models.Patient.patient_id)
+                    .limit(window_size)
+                ).all()
+            if not window:
+                break
+            masked = mask_values([(row.name, row.contact) for row in window], chunk_size=chunk_size, executor=executor)
+            for start in range(0, len(window), chunk_size):
+                rows = window[start:start + chunk_size]
+                anonymized += len(rows)
+                last_id = rows[-1].patient_id
+                with session_scope() as db:
+                    db.execute(update(models.Patient), [
+                        {"patient_id": row.patient_id, **columns}
+                        for row, columns in zip(rows, masked[start:start + chunk_size])
+                    ])
+                    db.execute(
+                        update(run_table)
+                        .where(run_table.run_id == run_id)
+                        .values(
+                            last_patient_id=last_id,
+                            processed=run_table.processed + len(rows),
+                            updated_at=datetime.utcnow(),
+                            rows_per_second=anonymized / max(time.monotonic() - started, 1e-6),
+                        )
+                    )
+                # The replaced tokens must not keep their plaintext in the raw-view cache
+                for row in rows:
+                    decrypt_cache.discard(row.anonymized_name)
+                    decrypt_cache.discard(row.anonymized_contact)
+    except Exception as e:
+        logger.error(f"Anonymization run {run_id} failed after {anonymized} patients: {e}")
+        _finish_anonymize_run(run_id, "failed", error=str(e))
+        raise
+    _finish_anonymize_run(run_id, "completed")
+    return anonymized
+
+
+def anonymize_all_patients(db=None, chunk_size: Optional[int] = None, user_id: Optional[int] = None) -> int:
+    """
+    Anonymize every pending patient through a checkpointed run (claiming a new
+    one or resuming an interrupted one) and return how many were anonymized.
+    Chunks commit in their own transactions, so any pending changes in db are
+    committed first for the walk to see them.
+    """
+    if db is not None:
+        db.commit()
+    return run_anonymize_all(claim_anonymize_run(user_id), chunk_size=chunk_size)
+
+
+def get_anonymize_status(run_id: Optional[int] = None) -> Optional[dict]:
+    """Progress of an anonymize-all run (the latest by default), or None if there is none."""
+    from app.db import models
+    from app.db.session import session_scope
+
+    with session_scope() as db:
+        query = db.query(models.AnonymizeRun)
+        if run_id is not None:
+            query = query.filter(models.AnonymizeRun.run_id == run_id)
+        run = query.order_by(models.AnonymizeRun.run_id.desc()).first()
+        if run is None:
+            return None
+        remaining = max((run.total or 0) - run.processed, 0)
+        return {
+            "run_id": run.run_id,
+            "status": run.status,
+            "processed": run.processed,
+            "total": run.total,
+            "percent": round(100 * run.processed / run.total, 1) if run.total else 100.0,
+            "rows_per_second": round(run.rows_per_second, 1) if run.rows_per_second else None,
+            "eta_seconds": (
+                round(remaining / run.rows_per_second, 1)
+                if run.status == "running" and run.rows_per_second else None
+            ),
+            "last_patient_id": run.last_patient_id,
+            "started_at": run.started_at,
+            "updated_at": run.updated_at,
+            "finished_at": run.finished_at,
+            "error": run.error,
+        }
+
+
+def get_anonymized_patients_data(patients: Sequence, role: str, raw: bool = False, use_cache: bool = True) -> list[dict]:
+    """
+    get_anonymized_patient_data for a list of patients, in order. For admin raw
+    reads all names and contacts are decrypted in one batch, through the
+    decrypted-value cache since admins reopen the same patients.
+    """
+    if role == "admin" and raw:
+        data = [get_anonymized_patient_data(patient, role, raw=False) for patient in patients]
+        for row, (name, contact) in zip(data, decrypt_patients(patients, cache=decrypt_cache if use_cache else None)):
+            row["name"], row["contact"] = name, contact
+        return data
+    return [get_anonymized_patient_data(patient, role, raw) for patient in patients]
 
 
 def get_anonymized_patient_data(patient, role: str, raw: bool = False) -> dict:
@@ -104,14 +570,8 @@ def get_anonymized_patient_data(patient, role: str, raw: bool = False) -> dict:
     - User: no access
     """
     if role == "admin" and raw:
-        # Admin can see raw data (decrypted)
-        try:
-            name = decrypt_field(patient.anonymized_name) if patient.anonymized_name else patient.name
-            contact = decrypt_field(patient.anonymized_contact) if patient.anonymized_contact else patient.contact
-        except Exception:
-            # Fallback to original if decryption fails
-            name = patient.name
-            contact = patient.contact
+        # Admin can see raw data (decrypted, falling back to the original if decryption fails)
+        name, contact = decrypt_patients([patient], cache=decrypt_cache)[0]
         return {
             "patient_id": patient.patient_id,
             "name": name,
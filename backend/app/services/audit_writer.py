@@ -0,0 +1,327 @@
+"""
+Background writer for audit-log rows.
+
+log_action hands rows to a bounded in-process queue; a daemon thread drains
+it and inserts rows in batches (one executemany per transaction) every
+AUDIT_BATCH_SIZE rows or AUDIT_FLUSH_INTERVAL_MS, whichever comes first.
+
+A batch that fails is retried with exponential backoff, then inserted one row
+per transaction so a single bad row cannot sink its neighbours. Rows that
+still fail are appended to the dead-letter file (JSON lines) for replay with
+replay_dead_letters; a row is never discarded without a trace.
+"""
+import atexit
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Optional
+
+from sqlalchemy import insert
+
+from app.core.config import settings
+from app.db import models
+from app.db.session import SessionLocal
+
+logger = logging.getLogger("hospital_cia.audit")
+
+_STOP = object()
+
+
+class AuditWriter:
+    """
+    Group-committing audit-log writer.
+
+    Queue-full policy:
+    - "block": wait up to AUDIT_QUEUE_BLOCK_TIMEOUT_MS for space, then write inline
+    - "inline": write the row synchronously in the caller
+    - "drop": discard the row and count it (only for non-critical deployments)
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable = SessionLocal,
+        max_queue_size: int = 10000,
+        batch_size: int = 200,
+        flush_interval_ms: int = 50,
+        full_policy: str = "block",
+        block_timeout_ms: int = 100,
+        retries: int = 3,
+        retry_backoff_ms: int = 50,
+        dead_letter_path: Optional[str] = None,
+    ):
+        if full_policy not in ("block", "inline", "drop"):
+            raise ValueError(f"Unknown audit queue policy: {full_policy}")
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval_ms / 1000
+        self.full_policy = full_policy
+        self.block_timeout = block_timeout_ms / 1000
+        self.retries = max(0, retries)
+        self.retry_backoff = retry_backoff_ms / 1000
+        self.dead_letter_path = dead_letter_path
+        self._dead_letter_lock = threading.Lock()
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue_size)
+        self._thread: Optional[threading.Thread] = None
+        self._commit_listeners: list[Callable[[], None]] = []
+        self._start_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            "enqueued": 0,
+            "written": 0,
+            "written_inline": 0,
+            "dropped": 0,
+            "failed": 0,
+            "retries": 0,
+            "row_fallbacks": 0,
+            "dead_lettered": 0,
+            "flushes": 0,
+            "max_batch_size": 0,
+            "last_flush_ms": 0.0,
+            "max_flush_ms": 0.0,
+            "total_flush_ms": 0.0,
+        }
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        with self._start_lock:
+            if self.running:
+                return
+            self._thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+            self._thread.start()
+
+    def submit(self, row: dict) -> None:
+        """Queue a row for the next batch, applying the queue-full policy."""
+        if self.try_submit(row):
+            return
+        if self.full_policy == "block":
+            try:
+                self._queue.put(row, timeout=self.block_timeout)
+                self._count("enqueued")
+                return
+            except queue.Full:
+                pass
+        elif self.full_policy == "drop":
+            self._count("dropped")
+            logger.warning("Audit queue full, dropped row", extra={"action": row.get("action")})
+            return
+        self.write_inline([row])
+
+    def try_submit(self, row: dict) -> bool:
+        """Queue a row without blocking; False when the queue is full."""
+        self.start()
+        try:
+            self._queue.put_nowait(row)
+        except queue.Full:
+            return False
+        self._count("enqueued")
+        return True
+
+    def add_commit_listener(self, callback: Callable[[], None]) -> None:
+        """Call callback (from the writer thread) after every committed batch."""
+        self._commit_listeners.append(callback)
+
+    def write_inline(self, rows: list[dict]) -> None:
+        """Insert rows in the calling thread (queue-full fallback)."""
+        self._write_batch(rows)
+        self._count("written_inline", len(rows))
+
+    def flush(self, timeout: Optional[float] = None) -> None:
+        """Block until every row queued so far has been written."""
+        if not self.running:
+            return
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._queue.all_tasks_done:
+            while self._queue.unfinished_tasks:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return
+                self._queue.all_tasks_done.wait(remaining)
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """Drain pending rows and stop the flusher thread."""
+        if not self.running:
+            return
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+        self._thread = None
+
+    def get_metrics(self) -> dict:
+        with self._stats_lock:
+            stats = dict(self._stats)
+        flushes = stats["flushes"] or 1
+        stats["avg_flush_ms"] = round(stats["total_flush_ms"] / flushes, 3)
+        stats["queue_depth"] = self._queue.qsize()
+        stats["queue_capacity"] = self._queue.maxsize
+        stats["running"] = self.running
+        return stats
+
+    def _count(self, key: str, amount: int = 1) -> None:
+        with self._stats_lock:
+            self._stats[key] += amount
+
+    def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            first = self._queue.get()
+            if first is _STOP:
+                self._queue.task_done()
+                break
+            batch = [first]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    self._queue.task_done()
+                    stopping = True
+                    break
+                batch.append(item)
+            try:
+                self._write_batch(batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+        # Drain anything queued after the stop marker
+        leftover = []
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            self._queue.task_done()
+            if item is not _STOP:
+                leftover.append(item)
+        if leftover:
+            self._write_batch(leftover)
+
+    def _insert(self, rows: list[dict]) -> None:
+        session = self.session_factory()
+        try:
+            session.execute(insert(models.Log), rows)
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+    def _write_batch(self, rows: list[dict]) -> None:
+        started = time.perf_counter()
+        for attempt in range(self.retries + 1):
+            try:
+                self._insert(rows)
+                break
+            except Exception as e:
+                if attempt == self.retries:
+                    logger.error(f"Failed to persist {len(rows)} audit rows after {attempt + 1} attempts: {str(e)}")
+                    self._write_rows_individually(rows)
+                    return
+                self._count("retries")
+                logger.warning(f"Audit batch insert failed (attempt {attempt + 1}), retrying: {str(e)}")
+                time.sleep(self.retry_backoff * 2 ** attempt)
+        self._record_flush(len(rows), started)
+
+    def _write_rows_individually(self, rows: list[dict]) -> None:
+        """Insert each row in its own transaction; dead-letter the ones that still fail."""
+        started = time.perf_counter()
+        self._count("row_fallbacks")
+        written, rejected = 0, []
+        for row in rows:
+            try:
+                self._insert([row])
+                written += 1
+            except Exception as e:
+                rejected.append((row, str(e)))
+        if written:
+            self._record_flush(written, started)
+        if rejected:
+            self._count("failed", len(rejected))
+            self._dead_letter(rejected)
+
+    def _dead_letter(self, rejected: list[tuple[dict, str]]) -> None:
+        lines = [
+            json.dumps({**row, "timestamp": row["timestamp"].isoformat() if row.get("timestamp") else None,
+                        "error": error})
+            for row, error in rejected
+        ]
+        if self.dead_letter_path:
+            try:
+                with self._dead_letter_lock:
+                    os.makedirs(os.path.dirname(self.dead_letter_path) or ".", exist_ok=True)
+                    with open(self.dead_letter_path, "a", encoding="utf-8") as f:
+                        f.write("\n".join(lines) + "\n")
+                self._count("dead_lettered", len(lines))
+                logger.error(f"Dead-lettered {len(lines)} audit rows to {self.dead_letter_path}")
+                return
+            except OSError as e:
+                logger.error(f"Failed to write audit dead-letter file: {str(e)}")
+        # Last resort: the rows themselves go to the audit file log
+        for line in lines:
+            logger.critical(f"Unpersisted audit row: {line}")
+
+    def replay_dead_letters(self) -> dict:
+        """
+        Insert the rows in the dead-letter file, one transaction per row. Rows
+        that fail again are kept in the file; returns {"replayed", "remaining"}.
+        """
+        if not self.dead_letter_path:
+            return {"replayed": 0, "remaining": 0}
+        with self._dead_letter_lock:
+            try:
+                with open(self.dead_letter_path, encoding="utf-8") as f:
+                    lines = [line for line in f if line.strip()]
+            except FileNotFoundError:
+                return {"replayed": 0, "remaining": 0}
+            remaining = []
+            for line in lines:
+                entry = json.loads(line)
+                row = {key: entry.get(key) for key in ("user_id", "role", "action", "details")}
+                row["timestamp"] = datetime.fromisoformat(entry["timestamp"]) if entry.get("timestamp") else datetime.utcnow()
+                try:
+                    self._insert([row])
+                except Exception as e:
+                    remaining.append(json.dumps({**entry, "error": str(e)}))
+            tmp_path = self.dead_letter_path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write("".join(line + "\n" for line in remaining))
+            os.replace(tmp_path, self.dead_letter_path)
+        return {"replayed": len(lines) - len(remaining), "remaining": len(remaining)}
+
+    def _record_flush(self, count: int, started: float) -> None:
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        with self._stats_lock:
+            self._stats["written"] += count
+            self._stats["flushes"] += 1
+            self._stats["max_batch_size"] = max(self._stats["max_batch_size"], count)
+            self._stats["last_flush_ms"] = round(elapsed_ms, 3)
+            self._stats["max_flush_ms"] = round(max(self._stats["max_flush_ms"], elapsed_ms), 3)
+            self._stats["total_flush_ms"] += elapsed_ms
+        for callback in self._commit_listeners:
+            try:
+                callback()
+            except Exception as e:
+                logger.error(f"Audit commit listener failed: {str(e)}")
+
+audit_writer = AuditWriter(
+    max_queue_size=settings.AUDIT_QUEUE_MAX_SIZE,
+    batch_size=settings.AUDIT_BATCH_SIZE,
+    flush_interval_ms=settings.AUDIT_FLUSH_INTERVAL_MS,
+    full_policy=settings.AUDIT_QUEUE_FULL_POLICY,
+    block_timeout_ms=settings.AUDIT_QUEUE_BLOCK_TIMEOUT_MS,
+    retries=settings.AUDIT_WRITE_RETRIES,
+    retry_backoff_ms=settings.AUDIT_RETRY_BACKOFF_MS,
+    dead_letter_path=settings.AUDIT_DEAD_LETTER_PATH,
+)
+atexit.register(audit_writer.stop)
@@ -6,10 +6,11 @@ from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
+from sqlalchemy import delete, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.config import settings
-from app.db.session import get_db_session
+from app.db.session import get_async_db_session, get_db_session, session_scope
 from app.db import models
 from app.services.email_service import send_mfa_code
 from app.services.logging_service import log_action
@@ -65,7 +66,7 @@ def generate_mfa_code() -> str:
 
 async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db_session),
+    db: AsyncSession = Depends(get_async_db_session),
 ) -> models.User:
     """Get current authenticated user from JWT token."""
     credentials_exception = HTTPException(
@@ -85,7 +86,7 @@ async def get_current_user(
         print("JWT DECODE ERROR:", type(e).__name__, str(e))
         raise credentials_exception
     
-    user = db.query(models.User).filter(models.User.user_id == user_id).first()
+    user = await db.scalar(select(models.User).where(models.User.user_id == user_id))
     if user is None:
         raise credentials_exception
     if not user.is_active:
@@ -109,16 +110,15 @@ def require_role(*allowed_roles: str):
     return role_checker
 
 
-async def create_mfa_code(user_id: int, db: Session) -> tuple[str, str]:
+async def create_mfa_code(user_id: int, db: AsyncSession) -> tuple[str, str]:
     """
     Create and store MFA code for user.
     Returns (mfa_code, temp_token).
     """
     # Clean up expired codes
-    db.query(models.MFACode).filter(
-        models.MFACode.expires_at < datetime.utcnow()
-    ).delete()
-    db.commit()
+    await db.execute(
+        delete(models.MFACode).where(models.MFACode.expires_at < datetime.utcnow())
+    )
     
     # Generate code and token
     mfa_code = generate_mfa_code()
@@ -135,25 +135,41 @@ async def create_mfa_code(user_id: int, db: Session) -> tuple[str, str]:
         used=False
     )
     db.add(mfa_record)
-    db.commit()
-    db.refresh(mfa_record)
+    await db.commit()
     
     return mfa_code, temp_token
 
 
+def run_mfa_code_cleanup() -> int:
+    """
+    Scheduled entry point: delete MFA codes that expired or were already used.
+    """
+    with session_scope() as db:
+        deleted = db.execute(
+            delete(models.MFACode).where(
+                or_(models.MFACode.expires_at < datetime.utcnow(), models.MFACode.used == True)
+            )
+        ).rowcount
+
+    print(f"[MFA] Removed {deleted} expired or used MFA codes")
+    return deleted
+
+
 async def verify_mfa_and_create_session(
     temp_token: str,
     code: str,
-    db: Session
+    db: AsyncSession
 ) -> tuple[models.User, str]:
     """
     Verify MFA code and create JWT session.
     Returns (user, access_token).
     """
-    mfa_record = db.query(models.MFACode).filter(
-        models.MFACode.temp_token == temp_token,
-        models.MFACode.used == False
-    ).first()
+    mfa_record = await db.scalar(
+        select(models.MFACode).where(
+            models.MFACode.temp_token == temp_token,
+            models.MFACode.used == False
+        )
+    )
     
     if not mfa_record:
         raise HTTPException(
@@ -163,7 +179,7 @@ async def verify_mfa_and_create_session(
     
     if mfa_record.expires_at < datetime.utcnow():
         mfa_record.used = True
-        db.commit()
+        await db.commit()
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="MFA code has expired"
@@ -177,10 +193,10 @@ async def verify_mfa_and_create_session(
     
     # Mark code as used
     mfa_record.used = True
-    db.commit()
+    await db.commit()
     
     # Get user
-    user = db.query(models.User).filter(models.User.user_id == mfa_record.user_id).first()
+    user = await db.scalar(select(models.User).where(models.User.user_id == mfa_record.user_id))
     if not user or not user.is_active:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
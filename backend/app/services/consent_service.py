@@ -0,0 +1,106 @@
+"""
+Consent statistics backed by the trigger-maintained consent_counters and
+consent_daily tables.
+
+Triggers on users update the counters in the same transaction as every
+registration, consent change, (de)activation or deletion, and copy them into
+today's consent_daily row. reconcile_consent_counters recomputes the totals
+from users to repair drift after manual edits or restores.
+"""
+from datetime import date, timedelta
+from typing import Optional
+
+from sqlalchemy import func, select, text
+from sqlalchemy.orm import Session
+
+from app.db import models
+from app.db.session import session_scope
+
+
+def consent_totals(db: Session) -> tuple[int, int]:
+    """(active users, consenting active users) from the counter row."""
+    row = db.get(models.ConsentCounter, 1)
+    if row is None:
+        return 0, 0
+    return row.total_users, row.consented_users
+
+
+def consent_percentage(total_users: int, consented_users: int) -> float:
+    return round(consented_users / total_users * 100, 2) if total_users else 0.0
+
+
+def consent_history(db: Session, start: date, end: date) -> list[tuple[date, int, int]]:
+    """
+    (day, total, consented) for every day in [start, end]. Days without a change
+    carry the previous day's totals forward.
+    """
+    rows = db.execute(
+        select(models.ConsentDaily)
+        .where(models.ConsentDaily.day <= end)
+        .where(
+            models.ConsentDaily.day >= func.coalesce(
+                select(func.max(models.ConsentDaily.day)).where(models.ConsentDaily.day <= start).scalar_subquery(),
+                start,
+            )
+        )
+        .order_by(models.ConsentDaily.day)
+    ).scalars().all()
+
+    history = []
+    current = (0, 0)
+    index = 0
+    day = start
+    while day <= end:
+        while index < len(rows) and rows[index].day <= day:
+            current = (rows[index].total_users, rows[index].consented_users)
+            index += 1
+        history.append((day, *current))
+        day += timedelta(days=1)
+    return history
+
+
+def reconcile_consent_counters(db: Session) -> Optional[dict]:
+    """
+    Recompute the counters from users (one aggregate scan) in the caller's
+    transaction. Returns the drift that was corrected, or None when consistent.
+    """
+    total_users, consented_users = db.execute(
+        select(
+            func.count(),
+            func.coalesce(func.sum(models.User.gdpr_consent == True), 0),
+        ).where(models.User.is_active == True)
+    ).one()
+    stored = db.get(models.ConsentCounter, 1)
+    if stored is not None and (stored.total_users, stored.consented_users) == (total_users, consented_users):
+        return None
+
+    drift = {
+        "total_users": total_users - (stored.total_users if stored else 0),
+        "consented_users": consented_users - (stored.consented_users if stored else 0),
+    }
+    if stored is None:
+        stored = models.ConsentCounter(counter_id=1)
+        db.add(stored)
+    stored.total_users = total_users
+    stored.consented_users = consented_users
+    db.flush()
+    db.execute(text(models.consent_daily_upsert_sql()))
+    return drift
+
+
+def run_consent_reconciliation() -> Optional[dict]:
+    """
+    Scheduled entry point: repair the consent counters if they drifted from users.
+    """
+    with session_scope() as db:
+        drift = reconcile_consent_counters(db)
+
+    if drift:
+        print(f"[CONSENT] Corrected consent counter drift: {drift}")
+    else:
+        print("[CONSENT] Consent counters consistent")
+    return drift
+
+
+if __name__ == "__main__":
+    run_consent_reconciliation()
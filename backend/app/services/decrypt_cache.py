@@ -0,0 +1,119 @@
+"""
+Bounded in-memory cache of decrypted patient fields for admin raw views.
+
+Entries are keyed by ciphertext: mask_patient writes a fresh Fernet token (new
+IV) whenever a field changes, so a stale plaintext can never be served for a
+rewritten field; the old token is still discarded explicitly so its plaintext
+does not linger until it ages out. Plaintexts are held in bytearrays and
+overwritten with zeros when they are evicted, expire or are discarded. Strings
+handed back to callers are ordinary immutable copies and are not covered.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Optional
+
+from app.core.config import settings
+
+
+class _Entry:
+    __slots__ = ("value", "expires_at", "size")
+
+    def __init__(self, value: bytearray, expires_at: float, size: int):
+        self.value = value
+        self.expires_at = expires_at
+        self.size = size
+
+
+class DecryptCache:
+    """TTL + LRU cache capped by entry count and by the bytes of tokens plus plaintexts."""
+
+    def __init__(
+        self,
+        max_entries: int = 10000,
+        max_bytes: int = 4194304,
+        ttl_seconds: float = 300,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._entries: OrderedDict[str, _Entry] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0, "invalidations": 0}
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and self.max_bytes > 0
+
+    def get(self, token: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None:
+                self._stats["misses"] += 1
+                return None
+            if entry.expires_at <= self._clock():
+                self._remove(token)
+                self._stats["expirations"] += 1
+                self._stats["misses"] += 1
+                return None
+            self._entries.move_to_end(token)
+            self._stats["hits"] += 1
+            return entry.value.decode()
+
+    def put(self, token: str, plaintext: str) -> None:
+        value = bytearray(plaintext.encode())
+        size = len(token) + len(value)
+        if not self.enabled or size > self.max_bytes:
+            return
+        with self._lock:
+            if token in self._entries:
+                self._remove(token)
+            self._entries[token] = _Entry(value, self._clock() + self.ttl_seconds, size)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self._stats["evictions"] += 1
+
+    def discard(self, token: Optional[str]) -> None:
+        """Drop the plaintext for a token that is being overwritten."""
+        if not token:
+            return
+        with self._lock:
+            if token in self._entries:
+                self._remove(token)
+                self._stats["invalidations"] += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            for token in list(self._entries):
+                self._remove(token)
+
+    def get_metrics(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = len(self._entries)
+            stats["bytes"] = self._bytes
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = round(stats["hits"] / lookups, 4) if lookups else 0.0
+        stats["max_entries"] = self.max_entries
+        stats["max_bytes"] = self.max_bytes
+        stats["ttl_seconds"] = self.ttl_seconds
+        return stats
+
+    def _remove(self, token: str) -> None:
+        # Caller holds the lock
+        entry = self._entries.pop(token)
+        self._bytes -= entry.size
+        # Overwrite the plaintext in place before the buffer is released
+        entry.value[:] = bytes(len(entry.value))
+
+
+decrypt_cache = DecryptCache(
+    max_entries=settings.DECRYPT_CACHE_MAX_ENTRIES,
+    max_bytes=settings.DECRYPT_CACHE_MAX_BYTES,
+    ttl_seconds=settings.DECRYPT_CACHE_TTL_SECONDS,
+)
@@ -0,0 +1,129 @@
+"""
+Bulk patient import from CSV or NDJSON.
+
+Rows are validated as they are read; valid rows are gathered into windows of
+batch_size * workers rows, masked (Fernet + blind index) across the decrypt
+pool in one call, then inserted batch_size rows per executemany and committed
+per batch. Invalid rows are reported by line number and skipped; batches
+already committed stay committed if a later one fails.
+"""
+import csv
+import json
+import os
+from datetime import datetime
+from typing import IO, Any, Iterable, Iterator, Optional
+
+from sqlalchemy import insert
+
+from app.core.config import settings
+from app.db.session import session_scope
+from app.db import models
+from app.services import anonymize_service
+
+IMPORT_FORMATS = {
+    "text/csv": "csv",
+    "application/x-ndjson": "ndjson",
+    "application/jsonl": "ndjson",
+}
+
+# (line number, record, error): record is None when the line could not be parsed
+ImportRow = tuple[int, Optional[dict], Optional[str]]
+
+
+def read_csv_rows(text: IO[str]) -> Iterator[ImportRow]:
+    """CSV with a header row naming at least a `name` column; other unknown columns are ignored."""
+    reader = csv.DictReader(text)
+    if reader.fieldnames is None:
+        return
+    reader.fieldnames = [field.strip().lower() for field in reader.fieldnames]
+    if "name" not in reader.fieldnames:
+        raise ValueError("CSV header must include a name column")
+    for record in reader:
+        # line_num is the last physical line read, which differs only for quoted newlines
+        yield reader.line_num, record, None
+
+
+def read_ndjson_rows(text: IO[str]) -> Iterator[ImportRow]:
+    """One JSON object per line; blank lines are skipped."""
+    for line_number, line in enumerate(text, start=1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            yield line_number, None, f"Invalid JSON: {e}"
+            continue
+        if not isinstance(record, dict):
+            yield line_number, None, "Expected a JSON object"
+            continue
+        yield line_number, record, None
+
+
+def validate_row(record: dict[str, Any]) -> dict:
+    """The name/contact/diagnosis of a row, cleaned as create_patient does; ValueError if invalid."""
+    for field in ("name", "contact", "diagnosis"):
+        if record.get(field) is not None and not isinstance(record[field], str):
+            raise ValueError(f"{field} must be a string")
+    name = (record.get("name") or "").strip()
+    contact = (record.get("contact") or "").strip() or None
+    if not name:
+        raise ValueError("name is required")
+    if len(name) > 255:
+        raise ValueError("name is longer than 255 characters")
+    if contact and len(contact) > 255:
+        raise ValueError("contact is longer than 255 characters")
+    return {"name": name, "contact": contact, "diagnosis": record.get("diagnosis") or None}
+
+
+def _insert_window(window: list[dict], batch_size: int, result: dict) -> None:
+    masked = anonymize_service.mask_values(
+        [(row["name"], row["contact"]) for row in window], chunk_size=batch_size
+    )
+    now = datetime.utcnow()
+    for start in range(0, len(window), batch_size):
+        rows = [
+            {**row, **columns, "date_added": now}
+            for row, columns in zip(window[start:start + batch_size], masked[start:start + batch_size])
+        ]
+        # One executemany and one commit per batch keeps each write transaction short
+        with session_scope() as db:
+            db.execute(insert(models.Patient), rows)
+        result["imported"] += len(rows)
+
+
+def import_patients(
+    rows: Iterable[ImportRow],
+    result: Optional[dict] = None,
+    batch_size: Optional[int] = None,
+) -> dict:
+    """
+    Validate and insert rows. Counts are kept in result as batches commit, so
+    a caller still knows what was written if a batch fails:
+    {"imported", "rejected", "errors": [{"line", "error"}], "errors_truncated"}.
+    At most PATIENT_IMPORT_MAX_ERRORS errors are listed; rejected counts all.
+    """
+    batch_size = batch_size or settings.PATIENT_IMPORT_BATCH_SIZE
+    # Enough rows per mask call to give every pool worker a batch
+    window_size = batch_size * max(1, settings.DECRYPT_WORKERS or os.cpu_count() or 1)
+    result = result if result is not None else {}
+    result.update(imported=0, rejected=0, errors=[], errors_truncated=False)
+
+    window: list[dict] = []
+    for line, record, error in rows:
+        if error is None:
+            try:
+                window.append(validate_row(record))
+            except ValueError as e:
+                error = str(e)
+        if error is not None:
+            result["rejected"] += 1
+            if len(result["errors"]) < settings.PATIENT_IMPORT_MAX_ERRORS:
+                result["errors"].append({"line": line, "error": error})
+            else:
+                result["errors_truncated"] = True
+        if len(window) >= window_size:
+            _insert_window(window, batch_size, result)
+            window = []
+    if window:
+        _insert_window(window, batch_size, result)
+    return result
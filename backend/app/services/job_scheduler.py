@@ -0,0 +1,379 @@
+"""
+In-process asyncio scheduler for maintenance jobs, started from the app lifespan.
+
+Every API worker runs a scheduler, so each occurrence of a job is claimed with a
+lease row in scheduler_leases: the first worker to upsert the lease runs it and
+records the occurrence in last_run_at, and every other worker skips it. A job
+whose last recorded occurrence is older than its previous fire time (the
+process was down at the time) is run once on startup.
+
+Job functions are the existing synchronous run_* entry points and run on a
+worker thread, so a long purge never blocks the event loop.
+"""
+import asyncio
+import logging
+import os
+import random
+import socket
+import time
+from datetime import datetime, timedelta
+from typing import Any, Callable, Optional
+
+from sqlalchemy import or_, select, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from app.core.config import settings
+from app.db.session import session_scope
+from app.db import models
+from app.services.anonymize_service import run_blind_index_backfill
+from app.services.auth_service import run_mfa_code_cleanup
+from app.services.consent_service import run_consent_reconciliation
+from app.services.maintenance_service import run_database_backup, run_sqlite_maintenance
+from app.services.retention_service import run_retention_cleanup
+from app.services.rollup_service import run_rollup_catchup
+
+logger = logging.getLogger("hospital_cia.audit")
+
+# Re-check the clock at least this often, so a suspended host or clock change is picked up
+MAX_SLEEP_SECONDS = 60.0
+
+
+def _parse_cron_field(field: str, low: int, high: int) -> set[int]:
+    values: set[int] = set()
+    for part in field.split(","):
+        base, _, step_text = part.partition("/")
+        step = int(step_text) if step_text else 1
+        if base == "*":
+            start, end = low, high
+        elif "-" in base:
+            start, end = (int(bound) for bound in base.split("-", 1))
+        else:
+            start = int(base)
+            end = high if step_text else start
+        if step < 1 or start < low or end > high or start > end:
+            raise ValueError(f"Cron field {field!r} is out of range {low}-{high}")
+        values.update(range(start, end + 1, step))
+    return values
+
+
+class CronTrigger:
+    """
+    Five-field cron expression: minute hour day-of-month month day-of-week
+    (0 or 7 = Sunday), each a *, value, range, list or /step. Evaluated in UTC.
+    As in cron, when both day fields are restricted a day matching either runs.
+    """
+
+    def __init__(self, expression: str):
+        fields = expression.split()
+        if len(fields) != 5:
+            raise ValueError(f"Cron expression {expression!r} must have five fields")
+        self.expression = expression
+        self.minutes = _parse_cron_field(fields[0], 0, 59)
+        self.hours = _parse_cron_field(fields[1], 0, 23)
+        self.days = _parse_cron_field(fields[2], 1, 31)
+        self.months = _parse_cron_field(fields[3], 1, 12)
+        self.weekdays = {day % 7 for day in _parse_cron_field(fields[4], 0, 7)}
+        self._any_day = fields[2] == "*"
+        self._any_weekday = fields[4] == "*"
+
+    @classmethod
+    def daily_at(cls, hhmm: str) -> "CronTrigger":
+        hour, minute = (int(part) for part in hhmm.split(":"))
+        return cls(f"{minute} {hour} * * *")
+
+    def _day_matches(self, moment: datetime) -> bool:
+        day_ok = moment.day in self.days
+        # Python counts Monday as 0, cron counts Sunday as 0
+        weekday_ok = (moment.weekday() + 1) % 7 in self.weekdays
+        if self._any_day:
+            return weekday_ok
+        if self._any_weekday:
+            return day_ok
+        return day_ok or weekday_ok
+
+    def next_after(self, after: datetime) -> datetime:
+        """First fire time strictly after `after`."""
+        candidate = after.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        # Skips whole months/days/hours at a time; four years covers every valid day-of-month
+        limit = candidate + timedelta(days=366 * 4)
+        while candidate <= limit:
+            if candidate.month not in self.months:
+                month_start = candidate.replace(day=1, hour=0, minute=0)
+                candidate = (month_start + timedelta(days=32)).replace(day=1)
+            elif not self._day_matches(candidate):
+                candidate = candidate.replace(hour=0, minute=0) + timedelta(days=1)
+            elif candidate.hour not in self.hours:
+                candidate = candidate.replace(minute=0) + timedelta(hours=1)
+            elif candidate.minute not in self.minutes:
+                candidate += timedelta(minutes=1)
+            else:
+                return candidate
+        raise ValueError(f"Cron expression {self.expression!r} never fires")
+
+    def latest_at_or_before(self, moment: datetime, since: datetime) -> Optional[datetime]:
+        """Most recent fire time in (since, moment], or None if there is none."""
+        latest = None
+        candidate = self.next_after(since)
+        while candidate <= moment:
+            latest = candidate
+            candidate = self.next_after(candidate)
+        return latest
+
+
+class ScheduledJob:
+    """A registered job, its next occurrence and its run counters."""
+
+    def __init__(
+        self,
+        name: str,
+        trigger: CronTrigger,
+        func: Callable[[], Any],
+        jitter_seconds: float = 0,
+        catch_up: bool = True,
+        lease_seconds: Optional[float] = None,
+    ):
+        self.name = name
+        self.trigger = trigger
+        self.func = func
+        self.jitter_seconds = jitter_seconds
+        self.catch_up = catch_up
+        self.lease_seconds = lease_seconds or settings.SCHEDULER_LEASE_SECONDS
+        # The occurrence to run next, and when to actually start it (due_at plus jitter)
+        self.due_at: Optional[datetime] = None
+        self.run_at: Optional[datetime] = None
+        self.running = False
+        self.runs = 0
+        self.succeeded = 0
+        self.failed = 0
+        self.skipped = 0
+        self.total_duration_ms = 0.0
+        self.max_duration_ms = 0.0
+        self.last_duration_ms: Optional[float] = None
+        self.last_started_at: Optional[datetime] = None
+        self.last_outcome: Optional[str] = None
+        self.last_error: Optional[str] = None
+
+    def record_run(self, started_at: datetime, duration_ms: float, error: Optional[Exception]) -> None:
+        self.runs += 1
+        if error is None:
+            self.succeeded += 1
+            self.last_outcome = "succeeded"
+            self.last_error = None
+        else:
+            self.failed += 1
+            self.last_outcome = "failed"
+            self.last_error = str(error)
+        self.last_started_at = started_at
+        self.last_duration_ms = duration_ms
+        self.total_duration_ms += duration_ms
+        self.max_duration_ms = max(self.max_duration_ms, duration_ms)
+
+    def to_dict(self) -> dict:
+        return {
+            "cron": self.trigger.expression,
+            "next_run_at": self.run_at.isoformat() if self.run_at else None,
+            "running": self.running,
+            "runs": self.runs,
+            "succeeded": self.succeeded,
+            "failed": self.failed,
+            "skipped": self.skipped,
+            "last_started_at": self.last_started_at.isoformat() if self.last_started_at else None,
+            "last_outcome": self.last_outcome,
+            "last_error": self.last_error,
+            "last_duration_ms": round(self.last_duration_ms, 2) if self.last_duration_ms is not None else None,
+            "avg_duration_ms": round(self.total_duration_ms / self.runs, 2) if self.runs else 0.0,
+            "max_duration_ms": round(self.max_duration_ms, 2),
+        }
+
+
+def acquire_lease(job_name: str, owner: str, due_at: datetime, now: datetime, lease_seconds: float) -> bool:
+    """
+    Claim the occurrence due_at of a job. Succeeds only if no other worker holds
+    an unexpired lease and nobody has already run this (or a later) occurrence.
+    """
+    lease = models.SchedulerLease
+    statement = sqlite_insert(lease).values(
+        job_name=job_name, owner=owner, leased_until=now + timedelta(seconds=lease_seconds)
+    )
+    statement = statement.on_conflict_do_update(
+        index_elements=["job_name"],
+        set_={"owner": statement.excluded.owner, "leased_until": statement.excluded.leased_until},
+        where=or_(lease.leased_until.is_(None), lease.leased_until < now, lease.owner == owner)
+        & or_(lease.last_run_at.is_(None), lease.last_run_at < due_at),
+    )
+    with session_scope() as db:
+        return db.execute(statement).rowcount == 1
+
+
+def release_lease(job_name: str, owner: str, due_at: datetime, outcome: str, duration_ms: float) -> None:
+    """Record the finished occurrence and free the lease for the next one."""
+    lease = models.SchedulerLease
+    with session_scope() as db:
+        db.execute(
+            update(lease)
+            .where(lease.job_name == job_name, lease.owner == owner)
+            .values(leased_until=None, last_run_at=due_at, last_outcome=outcome, last_duration_ms=duration_ms)
+        )
+
+
+def load_last_runs() -> dict[str, Optional[datetime]]:
+    with session_scope() as db:
+        rows = db.execute(select(models.SchedulerLease.job_name, models.SchedulerLease.last_run_at))
+        return {job_name: last_run_at for job_name, last_run_at in rows}
+
+
+class JobScheduler:
+    """Runs registered jobs on their cron triggers on the running event loop."""
+
+    def __init__(
+        self,
+        owner: Optional[str] = None,
+        clock: Callable[[], datetime] = datetime.utcnow,
+        jitter: Callable[[float, float], float] = random.uniform,
+    ):
+        self.owner = owner or f"{socket.gethostname()}:{os.getpid()}"
+        self._clock = clock
+        self._jitter = jitter
+        self._jobs: dict[str, ScheduledJob] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._runs: set[asyncio.Task] = set()
+
+    def add_job(
+        self,
+        name: str,
+        trigger: CronTrigger,
+        func: Callable[[], Any],
+        jitter_seconds: Optional[float] = None,
+        catch_up: bool = True,
+        lease_seconds: Optional[float] = None,
+    ) -> ScheduledJob:
+        if name in self._jobs:
+            raise ValueError(f"Job {name!r} is already registered")
+        if jitter_seconds is None:
+            jitter_seconds = settings.SCHEDULER_JITTER_SECONDS
+        job = ScheduledJob(name, trigger, func, jitter_seconds, catch_up, lease_seconds)
+        self._jobs[name] = job
+        return job
+
+    @property
+    def jobs(self) -> dict[str, ScheduledJob]:
+        return self._jobs
+
+    def _schedule(self, job: ScheduledJob, due_at: datetime, not_before: datetime) -> None:
+        job.due_at = due_at
+        offset = self._jitter(0, job.jitter_seconds) if job.jitter_seconds else 0
+        job.run_at = max(due_at, not_before) + timedelta(seconds=offset)
+
+    async def prepare(self) -> None:
+        """Compute each job's first occurrence, catching up on runs missed while no worker was up."""
+        now = self._clock()
+        last_runs = await asyncio.to_thread(load_last_runs)
+        for job in self._jobs.values():
+            last_run_at = last_runs.get(job.name)
+            missed = None
+            if job.catch_up and last_run_at is not None:
+                missed = job.trigger.latest_at_or_before(now, last_run_at)
+            if missed is not None:
+                logger.info(f"Scheduler catching up on {job.name} missed at {missed.isoformat()}")
+                self._schedule(job, missed, now)
+            else:
+                self._schedule(job, job.trigger.next_after(now), now)
+
+    def _dispatch(self, now: datetime) -> list[asyncio.Task]:
+        started = []
+        for job in self._jobs.values():
+            if job.run_at is None or job.run_at > now or job.running:
+                continue
+            due_at = job.due_at
+            # The next occurrence after now: a run that overran several fire times does not queue them all
+            self._schedule(job, job.trigger.next_after(now), now)
+            task = asyncio.create_task(self._execute(job, due_at), name=f"scheduler-{job.name}")
+            self._runs.add(task)
+            task.add_done_callback(self._runs.discard)
+            started.append(task)
+        return started
+
+    async def run_pending(self) -> None:
+        """Start every job that is due and wait for them (used by tests and the standalone runner)."""
+        tasks = self._dispatch(self._clock())
+        if tasks:
+            await asyncio.gather(*tasks)
+
+    async def _execute(self, job: ScheduledJob, due_at: datetime) -> None:
+        job.running = True
+        try:
+            acquired = await asyncio.to_thread(
+                acquire_lease, job.name, self.owner, due_at, self._clock(), job.lease_seconds
+            )
+            if not acquired:
+                job.skipped += 1
+                return
+            started_at = self._clock()
+            started = time.perf_counter()
+            error = None
+            try:
+                if asyncio.iscoroutinefunction(job.func):
+                    await job.func()
+                else:
+                    await asyncio.to_thread(job.func)
+            except Exception as e:
+                error = e
+                logger.error(f"Scheduled job {job.name} failed: {str(e)}")
+            duration_ms = (time.perf_counter() - started) * 1000
+            job.record_run(started_at, duration_ms, error)
+            await asyncio.to_thread(release_lease, job.name, self.owner, due_at, job.last_outcome, duration_ms)
+        except Exception as e:
+            # Lease bookkeeping failed (database locked or gone): try again at the next occurrence
+            logger.error(f"Scheduler could not run {job.name}: {str(e)}")
+        finally:
+            job.running = False
+
+    async def _run(self) -> None:
+        while True:
+            now = self._clock()
+            self._dispatch(now)
+            upcoming = [job.run_at for job in self._jobs.values() if job.run_at is not None]
+            delay = min((run_at - now).total_seconds() for run_at in upcoming) if upcoming else MAX_SLEEP_SECONDS
+            await asyncio.sleep(min(max(delay, 0.05), MAX_SLEEP_SECONDS))
+
+    async def start(self) -> None:
+        if self._task is not None:
+            return
+        await self.prepare()
+        self._task = asyncio.create_task(self._run(), name="job-scheduler")
+
+    async def stop(self) -> None:
+        """Stop dispatching. Jobs already running on a thread finish on their own; their lease then expires."""
+        task, self._task = self._task, None
+        if task is None:
+            return
+        task.cancel()
+        for run in list(self._runs):
+            run.cancel()
+        await asyncio.gather(task, *self._runs, return_exceptions=True)
+
+    def get_metrics(self) -> dict:
+        return {
+            "owner": self.owner,
+            "running": self._task is not None,
+            "jobs": {name: job.to_dict() for name, job in self._jobs.items()},
+        }
+
+
+def register_default_jobs(scheduler: JobScheduler) -> JobScheduler:
+    """The app's maintenance jobs; schedules come from settings."""
+    scheduler.add_job("retention_purge", CronTrigger.daily_at(settings.RETENTION_PURGE_TIME), run_retention_cleanup)
+    # Reconcile the activity rollup with the raw logs after the purge
+    scheduler.add_job("rollup_catchup", CronTrigger(settings.ROLLUP_CATCHUP_CRON), run_rollup_catchup)
+    # Repair consent counter drift (manual edits, restored backups)
+    scheduler.add_job("consent_reconciliation", CronTrigger(settings.CONSENT_RECONCILIATION_CRON), run_consent_reconciliation)
+    # Frequent and cheap: a missed run is simply covered by the next one
+    scheduler.add_job("mfa_code_cleanup", CronTrigger(settings.MFA_CLEANUP_CRON), run_mfa_code_cleanup, catch_up=False)
+    scheduler.add_job("database_backup", CronTrigger(settings.BACKUP_CRON), run_database_backup)
+    scheduler.add_job("sqlite_maintenance", CronTrigger(settings.SQLITE_MAINTENANCE_CRON), run_sqlite_maintenance)
+    # Index patients written before the search blind index existed
+    scheduler.add_job("blind_index_backfill", CronTrigger(settings.BLIND_INDEX_BACKFILL_CRON), run_blind_index_backfill)
+    return scheduler
+
+
+job_scheduler = register_default_jobs(JobScheduler())
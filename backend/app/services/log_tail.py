@@ -0,0 +1,127 @@
+"""
+Live tail of the audit log.
+
+Each subscriber follows the logs table by primary key: it reads rows with
+log_id > last seen id (a range scan on the rowid, whatever the filters), sends
+them, then sleeps until the audit writer commits a new batch or
+LOG_TAIL_POLL_SECONDS pass. The poll catches rows committed outside the
+writer, such as audit rows that joined a caller's transaction.
+"""
+import asyncio
+import threading
+import time
+from typing import Callable, Optional
+
+from sqlalchemy import Select, func, select
+
+from app.core.config import settings
+from app.db import models
+from app.db.session import AsyncSessionLocal
+from app.services.audit_writer import audit_writer
+from app.services.stats_stream import SubscriberLimitReached, format_event
+
+
+class LogTailNotifier:
+    """Wakes tail subscribers (on their own event loops) when audit rows are committed."""
+
+    def __init__(self, max_subscribers: int = 20):
+        self.max_subscribers = max_subscribers
+        self._waiters: dict[asyncio.Event, asyncio.AbstractEventLoop] = {}
+        self._lock = threading.Lock()
+        self._stats = {"notifications": 0, "rejected": 0}
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._waiters)
+
+    def register(self) -> asyncio.Event:
+        with self._lock:
+            if len(self._waiters) >= self.max_subscribers:
+                self._stats["rejected"] += 1
+                raise SubscriberLimitReached()
+            wakeup = asyncio.Event()
+            self._waiters[wakeup] = asyncio.get_running_loop()
+        return wakeup
+
+    def unregister(self, wakeup: asyncio.Event) -> None:
+        with self._lock:
+            self._waiters.pop(wakeup, None)
+
+    def notify(self) -> None:
+        with self._lock:
+            waiters = list(self._waiters.items())
+            self._stats["notifications"] += 1
+        for wakeup, loop in waiters:
+            try:
+                loop.call_soon_threadsafe(wakeup.set)
+            except RuntimeError:
+                # The subscriber's loop is already closed
+                self.unregister(wakeup)
+
+    def get_metrics(self) -> dict:
+        with self._lock:
+            return {**self._stats, "subscribers": len(self._waiters), "max_subscribers": self.max_subscribers}
+
+
+async def latest_log_id() -> int:
+    async with AsyncSessionLocal() as db:
+        return (await db.execute(select(func.max(models.Log.log_id)))).scalar() or 0
+
+
+async def fetch_logs_after(
+    after_id: int, apply_filters: Callable[[Select], Select], limit: int
+) -> tuple[list[models.Log], int]:
+    """
+    Up to `limit` matching rows after after_id, plus the id the caller has now
+    seen up to. Bounding the scan by the current max id lets a selective filter
+    advance past non-matching rows instead of rescanning them on every poll.
+    """
+    async with AsyncSessionLocal() as db:
+        upper = (await db.execute(select(func.max(models.Log.log_id)))).scalar() or 0
+        if upper <= after_id:
+            return [], after_id
+        statement = apply_filters(
+            select(models.Log).where(models.Log.log_id > after_id, models.Log.log_id <= upper)
+        )
+        rows = list((await db.execute(statement.order_by(models.Log.log_id).limit(limit))).scalars())
+    return rows, rows[-1].log_id if len(rows) == limit else upper
+
+
+async def tail_logs(
+    notifier: LogTailNotifier,
+    wakeup: asyncio.Event,
+    after_id: Optional[int],
+    apply_filters: Callable[[Select], Select],
+    serialize: Callable[[models.Log], dict],
+    heartbeat_seconds: float,
+    poll_seconds: float,
+    batch_size: int,
+):
+    """SSE body for one watcher: a "log" event per matching row (id: log_id), heartbeats when idle."""
+    try:
+        last_id = await latest_log_id() if after_id is None else after_id
+        yield f"retry: {int(poll_seconds * 1000)}\n\n"
+        last_sent = time.monotonic()
+        while True:
+            # Clear before reading so a commit landing during the query still wakes us
+            wakeup.clear()
+            rows, last_id = await fetch_logs_after(last_id, apply_filters, batch_size)
+            for row in rows:
+                yield format_event("log", serialize(row), row.log_id)
+            if rows:
+                last_sent = time.monotonic()
+                if len(rows) == batch_size:
+                    continue
+            elif time.monotonic() - last_sent >= heartbeat_seconds:
+                yield ": heartbeat\n\n"
+                last_sent = time.monotonic()
+            try:
+                await asyncio.wait_for(wakeup.wait(), timeout=min(poll_seconds, heartbeat_seconds))
+            except asyncio.TimeoutError:
+                pass
+    finally:
+        notifier.unregister(wakeup)
+
+
+log_tail_notifier = LogTailNotifier(max_subscribers=settings.LOG_TAIL_MAX_SUBSCRIBERS)
+audit_writer.add_commit_listener(log_tail_notifier.notify)
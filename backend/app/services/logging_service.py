@@ -1,26 +1,150 @@
+import atexit
+import gzip
+import json
 import logging
+import logging.handlers
+import os
+import queue
+import shutil
+import time
 from pathlib import Path
 from typing import Optional
-from datetime import datetime
+from datetime import datetime, timezone
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from app.core.config import settings
 from app.db import models
-from app.db.session import session_scope
+from app.db.session import async_session_scope, session_scope
+from app.services.activity_counters import activity_counters
+from app.services.audit_writer import audit_writer
 
 BACKEND_DIR = Path(__file__).resolve().parents[2]
 logs_dir = BACKEND_DIR / "logs"
 logs_dir.mkdir(parents=True, exist_ok=True)
 
+# Attributes every LogRecord has; anything else was passed through extra=
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "taskName"}
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """One JSON object per line, including the structured fields passed via extra=."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exc_info"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class SizeAndTimeRotatingFileHandler(logging.handlers.TimedRotatingFileHandler):
+    """
+    Rotates when the file reaches max_bytes or the time interval elapses,
+    whichever comes first. Rotated segments are gzipped and only the newest
+    backup_count are kept.
+    """
+
+    def __init__(self, filename, max_bytes: int = 0, when: str = "midnight", backup_count: int = 0):
+        super().__init__(filename, when=when, backupCount=backup_count, encoding="utf-8", delay=True, utc=True)
+        self.max_bytes = max_bytes
+
+    def shouldRollover(self, record: logging.LogRecord) -> bool:
+        if super().shouldRollover(record):
+            return True
+        if self.max_bytes <= 0:
+            return False
+        if self.stream is None:
+            self.stream = self._open()
+        return self.stream.tell() + len(self.format(record)) + 1 >= self.max_bytes
+
+    def doRollover(self) -> None:
+        if self.stream:
+            self.stream.close()
+            self.stream = None
+        if os.path.exists(self.baseFilename):
+            stamp = time.strftime("%Y%m%d-%H%M%S", time.gmtime())
+            dest = f"{self.baseFilename}.{stamp}"
+            counter = 1
+            while os.path.exists(f"{dest}.gz"):
+                dest = f"{self.baseFilename}.{stamp}.{counter}"
+                counter += 1
+            self.rotate(self.baseFilename, dest)
+            self._delete_old_segments()
+        self.rolloverAt = self.computeRollover(int(time.time()))
+
+    def rotate(self, source: str, dest: str) -> None:
+        with open(source, "rb") as src, gzip.open(f"{dest}.gz", "wb") as out:
+            shutil.copyfileobj(src, out)
+        os.remove(source)
+
+    def _delete_old_segments(self) -> None:
+        if self.backupCount <= 0:
+            return
+        directory, base = os.path.split(self.baseFilename)
+        segments = sorted(
+            (name for name in os.listdir(directory) if name.startswith(base + ".") and name.endswith(".gz")),
+            key=lambda name: os.path.getmtime(os.path.join(directory, name)),
+        )
+        for name in segments[:-self.backupCount]:
+            os.remove(os.path.join(directory, name))
+
+
+def start_audit_log_listener(logger: logging.Logger, path: Path) -> logging.handlers.QueueListener:
+    """
+    Route logger through a QueueHandler so callers (including the event loop)
+    only enqueue records; a QueueListener thread formats and writes them.
+    """
+    file_handler = SizeAndTimeRotatingFileHandler(
+        path,
+        max_bytes=settings.AUDIT_LOG_MAX_BYTES,
+        when=settings.AUDIT_LOG_ROTATE_WHEN,
+        backup_count=settings.AUDIT_LOG_BACKUP_COUNT,
+    )
+    file_handler.setFormatter(JsonLinesFormatter())
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    logger.addHandler(logging.handlers.QueueHandler(log_queue))
+    listener = logging.handlers.QueueListener(log_queue, file_handler, respect_handler_level=True)
+    listener.start()
+    return listener
+
+
 audit_logger = logging.getLogger("hospital_cia.audit")
 audit_logger.setLevel(logging.DEBUG if settings.ENVIRONMENT == "development" else logging.INFO)
 
-handler = logging.FileHandler(logs_dir / "audit.log")
-formatter = logging.Formatter("%(asctime)s - %(levelname)s - %(message)s")
-handler.setFormatter(formatter)
+audit_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def stop_audit_log_listener() -> None:
+    """Write out queued records and stop the listener thread (idempotent)."""
+    global audit_listener
+    if audit_listener is not None:
+        audit_listener.stop()
+        audit_listener = None
+
 
 if not audit_logger.handlers:
-    audit_logger.addHandler(handler)
+    audit_listener = start_audit_log_listener(audit_logger, logs_dir / "audit.log")
+    atexit.register(stop_audit_log_listener)
+
+
+def _log_row(user_id: Optional[int], role: Optional[str], action: str, details: Optional[str]) -> dict:
+    return {
+        "user_id": user_id,
+        "role": role,
+        "action": action,
+        "details": details,
+        "timestamp": datetime.utcnow(),
+    }
 
 
 def log_action(
@@ -29,10 +153,15 @@ def log_action(
     role: Optional[str] = None,
     action: str,
     details: Optional[str] = None,
-    db: Optional[Session] = None
+    db: Optional[Session] = None,
+    out_of_band: bool = False
 ) -> None:
     """
     Persist structured logs to database and file logger.
+    With db, the row joins the caller's unit of work and is written by the caller's
+    commit, atomically with the business change; log_action never commits it.
+    Without db, or with out_of_band=True, the row is written independently of any
+    request transaction (read-only routes, events that must survive a rollback).
     Do NOT log PII in details field.
     """
     # Log to file
@@ -40,32 +169,58 @@ def log_action(
         "action performed",
         extra={"user_id": user_id, "role": role, "action": action, "details": details},
     )
-    
-    # Persist to database
+
+    row = _log_row(user_id, role, action, details)
+    if db is not None and not out_of_band:
+        db.add(models.Log(**row))
+        activity_counters.record_on_commit(db, row)
+        return
+    activity_counters.record_row(row)
+
+    # Out-of-band: batched audit writer, or a dedicated transaction
+    if settings.AUDIT_WRITER_ENABLED:
+        audit_writer.submit(row)
+        return
+
     try:
-        if db:
-            # Use provided session
-            log_entry = models.Log(
-                user_id=user_id,
-                role=role,
-                action=action,
-                details=details,
-                timestamp=datetime.utcnow()
-            )
-            db.add(log_entry)
-            db.commit()
-        else:
-            # Create new session
-            with session_scope() as session:
-                log_entry = models.Log(
-                    user_id=user_id,
-                    role=role,
-                    action=action,
-                    details=details,
-                    timestamp=datetime.utcnow()
-                )
-                session.add(log_entry)
-                session.commit()
+        with session_scope() as session:
+            session.add(models.Log(**row))
     except Exception as e:
         audit_logger.error(f"Failed to persist log to database: {str(e)}")
 
+
+async def log_action_async(
+    *,
+    user_id: Optional[int] = None,
+    role: Optional[str] = None,
+    action: str,
+    details: Optional[str] = None,
+    db: Optional[AsyncSession] = None,
+    out_of_band: bool = False
+) -> None:
+    """
+    Async counterpart of log_action for handlers running on an AsyncSession.
+    Same transaction rules: with db the caller's commit persists the row.
+    Do NOT log PII in details field.
+    """
+    audit_logger.info(
+        "action performed",
+        extra={"user_id": user_id, "role": role, "action": action, "details": details},
+    )
+
+    row = _log_row(user_id, role, action, details)
+    if db is not None and not out_of_band:
+        db.add(models.Log(**row))
+        activity_counters.record_on_commit(db, row)
+        return
+    activity_counters.record_row(row)
+
+    # Never block the event loop on a full queue; fall back to an inline insert
+    if settings.AUDIT_WRITER_ENABLED and audit_writer.try_submit(row):
+        return
+
+    try:
+        async with async_session_scope() as session:
+            session.add(models.Log(**row))
+    except Exception as e:
+        audit_logger.error(f"Failed to persist log to database: {str(e)}")
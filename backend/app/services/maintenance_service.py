@@ -0,0 +1,78 @@
+"""
+Scheduled database housekeeping: online backups and SQLite maintenance.
+"""
+import sqlite3
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+from app.core.config import settings
+from app.db.session import engine
+
+
+def backups_dir() -> Path:
+    return Path(settings.DB_PATH).parent / "backups"
+
+
+def backup_database(destination: Optional[Path] = None) -> Optional[Path]:
+    """
+    Copy the database with SQLite's online backup API. Unlike a file copy this
+    includes commits still in the WAL and is consistent while the app writes.
+    Returns the backup path, or None if there is no database yet.
+    """
+    db_path = Path(settings.DB_PATH)
+    if not db_path.exists():
+        return None
+    if destination is None:
+        timestamp = datetime.utcnow().strftime("%Y%m%d_%H%M%S")
+        destination = backups_dir() / f"hospital_backup_{timestamp}.db"
+    destination.parent.mkdir(parents=True, exist_ok=True)
+
+    source = sqlite3.connect(str(db_path))
+    target = sqlite3.connect(str(destination))
+    try:
+        # pages=-1: copy in one step; the source is only read-locked for the copy itself
+        source.backup(target)
+    finally:
+        target.close()
+        source.close()
+    settings.LAST_SYNC_TIME = datetime.utcnow()
+    return destination
+
+
+def prune_backups(keep: int) -> list[Path]:
+    """Delete all but the newest `keep` backups; returns the removed files."""
+    backups = sorted(backups_dir().glob("hospital_backup_*.db"), reverse=True)
+    removed = backups[keep:]
+    for backup in removed:
+        backup.unlink(missing_ok=True)
+    return removed
+
+
+def run_database_backup() -> Optional[Path]:
+    """
+    Scheduled entry point: back up the database and keep the newest BACKUP_KEEP_COUNT copies.
+    """
+    backup_path = backup_database()
+    if backup_path is None:
+        print(f"[BACKUP] Database file not found: {settings.DB_PATH}")
+        return None
+    removed = prune_backups(settings.BACKUP_KEEP_COUNT)
+    print(f"[BACKUP] Database backed up to {backup_path} ({len(removed)} old backups removed)")
+    return backup_path
+
+
+def run_sqlite_maintenance() -> dict:
+    """
+    Scheduled entry point: refresh planner statistics and truncate the WAL.
+
+    PRAGMA optimize only re-analyzes tables whose statistics are stale, and a
+    TRUNCATE checkpoint folds the WAL back into the database file so it does
+    not keep the size it grew to during the day's largest write burst.
+    """
+    with engine.connect() as connection:
+        connection.exec_driver_sql("PRAGMA optimize")
+        busy, wal_pages, checkpointed = connection.exec_driver_sql("PRAGMA wal_checkpoint(TRUNCATE)").one()
+    result = {"busy": bool(busy), "wal_pages": wal_pages, "checkpointed_pages": checkpointed}
+    print(f"[MAINTENANCE] SQLite optimize and WAL checkpoint done: {result}")
+    return result
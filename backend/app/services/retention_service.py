@@ -1,29 +1,270 @@
 """
 Background service for automatic log retention cleanup.
 Run this as a scheduled task (cron job or background worker).
+
+Purges delete logs in bounded batches, each in its own short transaction with
+a pause in between, so SQLite's write lock is released regularly and audit
+writes interleave with a long purge instead of stalling behind it.
 """
-from datetime import datetime, timedelta
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime, time as day_start, timedelta
+from typing import Callable, Optional
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.response_cache import dashboard_cache
 from app.db.session import session_scope
 from app.db import models
 
+logger = logging.getLogger("hospital_cia.audit")
+
+
+class RetentionPolicySnapshot:
+    __slots__ = ("retention_days", "enabled")
+
+    def __init__(self, retention_days: int, enabled: bool):
+        self.retention_days = retention_days
+        self.enabled = enabled
+
+
+class RetentionPolicyCache:
+    """
+    In-process copy of the retention_policy row. The admin API refreshes it on
+    update; other processes (the scheduler) pick changes up after ttl_seconds.
+    """
+
+    def __init__(self, ttl_seconds: float = 60, clock: Callable[[], float] = time.monotonic):
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._policy: Optional[RetentionPolicySnapshot] = None
+        self._expires_at = 0.0
+        self._lock = threading.Lock()
+
+    def get(self, db: Optional[Session] = None) -> RetentionPolicySnapshot:
+        with self._lock:
+            if self._policy is not None and self._expires_at > self._clock():
+                return self._policy
+        if db is None:
+            with session_scope() as session:
+                policy = load_retention_policy(session)
+        else:
+            policy = load_retention_policy(db)
+        self.set(policy)
+        return policy
+
+    def set(self, policy: RetentionPolicySnapshot) -> None:
+        with self._lock:
+            self._policy = policy
+            self._expires_at = self._clock() + self.ttl_seconds
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._policy = None
+
+
+def load_retention_policy(db: Session) -> RetentionPolicySnapshot:
+    row = db.get(models.RetentionPolicy, 1)
+    if row is None:
+        return RetentionPolicySnapshot(settings.RETENTION_DEFAULT_DAYS, True)
+    return RetentionPolicySnapshot(row.retention_days, row.enabled)
+
+
+def save_retention_policy(
+    db: Session, retention_days: int, enabled: bool, user_id: Optional[int] = None
+) -> RetentionPolicySnapshot:
+    """Upsert the policy row in the caller's transaction; refresh the cache after committing."""
+    values = {"retention_days": retention_days, "enabled": enabled, "updated_at": datetime.utcnow(), "updated_by": user_id}
+    statement = sqlite_insert(models.RetentionPolicy).values(policy_id=1, **values)
+    db.execute(statement.on_conflict_do_update(index_elements=["policy_id"], set_=values))
+    return RetentionPolicySnapshot(retention_days, enabled)
+
+
+def next_scheduled_purge(now: datetime) -> datetime:
+    """Next run of the daily purge at RETENTION_PURGE_TIME (UTC)."""
+    hour, minute = (int(part) for part in settings.RETENTION_PURGE_TIME.split(":"))
+    scheduled = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+    return scheduled if scheduled > now else scheduled + timedelta(days=1)
+
+
+def retention_preview(
+    db: Session, policy: RetentionPolicySnapshot, now: Optional[datetime] = None
+) -> tuple[Optional[datetime], int]:
+    """
+    (next_purge_date, logs_to_delete) for the policy. Whole days before the cutoff
+    are summed from log_daily_rollup and only the cutoff day itself is counted in
+    logs, so the cost does not grow with the size of the table.
+    """
+    if not policy.enabled:
+        return None, 0
+    now = now or datetime.utcnow()
+    cutoff = now - timedelta(days=policy.retention_days)
+    cutoff_day_start = datetime.combine(cutoff.date(), day_start.min)
+
+    # One round trip; MIN() over the indexed timestamp is a single index probe
+    whole_days, cutoff_day, oldest = db.execute(select(
+        select(func.coalesce(func.sum(models.LogDailyRollup.count), 0))
+        .where(models.LogDailyRollup.day < cutoff.date())
+        .scalar_subquery(),
+        select(func.count(models.Log.log_id))
+        .where(models.Log.timestamp >= cutoff_day_start, models.Log.timestamp < cutoff)
+        .scalar_subquery(),
+        select(func.min(models.Log.timestamp)).scalar_subquery(),
+    )).one()
+    logs_to_delete = whole_days + cutoff_day
+
+    if logs_to_delete:
+        return next_scheduled_purge(now), logs_to_delete
+    if oldest is None:
+        return None, 0
+    # The first purge run after the oldest log expires
+    return next_scheduled_purge(max(oldest + timedelta(days=policy.retention_days), now)), 0
+
+
+def purge_logs_before(
+    cutoff: datetime,
+    batch_size: Optional[int] = None,
+    pause_seconds: Optional[float] = None,
+    progress: Optional[Callable[[int], None]] = None,
+) -> int:
+    """
+    Delete logs older than cutoff in batches of batch_size rows.
+    Returns the number of logs deleted; progress(n) is called after each batch.
+    The delete trigger decrements log_daily_rollup in each batch's transaction,
+    so the rollup matches the surviving logs at every commit, even if the
+    process dies mid-purge.
+    """
+    batch_size = batch_size or settings.RETENTION_PURGE_BATCH_SIZE
+    pause_seconds = settings.RETENTION_PURGE_PAUSE_MS / 1000 if pause_seconds is None else pause_seconds
+
+    deleted = 0
+    while True:
+        with session_scope() as db:
+            batch = select(models.Log.log_id).where(models.Log.timestamp < cutoff).limit(batch_size)
+            count = db.execute(
+                delete(models.Log).where(models.Log.log_id.in_(batch)),
+                execution_options={"synchronize_session": False},
+            ).rowcount
+        deleted += count
+        if progress is not None:
+            progress(count)
+        if count < batch_size:
+            break
+        # Let queued writers take the lock between batches
+        time.sleep(pause_seconds)
+    return deleted
+
 
 def cleanup_old_logs(retention_days: int = 90) -> int:
     """
     Delete logs older than retention_days.
     Returns the number of logs deleted.
-    
+
     This should be run as a scheduled background task (e.g., daily at midnight).
     """
-    cutoff_date = datetime.utcnow() - timedelta(days=retention_days)
-    
-    with session_scope() as db:
-        deleted_count = db.query(models.Log).filter(
-            models.Log.timestamp < cutoff_date
-        ).delete()
-        db.commit()
-        
-        return deleted_count
+    return purge_logs_before(datetime.utcnow() - timedelta(days=retention_days))
+
+
+class RetentionPurgeJob:
+    """Progress of one purge running in a background thread."""
+
+    def __init__(self, retention_days: int, cutoff: datetime):
+        self.job_id = uuid.uuid4().hex
+        self.retention_days = retention_days
+        self.cutoff = cutoff
+        self.status = "queued"
+        self.deleted = 0
+        self.batches = 0
+        self.created_at = datetime.utcnow()
+        self.started_at: Optional[datetime] = None
+        self.finished_at: Optional[datetime] = None
+        self.error: Optional[str] = None
+
+    def record_batch(self, count: int) -> None:
+        self.deleted += count
+        self.batches += 1
+
+    def to_dict(self) -> dict:
+        elapsed = None
+        if self.started_at is not None:
+            elapsed = ((self.finished_at or datetime.utcnow()) - self.started_at).total_seconds()
+        return {
+            "job_id": self.job_id,
+            "status": self.status,
+            "retention_days": self.retention_days,
+            "cutoff": self.cutoff,
+            "deleted": self.deleted,
+            "batches": self.batches,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "rows_per_second": round(self.deleted / elapsed, 1) if elapsed else None,
+            "error": self.error,
+        }
+
+
+class RetentionPurgeRunner:
+    """Runs at most one purge at a time outside the request and remembers recent jobs."""
+
+    def __init__(self, purge: Callable[..., int] = purge_logs_before, history: int = 20):
+        self.purge = purge
+        self.history = history
+        self._jobs: OrderedDict[str, RetentionPurgeJob] = OrderedDict()
+        self._active: Optional[RetentionPurgeJob] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def start(self, retention_days: int) -> RetentionPurgeJob:
+        """Queue a purge for retention_days; returns the running job if one is already in progress."""
+        with self._lock:
+            if self._active is not None:
+                return self._active
+            job = RetentionPurgeJob(retention_days, datetime.utcnow() - timedelta(days=retention_days))
+            self._jobs[job.job_id] = job
+            while len(self._jobs) > self.history:
+                self._jobs.popitem(last=False)
+            self._active = job
+            self._thread = threading.Thread(target=self._run, args=(job,), name="retention-purge", daemon=True)
+            self._thread.start()
+        return job
+
+    def get(self, job_id: str) -> Optional[RetentionPurgeJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def wait(self, timeout: Optional[float] = None) -> None:
+        """Block until the running purge (if any) finishes."""
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+
+    def _run(self, job: RetentionPurgeJob) -> None:
+        job.status = "running"
+        job.started_at = datetime.utcnow()
+        try:
+            self.purge(job.cutoff, progress=job.record_batch)
+            job.status = "completed"
+        except Exception as e:
+            job.status = "failed"
+            job.error = str(e)
+            logger.error(f"Retention purge {job.job_id} failed: {str(e)}")
+        finally:
+            job.finished_at = datetime.utcnow()
+            with self._lock:
+                self._active = None
+            # Cached previews and charts still count the purged rows
+            dashboard_cache.invalidate("get_retention_settings")
+            dashboard_cache.invalidate("get_activity_stats")
+
+
+retention_purges = RetentionPurgeRunner()
+retention_policy_cache = RetentionPolicyCache(ttl_seconds=settings.RETENTION_POLICY_CACHE_SECONDS)
 
 
 def run_retention_cleanup():
@@ -35,14 +276,16 @@ def run_retention_cleanup():
     - APScheduler
     - Systemd timer
     """
-    retention_days = 90  # Default, could be loaded from settings table
-    deleted = cleanup_old_logs(retention_days)
-    
-    print(f"[RETENTION] Cleaned up {deleted} logs older than {retention_days} days")
+    policy = retention_policy_cache.get()
+    if not policy.enabled:
+        print("[RETENTION] Retention policy disabled, nothing purged")
+        return 0
+    deleted = cleanup_old_logs(policy.retention_days)
+
+    print(f"[RETENTION] Cleaned up {deleted} logs older than {policy.retention_days} days")
     return deleted
 
 
 if __name__ == "__main__":
     # For manual testing or direct execution
     run_retention_cleanup()
-
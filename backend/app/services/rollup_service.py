@@ -0,0 +1,52 @@
+"""
+Catch-up job for the log_daily_rollup table.
+
+Triggers on logs keep the rollup current as rows are written or purged; this
+job recomputes recent days from the raw logs to backfill databases restored
+from a backup or repair drift after manual edits.
+"""
+from datetime import date, datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import delete, text
+from sqlalchemy.orm import Session
+
+from app.db import models
+from app.db.session import session_scope
+
+
+def rebuild_daily_rollup(db: Session, since: Optional[date] = None) -> int:
+    """
+    Recompute rollup rows from logs for days >= since (every day when None).
+    Runs in the caller's transaction; returns the number of rollup rows written.
+    """
+    stale = delete(models.LogDailyRollup)
+    if since is None:
+        db.execute(stale)
+        result = db.execute(text(models.log_rollup_backfill_sql()))
+    else:
+        db.execute(stale.where(models.LogDailyRollup.day >= since))
+        # Timestamps are stored as "YYYY-MM-DD HH:MM:SS..." text, so a bare date compares as midnight
+        result = db.execute(
+            text(models.log_rollup_backfill_sql("WHERE timestamp >= :since")),
+            {"since": since.isoformat()},
+        )
+    return result.rowcount
+
+
+def run_rollup_catchup(days: int = 2) -> int:
+    """
+    Scheduled entry point: rebuild the last `days` days (plus today) of the rollup.
+    """
+    since = datetime.utcnow().date() - timedelta(days=days)
+    with session_scope() as db:
+        rebuilt = rebuild_daily_rollup(db, since)
+
+    print(f"[ROLLUP] Rebuilt {rebuilt} rollup rows since {since.isoformat()}")
+    return rebuilt
+
+
+if __name__ == "__main__":
+    # Full backfill when run by hand
+    with session_scope() as session:
+        print(f"[ROLLUP] Rebuilt {rebuild_daily_rollup(session)} rollup rows")
@@ -0,0 +1,207 @@
+"""
+Server-Sent Events fan-out for admin dashboard statistics.
+
+A single producer task computes a statistics snapshot every
+STATS_STREAM_INTERVAL_SECONDS while at least one client is subscribed, diffs it
+against the previous one and pushes the delta to every subscriber's bounded
+queue. A subscriber whose queue fills up (a slow client) has its backlog
+replaced by one full snapshot, so memory per connection stays bounded.
+"""
+import asyncio
+import itertools
+import json
+import logging
+from datetime import datetime, time as day_start
+from typing import Awaitable, Callable, Optional
+
+from app.core.config import settings
+from app.db import models
+from app.db.session import AsyncSessionLocal
+from app.services.activity_counters import activity_counters
+from app.services.consent_service import consent_percentage
+
+logger = logging.getLogger("hospital_cia.audit")
+
+
+class SubscriberLimitReached(Exception):
+    """Raised when the stream already has the maximum number of subscribers."""
+
+
+async def compute_stats_snapshot() -> dict:
+    """Today's activity from the in-memory counters plus consent totals from the trigger-maintained counter row."""
+    now = datetime.utcnow()
+    totals = activity_counters.totals_by_key(datetime.combine(now.date(), day_start.min), now)
+    by_role: dict[str, int] = {}
+    by_type: dict[str, int] = {}
+    for (role, action_type), count in totals.items():
+        by_role[role] = by_role.get(role, 0) + count
+        by_type[action_type] = by_type.get(action_type, 0) + count
+
+    async with AsyncSessionLocal() as db:
+        counters = await db.get(models.ConsentCounter, 1)
+    total_users, consented_users = (counters.total_users, counters.consented_users) if counters else (0, 0)
+
+    return {
+        "activity": {"day": now.date().isoformat(), "total": sum(totals.values()), "by_role": by_role, "by_type": by_type},
+        "consent": {
+            "total_users": total_users,
+            "consented_users": consented_users,
+            "consent_percentage": consent_percentage(total_users, consented_users),
+        },
+    }
+
+
+def _counter_diff(old: dict[str, int], new: dict[str, int]) -> dict[str, int]:
+    return {key: new.get(key, 0) - old.get(key, 0) for key in set(old) | set(new) if new.get(key, 0) != old.get(key, 0)}
+
+
+def diff_snapshots(old: dict, new: dict) -> Optional[dict]:
+    """
+    Delta between two snapshots, or None when nothing changed. Activity is sent
+    as increments for `day` (from zero when the day rolled over); consent as the
+    new totals.
+    """
+    delta = {}
+    old_activity, new_activity = old["activity"], new["activity"]
+    if old_activity["day"] != new_activity["day"]:
+        old_activity = {"total": 0, "by_role": {}, "by_type": {}}
+    actions = new_activity["total"] - old_activity["total"]
+    by_role = _counter_diff(old_activity["by_role"], new_activity["by_role"])
+    by_type = _counter_diff(old_activity["by_type"], new_activity["by_type"])
+    if actions or by_role or by_type:
+        delta["activity"] = {"day": new_activity["day"], "actions": actions, "by_role": by_role, "by_type": by_type}
+    if old["consent"] != new["consent"]:
+        delta["consent"] = new["consent"]
+    return delta or None
+
+
+def format_event(event: str, data: dict, event_id: Optional[int] = None) -> str:
+    lines = [f"event: {event}"]
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"data: {json.dumps(data, separators=(',', ':'))}")
+    return "\n".join(lines) + "\n\n"
+
+
+class Subscription:
+    def __init__(self, queue_size: int):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.resyncs = 0
+
+    def push(self, event: str, data: dict, latest_snapshot: dict) -> None:
+        try:
+            self.queue.put_nowait((event, data))
+        except asyncio.QueueFull:
+            # Slow reader: replace the backlog with one full snapshot
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(("snapshot", latest_snapshot))
+            self.resyncs += 1
+
+
+class StatsBroadcaster:
+    def __init__(
+        self,
+        compute: Callable[[], Awaitable[dict]] = compute_stats_snapshot,
+        interval_seconds: float = 2.0,
+        max_subscribers: int = 20,
+        queue_size: int = 32,
+    ):
+        self.compute = compute
+        self.interval = interval_seconds
+        self.max_subscribers = max_subscribers
+        self.queue_size = queue_size
+        self._subscribers: set[Subscription] = set()
+        self._snapshot: Optional[dict] = None
+        self._task: Optional[asyncio.Task] = None
+        self._event_ids = itertools.count(1)
+        self._stats = {"snapshots": 0, "deltas": 0, "rejected": 0, "resyncs": 0}
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    async def subscribe(self) -> tuple[Subscription, dict]:
+        """Register a subscriber; returns it with the current snapshot to send first."""
+        if len(self._subscribers) >= self.max_subscribers:
+            self._stats["rejected"] += 1
+            raise SubscriberLimitReached()
+        if not self._producer_running():
+            snapshot = await self.compute()
+            self._stats["snapshots"] += 1
+            # Another subscriber may have started the producer while we computed
+            if not self._producer_running():
+                self._snapshot = snapshot
+                self._task = asyncio.create_task(self._run())
+        subscription = Subscription(self.queue_size)
+        self._subscribers.add(subscription)
+        return subscription, self._snapshot
+
+    def _producer_running(self) -> bool:
+        return (
+            self._task is not None
+            and not self._task.done()
+            and self._task.get_loop() is asyncio.get_running_loop()
+        )
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        self._stats["resyncs"] += subscription.resyncs
+        self._subscribers.discard(subscription)
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def next_event_id(self) -> int:
+        return next(self._event_ids)
+
+    def get_metrics(self) -> dict:
+        return {**self._stats, "subscribers": len(self._subscribers), "max_subscribers": self.max_subscribers}
+
+    async def _run(self) -> None:
+        # One computation per tick, shared by every subscriber; exits when the last one leaves
+        while self._subscribers:
+            await asyncio.sleep(self.interval)
+            if not self._subscribers:
+                break
+            try:
+                snapshot = await self.compute()
+            except Exception as e:
+                logger.error(f"Failed to compute stats snapshot: {str(e)}")
+                continue
+            self._stats["snapshots"] += 1
+            delta = diff_snapshots(self._snapshot, snapshot)
+            self._snapshot = snapshot
+            if delta is None:
+                continue
+            self._stats["deltas"] += 1
+            for subscription in list(self._subscribers):
+                subscription.push("delta", delta, snapshot)
+        self._task = None
+
+
+async def event_stream(broadcaster: StatsBroadcaster, subscription: Subscription, snapshot: dict, heartbeat_seconds: float):
+    """SSE body for one subscriber: the initial snapshot, then deltas, with heartbeat comments when idle."""
+    try:
+        yield f"retry: {int(heartbeat_seconds * 1000)}\n" + format_event("snapshot", snapshot, broadcaster.next_event_id())
+        while True:
+            try:
+                event, data = await asyncio.wait_for(subscription.queue.get(), timeout=heartbeat_seconds)
+            except asyncio.TimeoutError:
+                yield ": heartbeat\n\n"
+                continue
+            yield format_event(event, data, broadcaster.next_event_id())
+    finally:
+        broadcaster.unsubscribe(subscription)
+
+
+stats_broadcaster = StatsBroadcaster(
+    interval_seconds=settings.STATS_STREAM_INTERVAL_SECONDS,
+    max_subscribers=settings.STATS_STREAM_MAX_SUBSCRIBERS,
+    queue_size=settings.STATS_STREAM_QUEUE_SIZE,
+)
@@ -1,28 +1,32 @@
 """
-Scheduler for background tasks like log retention cleanup.
-Run this as a separate process or use it with a task queue.
+Standalone runner for the maintenance jobs in app.services.job_scheduler.
+
+The API already runs these jobs in-process (SCHEDULER_ENABLED); use this for
+deployments that keep background work out of the API workers. Runs coordinate
+through the scheduler_leases table, so it is safe alongside the API as well.
 
 Usage:
     python -m backend.scheduler
 """
-import time
-import schedule
-from app.services.retention_service import run_retention_cleanup
+import asyncio
+
+from app.services.job_scheduler import job_scheduler
 
 
-def run_scheduler():
-    """Run the scheduler in a loop."""
-    # Schedule retention cleanup daily at 2 AM
-    schedule.every().day.at("02:00").do(run_retention_cleanup)
-    
+async def run_scheduler():
+    """Run the scheduler until interrupted."""
+    await job_scheduler.start()
     print("[SCHEDULER] Background scheduler started")
-    print("[SCHEDULER] Retention cleanup scheduled for 02:00 daily")
-    
-    while True:
-        schedule.run_pending()
-        time.sleep(60)  # Check every minute
+    for name, job in job_scheduler.jobs.items():
+        print(f"[SCHEDULER] {name}: '{job.trigger.expression}' (UTC), next run {job.run_at.isoformat()}")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await job_scheduler.stop()
 
 
 if __name__ == "__main__":
-    run_scheduler()
-
+    try:
+        asyncio.run(run_scheduler())
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,25 @@
+"""
+Blind-index backfill script.
+Computes the patient search tokens for rows that have none, or for every row
+with --rebuild (needed after BLIND_INDEX_KEY or the prefix settings change).
+"""
+import sys
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+if str(BASE_DIR) not in sys.path:
+    sys.path.append(str(BASE_DIR))
+
+from app.services import anonymize_service  # noqa: E402
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Backfill the patient search blind index")
+    parser.add_argument("--rebuild", action="store_true", help="Recompute the tokens of every patient")
+    parser.add_argument("--batch-size", type=int, default=None, help="Patients per transaction")
+    args = parser.parse_args()
+
+    indexed = anonymize_service.backfill_blind_indexes(batch_size=args.batch_size, rebuild=args.rebuild)
+    print(f"Blind-indexed {indexed} patients")
@@ -3,7 +3,6 @@ Database backup script.
 Creates timestamped backups of the SQLite database.
 """
 import sys
-import shutil
 from pathlib import Path
 from datetime import datetime
 
@@ -12,46 +11,27 @@ if str(BASE_DIR) not in sys.path:
     sys.path.append(str(BASE_DIR))
 
 from app.core.config import settings  # noqa: E402
+from app.services import maintenance_service  # noqa: E402
 
 
 def backup_database():
     """Create a timestamped backup of the database."""
-    db_path = Path(settings.DB_PATH)
-    
-    if not db_path.exists():
-        print(f"Database file not found: {db_path}")
-        return False
-    
-    # Create backups directory
-    backups_dir = db_path.parent / "backups"
-    backups_dir.mkdir(parents=True, exist_ok=True)
-    
-    # Generate backup filename with timestamp
-    timestamp = datetime.utcnow().strftime("%Y%m%d_%H%M%S")
-    backup_filename = f"hospital_backup_{timestamp}.db"
-    backup_path = backups_dir / backup_filename
-    
     try:
-        # Copy database file
-        shutil.copy2(db_path, backup_path)
-        print(f"Database backed up successfully to: {backup_path}")
-        
-        # Update last sync time in config (if possible)
-        try:
-            settings.LAST_SYNC_TIME = datetime.utcnow()
-        except Exception:
-            pass
-        
-        return True
+        backup_path = maintenance_service.backup_database()
     except Exception as e:
         print(f"Error creating backup: {e}")
         return False
 
+    if backup_path is None:
+        print(f"Database file not found: {settings.DB_PATH}")
+        return False
+    print(f"Database backed up successfully to: {backup_path}")
+    return True
+
 
 def list_backups():
     """List all available backups."""
-    db_path = Path(settings.DB_PATH)
-    backups_dir = db_path.parent / "backups"
+    backups_dir = maintenance_service.backups_dir()
     
     if not backups_dir.exists():
         print("No backups directory found.")
@@ -0,0 +1,122 @@
+"""
+Benchmark per-request overhead of the audit logging middleware with a plain
+FileHandler (synchronous write on the event loop) versus the QueueHandler /
+QueueListener JSON-lines pipeline from app.services.logging_service.
+
+Each round serves the same trivial endpoint through a middleware that logs
+"Request received" / "Response sent" like app.main. Two numbers are reported
+per handler: time spent inside the logging calls on the event loop, and the
+end-to-end overhead against a round with logging disabled. Rounds are
+interleaved and the median is reported to smooth out scheduler noise.
+
+Usage:
+    python scripts/bench_audit_logging.py --requests 5000 --rounds 5
+"""
+import asyncio
+import logging
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+if str(BASE_DIR) not in sys.path:
+    sys.path.append(str(BASE_DIR))
+
+import httpx  # noqa: E402
+from fastapi import FastAPI, Request  # noqa: E402
+
+from app.services.logging_service import start_audit_log_listener  # noqa: E402
+
+
+def build_app(logger: logging.Logger, logging_time: list[float]) -> FastAPI:
+    app = FastAPI()
+
+    @app.middleware("http")
+    async def audit_logging_middleware(request: Request, call_next):
+        started = time.perf_counter()
+        logger.debug("Request received", extra={"path": request.url.path, "method": request.method})
+        logging_time[0] += time.perf_counter() - started
+        response = await call_next(request)
+        started = time.perf_counter()
+        logger.debug("Response sent", extra={"status_code": response.status_code, "path": request.url.path})
+        logging_time[0] += time.perf_counter() - started
+        return response
+
+    @app.get("/ping")
+    async def ping():
+        return {"ok": True}
+
+    return app
+
+
+async def measure(app: FastAPI, requests: int) -> float:
+    """Mean microseconds per request."""
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for _ in range(50):
+            await client.get("/ping")
+        started = time.perf_counter()
+        for _ in range(requests):
+            await client.get("/ping")
+        return (time.perf_counter() - started) / requests * 1_000_000
+
+
+def make_logger() -> logging.Logger:
+    logger = logging.getLogger(f"bench_audit_{uuid.uuid4().hex}")
+    logger.setLevel(logging.DEBUG)
+    logger.propagate = False
+    return logger
+
+
+def run_round(label: str, requests: int, tmp: Path) -> tuple[float, float]:
+    """(mean us per request, mean us per request spent in logging calls)."""
+    logger = make_logger()
+    listener = None
+    if label == "none":
+        logger.disabled = True
+    elif label == "file":
+        handler = logging.FileHandler(tmp / "file.log")
+        handler.setFormatter(logging.Formatter("%(asctime)s - %(levelname)s - %(message)s"))
+        logger.addHandler(handler)
+    else:
+        listener = start_audit_log_listener(logger, tmp / "queue.log")
+    logging_time = [0.0]
+    try:
+        per_request = asyncio.run(measure(build_app(logger, logging_time), requests))
+        # measure() also issues 50 warm-up requests
+        return per_request, logging_time[0] / (requests + 50) * 1_000_000
+    finally:
+        if listener:
+            listener.stop()
+        for handler in logger.handlers:
+            handler.close()
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark audit logging middleware overhead")
+    parser.add_argument("--requests", type=int, default=5000, help="Requests per round")
+    parser.add_argument("--rounds", type=int, default=5, help="Interleaved rounds per handler")
+    args = parser.parse_args()
+
+    labels = ("none", "file", "queue")
+    samples: dict[str, list[tuple[float, float]]] = {label: [] for label in labels}
+    with tempfile.TemporaryDirectory() as tmp:
+        for _ in range(args.rounds):
+            for label in labels:
+                samples[label].append(run_round(label, args.requests, Path(tmp)))
+
+    baseline = statistics.median(total for total, _ in samples["none"])
+    print(f"{'handler':<10}{'us/req':>10}{'overhead us':>14}{'on-loop us':>12}")
+    for label in labels:
+        total = statistics.median(value for value, _ in samples[label])
+        on_loop = statistics.median(value for _, value in samples[label])
+        print(f"{label:<10}{total:>10.1f}{total - baseline:>14.1f}{on_loop:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Benchmark decrypting the name and contact of every patient for a raw export:
+the old per-field decrypt_field loop versus the batched decrypt_fields from
+app.services.anonymize_service on process pools of increasing size.
+
+Tokens are generated in memory (two per patient), so no database is needed.
+Pool start-up is timed separately from the decrypt itself; the app keeps its
+pool for the life of the process.
+
+Usage:
+    python scripts/bench_decrypt.py --patients 100000 --workers 1,2,4,8
+"""
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+if str(BASE_DIR) not in sys.path:
+    sys.path.append(str(BASE_DIR))
+
+from cryptography.fernet import Fernet  # noqa: E402
+
+from app.core.config import settings  # noqa: E402
+from app.services import anonymize_service  # noqa: E402
+
+
+def run_serial(tokens: list[str]) -> float:
+    started = time.perf_counter()
+    for token in tokens:
+        anonymize_service.decrypt_field(token)
+    return time.perf_counter() - started
+
+
+def run_pool(tokens: list[str], workers: int, chunk_size: int) -> tuple[float, float]:
+    started = time.perf_counter()
+    pool = ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=anonymize_service._init_decrypt_worker,
+        initargs=(settings.FERNET_KEY,),
+    )
+    # Start every worker before timing the decrypt
+    list(pool.map(anonymize_service._decrypt_chunk, [[]] * workers))
+    startup = time.perf_counter() - started
+    try:
+        started = time.perf_counter()
+        decrypted = anonymize_service.decrypt_fields(tokens, chunk_size=chunk_size, executor=pool)
+        elapsed = time.perf_counter() - started
+    finally:
+        pool.shutdown()
+    assert len(decrypted) == len(tokens) and None not in decrypted
+    return startup, elapsed
+
+
+def main():
+    import argparse
+
+    cpus = os.cpu_count() or 1
+    default_workers = ",".join(str(n) for n in (1, 2, 4, 8, 16) if n <= cpus) or "1"
+    parser = argparse.ArgumentParser(description="Benchmark serial vs pooled Fernet decryption")
+    parser.add_argument("--patients", type=int, default=100_000, help="Patients to decrypt (two tokens each)")
+    parser.add_argument("--workers", default=default_workers, help="Comma-separated pool sizes")
+    parser.add_argument("--chunk-size", type=int, default=settings.DECRYPT_CHUNK_SIZE, help="Tokens per chunk")
+    args = parser.parse_args()
+
+    try:
+        anonymize_service.get_fernet()
+    except ValueError:
+        # No usable FERNET_KEY configured: benchmark with a throwaway one
+        settings.FERNET_KEY = Fernet.generate_key().decode()
+        anonymize_service._fernet = None
+
+    print(f"Encrypting {args.patients * 2} tokens...")
+    tokens = [
+        anonymize_service.encrypt_field(value)
+        for i in range(args.patients)
+        for value in (f"Patient {i}", f"555-{i:07d}")
+    ]
+
+    serial = run_serial(tokens)
+    print(f"{'mode':<12}{'startup s':>10}{'decrypt s':>11}{'tokens/s':>12}{'speedup':>9}")
+    print(f"{'serial':<12}{'-':>10}{serial:>11.2f}{len(tokens) / serial:>12.0f}{1.0:>9.2f}")
+    for workers in (int(n) for n in args.workers.split(",")):
+        startup, elapsed = run_pool(tokens, workers, args.chunk_size)
+        print(
+            f"{f'pool x{workers}':<12}{startup:>10.2f}{elapsed:>11.2f}"
+            f"{len(tokens) / elapsed:>12.0f}{serial / elapsed:>9.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
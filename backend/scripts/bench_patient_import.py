@@ -0,0 +1,119 @@
+"""
+Benchmark the bulk patient import (POST /api/patients/import) against creating
+the same patients one POST /api/patients/ call at a time.
+
+A scratch database is used. The per-record path is timed on --sample rows and
+its rate extrapolated; the bulk path imports all --rows rows as CSV and as
+NDJSON. Each pass starts from an empty patients table.
+
+Usage:
+    python scripts/bench_patient_import.py --rows 100000 --sample 1000
+"""
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+if str(BASE_DIR) not in sys.path:
+    sys.path.append(str(BASE_DIR))
+
+TMP_DIR = Path(tempfile.mkdtemp(prefix="bench_patient_import_"))
+# The app's engines are created on import, so point them at the scratch database first
+os.environ["DB_PATH"] = str(TMP_DIR / "bench.db")
+
+from cryptography.fernet import Fernet  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import delete  # noqa: E402
+
+from app.core.config import settings  # noqa: E402
+
+if settings.FERNET_KEY == "generate-me":
+    settings.FERNET_KEY = Fernet.generate_key().decode()
+
+from app.main import app  # noqa: E402
+from app.db import models  # noqa: E402
+from app.db.session import engine, session_scope  # noqa: E402
+from app.services.anonymize_service import shutdown_decrypt_pool  # noqa: E402
+from app.services.audit_writer import audit_writer  # noqa: E402
+from app.services.auth_service import create_access_token, hash_password  # noqa: E402
+
+
+def setup() -> dict:
+    models.Base.metadata.create_all(bind=engine)
+    with session_scope() as db:
+        admin = models.User(username="bench_admin", email="bench_admin@test.com",
+                            hashed_password=hash_password("Admin123!"), role="admin")
+        db.add(admin)
+        db.flush()
+        token = create_access_token(data={"sub": str(admin.user_id), "role": admin.role})
+    return {"Authorization": f"Bearer {token}"}
+
+
+def reset() -> None:
+    with session_scope() as db:
+        db.execute(delete(models.Patient))
+
+
+def records(count: int) -> list[dict]:
+    return [
+        {"name": f"Patient {i} Testcase", "contact": f"555-{i:07d}", "diagnosis": "Seasonal influenza"}
+        for i in range(count)
+    ]
+
+
+def per_record(client: TestClient, headers: dict, rows: list[dict]) -> float:
+    reset()
+    started = time.perf_counter()
+    for row in rows:
+        assert client.post("/api/patients/", json=row, headers=headers).status_code == 201
+    return len(rows) / (time.perf_counter() - started)
+
+
+def bulk(client: TestClient, headers: dict, rows: list[dict], source_format: str) -> float:
+    reset()
+    if source_format == "csv":
+        body = "name,contact,diagnosis\n" + "".join(f"{r['name']},{r['contact']},{r['diagnosis']}\n" for r in rows)
+        content_type = "text/csv"
+    else:
+        body = "".join(json.dumps(r) + "\n" for r in rows)
+        content_type = "application/x-ndjson"
+    started = time.perf_counter()
+    response = client.post("/api/patients/import", content=body.encode(),
+                           headers={**headers, "Content-Type": content_type})
+    elapsed = time.perf_counter() - started
+    assert response.status_code == 200 and response.json()["imported"] == len(rows), response.text
+    return len(rows) / elapsed
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark bulk patient import vs per-record creates")
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--sample", type=int, default=1000, help="Rows created one call at a time")
+    args = parser.parse_args()
+
+    try:
+        headers = setup()
+        client = TestClient(app)
+        rows = records(args.rows)
+        print(f"{'mode':<12}{'rows/s':>10}{'time for rows':>16}")
+        for label, rate in (
+            ("per-record", per_record(client, headers, rows[:args.sample])),
+            ("bulk csv", bulk(client, headers, rows, "csv")),
+            ("bulk ndjson", bulk(client, headers, rows, "ndjson")),
+        ):
+            print(f"{label:<12}{rate:>10.0f}{args.rows / rate:>15.1f}s")
+    finally:
+        audit_writer.stop()
+        shutdown_decrypt_pool()
+        engine.dispose()
+        shutil.rmtree(TMP_DIR, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Measure peak Python memory of the streamed patient listing against the old
+build-the-whole-list approach, at several table sizes.
+
+For each size a scratch database is seeded, then the same rows are encoded
+(a) by loading every ORM row into PatientOut models and serializing the list,
+and (b) with app.api.patients.stream_patients, consuming the chunks as a
+client would. tracemalloc reports the peak for each; (b) should stay flat as
+the table grows.
+
+Usage:
+    python scripts/bench_patient_stream.py --sizes 10000,50000,100000
+"""
+import json
+import os
+import shutil
+import sys
+import tempfile
+import tracemalloc
+from datetime import datetime, timedelta
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+if str(BASE_DIR) not in sys.path:
+    sys.path.append(str(BASE_DIR))
+
+TMP_DIR = Path(tempfile.mkdtemp(prefix="bench_patient_stream_"))
+# The app's engines are created on import, so point them at the scratch database first
+os.environ["DB_PATH"] = str(TMP_DIR / "bench.db")
+
+from sqlalchemy import delete, insert, select  # noqa: E402
+
+from app.api.patients import PatientOut, stream_patients  # noqa: E402
+from app.db import models  # noqa: E402
+from app.db.session import ReadSessionLocal, engine, read_engine, session_scope  # noqa: E402
+from app.services import anonymize_service  # noqa: E402
+from app.services.audit_writer import audit_writer  # noqa: E402
+
+
+def seed(count: int, chunk: int = 10_000) -> None:
+    models.Base.metadata.create_all(bind=engine)
+    now = datetime.utcnow()
+    with session_scope() as db:
+        db.execute(delete(models.Patient))
+        for start in range(0, count, chunk):
+            db.execute(insert(models.Patient), [
+                {
+                    "name": f"Patient {i}",
+                    "contact": f"555-{i:07d}",
+                    "diagnosis": "Seasonal influenza, follow-up in two weeks",
+                    "anonymized_name": f"ANON_{i}",
+                    "anonymized_contact": "XXX-XXX-XXXX",
+                    "date_added": now - timedelta(seconds=i),
+                }
+                for i in range(start, min(start + chunk, count))
+            ])
+
+
+def materialized() -> int:
+    with ReadSessionLocal() as db:
+        patients = db.query(models.Patient).order_by(models.Patient.date_added.desc()).all()
+        result = [PatientOut(**anonymize_service.get_anonymized_patient_data(p, "doctor")) for p in patients]
+        body = json.dumps([row.model_dump(mode="json") for row in result]).encode()
+    return len(body)
+
+
+def streamed() -> int:
+    statement = select(
+        models.Patient.patient_id, models.Patient.name, models.Patient.contact, models.Patient.diagnosis,
+        models.Patient.anonymized_name, models.Patient.anonymized_contact, models.Patient.date_added,
+    ).order_by(models.Patient.date_added.desc(), models.Patient.patient_id.desc())
+    return sum(len(chunk) for chunk in stream_patients(statement, "doctor", False, ndjson=True, user_id=None))
+
+
+def peak_mib(func) -> tuple[float, int]:
+    tracemalloc.start()
+    try:
+        size = func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak / 1048576, size
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Peak memory of streamed vs materialized patient listing")
+    parser.add_argument("--sizes", default="10000,50000,100000", help="Comma-separated patient counts")
+    args = parser.parse_args()
+
+    try:
+        print(f"{'patients':>10}{'list MiB':>11}{'stream MiB':>12}{'body MiB':>10}")
+        for count in (int(n) for n in args.sizes.split(",")):
+            seed(count)
+            list_peak, _ = peak_mib(materialized)
+            stream_peak, body = peak_mib(streamed)
+            print(f"{count:>10}{list_peak:>11.1f}{stream_peak:>12.1f}{body / 1048576:>10.1f}")
+    finally:
+        audit_writer.stop()
+        engine.dispose()
+        read_engine.dispose()
+        shutil.rmtree(TMP_DIR, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
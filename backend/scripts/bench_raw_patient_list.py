@@ -0,0 +1,126 @@
+"""
+Benchmark the admin raw patient list (GET /api/patients?raw=true) with and
+without the decrypted-value cache.
+
+A scratch database with --patients masked patients is seeded, then the first
+--pages pages are requested round-robin --requests times, so after the first
+pass every request is a cache hit (the repeated-admin-views case). The
+uncached run sets the cache capacity to zero.
+
+Usage:
+    python scripts/bench_raw_patient_list.py --patients 20000 --pages 5 --requests 500
+"""
+import os
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+if str(BASE_DIR) not in sys.path:
+    sys.path.append(str(BASE_DIR))
+
+TMP_DIR = Path(tempfile.mkdtemp(prefix="bench_raw_list_"))
+# The app's engines are created on import, so point them at the scratch database first
+os.environ["DB_PATH"] = str(TMP_DIR / "bench.db")
+
+from cryptography.fernet import Fernet  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import insert  # noqa: E402
+
+from app.core.config import settings  # noqa: E402
+
+if settings.FERNET_KEY == "generate-me":
+    settings.FERNET_KEY = Fernet.generate_key().decode()
+
+from app.main import app  # noqa: E402
+from app.db import models  # noqa: E402
+from app.db.session import engine, session_scope  # noqa: E402
+from app.services.anonymize_service import encrypt_field  # noqa: E402
+from app.services.audit_writer import audit_writer  # noqa: E402
+from app.services.auth_service import create_access_token, hash_password  # noqa: E402
+from app.services.decrypt_cache import decrypt_cache  # noqa: E402
+
+
+def seed(patients: int, chunk: int = 5000) -> dict:
+    models.Base.metadata.create_all(bind=engine)
+    now = datetime.utcnow()
+    with session_scope() as db:
+        for start in range(0, patients, chunk):
+            db.execute(insert(models.Patient), [
+                {
+                    "name": f"Patient {i}",
+                    "contact": f"555-{i:07d}",
+                    "anonymized_name": encrypt_field(f"Patient {i}"),
+                    "anonymized_contact": encrypt_field(f"555-{i:07d}"),
+                    "date_added": now - timedelta(minutes=i),
+                }
+                for i in range(start, min(start + chunk, patients))
+            ])
+        admin = models.User(username="bench_admin", email="bench_admin@test.com",
+                            hashed_password=hash_password("Admin123!"), role="admin")
+        db.add(admin)
+        db.flush()
+        token = create_access_token(data={"sub": str(admin.user_id), "role": admin.role})
+    return {"Authorization": f"Bearer {token}"}
+
+
+def run(label: str, client: TestClient, headers: dict, pages: int, requests: int, limit: int) -> None:
+    decrypt_cache.clear()
+    # Collect the page cursors once, then replay them
+    cursors, cursor = [], None
+    for _ in range(pages):
+        cursors.append(cursor)
+        cursor = client.get("/api/patients/", params={"raw": True, "limit": limit, **({"cursor": cursor} if cursor else {})},
+                            headers=headers).json()["next_cursor"]
+    before = decrypt_cache.get_metrics()
+    latencies = []
+    started = time.perf_counter()
+    for i in range(requests):
+        cursor = cursors[i % len(cursors)]
+        request_started = time.perf_counter()
+        response = client.get("/api/patients/", params={"raw": True, "limit": limit, **({"cursor": cursor} if cursor else {})},
+                              headers=headers)
+        latencies.append(time.perf_counter() - request_started)
+        assert response.status_code == 200
+    elapsed = time.perf_counter() - started
+    after = decrypt_cache.get_metrics()
+    hits, misses = after["hits"] - before["hits"], after["misses"] - before["misses"]
+    latencies.sort()
+    print(
+        f"{label:<10}{requests / elapsed:>10.1f}{latencies[len(latencies) // 2] * 1000:>10.2f}"
+        f"{latencies[int(len(latencies) * 0.99)] * 1000:>10.2f}"
+        f"{(hits / (hits + misses) if hits + misses else 0):>10.1%}"
+    )
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark raw patient list with and without the decrypt cache")
+    parser.add_argument("--patients", type=int, default=20_000)
+    parser.add_argument("--pages", type=int, default=5, help="Distinct pages admins keep reopening")
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--limit", type=int, default=200, help="Patients per page")
+    args = parser.parse_args()
+
+    try:
+        print(f"Seeding {args.patients} patients...")
+        headers = seed(args.patients)
+        client = TestClient(app)
+        print(f"{'mode':<10}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}{'hit rate':>10}")
+        run("cached", client, headers, args.pages, args.requests, args.limit)
+        capacity = decrypt_cache.max_entries
+        decrypt_cache.max_entries = 0
+        run("uncached", client, headers, args.pages, args.requests, args.limit)
+        decrypt_cache.max_entries = capacity
+    finally:
+        audit_writer.stop()
+        engine.dispose()
+        shutil.rmtree(TMP_DIR, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
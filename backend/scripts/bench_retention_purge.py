@@ -0,0 +1,150 @@
+"""
+Benchmark retention purges on a large logs table: one DELETE statement
+(the old in-request purge) versus the batched purge from
+app.services.retention_service.
+
+A seed database with --rows logs spread over --days days is built once, then
+copied fresh for each mode. While the purge runs, a writer thread inserts one
+audit row every --write-interval-ms with its own commit, like log_action, and
+records how long each insert waited; the maximum and p99 show how long other
+writers stall behind the purge. Seeding 10M rows takes several minutes.
+
+Usage:
+    python scripts/bench_retention_purge.py --rows 10000000 --days 365 --retention-days 90
+"""
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+if str(BASE_DIR) not in sys.path:
+    sys.path.append(str(BASE_DIR))
+
+TMP_DIR = Path(tempfile.mkdtemp(prefix="bench_retention_"))
+DB_PATH = TMP_DIR / "bench.db"
+# The purge uses the app's session factory, so point it at the scratch database before importing
+os.environ["DB_PATH"] = str(DB_PATH)
+
+from sqlalchemy import delete, insert  # noqa: E402
+from sqlalchemy.exc import OperationalError  # noqa: E402
+
+from app.db import models  # noqa: E402
+from app.db.session import SessionLocal, create_db_engine, engine  # noqa: E402
+from app.services.retention_service import purge_logs_before  # noqa: E402
+
+
+def seed(path: Path, rows: int, days: int, chunk: int = 100_000) -> None:
+    seed_engine = create_db_engine(str(path))
+    models.Base.metadata.create_all(bind=seed_engine)
+    now = datetime.utcnow()
+    step = timedelta(days=days) / rows
+    roles = ("admin", "doctor", "receptionist")
+    with seed_engine.begin() as conn:
+        for start in range(0, rows, chunk):
+            conn.execute(insert(models.Log), [
+                {
+                    "role": roles[i % 3],
+                    "action": f"bench_{i % 7}",
+                    "timestamp": now - step * (rows - i),
+                }
+                for i in range(start, min(start + chunk, rows))
+            ])
+    seed_engine.dispose()
+
+
+def purge_single(cutoff: datetime) -> int:
+    with SessionLocal() as db:
+        deleted = db.execute(
+            delete(models.Log).where(models.Log.timestamp < cutoff),
+            execution_options={"synchronize_session": False},
+        ).rowcount
+        db.commit()
+    return deleted
+
+
+def run_mode(label: str, purge, seed_path: Path, retention_days: int, write_interval: float) -> dict:
+    engine.dispose()
+    for suffix in ("", "-wal", "-shm"):
+        Path(f"{DB_PATH}{suffix}").unlink(missing_ok=True)
+    shutil.copy(seed_path, DB_PATH)
+
+    waits: list[float] = []
+    errors = [0]
+    stop = threading.Event()
+
+    def writer():
+        while not stop.is_set():
+            started = time.perf_counter()
+            session = SessionLocal()
+            try:
+                session.add(models.Log(role="admin", action="bench_write", timestamp=datetime.utcnow()))
+                session.commit()
+                waits.append(time.perf_counter() - started)
+            except OperationalError:
+                session.rollback()
+                errors[0] += 1
+            finally:
+                session.close()
+            time.sleep(write_interval)
+
+    thread = threading.Thread(target=writer)
+    thread.start()
+    started = time.perf_counter()
+    deleted = purge(datetime.utcnow() - timedelta(days=retention_days))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    thread.join()
+
+    waits.sort()
+    return {
+        "mode": label,
+        "deleted": deleted,
+        "seconds": elapsed,
+        "rows_per_sec": deleted / elapsed if elapsed else 0.0,
+        "writes": len(waits),
+        "write_p99_ms": waits[min(len(waits) - 1, int(len(waits) * 0.99))] * 1000 if waits else 0.0,
+        "write_max_ms": waits[-1] * 1000 if waits else 0.0,
+        "write_median_ms": statistics.median(waits) * 1000 if waits else 0.0,
+        "errors": errors[0],
+    }
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark single-statement vs batched retention purges")
+    parser.add_argument("--rows", type=int, default=10_000_000, help="Log rows to seed")
+    parser.add_argument("--days", type=int, default=365, help="Days the seeded rows are spread over")
+    parser.add_argument("--retention-days", type=int, default=90, help="Retention policy to purge with")
+    parser.add_argument("--write-interval-ms", type=float, default=10, help="Pause between concurrent audit writes")
+    args = parser.parse_args()
+
+    seed_path = TMP_DIR / "seed.db"
+    try:
+        print(f"Seeding {args.rows} rows...")
+        seed(seed_path, args.rows, args.days)
+        modes = [("single", purge_single), ("batched", purge_logs_before)]
+        print(
+            f"{'mode':<9}{'deleted':>11}{'seconds':>9}{'rows/s':>11}"
+            f"{'writes':>8}{'p50 ms':>9}{'p99 ms':>9}{'max ms':>10}{'errors':>8}"
+        )
+        for label, purge in modes:
+            r = run_mode(label, purge, seed_path, args.retention_days, args.write_interval_ms / 1000)
+            print(
+                f"{r['mode']:<9}{r['deleted']:>11}{r['seconds']:>9.1f}{r['rows_per_sec']:>11.0f}"
+                f"{r['writes']:>8}{r['write_median_ms']:>9.1f}{r['write_p99_ms']:>9.1f}"
+                f"{r['write_max_ms']:>10.1f}{r['errors']:>8}"
+            )
+    finally:
+        engine.dispose()
+        shutil.rmtree(TMP_DIR, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Benchmark SQLite read/write throughput with the default connection profile
+versus the tuned PRAGMA profile from app.db.session.
+
+Simulates concurrent requests: writer threads insert audit-log rows with one
+commit each (like log_action) while reader threads run the activity-stats
+range query.
+
+Usage:
+    python scripts/bench_sqlite_profile.py --writers 4 --readers 8 --duration 5
+"""
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+if str(BASE_DIR) not in sys.path:
+    sys.path.append(str(BASE_DIR))
+
+from sqlalchemy import func  # noqa: E402
+from sqlalchemy.exc import OperationalError  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from app.db import models  # noqa: E402
+from app.db.session import create_db_engine, get_sqlite_pragmas  # noqa: E402
+
+
+def run_profile(label: str, pragmas: dict, writers: int, readers: int, duration: float, seed_rows: int) -> dict:
+    """Run one benchmark round against a fresh database file."""
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = str(Path(tmp) / "bench.db")
+        engine = create_db_engine(db_path, pragmas=pragmas)
+        models.Base.metadata.create_all(bind=engine)
+        Session = sessionmaker(bind=engine)
+
+        session = Session()
+        now = datetime.utcnow()
+        session.bulk_insert_mappings(models.Log, [
+            {"role": "admin", "action": "seed", "timestamp": now - timedelta(minutes=i)}
+            for i in range(seed_rows)
+        ])
+        session.commit()
+        session.close()
+
+        counts = {"writes": 0, "reads": 0, "errors": 0}
+        lock = threading.Lock()
+        stop = threading.Event()
+
+        def writer():
+            while not stop.is_set():
+                session = Session()
+                try:
+                    session.add(models.Log(role="admin", action="bench_write", timestamp=datetime.utcnow()))
+                    session.commit()
+                    key = "writes"
+                except OperationalError:
+                    session.rollback()
+                    key = "errors"
+                finally:
+                    session.close()
+                with lock:
+                    counts[key] += 1
+
+        def reader():
+            while not stop.is_set():
+                session = Session()
+                try:
+                    session.query(func.count(models.Log.log_id)).filter(
+                        models.Log.timestamp >= datetime.utcnow() - timedelta(days=7)
+                    ).scalar()
+                    key = "reads"
+                except OperationalError:
+                    key = "errors"
+                finally:
+                    session.close()
+                with lock:
+                    counts[key] += 1
+
+        threads = [threading.Thread(target=writer) for _ in range(writers)]
+        threads += [threading.Thread(target=reader) for _ in range(readers)]
+        for thread in threads:
+            thread.start()
+        time.sleep(duration)
+        stop.set()
+        for thread in threads:
+            thread.join()
+        engine.dispose()
+
+    return {
+        "profile": label,
+        "writes_per_sec": counts["writes"] / duration,
+        "reads_per_sec": counts["reads"] / duration,
+        "errors": counts["errors"],
+    }
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark SQLite connection profiles")
+    parser.add_argument("--writers", type=int, default=4, help="Concurrent writer threads")
+    parser.add_argument("--readers", type=int, default=8, help="Concurrent reader threads")
+    parser.add_argument("--duration", type=float, default=5.0, help="Seconds per profile")
+    parser.add_argument("--seed-rows", type=int, default=20000, help="Log rows to seed before measuring")
+    args = parser.parse_args()
+
+    profiles = [
+        ("default", {"busy_timeout": 5000}),
+        ("tuned", get_sqlite_pragmas()),
+    ]
+    print(f"{'profile':<10}{'writes/s':>12}{'reads/s':>12}{'errors':>8}")
+    for label, pragmas in profiles:
+        result = run_profile(label, pragmas, args.writers, args.readers, args.duration, args.seed_rows)
+        print(
+            f"{result['profile']:<10}{result['writes_per_sec']:>12.1f}"
+            f"{result['reads_per_sec']:>12.1f}{result['errors']:>8}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -2,8 +2,10 @@ import sys
 from pathlib import Path
 from datetime import datetime
 
+from alembic.migration import MigrationContext
+from alembic.script import ScriptDirectory
 from passlib.context import CryptContext
-from sqlalchemy import create_engine
+from sqlalchemy import inspect
 from sqlalchemy.orm import sessionmaker
 
 BASE_DIR = Path(__file__).resolve().parents[1]
@@ -12,12 +14,20 @@ if str(BASE_DIR) not in sys.path:
 
 from app.core.config import settings  # noqa: E402
 from app.db import models  # noqa: E402
+from app.db.session import create_db_engine  # noqa: E402
 
 pwd_context = CryptContext(schemes=["pbkdf2_sha256"], deprecated="auto")
 
 
 def get_engine():
-    return create_engine(f"sqlite:///{settings.DB_PATH}", connect_args={"check_same_thread": False})
+    return create_db_engine(settings.DB_PATH)
+
+
+def stamp_schema_head(engine) -> None:
+    """Mark a schema built by create_all as current, so `alembic upgrade head` has nothing to replay."""
+    script = ScriptDirectory(str(BASE_DIR / "alembic"))
+    with engine.begin() as connection:
+        MigrationContext.configure(connection).stamp(script, "head")
 
 
 def initialize_database():
@@ -26,7 +36,10 @@ def initialize_database():
     db_file.parent.mkdir(parents=True, exist_ok=True)
 
     engine = get_engine()
+    fresh_schema = not inspect(engine).has_table("users")
     models.Base.metadata.create_all(bind=engine)
+    if fresh_schema:
+        stamp_schema_head(engine)
 
     Session = sessionmaker(bind=engine)
     session = Session()
@@ -0,0 +1,188 @@
+"""
+Load test comparing a synchronous Session used inside an async handler
+(the old pattern) against the aiosqlite-backed AsyncSession.
+
+The app is served by a separate uvicorn process. Each client repeatedly
+runs an activity-stats style range query while a probe client measures how
+long a trivial endpoint takes to answer; with the blocking pattern every
+request, including the probe, queues behind each query on the event loop.
+
+Usage:
+    python scripts/load_test_async.py --clients 64 --requests 20
+"""
+import asyncio
+import statistics
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+if str(BASE_DIR) not in sys.path:
+    sys.path.append(str(BASE_DIR))
+
+import httpx  # noqa: E402
+from fastapi import FastAPI  # noqa: E402
+from sqlalchemy import func, select  # noqa: E402
+from sqlalchemy.ext.asyncio import async_sessionmaker  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from app.db import models  # noqa: E402
+from app.db.session import create_async_db_engine, create_db_engine  # noqa: E402
+
+
+def build_app(db_path: str, pool_size: int) -> FastAPI:
+    engine = create_db_engine(db_path)
+    Session = sessionmaker(bind=engine)
+    AsyncSession = async_sessionmaker(bind=create_async_db_engine(db_path, pool_size=pool_size))
+    app = FastAPI()
+
+    def stats_query():
+        cutoff = datetime.utcnow() - timedelta(days=30)
+        return (
+            select(models.Log.role, func.count())
+            .where(models.Log.timestamp >= cutoff, models.Log.details.like("%x%"))
+            .group_by(models.Log.role)
+        )
+
+    @app.get("/blocking")
+    async def blocking():
+        db = Session()
+        try:
+            return {"rows": len(db.execute(stats_query()).all())}
+        finally:
+            db.close()
+
+    @app.get("/async")
+    async def non_blocking():
+        async with AsyncSession() as db:
+            return {"rows": len((await db.execute(stats_query())).all())}
+
+    @app.get("/ping")
+    async def ping():
+        return {"ok": True}
+
+    return app
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def run_round(base_url: str, path: str, clients: int, requests: int) -> dict:
+    async with httpx.AsyncClient(base_url=base_url, timeout=120) as client:
+        latencies: list[float] = []
+        probe_latencies: list[float] = []
+        done = asyncio.Event()
+
+        async def worker():
+            for _ in range(requests):
+                start = time.perf_counter()
+                response = await client.get(path)
+                response.raise_for_status()
+                latencies.append((time.perf_counter() - start) * 1000)
+
+        async def probe():
+            while not done.is_set():
+                start = time.perf_counter()
+                await client.get("/ping")
+                probe_latencies.append((time.perf_counter() - start) * 1000)
+                await asyncio.sleep(0.01)
+
+        probe_task = asyncio.create_task(probe())
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(clients)))
+        elapsed = time.perf_counter() - started
+        done.set()
+        await probe_task
+
+    return {
+        "path": path,
+        "throughput": len(latencies) / elapsed,
+        "p50": statistics.median(latencies),
+        "p99": percentile(latencies, 99),
+        "probe_p99": percentile(probe_latencies, 99) if probe_latencies else 0.0,
+    }
+
+
+def create_app() -> FastAPI:
+    """uvicorn factory used by the benchmark server process."""
+    return build_app(os.environ["LOAD_TEST_DB_PATH"], int(os.environ["LOAD_TEST_POOL_SIZE"]))
+
+
+def start_server(db_path: str, port: int, pool_size: int) -> subprocess.Popen:
+    """Serve the app from a separate uvicorn process so clients measure real queueing delay."""
+    process = subprocess.Popen(
+        [
+            sys.executable, "-m", "uvicorn", "scripts.load_test_async:create_app",
+            "--factory", "--port", str(port), "--log-level", "warning",
+        ],
+        cwd=BASE_DIR,
+        env={**os.environ, "LOAD_TEST_DB_PATH": db_path, "LOAD_TEST_POOL_SIZE": str(pool_size)},
+    )
+    for _ in range(100):
+        try:
+            httpx.get(f"http://127.0.0.1:{port}/ping")
+            return process
+        except httpx.TransportError:
+            time.sleep(0.1)
+    process.terminate()
+    raise RuntimeError("Benchmark server did not start")
+
+
+def seed(db_path: str, rows: int) -> None:
+    engine = create_db_engine(db_path)
+    models.Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine)
+    session = Session()
+    now = datetime.utcnow()
+    session.bulk_insert_mappings(models.Log, [
+        {
+            "role": ("admin", "doctor", "receptionist")[i % 3],
+            "action": "view_patients",
+            "details": f"seed {i}",
+            "timestamp": now - timedelta(minutes=i),
+        }
+        for i in range(rows)
+    ])
+    session.commit()
+    session.close()
+    engine.dispose()
+
+
+async def main_async(args) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = str(Path(tmp) / "load.db")
+        seed(db_path, args.seed_rows)
+        # One pooled connection per client so async requests never queue on the pool
+        server = start_server(db_path, args.port, args.clients)
+        base_url = f"http://127.0.0.1:{args.port}"
+        print(f"{'endpoint':<12}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}{'ping p99':>10}")
+        for path in ("/blocking", "/async"):
+            result = await run_round(base_url, path, args.clients, args.requests)
+            print(
+                f"{result['path']:<12}{result['throughput']:>10.1f}{result['p50']:>10.1f}"
+                f"{result['p99']:>10.1f}{result['probe_p99']:>10.1f}"
+            )
+        server.terminate()
+        server.wait()
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Load test sync vs async DB sessions")
+    parser.add_argument("--clients", type=int, default=64, help="Concurrent clients")
+    parser.add_argument("--requests", type=int, default=20, help="Requests per client")
+    parser.add_argument("--seed-rows", type=int, default=50000, help="Log rows to seed")
+    parser.add_argument("--port", type=int, default=8765, help="Port for the benchmark server")
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,18 @@
+"""
+Audit dead-letter replay script.
+Re-inserts audit rows the writer could not persist (AUDIT_DEAD_LETTER_PATH);
+rows that fail again stay in the file.
+"""
+import sys
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+if str(BASE_DIR) not in sys.path:
+    sys.path.append(str(BASE_DIR))
+
+from app.services.audit_writer import audit_writer  # noqa: E402
+
+
+if __name__ == "__main__":
+    result = audit_writer.replay_dead_letters()
+    print(f"Replayed {result['replayed']} audit rows, {result['remaining']} remaining")
@@ -3,14 +3,22 @@ Shared pytest fixtures for all tests.
 """
 import pytest
 import os
+import uuid
+from contextlib import contextmanager
 from pathlib import Path
+from cryptography.fernet import Fernet
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 
 from app.main import app
 from app.db import models
 from app.core.config import settings
+from app.core.response_cache import dashboard_cache
+from app.db.instrumentation import collect_queries
+from app.db.session import SessionLocal, create_db_engine
+from app.services.audit_writer import audit_writer
+from app.services.auth_service import create_access_token, hash_password
+from app.services.retention_service import retention_policy_cache, retention_purges
 
 
 @pytest.fixture(scope="function")
@@ -19,6 +27,82 @@ def client():
     return TestClient(app)
 
 
+@pytest.fixture
+def make_user():
+    """
+    Factory for committed users with unique names, detached so their
+    attributes stay readable:
+
+        doctor = make_user("doctor", gdpr_consent=True)
+    """
+    def _make_user(role: str = "admin", **fields) -> models.User:
+        suffix = uuid.uuid4().hex[:8]
+        fields.setdefault("is_active", True)
+        with SessionLocal() as db:
+            user = models.User(
+                username=f"{role}_{suffix}",
+                email=f"{role}_{suffix}@test.com",
+                hashed_password=hash_password("Test123!"),
+                role=role,
+                **fields,
+            )
+            db.add(user)
+            db.commit()
+            db.refresh(user)
+            db.expunge(user)
+        return user
+
+    return _make_user
+
+
+@pytest.fixture
+def auth_headers():
+    """Bearer headers for a user: auth_headers(user)."""
+    def _auth_headers(user: models.User) -> dict:
+        token = create_access_token(data={"sub": str(user.user_id), "role": user.role})
+        return {"Authorization": f"Bearer {token}"}
+
+    return _auth_headers
+
+
+@pytest.fixture
+def admin_user(make_user):
+    return make_user("admin")
+
+
+@pytest.fixture
+def admin_headers(admin_user, auth_headers):
+    return auth_headers(admin_user)
+
+
+@pytest.fixture
+def fernet_key():
+    """A real Fernet key for tests that encrypt, when .env still has the placeholder."""
+    if settings.FERNET_KEY == "generate-me":
+        settings.FERNET_KEY = Fernet.generate_key().decode()
+
+
+@pytest.fixture
+def assert_max_queries():
+    """
+    Lock in a SQL statement budget for a block of code:
+
+        with assert_max_queries(4):
+            client.get("/api/logs", headers=headers)
+    """
+    @contextmanager
+    def _assert_max_queries(limit: int):
+        with collect_queries() as stats:
+            yield stats
+            # Attribute queued audit-log inserts to the block that produced them
+            audit_writer.flush()
+        assert stats.count <= limit, (
+            f"Expected at most {limit} queries, got {stats.count}:\n" + "\n".join(stats.statements)
+        )
+
+    return _assert_max_queries
+
+
 @pytest.fixture(scope="function", autouse=True)
 def setup_test_db():
     """Ensure test database is set up and cleaned up."""
@@ -26,10 +110,17 @@ def setup_test_db():
     test_db_path = os.getenv("DB_PATH", settings.DB_PATH)
     
     # Create tables if they don't exist
-    engine = create_engine(f"sqlite:///{test_db_path}", connect_args={"check_same_thread": False})
+    engine = create_db_engine(test_db_path)
     models.Base.metadata.create_all(bind=engine)
+    engine.dispose()
     
     yield
+
+    # Don't let queued audit rows, running purges or cached dashboard responses leak into the next test
+    retention_purges.wait()
+    audit_writer.flush()
+    dashboard_cache.invalidate()
+    retention_policy_cache.invalidate()
     
     # Optional: Clean up test database after all tests
     # Uncomment if you want to delete test DB after tests
@@ -0,0 +1,121 @@
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.db.session import SessionLocal
+from app.db import models
+from app.services.activity_counters import ActivityCounters, activity_counters
+from app.services.audit_writer import audit_writer
+from app.services.logging_service import log_action
+
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def tag():
+    return f"counters{uuid.uuid4().hex[:8]}"
+
+
+def test_window_sums_buckets_by_role_and_type():
+    counters = ActivityCounters(minute_buckets=120, hour_buckets=48)
+    now = datetime(2026, 10, 16, 12, 30)
+    counters.record("doctor", "view_patient", now)
+    counters.record("doctor", "view_logs", now - timedelta(minutes=5))
+    counters.record(None, "login", now - timedelta(hours=3))
+
+    minutes = counters.window(1, "minute", now=now)
+    assert len(minutes["buckets"]) == 60
+    assert minutes["total"] == 2
+    assert minutes["actions_by_type"] == {"view": 2}
+    assert minutes["actions"][-1] == 1
+
+    hours = counters.window(24, "hour", now=now)
+    assert hours["total"] == 3
+    assert hours["actions_by_role"] == {"doctor": 2, "unknown": 1}
+    assert hours["buckets"][-1] == "2026-10-16T12:00:00"
+
+
+def test_ring_forgets_buckets_older_than_its_span():
+    counters = ActivityCounters(minute_buckets=60, hour_buckets=4)
+    now = datetime(2026, 10, 16, 12, 0)
+    counters.record("admin", "login", now - timedelta(hours=6))
+    counters.record("admin", "login", now)
+    # A late event for a bucket that has already been recycled is ignored
+    counters.record("admin", "login", now - timedelta(hours=5))
+
+    assert counters.window(4, "hour", now=now)["total"] == 1
+    assert counters.totals_by_key(now - timedelta(hours=3), now=now) == {("admin", "login"): 1}
+
+
+def test_rows_in_caller_transaction_count_only_on_commit(db, tag):
+    before = activity_counters.window(1)["actions_by_type"].get(tag, 0)
+
+    log_action(role="doctor", action=f"{tag}_update", db=db)
+    db.rollback()
+    assert activity_counters.window(1)["actions_by_type"].get(tag, 0) == before
+
+    log_action(role="doctor", action=f"{tag}_update", db=db)
+    assert activity_counters.window(1)["actions_by_type"].get(tag, 0) == before
+    db.commit()
+    assert activity_counters.window(1)["actions_by_type"].get(tag, 0) == before + 1
+
+
+def test_out_of_band_rows_count_immediately(tag):
+    log_action(role="admin", action=f"{tag}_export")
+    assert activity_counters.window(1)["actions_by_type"][tag] == 1
+
+
+def test_seed_rebuilds_counters_from_logs(db, tag):
+    now = datetime.utcnow()
+    db.add(models.Log(role="receptionist", action=f"{tag}_add", timestamp=now - timedelta(minutes=10)))
+    db.add(models.Log(role="receptionist", action=f"{tag}_add", timestamp=now - timedelta(hours=30)))
+    db.commit()
+
+    counters = ActivityCounters(minute_buckets=1440, hour_buckets=720)
+    counters.seed(db, now=now)
+
+    assert counters.window(24, "minute", now=now)["actions_by_type"][tag] == 1
+    assert counters.window(48, "hour", now=now)["actions_by_type"][tag] == 2
+
+
+def test_recent_activity_endpoint_reads_counters(client, admin_headers, tag):
+    log_action(role="doctor", action=f"{tag}_view")
+
+    response = client.get(
+        "/api/stats/activity/recent?hours=2&granularity=minute", headers=admin_headers
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert len(data["buckets"]) == 120
+    assert data["actions_by_type"][tag] == 1
+
+    too_long = client.get(
+        "/api/stats/activity/recent?hours=48&granularity=minute", headers=admin_headers
+    )
+    assert too_long.status_code == 400
+
+
+def test_consistency_endpoint_reports_rows_written_behind_its_back(client, db, admin_headers, tag):
+    audit_writer.flush()
+    with SessionLocal() as session:
+        activity_counters.seed(session)
+
+    response = client.get("/api/admin/stats/activity/consistency?hours=2", headers=admin_headers)
+    assert response.status_code == 200
+    assert response.json()["consistent"] is True
+
+    # Written directly, bypassing log_action
+    db.add(models.Log(role="doctor", action=f"{tag}_edit", timestamp=datetime.utcnow()))
+    db.commit()
+
+    data = client.get("/api/admin/stats/activity/consistency?hours=2", headers=admin_headers).json()
+    assert data["consistent"] is False
+    assert {"role": "doctor", "action_type": tag, "counters": 0, "database": 1} in data["mismatches"]
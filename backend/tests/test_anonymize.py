@@ -1,3 +1,5 @@
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
 import pytest
 from app.db.session import SessionLocal
 from app.db import models
@@ -90,3 +92,52 @@ def test_anonymize_all_patients(db):
     for patient in patients:
         assert patient.anonymized_name is not None or patient.name is None
 
+
+
+@pytest.fixture
+def fernet_key():
+    if settings.FERNET_KEY == "generate-me":
+        settings.FERNET_KEY = Fernet.generate_key().decode()
+
+
+def test_decrypt_fields_preserves_order_across_chunks(fernet_key):
+    """Chunks decrypted on a pool come back in input order; bad tokens become None."""
+    values = [f"Patient {i}" for i in range(10)]
+    tokens = [anonymize_service.encrypt_field(value) for value in values] + [None, "ANON_7", ""]
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        decrypted = anonymize_service.decrypt_fields(tokens, chunk_size=3, executor=pool)
+
+    assert decrypted == values + [None, None, None]
+    assert anonymize_service.decrypt_fields(tokens) == decrypted
+
+
+def test_large_batches_use_the_process_pool(fernet_key, monkeypatch):
+    monkeypatch.setattr(settings, "DECRYPT_POOL", "process")
+    monkeypatch.setattr(settings, "DECRYPT_WORKERS", 2)
+    monkeypatch.setattr(settings, "DECRYPT_PARALLEL_THRESHOLD", 4)
+    monkeypatch.setattr(settings, "DECRYPT_CHUNK_SIZE", 3)
+    tokens = [anonymize_service.encrypt_field(f"555-{i:04d}") for i in range(8)]
+    try:
+        decrypted = anonymize_service.decrypt_fields(tokens)
+        assert isinstance(anonymize_service.get_decrypt_pool(), ProcessPoolExecutor)
+    finally:
+        anonymize_service.shutdown_decrypt_pool()
+
+    assert decrypted == [f"555-{i:04d}" for i in range(8)]
+
+
+def test_raw_batch_matches_single_patient_reads(fernet_key, db):
+    patients = [models.Patient(name=f"Batch {i}", contact=f"555-{i}") for i in range(3)]
+    db.add_all(patients)
+    db.flush()
+    for patient in patients[:2]:
+        anonymize_service.mask_patient(patient)
+    # Not decryptable: falls back to the stored plaintext
+    patients[2].anonymized_name = "ANON_broken"
+    db.commit()
+
+    batch = anonymize_service.get_anonymized_patients_data(patients, "admin", raw=True)
+
+    assert batch == [anonymize_service.get_anonymized_patient_data(p, "admin", raw=True) for p in patients]
+    assert [(row["name"], row["contact"]) for row in batch] == [(f"Batch {i}", f"555-{i}") for i in range(3)]
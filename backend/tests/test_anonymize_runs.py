@@ -0,0 +1,107 @@
+import time
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.db import models
+from app.services import anonymize_service
+
+
+@pytest.fixture
+def pending(monkeypatch, fernet_key):
+    """Five unmasked patients, with everything pending before them anonymized first."""
+    # Windows of one chunk, masked inline
+    monkeypatch.setattr(settings, "DECRYPT_WORKERS", 1)
+    anonymize_service.anonymize_all_patients()
+    tag = uuid.uuid4().hex[:8]
+    with SessionLocal() as db:
+        patients = [models.Patient(name=f"Run {tag} {i}", contact=f"555-01{i:02d}") for i in range(5)]
+        db.add_all(patients)
+        db.commit()
+        ids = [p.patient_id for p in patients]
+    yield ids
+    with SessionLocal() as db:
+        db.query(models.Patient).filter(models.Patient.patient_id.in_(ids)).delete(synchronize_session=False)
+        db.commit()
+
+
+def masked_ids(ids):
+    with SessionLocal() as db:
+        return [
+            p.patient_id for p in db.query(models.Patient).filter(models.Patient.patient_id.in_(ids))
+            .order_by(models.Patient.patient_id) if p.anonymized_name
+        ]
+
+
+def test_run_checkpoints_each_chunk_and_resumes_after_a_failure(pending, monkeypatch):
+    real_mask_values = anonymize_service.mask_values
+    calls = []
+
+    def failing_second_window(*args, **kwargs):
+        calls.append(1)
+        if len(calls) == 2:
+            raise RuntimeError("worker died")
+        return real_mask_values(*args, **kwargs)
+
+    monkeypatch.setattr(anonymize_service, "mask_values", failing_second_window)
+    run_id = anonymize_service.claim_anonymize_run()
+    with pytest.raises(RuntimeError):
+        anonymize_service.run_anonymize_all(run_id, chunk_size=2)
+
+    status = anonymize_service.get_anonymize_status(run_id)
+    assert (status["status"], status["processed"], status["total"]) == ("failed", 2, 5)
+    assert status["last_patient_id"] == pending[1] and status["error"] == "worker died"
+    assert masked_ids(pending) == pending[:2]
+
+    # The next claim resumes the same run after its checkpoint
+    monkeypatch.setattr(anonymize_service, "mask_values", real_mask_values)
+    assert anonymize_service.claim_anonymize_run() == run_id
+    assert anonymize_service.run_anonymize_all(run_id, chunk_size=2) == 3
+
+    status = anonymize_service.get_anonymize_status(run_id)
+    assert (status["status"], status["processed"], status["percent"]) == ("completed", 5, 100.0)
+    assert status["rows_per_second"] > 0 and status["finished_at"] is not None
+    assert masked_ids(pending) == pending
+    with SessionLocal() as db:
+        patients = db.query(models.Patient).filter(models.Patient.patient_id.in_(pending)).all()
+        assert anonymize_service.decrypt_patients(patients) == [(p.name, p.contact) for p in patients]
+        assert all(p.name_bidx for p in patients)
+
+
+def test_a_live_run_is_exclusive_until_its_heartbeat_goes_stale(pending):
+    run_id = anonymize_service.claim_anonymize_run(owner="other-host:1")
+    with pytest.raises(anonymize_service.AnonymizeRunActive):
+        anonymize_service.claim_anonymize_run()
+
+    with SessionLocal() as db:
+        run = db.get(models.AnonymizeRun, run_id)
+        run.updated_at = datetime.utcnow() - timedelta(seconds=settings.ANONYMIZE_STALE_SECONDS + 1)
+        db.commit()
+    assert anonymize_service.claim_anonymize_run() == run_id
+    assert anonymize_service.run_anonymize_all(run_id) == 5
+
+
+def test_background_run_reports_progress_through_status(pending, client, admin_headers, make_user, auth_headers):
+    headers = admin_headers
+    doctor_headers = auth_headers(make_user("doctor"))
+
+    response = client.post("/api/patients/anonymize", json={"patient_id": None, "background": True}, headers=headers)
+    assert response.status_code == 202
+    run_id = response.json()["run_id"]
+
+    deadline = time.monotonic() + 10
+    while True:
+        status = client.get("/api/patients/anonymize/status", headers=headers).json()
+        if status["status"] != "running" or time.monotonic() > deadline:
+            break
+        time.sleep(0.05)
+    assert (status["run_id"], status["status"], status["processed"]) == (run_id, "completed", 5)
+    assert masked_ids(pending) == pending
+
+    # Nothing left: a synchronous run completes at once
+    response = client.post("/api/patients/anonymize", json={"patient_id": None}, headers=headers)
+    assert response.status_code == 200 and response.json()["anonymized_count"] == 0
+    assert client.get("/api/patients/anonymize/status", headers=doctor_headers).status_code == 403
@@ -0,0 +1,77 @@
+import asyncio
+import uuid
+from unittest.mock import patch
+
+import pytest
+
+from app.db.session import SessionLocal
+from app.db import models
+from app.services.audit_writer import audit_writer
+from app.services.logging_service import log_action_async
+
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@patch("app.api.auth.email_service.send_mfa_code")
+def test_async_auth_flow(mock_send_email, client, db):
+    """Register, login and MFA-verify end to end on the async session path."""
+    codes = []
+
+    async def capture_code(email, code):
+        codes.append(code)
+        return True
+
+    mock_send_email.side_effect = capture_code
+    username = f"async_{uuid.uuid4().hex[:8]}"
+
+    response = client.post(
+        "/api/auth/register",
+        json={"username": username, "email": f"{username}@test.com", "password": "Async123!"},
+    )
+    assert response.status_code == 201
+
+    response = client.post(
+        "/api/auth/login",
+        json={"username_or_email": username, "password": "Async123!"},
+    )
+    assert response.status_code == 200
+    temp_token = response.json()["temp_token"]
+
+    response = client.post("/api/auth/mfa-verify", json={"temp_token": temp_token, "code": codes[0]})
+    assert response.status_code == 200
+    token = response.json()["access_token"]
+
+    response = client.get("/api/auth/me", headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 200
+    assert response.json()["username"] == username
+
+    audit_writer.flush()
+    actions = {
+        log.action
+        for log in db.query(models.Log).filter(models.Log.details.like(f"%{username}%")).all()
+    }
+    assert "register" in actions
+
+
+def test_log_action_async_persists_row(db):
+    """log_action_async writes the audit row through its own async session."""
+    marker = f"async-log-{uuid.uuid4().hex}"
+    asyncio.run(log_action_async(role="admin", action="async_test", details=marker))
+    audit_writer.flush()
+
+    entry = db.query(models.Log).filter(models.Log.details == marker).first()
+    assert entry is not None
+    assert entry.action == "async_test"
+
+
+def test_health_check_uses_async_session(client):
+    response = client.get("/api/health")
+    assert response.status_code == 200
+    assert response.json()["db"] is True
@@ -0,0 +1,67 @@
+import gzip
+import json
+import logging
+import uuid
+
+from app.services.logging_service import (
+    JsonLinesFormatter,
+    SizeAndTimeRotatingFileHandler,
+    start_audit_log_listener,
+)
+
+
+def make_logger():
+    logger = logging.getLogger(f"test_audit_{uuid.uuid4().hex}")
+    logger.setLevel(logging.DEBUG)
+    logger.propagate = False
+    return logger
+
+
+def test_json_formatter_serializes_extra_fields():
+    record = logging.LogRecord("hospital_cia.audit", logging.INFO, __file__, 1, "action performed", (), None)
+    record.user_id = 7
+    record.action = "view_logs"
+    record.details = None
+
+    entry = json.loads(JsonLinesFormatter().format(record))
+
+    assert entry["message"] == "action performed"
+    assert entry["level"] == "INFO"
+    assert entry["user_id"] == 7
+    assert entry["action"] == "view_logs"
+    assert "details" in entry
+    assert "lineno" not in entry
+
+
+def test_queue_listener_writes_json_lines(tmp_path):
+    logger = make_logger()
+    path = tmp_path / "audit.log"
+    listener = start_audit_log_listener(logger, path)
+    for i in range(5):
+        logger.info("Request received", extra={"path": f"/api/{i}", "method": "GET"})
+    listener.stop()
+
+    lines = path.read_text().splitlines()
+    assert len(lines) == 5
+    assert [json.loads(line)["path"] for line in lines] == [f"/api/{i}" for i in range(5)]
+
+
+def test_size_rotation_gzips_segments(tmp_path):
+    path = tmp_path / "audit.log"
+    handler = SizeAndTimeRotatingFileHandler(path, max_bytes=500, backup_count=3)
+    handler.setFormatter(JsonLinesFormatter())
+    logger = make_logger()
+    logger.addHandler(handler)
+    try:
+        for i in range(100):
+            logger.info("action performed", extra={"seq": i})
+    finally:
+        handler.close()
+
+    segments = sorted(tmp_path.glob("audit.log.*.gz"))
+    assert 0 < len(segments) <= 3
+    assert path.stat().st_size < 500
+    for segment in segments:
+        with gzip.open(segment, "rt") as f:
+            for line in f:
+                assert "seq" in json.loads(line)
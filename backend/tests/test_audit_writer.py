@@ -0,0 +1,243 @@
+import json
+import threading
+import uuid
+from datetime import datetime
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.orm import sessionmaker
+
+from app.db import models
+from app.db.instrumentation import collect_queries, instrument_engine
+from app.db.session import SessionLocal, async_engine, create_db_engine, engine
+from app.services.audit_writer import AuditWriter, audit_writer
+from app.services.logging_service import log_action
+from app.services.retention_service import retention_purges
+
+
+@pytest.fixture
+def writer_session(tmp_path):
+    engine = create_db_engine(str(tmp_path / "audit.db"))
+    instrument_engine(engine)
+    models.Base.metadata.create_all(bind=engine)
+    yield sessionmaker(bind=engine)
+    engine.dispose()
+
+
+def make_row(action: str = "test_action") -> dict:
+    return {"user_id": None, "role": "admin", "action": action, "details": None, "timestamp": datetime.utcnow()}
+
+
+def count_rows(session_factory, action: str) -> int:
+    session = session_factory()
+    try:
+        return session.query(models.Log).filter(models.Log.action == action).count()
+    finally:
+        session.close()
+
+
+def test_rows_are_written_in_batches(writer_session):
+    """Queued rows are group-committed with one executemany per batch."""
+    writer = AuditWriter(session_factory=writer_session, batch_size=50, flush_interval_ms=1000)
+    try:
+        with collect_queries() as stats:
+            for _ in range(120):
+                writer.submit(make_row("batched"))
+            writer.flush()
+        assert count_rows(writer_session, "batched") == 120
+        metrics = writer.get_metrics()
+        assert metrics["written"] == 120
+        assert metrics["queue_depth"] == 0
+        assert metrics["max_batch_size"] == 50
+        # One executemany per batch instead of one INSERT per row
+        inserts = [statement for statement in stats.statements if statement.startswith("INSERT")]
+        assert len(inserts) == metrics["flushes"] == 3
+    finally:
+        writer.stop()
+
+
+def test_flush_interval_bounds_latency(writer_session):
+    """A partial batch is written once the flush interval elapses."""
+    writer = AuditWriter(session_factory=writer_session, batch_size=1000, flush_interval_ms=20)
+    try:
+        writer.submit(make_row("interval"))
+        writer.flush(timeout=5)
+        assert count_rows(writer_session, "interval") == 1
+        assert writer.get_metrics()["last_flush_ms"] > 0
+    finally:
+        writer.stop()
+
+
+def test_stop_drains_pending_rows(writer_session):
+    writer = AuditWriter(session_factory=writer_session, batch_size=1000, flush_interval_ms=60000)
+    for _ in range(10):
+        writer.submit(make_row("drain"))
+    writer.stop()
+    assert not writer.running
+    assert count_rows(writer_session, "drain") == 10
+
+
+def test_drop_policy_counts_dropped_rows(writer_session):
+    """With a stalled flusher and a full queue, the drop policy discards and counts."""
+    writer = AuditWriter(session_factory=writer_session, max_queue_size=2, batch_size=1, full_policy="drop")
+    gate = threading.Event()
+    original = writer._write_batch
+    writer._write_batch = lambda rows: (gate.wait(5), original(rows))
+    try:
+        for _ in range(10):
+            writer.submit(make_row("dropped"))
+        assert writer.get_metrics()["dropped"] > 0
+    finally:
+        gate.set()
+        writer.stop()
+    metrics = writer.get_metrics()
+    assert metrics["written"] + metrics["dropped"] == 10
+
+
+def test_block_policy_falls_back_to_inline_write(writer_session):
+    """No audit row is lost: after the block timeout the caller writes it inline."""
+    writer = AuditWriter(
+        session_factory=writer_session, max_queue_size=1, batch_size=1, full_policy="block", block_timeout_ms=10
+    )
+    gate = threading.Event()
+    original = writer._write_batch
+
+    def stalled(rows):
+        if threading.current_thread().name == "audit-writer":
+            gate.wait(5)
+        original(rows)
+
+    writer._write_batch = stalled
+    try:
+        for _ in range(5):
+            writer.submit(make_row("blocked"))
+        assert writer.get_metrics()["written_inline"] > 0
+    finally:
+        gate.set()
+        writer.stop()
+    assert count_rows(writer_session, "blocked") == 5
+
+
+def test_unknown_policy_rejected():
+    with pytest.raises(ValueError):
+        AuditWriter(full_policy="ignore")
+
+
+def test_log_action_joins_caller_transaction():
+    """With db, the audit row is only persisted by the caller's commit."""
+    marker = f"enlisted-{uuid.uuid4().hex}"
+    session = SessionLocal()
+    try:
+        log_action(role="admin", action="enlisted", details=marker, db=session)
+        session.rollback()
+        audit_writer.flush()
+        assert session.query(models.Log).filter(models.Log.details == marker).count() == 0
+
+        log_action(role="admin", action="enlisted", details=marker, db=session)
+        session.commit()
+        assert session.query(models.Log).filter(models.Log.details == marker).count() == 1
+    finally:
+        session.close()
+
+
+def test_out_of_band_log_survives_rollback():
+    marker = f"out-of-band-{uuid.uuid4().hex}"
+    session = SessionLocal()
+    try:
+        log_action(role="admin", action="out_of_band", details=marker, db=session, out_of_band=True)
+        session.rollback()
+        audit_writer.flush()
+        assert session.query(models.Log).filter(models.Log.details == marker).count() == 1
+    finally:
+        session.close()
+
+
+def test_write_routes_commit_once(client, admin_headers, make_user, monkeypatch):
+    """Each write request commits its change and audit row in a single transaction."""
+    other = make_user("receptionist")
+
+    commits = []
+
+    def on_commit(conn):
+        commits.append(conn)
+
+    # The retention purge commits per batch in its own thread, after the request
+    monkeypatch.setattr(retention_purges, "purge", lambda cutoff, progress: 0)
+
+    requests = [
+        ("post", "/api/patients/", {"name": "Commit Once", "contact": "555-2222"}),
+        ("put", f"/api/users/{other.user_id}/role", {"role": "doctor"}),
+        ("put", f"/api/users/{other.user_id}/activate", None),
+        ("post", "/api/consent/accept", {"accepted": True}),
+        ("post", "/api/admin/retention", {"retention_days": 365, "enabled": True}),
+    ]
+    audit_writer.flush()
+    for target in (engine, async_engine.sync_engine):
+        event.listen(target, "commit", on_commit)
+    try:
+        for method, url, body in requests:
+            commits.clear()
+            response = client.request(method, url, json=body, headers=admin_headers)
+            assert response.status_code < 300, url
+            assert len(commits) == 1, url
+    finally:
+        for target in (engine, async_engine.sync_engine):
+            event.remove(target, "commit", on_commit)
+
+
+def test_audit_writer_metrics_endpoint(client, admin_headers):
+    response = client.get("/api/admin/metrics/audit-writer", headers=admin_headers)
+    assert response.status_code == 200
+    body = response.json()
+    for key in ("queue_depth", "queue_capacity", "written", "dropped", "avg_flush_ms", "max_flush_ms"):
+        assert key in body
+
+
+def test_failed_batch_is_retried_with_backoff(writer_session, tmp_path, monkeypatch):
+    writer = AuditWriter(session_factory=writer_session, retries=3, retry_backoff_ms=10,
+                         dead_letter_path=str(tmp_path / "dead.jsonl"))
+    original, attempts, sleeps = writer._insert, [], []
+
+    def flaky(rows):
+        attempts.append(len(rows))
+        if len(attempts) < 3:
+            raise RuntimeError("database is locked")
+        original(rows)
+
+    monkeypatch.setattr(writer, "_insert", flaky)
+    monkeypatch.setattr("app.services.audit_writer.time.sleep", sleeps.append)
+    writer.write_inline([make_row("retried") for _ in range(4)])
+
+    assert attempts == [4, 4, 4]
+    assert sleeps == [0.01, 0.02]
+    assert count_rows(writer_session, "retried") == 4
+    assert writer.get_metrics()["retries"] == 2
+    assert not (tmp_path / "dead.jsonl").exists()
+
+
+def test_unwritable_rows_fall_back_per_row_and_are_dead_lettered(writer_session, tmp_path, monkeypatch):
+    dead_letter = tmp_path / "dead.jsonl"
+    writer = AuditWriter(session_factory=writer_session, retries=1, retry_backoff_ms=0,
+                         dead_letter_path=str(dead_letter))
+    original, broken = writer._insert, {"on": True}
+
+    def reject_poison(rows):
+        if broken["on"] and any(row["action"] == "poison" for row in rows):
+            raise RuntimeError("constraint failed")
+        original(rows)
+
+    monkeypatch.setattr(writer, "_insert", reject_poison)
+    writer.write_inline([make_row("healthy"), make_row("poison"), make_row("healthy")])
+
+    # The good rows still land; the bad one is kept, not dropped
+    assert count_rows(writer_session, "healthy") == 2
+    assert count_rows(writer_session, "poison") == 0
+    metrics = writer.get_metrics()
+    assert (metrics["row_fallbacks"], metrics["failed"], metrics["dead_lettered"]) == (1, 1, 1)
+    entries = [json.loads(line) for line in dead_letter.read_text().splitlines()]
+    assert [(entry["action"], entry["error"]) for entry in entries] == [("poison", "constraint failed")]
+
+    broken["on"] = False
+    assert writer.replay_dead_letters() == {"replayed": 1, "remaining": 0}
+    assert count_rows(writer_session, "poison") == 1
+    assert dead_letter.read_text() == ""
@@ -0,0 +1,76 @@
+from datetime import date
+
+from sqlalchemy import text
+
+from app.db.session import SessionLocal
+from app.db import models
+from app.services.consent_service import consent_history, consent_totals, reconcile_consent_counters
+
+
+def test_counters_follow_consent_and_activation_changes(client, make_user, auth_headers):
+    with SessionLocal() as db:
+        reconcile_consent_counters(db)
+        db.commit()
+        before = consent_totals(db)
+    admin_headers = auth_headers(make_user("admin"))
+    user = make_user("doctor")
+    user_id, user_headers = user.user_id, auth_headers(user)
+    with SessionLocal() as db:
+        assert consent_totals(db) == (before[0] + 2, before[1])
+
+    assert client.post("/api/consent/accept", json={"accepted": True}, headers=user_headers).status_code == 200
+    with SessionLocal() as db:
+        assert consent_totals(db) == (before[0] + 2, before[1] + 1)
+
+    assert client.put(f"/api/users/{user_id}/activate", headers=admin_headers).status_code == 200
+    with SessionLocal() as db:
+        assert consent_totals(db) == (before[0] + 1, before[1])
+        # Every change went through the triggers, so there is nothing to repair
+        assert reconcile_consent_counters(db) is None
+
+
+def test_reconcile_repairs_drift():
+    with SessionLocal() as db:
+        reconcile_consent_counters(db)
+        db.execute(text("UPDATE consent_counters SET total_users = total_users + 5"))
+        db.commit()
+
+        assert reconcile_consent_counters(db) == {"total_users": -5, "consented_users": 0}
+        db.commit()
+        assert reconcile_consent_counters(db) is None
+
+
+def test_history_carries_totals_forward():
+    with SessionLocal() as db:
+        db.query(models.ConsentDaily).filter(models.ConsentDaily.day < date(2001, 12, 31)).delete()
+        db.add_all([
+            models.ConsentDaily(day=date(2001, 1, 2), total_users=10, consented_users=4),
+            models.ConsentDaily(day=date(2001, 1, 4), total_users=12, consented_users=9),
+        ])
+        db.commit()
+        try:
+            history = consent_history(db, date(2001, 1, 1), date(2001, 1, 5))
+            later = consent_history(db, date(2001, 1, 3), date(2001, 1, 3))
+        finally:
+            db.query(models.ConsentDaily).filter(models.ConsentDaily.day < date(2001, 12, 31)).delete()
+            db.commit()
+
+    assert [(total, consented) for _, total, consented in history] == [(0, 0), (10, 4), (10, 4), (12, 9), (12, 9)]
+    # A window starting between changes picks up the last earlier row
+    assert later == [(date(2001, 1, 3), 10, 4)]
+
+
+def test_stats_endpoints_read_the_counters(client, make_user, auth_headers):
+    admin = make_user("admin", gdpr_consent=True)
+    with SessionLocal() as db:
+        total_users, consented_users = consent_totals(db)
+
+    response = client.get("/api/admin/consent-stats", headers=auth_headers(admin))
+    assert response.status_code == 200
+    assert (response.json()["total_users"], response.json()["consented_users"]) == (total_users, consented_users)
+
+    history = client.get("/api/admin/consent-stats/history?days=7", headers=auth_headers(admin))
+    assert history.status_code == 200
+    body = history.json()
+    assert len(body["days"]) == 8
+    assert (body["total_users"][-1], body["consented_users"][-1]) == (total_users, consented_users)
@@ -0,0 +1,35 @@
+from sqlalchemy import text
+
+from app.db.session import create_db_engine, engine
+
+
+def test_engine_applies_pragma_profile(tmp_path):
+    """Every new connection gets the tuned PRAGMA profile."""
+    test_engine = create_db_engine(str(tmp_path / "pragma.db"))
+    try:
+        with test_engine.connect() as conn:
+            assert conn.execute(text("PRAGMA journal_mode")).scalar().lower() == "wal"
+            # synchronous=NORMAL is reported as 1
+            assert conn.execute(text("PRAGMA synchronous")).scalar() == 1
+            assert conn.execute(text("PRAGMA busy_timeout")).scalar() == 5000
+            # temp_store=MEMORY is reported as 2
+            assert conn.execute(text("PRAGMA temp_store")).scalar() == 2
+            assert conn.execute(text("PRAGMA cache_size")).scalar() == -65536
+    finally:
+        test_engine.dispose()
+
+
+def test_engine_accepts_custom_pragmas(tmp_path):
+    """A custom profile replaces the default one."""
+    test_engine = create_db_engine(str(tmp_path / "custom.db"), pragmas={"journal_mode": "DELETE"})
+    try:
+        with test_engine.connect() as conn:
+            assert conn.execute(text("PRAGMA journal_mode")).scalar().lower() == "delete"
+    finally:
+        test_engine.dispose()
+
+
+def test_app_engine_uses_wal():
+    """The application engine is built through the shared factory."""
+    with engine.connect() as conn:
+        assert conn.execute(text("PRAGMA journal_mode")).scalar().lower() == "wal"
@@ -0,0 +1,95 @@
+import pytest
+from cryptography.fernet import Fernet
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.db import models
+from app.services import anonymize_service
+from app.services.decrypt_cache import DecryptCache, decrypt_cache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def fernet_key():
+    if settings.FERNET_KEY == "generate-me":
+        settings.FERNET_KEY = Fernet.generate_key().decode()
+
+
+def test_lru_eviction_by_entries_and_bytes_zeroes_plaintext():
+    cache = DecryptCache(max_entries=2, max_bytes=1000, ttl_seconds=60)
+    cache.put("token-a", "Alice")
+    cache.put("token-b", "Bob")
+    evicted = cache._entries["token-a"].value
+    assert cache.get("token-b") == "Bob"
+    cache.put("token-c", "Carol")
+
+    assert cache.get("token-a") is None
+    assert evicted == bytearray(5)
+
+    # 7 + 4 bytes per entry: a third entry no longer fits in 25 bytes
+    small = DecryptCache(max_entries=100, max_bytes=25, ttl_seconds=60)
+    for token in ("token-1", "token-2", "token-3"):
+        small.put(token, "abcd")
+    metrics = small.get_metrics()
+    assert (metrics["entries"], metrics["bytes"], metrics["evictions"]) == (2, 22, 1)
+    assert small.get("token-1") is None
+
+
+def test_entries_expire_after_ttl():
+    clock = FakeClock()
+    cache = DecryptCache(max_entries=10, max_bytes=1000, ttl_seconds=60, clock=clock)
+    cache.put("token", "555-1234")
+    value = cache._entries["token"].value
+    clock.now += 59
+    assert cache.get("token") == "555-1234"
+    clock.now += 1
+    assert cache.get("token") is None
+    assert value == bytearray(8)
+    assert cache.get_metrics()["expirations"] == 1
+
+
+def test_batched_decrypt_only_decrypts_cache_misses(fernet_key, monkeypatch):
+    cache = DecryptCache(max_entries=100, max_bytes=100000, ttl_seconds=60)
+    tokens = [anonymize_service.encrypt_field(f"Patient {i}") for i in range(4)]
+    decrypted_counts = []
+    real_decrypt_chunk = anonymize_service._decrypt_chunk
+
+    def counting_decrypt_chunk(chunk):
+        decrypted_counts.append(len(chunk))
+        return real_decrypt_chunk(chunk)
+
+    monkeypatch.setattr(anonymize_service, "_decrypt_chunk", counting_decrypt_chunk)
+    first = anonymize_service.decrypt_fields(tokens[:2], cache=cache)
+    second = anonymize_service.decrypt_fields(tokens + [None], cache=cache)
+
+    assert first == ["Patient 0", "Patient 1"]
+    assert second == [f"Patient {i}" for i in range(4)] + [None]
+    assert decrypted_counts == [2, 2]
+    assert cache.get_metrics()["hits"] == 2
+
+
+def test_mask_patient_invalidates_the_old_ciphertext(fernet_key):
+    with SessionLocal() as db:
+        patient = models.Patient(name="Before", contact="555-0000")
+        db.add(patient)
+        db.flush()
+        anonymize_service.mask_patient(patient)
+        db.commit()
+
+        assert anonymize_service.get_anonymized_patient_data(patient, "admin", raw=True)["name"] == "Before"
+        old_token = patient.anonymized_name
+        assert decrypt_cache.get(old_token) == "Before"
+
+        patient.name = "After"
+        anonymize_service.mask_patient(patient)
+        db.commit()
+
+        assert decrypt_cache.get(old_token) is None
+        assert anonymize_service.get_anonymized_patient_data(patient, "admin", raw=True)["name"] == "After"
@@ -0,0 +1,152 @@
+import asyncio
+import sqlite3
+import uuid
+from contextlib import closing
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.db.session import SessionLocal
+from app.db import models
+from app.services.auth_service import run_mfa_code_cleanup
+from app.services.job_scheduler import CronTrigger, JobScheduler, acquire_lease, release_lease
+from app.services.maintenance_service import backup_database, run_sqlite_maintenance
+
+
+class FakeClock:
+    def __init__(self, now):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def no_jitter(low, high):
+    return 0
+
+
+@pytest.fixture
+def job_name():
+    name = f"test_job_{uuid.uuid4().hex[:8]}"
+    yield name
+    with SessionLocal() as db:
+        db.query(models.SchedulerLease).filter(models.SchedulerLease.job_name == name).delete()
+        db.commit()
+
+
+def test_cron_trigger_next_fire_times():
+    start = datetime(2026, 1, 31, 23, 50, 30)
+    assert CronTrigger("*/15 * * * *").next_after(start) == datetime(2026, 2, 1, 0, 0)
+    assert CronTrigger.daily_at("02:00").next_after(start) == datetime(2026, 2, 1, 2, 0)
+    assert CronTrigger("0 0 1 * *").next_after(datetime(2026, 2, 1)) == datetime(2026, 3, 1)
+    # 2026-02-02 is a Monday; 7 means Sunday like 0
+    assert CronTrigger("30 9 * * 1").next_after(start) == datetime(2026, 2, 2, 9, 30)
+    assert CronTrigger("0 12 * * 7").next_after(start) == datetime(2026, 2, 1, 12, 0)
+    assert CronTrigger("0 0 29 2 *").next_after(start) == datetime(2028, 2, 29)
+    for invalid in ("* * * *", "60 * * * *", "0 0 31 2 *"):
+        with pytest.raises(ValueError):
+            CronTrigger(invalid).next_after(start)
+
+
+def test_only_one_worker_runs_each_occurrence(job_name):
+    due = datetime(2026, 3, 1, 2, 0)
+    clock = FakeClock(due - timedelta(minutes=1))
+    calls = []
+    workers = [JobScheduler(owner=owner, clock=clock, jitter=no_jitter) for owner in ("worker-a", "worker-b")]
+    for worker in workers:
+        worker.add_job(job_name, CronTrigger("0 2 * * *"), lambda: calls.append(1))
+
+    async def scenario():
+        for worker in workers:
+            await worker.prepare()
+        clock.now = due + timedelta(seconds=5)
+        await asyncio.gather(*(worker.run_pending() for worker in workers))
+
+    asyncio.run(scenario())
+
+    assert calls == [1]
+    jobs = [worker.jobs[job_name] for worker in workers]
+    assert sorted((job.runs, job.skipped) for job in jobs) == [(0, 1), (1, 0)]
+    assert all(job.run_at == datetime(2026, 3, 2, 2, 0) for job in jobs)
+    with SessionLocal() as db:
+        lease = db.get(models.SchedulerLease, job_name)
+        assert (lease.last_run_at, lease.last_outcome, lease.leased_until) == (due, "succeeded", None)
+
+
+def test_missed_run_is_caught_up_once_on_start(job_name):
+    now = datetime(2026, 3, 5, 8, 0)
+    assert acquire_lease(job_name, "old-worker", datetime(2026, 3, 2, 2, 0), now - timedelta(days=3), 60)
+    release_lease(job_name, "old-worker", datetime(2026, 3, 2, 2, 0), "succeeded", 1.0)
+
+    calls = []
+    scheduler = JobScheduler(owner="worker-a", clock=FakeClock(now), jitter=no_jitter)
+    job = scheduler.add_job(job_name, CronTrigger("0 2 * * *"), lambda: calls.append(1))
+    skipped = scheduler.add_job(f"{job_name}_no_catch_up", CronTrigger("0 2 * * *"), lambda: calls.append(2), catch_up=False)
+
+    async def scenario():
+        await scheduler.prepare()
+        # The most recent missed occurrence, due immediately
+        assert (job.due_at, job.run_at) == (datetime(2026, 3, 5, 2, 0), now)
+        await scheduler.run_pending()
+
+    asyncio.run(scenario())
+
+    assert calls == [1]
+    assert job.run_at == datetime(2026, 3, 6, 2, 0)
+    assert skipped.run_at == datetime(2026, 3, 6, 2, 0)
+
+
+def test_failed_run_is_recorded_and_next_occurrence_still_runs(job_name):
+    clock = FakeClock(datetime(2026, 3, 1, 0, 0, 30))
+    scheduler = JobScheduler(owner="worker-a", clock=clock, jitter=no_jitter)
+
+    def flaky():
+        raise RuntimeError("disk full")
+
+    job = scheduler.add_job(job_name, CronTrigger("0 * * * *"), flaky)
+
+    async def scenario():
+        await scheduler.prepare()
+        clock.now = datetime(2026, 3, 1, 1, 0, 1)
+        await scheduler.run_pending()
+        job.func = lambda: None
+        clock.now = datetime(2026, 3, 1, 2, 0, 1)
+        await scheduler.run_pending()
+
+    asyncio.run(scenario())
+
+    metrics = scheduler.get_metrics()["jobs"][job_name]
+    assert (metrics["runs"], metrics["succeeded"], metrics["failed"]) == (2, 1, 1)
+    assert metrics["last_outcome"] == "succeeded"
+    assert metrics["last_duration_ms"] is not None
+
+
+def test_mfa_cleanup_removes_expired_and_used_codes(make_user):
+    now = datetime.utcnow()
+    suffix = uuid.uuid4().hex[:8]
+    user = make_user("doctor")
+    with SessionLocal() as db:
+        for token, expires_at, used in (
+            ("expired", now - timedelta(minutes=1), False),
+            ("used", now + timedelta(minutes=5), True),
+            ("valid", now + timedelta(minutes=5), False),
+        ):
+            db.add(models.MFACode(
+                user_id=user.user_id, hashed_code="x", temp_token=f"{token}_{suffix}", expires_at=expires_at, used=used,
+            ))
+        db.commit()
+
+    assert run_mfa_code_cleanup() >= 2
+    with SessionLocal() as db:
+        tokens = [code.temp_token for code in db.query(models.MFACode).filter(models.MFACode.user_id == user.user_id)]
+    assert tokens == [f"valid_{suffix}"]
+
+
+def test_backup_and_maintenance_jobs(tmp_path):
+    destination = backup_database(tmp_path / "backup.db")
+    with closing(sqlite3.connect(str(destination))) as backup:
+        assert backup.execute("PRAGMA integrity_check").fetchone() == ("ok",)
+        assert backup.execute("SELECT COUNT(*) FROM sqlite_master WHERE name = 'scheduler_leases'").fetchone() == (1,)
+
+    result = run_sqlite_maintenance()
+    assert set(result) == {"busy", "wal_pages", "checkpointed_pages"}
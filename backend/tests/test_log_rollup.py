@@ -0,0 +1,118 @@
+import uuid
+from datetime import date, datetime, timedelta
+
+import pytest
+from sqlalchemy import insert
+
+from app.db.session import SessionLocal
+from app.db import models
+from app.services.rollup_service import rebuild_daily_rollup
+
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def tag():
+    """Unique action prefix, so rollup rows from other tests don't interfere."""
+    return f"rollup{uuid.uuid4().hex[:8]}"
+
+
+def rollup_counts(db, tag):
+    rows = db.query(models.LogDailyRollup).filter(models.LogDailyRollup.action_type == tag).all()
+    return {(row.day, row.role): row.count for row in rows}
+
+
+def test_insert_trigger_counts_orm_and_bulk_inserts(db, tag):
+    today = datetime.utcnow().replace(hour=12)
+    db.add(models.Log(role="doctor", action=f"{tag}_view", timestamp=today))
+    db.add(models.Log(role="doctor", action=f"{tag}_edit", timestamp=today))
+    db.add(models.Log(role=None, action=tag, timestamp=today - timedelta(days=1)))
+    db.commit()
+    # Same path as the background audit writer
+    db.execute(insert(models.Log), [
+        {"role": "doctor", "action": f"{tag}_view", "timestamp": today} for _ in range(3)
+    ])
+    db.commit()
+
+    assert rollup_counts(db, tag) == {
+        (today.date(), "doctor"): 5,
+        (today.date() - timedelta(days=1), "unknown"): 1,
+    }
+
+
+def test_delete_trigger_decrements_and_drops_empty_rows(db, tag):
+    today = datetime.utcnow()
+    old = today - timedelta(days=40)
+    for timestamp in (today, old, old):
+        db.add(models.Log(role="admin", action=f"{tag}_purge", timestamp=timestamp))
+    db.commit()
+
+    db.query(models.Log).filter(models.Log.action == f"{tag}_purge", models.Log.timestamp < today - timedelta(days=30)).delete()
+    db.commit()
+
+    assert rollup_counts(db, tag) == {(today.date(), "admin"): 1}
+
+
+def test_rebuild_matches_trigger_maintained_rows(db, tag):
+    today = datetime.utcnow()
+    for i in range(6):
+        db.add(models.Log(role="receptionist", action=f"{tag}_add", timestamp=today - timedelta(days=i % 3)))
+    db.commit()
+    expected = rollup_counts(db, tag)
+
+    # Simulate drift, then repair the last few days
+    db.query(models.LogDailyRollup).filter(models.LogDailyRollup.action_type == tag).update({"count": 99})
+    db.commit()
+    rebuild_daily_rollup(db, since=today.date() - timedelta(days=5))
+    db.commit()
+
+    assert rollup_counts(db, tag) == expected
+
+
+def test_activity_stats_daily_from_rollup(client, db, admin_headers, tag):
+    today = datetime.utcnow()
+    for i in range(3):
+        db.add(models.Log(role="doctor", action=f"{tag}_view", timestamp=today - timedelta(days=i)))
+    db.commit()
+
+    response = client.get("/api/stats/activity?days=7", headers=admin_headers)
+    assert response.status_code == 200
+    data = response.json()
+    assert data["granularity"] == "daily"
+    assert len(data["days"]) == 8
+    assert data["days"][-1] == today.date().isoformat()
+    assert data["actions_by_type"][tag] == 3
+
+
+def test_activity_stats_weekly_over_a_year(client, db, admin_headers, tag):
+    today = datetime.utcnow()
+    for offset in (0, 1, 8, 200, 364):
+        db.add(models.Log(role="doctor", action=f"{tag}_view", timestamp=today - timedelta(days=offset)))
+    db.commit()
+
+    response = client.get(
+        "/api/stats/activity?days=365&granularity=weekly", headers=admin_headers
+    )
+    assert response.status_code == 200
+    data = response.json()
+    start = date.fromisoformat(data["days"][0])
+    assert start == today.date() - timedelta(days=365)
+    assert len(data["days"]) == 53
+    assert all(
+        date.fromisoformat(b) - date.fromisoformat(a) == timedelta(days=7)
+        for a, b in zip(data["days"], data["days"][1:])
+    )
+    assert data["actions_by_type"][tag] == 5
+    assert sum(data["actions_per_day"]) >= 5
+
+
+def test_activity_stats_rejects_windows_over_a_year(client, admin_headers):
+    response = client.get("/api/stats/activity?days=366", headers=admin_headers)
+    assert response.status_code == 422
@@ -0,0 +1,113 @@
+import asyncio
+import json
+import uuid
+
+import pytest
+
+from app.api.logs import LogEntry, apply_log_filters
+from app.db.session import SessionLocal, async_engine
+from app.db import models
+from app.services.audit_writer import audit_writer
+from app.services.log_tail import LogTailNotifier, fetch_logs_after, tail_logs
+from app.services.stats_stream import SubscriberLimitReached
+
+
+def parse_event(chunk: str) -> tuple[str, dict]:
+    fields = dict(line.split(": ", 1) for line in chunk.strip().splitlines() if ": " in line)
+    return fields["event"], json.loads(fields["data"])
+
+
+def add_logs(*rows: dict) -> int:
+    """Insert rows and return the highest log_id before them."""
+    with SessionLocal() as db:
+        before = db.query(models.Log.log_id).order_by(models.Log.log_id.desc()).limit(1).scalar() or 0
+        db.add_all(models.Log(**row) for row in rows)
+        db.commit()
+    return before
+
+
+def filters(role=None, user_id=None, action=None):
+    return lambda statement: apply_log_filters(statement, role, user_id, action, None, None)
+
+
+def serialize(entry):
+    return LogEntry.model_validate(entry).model_dump(mode="json")
+
+
+async def next_row(stream):
+    """Next chunk that is not a heartbeat."""
+    while True:
+        chunk = await stream.__anext__()
+        if not chunk.startswith(":"):
+            return chunk
+
+
+def test_tail_streams_matching_rows_then_new_commits():
+    role = f"tail_{uuid.uuid4().hex[:8]}"
+    after_id = add_logs(
+        {"role": role, "action": "view_patients", "details": "first"},
+        {"role": "doctor", "action": "view_patients", "details": "other role"},
+        {"role": role, "action": "export_logs", "details": "second"},
+    )
+
+    async def scenario():
+        notifier = LogTailNotifier()
+        wakeup = notifier.register()
+        stream = tail_logs(
+            notifier, wakeup, after_id, filters(role=role), serialize,
+            heartbeat_seconds=0.05, poll_seconds=30, batch_size=10,
+        )
+        try:
+            chunks = [await stream.__anext__() for _ in range(4)]
+            # A commit by the audit writer wakes the tail without waiting for the poll
+            audit_writer.add_commit_listener(notifier.notify)
+            audit_writer.submit({"role": role, "action": "view_logs", "details": "live"})
+            chunks.append(await asyncio.wait_for(next_row(stream), 5))
+            await stream.aclose()
+            return chunks, notifier.subscriber_count
+        finally:
+            audit_writer._commit_listeners.remove(notifier.notify)
+            await async_engine.dispose()
+
+    chunks, subscribers_left = asyncio.run(scenario())
+    assert chunks[0].startswith("retry: ")
+    assert [parse_event(chunk)[1]["details"] for chunk in chunks[1:3]] == ["first", "second"]
+    assert chunks[3] == ": heartbeat\n\n"
+    assert parse_event(chunks[4])[1]["details"] == "live"
+    assert subscribers_left == 0
+
+
+def test_selective_filter_advances_past_non_matching_rows():
+    action = f"tail_{uuid.uuid4().hex[:8]}"
+    after_id = add_logs(*({"role": "doctor", "action": "view_patients"} for _ in range(5)))
+
+    async def scenario():
+        try:
+            return await fetch_logs_after(after_id, filters(action=action), 10)
+        finally:
+            await async_engine.dispose()
+
+    rows, seen_up_to = asyncio.run(scenario())
+    assert rows == []
+    assert seen_up_to >= after_id + 5
+
+
+def test_notifier_enforces_subscriber_cap():
+    async def scenario():
+        notifier = LogTailNotifier(max_subscribers=1)
+        wakeup = notifier.register()
+        with pytest.raises(SubscriberLimitReached):
+            notifier.register()
+        notifier.notify()
+        await asyncio.sleep(0)
+        return wakeup.is_set(), notifier.get_metrics()
+
+    woken, metrics = asyncio.run(scenario())
+    assert woken
+    assert metrics["rejected"] == 1
+    assert metrics["notifications"] == 1
+
+
+def test_tail_endpoint_requires_admin(client, make_user, auth_headers):
+    assert client.get("/api/logs/tail").status_code in (401, 403)
+    assert client.get("/api/logs/tail", headers=auth_headers(make_user("doctor"))).status_code == 403
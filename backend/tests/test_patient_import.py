@@ -0,0 +1,112 @@
+import json
+import uuid
+
+import pytest
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.db import models
+from app.services import anonymize_service
+from app.services.audit_writer import audit_writer
+
+
+# Imported patients are masked with Fernet
+pytestmark = pytest.mark.usefixtures("fernet_key")
+
+
+@pytest.fixture(autouse=True)
+def small_batches(monkeypatch):
+    # Two-row batches, masked inline, so a handful of rows spans several transactions
+    monkeypatch.setattr(settings, "PATIENT_IMPORT_BATCH_SIZE", 2)
+    monkeypatch.setattr(settings, "DECRYPT_WORKERS", 1)
+
+
+@pytest.fixture
+def tag():
+    """A name marker no other test uses; removes the imported patients afterwards."""
+    value = f"Imp{uuid.uuid4().hex[:8]}"
+    yield value
+    with SessionLocal() as db:
+        db.query(models.Patient).filter(models.Patient.name.like(f"%{value}%")).delete(synchronize_session=False)
+        db.commit()
+
+
+def imported_patients(tag):
+    with SessionLocal() as db:
+        return db.query(models.Patient).filter(models.Patient.name.like(f"%{tag}%")).order_by(models.Patient.patient_id).all()
+
+
+def test_csv_import_masks_rows_and_reports_invalid_lines(client, tag, make_user, auth_headers):
+    receptionist = make_user("receptionist")
+    user_id, headers = receptionist.user_id, auth_headers(receptionist)
+    body = (
+        "Name,Contact,Diagnosis,Ward\n"
+        f"Ada {tag},555-0101,Asthma,3\n"
+        ",555-0102,,3\n"
+        f"\"Bob {tag}\",,\"Flu,\nfollow-up\",4\n"
+        f"Cy {tag},{'9' * 256},,4\n"
+        f"Di {tag},555-0104,,4\n"
+    )
+    response = client.post("/api/patients/import", content=body.encode(),
+                           headers={**headers, "Content-Type": "text/csv; charset=utf-8"})
+    assert response.status_code == 200
+    result = response.json()
+    assert (result["imported"], result["rejected"]) == (3, 2)
+    assert result["errors"] == [
+        {"line": 3, "error": "name is required"},
+        {"line": 6, "error": "contact is longer than 255 characters"},
+    ]
+
+    patients = imported_patients(tag)
+    assert [p.name for p in patients] == [f"Ada {tag}", f"Bob {tag}", f"Di {tag}"]
+    assert patients[1].diagnosis == "Flu,\nfollow-up" and patients[1].anonymized_contact is None
+    assert anonymize_service.decrypt_patients(patients) == [(p.name, p.contact) for p in patients]
+    assert patients[0].name_bidx == anonymize_service.blind_index("name", f"ada {tag.casefold()}")
+
+    # Imported rows are searchable like any other patient
+    found = client.get("/api/patients/search", params={"name": tag, "contact": "5550104"}, headers=headers)
+    assert [p["patient_id"] for p in found.json()] == [patients[2].patient_id]
+
+    audit_writer.flush()
+    with SessionLocal() as db:
+        logs = db.query(models.Log).filter(models.Log.user_id == user_id, models.Log.action == "import_patients").all()
+    assert [(log.action, log.details) for log in logs] == [
+        ("import_patients", "Imported 3 patients from csv (2 rows rejected)")
+    ]
+
+
+def test_ndjson_import_rejects_bad_lines_and_caps_listed_errors(client, tag, monkeypatch, make_user, auth_headers):
+    monkeypatch.setattr(settings, "PATIENT_IMPORT_MAX_ERRORS", 2)
+    headers = auth_headers(make_user("admin"))
+    lines = [
+        json.dumps({"name": f"Ed {tag}", "contact": "ed@example.org"}),
+        "{not json",
+        "",
+        json.dumps([f"Fay {tag}"]),
+        json.dumps({"name": f"Gus {tag}", "contact": 5550107}),
+        json.dumps({"name": f"Hal {tag}", "diagnosis": "Migraine"}),
+    ]
+    response = client.post("/api/patients/import", content="\n".join(lines).encode(),
+                           headers={**headers, "Content-Type": "application/x-ndjson"})
+    assert response.status_code == 200
+    result = response.json()
+    assert (result["imported"], result["rejected"], result["errors_truncated"]) == (2, 3, True)
+    assert [error["line"] for error in result["errors"]] == [2, 4]
+    assert result["errors"][0]["error"].startswith("Invalid JSON")
+    assert [p.name for p in imported_patients(tag)] == [f"Ed {tag}", f"Hal {tag}"]
+
+
+@pytest.mark.parametrize("content_type, body, status_code", [
+    ("application/json", b"[]", 415),
+    ("text/csv", b"contact,diagnosis\n555,flu\n", 400),
+])
+def test_unsupported_or_malformed_uploads_are_rejected(client, content_type, body, status_code, make_user, auth_headers):
+    headers = auth_headers(make_user("admin"))
+    response = client.post("/api/patients/import", content=body, headers={**headers, "Content-Type": content_type})
+    assert response.status_code == status_code
+
+
+def test_doctors_cannot_import(client, make_user, auth_headers):
+    headers = auth_headers(make_user("doctor"))
+    response = client.post("/api/patients/import", content=b"name\nX\n", headers={**headers, "Content-Type": "text/csv"})
+    assert response.status_code == 403
@@ -0,0 +1,145 @@
+import json
+import sqlite3
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import select
+
+from app.api.patients import stream_patients
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.db import models
+
+# Far enough in the past that no other test adds patients on these days
+EPOCH = datetime(2001, 1, 1)
+
+
+@pytest.fixture
+def doctor_headers(make_user, auth_headers):
+    return auth_headers(make_user("doctor"))
+
+
+@pytest.fixture
+def old_patients():
+    """Seven patients on three days; three share one date_added to exercise the patient_id tiebreak."""
+    tag = uuid.uuid4().hex[:8]
+    added = [EPOCH, EPOCH + timedelta(days=1), EPOCH + timedelta(days=1), EPOCH + timedelta(days=1),
+             EPOCH + timedelta(days=2, hours=3), EPOCH + timedelta(days=2, hours=4), EPOCH + timedelta(days=2, hours=5)]
+    with SessionLocal() as db:
+        patients = [
+            models.Patient(name=f"Paged {i}", diagnosis=f"{tag} {'flu' if i % 2 else 'asthma'}", date_added=date_added)
+            for i, date_added in enumerate(added)
+        ]
+        db.add_all(patients)
+        db.commit()
+        expected = [p.patient_id for p in sorted(patients, key=lambda p: (p.date_added, p.patient_id), reverse=True)]
+    yield tag, expected
+    with SessionLocal() as db:
+        db.query(models.Patient).filter(models.Patient.patient_id.in_(expected)).delete()
+        db.commit()
+
+
+def test_cursor_pages_walk_every_patient_once_in_order(client, doctor_headers, old_patients):
+    tag, expected = old_patients
+    seen, cursor, pages = [], None, 0
+    while True:
+        params = {"limit": 2, "diagnosis": tag, **({"cursor": cursor} if cursor else {})}
+        response = client.get("/api/patients/", params=params, headers=doctor_headers)
+        assert response.status_code == 200
+        body = response.json()
+        assert body["total"] is None
+        seen += [patient["patient_id"] for patient in body["patients"]]
+        pages += 1
+        cursor = body["next_cursor"]
+        if cursor is None:
+            break
+
+    assert seen == expected
+    assert pages == 4
+
+
+def test_filters_and_total_on_request(client, doctor_headers, old_patients):
+    tag, expected = old_patients
+    response = client.get(
+        "/api/patients/",
+        params={"diagnosis": f"{tag} FLU", "date_from": "2001-01-02", "date_to": "2001-01-02", "include_total": True},
+        headers=doctor_headers,
+    )
+    assert response.status_code == 200
+    body = response.json()
+    # Days 2 only: patients 1, 2, 3 of which 1 and 3 have flu (case-insensitive match)
+    assert body["total"] == 2
+    assert [patient["patient_id"] for patient in body["patients"]] == [expected[3], expected[5]]
+    assert body["next_cursor"] is None
+
+
+@pytest.mark.parametrize("params", [{"cursor": "not-a-cursor"}, {"date_from": "01/02/2001"}])
+def test_invalid_cursor_or_date_is_rejected(client, doctor_headers, params):
+    response = client.get("/api/patients/", params=params, headers=doctor_headers)
+    assert response.status_code == 400
+
+
+def test_page_query_walks_the_date_added_index_without_sorting():
+    conn = sqlite3.connect(settings.DB_PATH)
+    try:
+        plan = [row[3] for row in conn.execute(
+            "EXPLAIN QUERY PLAN SELECT * FROM patients WHERE (date_added, patient_id) < (?, ?) "
+            "ORDER BY date_added DESC, patient_id DESC LIMIT 51",
+            ("2001-01-02 00:00:00.000000", 10),
+        )]
+    finally:
+        conn.close()
+    assert any("ix_patients_date_added" in detail for detail in plan), plan
+    assert not any("TEMP B-TREE" in detail for detail in plan), plan
+
+
+def test_ndjson_stream_sends_every_matching_patient(client, doctor_headers, old_patients, monkeypatch):
+    tag, expected = old_patients
+    monkeypatch.setattr(settings, "PATIENT_STREAM_BATCH_SIZE", 2)
+    response = client.get(
+        "/api/patients/", params={"diagnosis": tag, "limit": 1},
+        headers={**doctor_headers, "Accept": "application/x-ndjson"},
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [row["patient_id"] for row in rows] == expected
+    assert rows[0]["name"].startswith("ANON_")
+
+
+def test_json_array_stream_resumes_after_a_cursor(client, doctor_headers, old_patients):
+    tag, expected = old_patients
+    first_page = client.get("/api/patients/", params={"diagnosis": tag, "limit": 3}, headers=doctor_headers).json()
+    response = client.get(
+        "/api/patients/", params={"diagnosis": tag, "stream": True, "cursor": first_page["next_cursor"]},
+        headers=doctor_headers,
+    )
+    assert response.status_code == 200
+    assert [row["patient_id"] for row in response.json()] == expected[3:]
+
+
+def test_stream_encodes_one_chunk_per_batch(old_patients):
+    tag, expected = old_patients
+    statement = (
+        select(models.Patient.patient_id, models.Patient.name, models.Patient.contact, models.Patient.diagnosis,
+               models.Patient.anonymized_name, models.Patient.anonymized_contact, models.Patient.date_added)
+        .where(models.Patient.patient_id.in_(expected))
+        .order_by(models.Patient.date_added.desc(), models.Patient.patient_id.desc())
+    )
+    chunks = list(stream_patients(statement, "receptionist", False, ndjson=False, user_id=None, batch_size=3))
+
+    # "[", three batches of at most 3 rows, "]"
+    assert len(chunks) == 5
+    assert [row["patient_id"] for row in json.loads(b"".join(chunks))] == expected
+
+
+def test_without_paging_parameters_the_response_is_the_original_list(client, doctor_headers, old_patients):
+    tag, expected = old_patients
+    response = client.get("/api/patients/", params={"diagnosis": tag}, headers=doctor_headers)
+    assert response.status_code == 200
+    assert isinstance(response.json(), list)
+    assert [row["patient_id"] for row in response.json()] == expected
+
+    paged = client.get("/api/patients/", params={"diagnosis": tag, "limit": 50}, headers=doctor_headers).json()
+    assert [row["patient_id"] for row in paged["patients"]] == expected
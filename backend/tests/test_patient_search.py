@@ -0,0 +1,115 @@
+import json
+import sqlite3
+import uuid
+
+import pytest
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.db import models
+from app.services import anonymize_service
+
+# Creating patients encrypts their fields
+pytestmark = pytest.mark.usefixtures("fernet_key")
+
+
+@pytest.fixture
+def surname():
+    """A surname no other test uses; removes its patients afterwards."""
+    name = f"Zq{uuid.uuid4().hex[:8]}"
+    yield name
+    with SessionLocal() as db:
+        db.query(models.Patient).filter(models.Patient.name.like(f"%{name}%")).delete(synchronize_session=False)
+        db.commit()
+
+
+def add_patient(client, headers, name, contact=None):
+    response = client.post("/api/patients/", json={"name": name, "contact": contact}, headers=headers)
+    assert response.status_code == 201
+    return response.json()["patient_id"]
+
+
+def search(client, headers, **params):
+    response = client.get("/api/patients/search", params={"raw": True, **params}, headers=headers)
+    assert response.status_code == 200
+    return [patient["name"] for patient in response.json()]
+
+
+def test_name_prefixes_and_normalized_contact_match(client, admin_headers, surname):
+    add_patient(client, admin_headers, f"Ada {surname}", "+1 (555) 010-2030")
+    add_patient(client, admin_headers, f"Bob {surname}-Lovelace", "ada@example.org")
+
+    # Word prefixes, case-insensitive, every word must match
+    assert search(client, admin_headers, name=surname[:5].upper()) == [f"Bob {surname}-Lovelace", f"Ada {surname}"]
+    # Terms shorter than BLIND_INDEX_MIN_PREFIX only match whole words
+    assert search(client, admin_headers, name=f"ad {surname}") == []
+    assert search(client, admin_headers, name=f"ada {surname[:4]}") == [f"Ada {surname}"]
+    assert search(client, admin_headers, name=f"  ADA   {surname} ", exact=True) == [f"Ada {surname}"]
+    assert search(client, admin_headers, name=surname[:4], exact=True) == []
+
+    # Phone numbers match on their digits, emails case-insensitively
+    assert search(client, admin_headers, contact="15550102030") == [f"Ada {surname}"]
+    assert search(client, admin_headers, contact="ADA@Example.org", name=surname[:4]) == [f"Bob {surname}-Lovelace"]
+
+
+def test_index_holds_no_plaintext(client, admin_headers, surname):
+    patient_id = add_patient(client, admin_headers, f"Ada {surname}", "555-0100")
+    with SessionLocal() as db:
+        patient = db.get(models.Patient, patient_id)
+        tokens = [row.token for row in db.query(models.PatientNameToken).filter_by(patient_id=patient_id)]
+        stored = [patient.name_bidx, patient.contact_bidx, patient.name_tokens] + tokens
+
+    # "ada" plus the prefixes of the surname from 3 characters up
+    assert sorted(tokens) == json.loads(patient.name_tokens)
+    assert len(tokens) == 1 + len(surname) - 2
+    # Every stored value is exactly the keyed digest of the normalized plaintext
+    name = anonymize_service.normalize_name(f"Ada {surname}")
+    assert patient.name_bidx == anonymize_service.blind_index("name", name)
+    assert patient.contact_bidx == anonymize_service.blind_index(
+        "contact", anonymize_service.normalize_contact("555-0100")
+    )
+    assert sorted(tokens) == sorted(
+        anonymize_service.blind_index("name-prefix", term) for term in anonymize_service.name_prefix_terms(name)
+    )
+    # The surname starts with "zq", which cannot occur in a hex digest
+    for value in stored:
+        for plaintext in (surname.casefold(), surname[:3].casefold()):
+            assert plaintext not in value
+
+
+def test_backfill_indexes_rows_written_without_mask_patient(client, admin_headers, surname):
+    with SessionLocal() as db:
+        db.add(models.Patient(name=f"Legacy {surname}", contact="555-0199"))
+        db.commit()
+    assert search(client, admin_headers, name=surname) == []
+
+    assert anonymize_service.backfill_blind_indexes(batch_size=1) >= 1
+    assert search(client, admin_headers, name=f"leg {surname}") == [f"Legacy {surname}"]
+    assert search(client, admin_headers, contact="5550199") == [f"Legacy {surname}"]
+
+    # Rows that already have an index are left alone
+    assert anonymize_service.backfill_blind_indexes() == 0
+
+
+def test_search_validates_terms_and_raw_access(client, admin_headers, make_user, auth_headers):
+    assert client.get("/api/patients/search", params={"name": "   "}, headers=admin_headers).status_code == 400
+    doctor_headers = auth_headers(make_user("doctor"))
+    assert client.get("/api/patients/search", params={"name": "ada"}, headers=doctor_headers).status_code == 200
+    assert client.get("/api/patients/search", params={"name": "ada", "raw": True},
+                      headers=doctor_headers).status_code == 403
+
+
+def test_token_lookup_uses_the_primary_key():
+    conn = sqlite3.connect(settings.DB_PATH)
+    try:
+        plan = [row[3] for row in conn.execute(
+            "EXPLAIN QUERY PLAN SELECT * FROM patients WHERE patient_id IN "
+            "(SELECT patient_id FROM patient_name_tokens WHERE token = ?) "
+            "AND contact_bidx = ? ORDER BY date_added DESC, patient_id DESC LIMIT 20",
+            ("0" * 32, "0" * 32),
+        )]
+    finally:
+        conn.close()
+    assert any("patient_name_tokens USING PRIMARY KEY (token=?)" in detail
+               or "patient_name_tokens USING COVERING INDEX" in detail for detail in plan), plan
+    assert not any(detail.startswith("SCAN patients") for detail in plan), plan
@@ -0,0 +1,221 @@
+"""
+SQL statement budgets per router in app/api.
+
+Budgets count every statement the request issues on any engine, including
+the authentication lookup and the audit-log write. Lower them when an
+endpoint gets cheaper; raising one needs a reason. Each block also asserts
+the response status, so an early 4xx/5xx cannot pass a budget by doing less.
+"""
+import uuid
+from unittest.mock import patch
+
+import pytest
+
+from app.api import logs as logs_api
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.db import models
+from app.services.retention_service import retention_purges
+
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def other_user(make_user):
+    return make_user("receptionist")
+
+
+@pytest.fixture
+def patient(db):
+    patient = models.Patient(name="Budget Patient", contact="555-0000", diagnosis="Checkup")
+    db.add(patient)
+    db.commit()
+    db.refresh(patient)
+    return patient
+
+
+@patch("app.api.auth.email_service.send_mfa_code")
+def test_auth_router_budget(mock_send_email, client, admin_headers, assert_max_queries):
+    mock_send_email.return_value = True
+    username = f"budget_{uuid.uuid4().hex[:8]}"
+
+    with assert_max_queries(4):
+        response = client.post(
+            "/api/auth/register",
+            json={"username": username, "email": f"{username}@test.com", "password": "Budget123!"},
+        )
+        assert response.status_code == 201
+    with assert_max_queries(4):
+        response = client.post("/api/auth/login", json={"username_or_email": username, "password": "Budget123!"})
+        assert response.status_code == 200
+    with assert_max_queries(1):
+        response = client.get("/api/auth/me", headers=admin_headers)
+        assert response.status_code == 200
+    with assert_max_queries(2):
+        response = client.post("/api/auth/logout", headers=admin_headers)
+        assert response.status_code == 200
+
+
+def test_users_router_budget(client, admin_headers, other_user, assert_max_queries):
+    with assert_max_queries(3):
+        response = client.get("/api/users/", headers=admin_headers)
+        assert response.status_code == 200
+    with assert_max_queries(5):
+        response = client.put(f"/api/users/{other_user.user_id}/role", json={"role": "doctor"}, headers=admin_headers)
+        assert response.status_code == 200
+    with assert_max_queries(5):
+        response = client.put(f"/api/users/{other_user.user_id}/activate", headers=admin_headers)
+        assert response.status_code == 200
+
+
+def test_patients_router_budget(client, admin_headers, patient, assert_max_queries):
+    with assert_max_queries(3):
+        response = client.get("/api/patients/", headers=admin_headers)
+        assert response.status_code == 200
+    with assert_max_queries(3):
+        response = client.get(f"/api/patients/{patient.patient_id}", headers=admin_headers)
+        assert response.status_code == 200
+    with assert_max_queries(5):
+        response = client.post("/api/patients/", json={"name": "New Patient", "contact": "555-1111"}, headers=admin_headers)
+        assert response.status_code == 201
+    with assert_max_queries(5):
+        response = client.put(f"/api/patients/{patient.patient_id}", json={"name": "Renamed"}, headers=admin_headers)
+        assert response.status_code == 200
+    with assert_max_queries(4):
+        response = client.post("/api/patients/anonymize", json={"patient_id": patient.patient_id}, headers=admin_headers)
+        assert response.status_code == 200
+
+
+def test_logs_router_budget(client, admin_headers, assert_max_queries):
+    with assert_max_queries(4):
+        response = client.get("/api/logs/?role=admin", headers=admin_headers)
+        assert response.status_code == 200
+
+
+def test_export_router_budget(client, admin_headers, assert_max_queries):
+    with assert_max_queries(3):
+        response = client.get("/api/export/?type=logs", headers=admin_headers)
+        assert response.status_code == 200
+    with assert_max_queries(3):
+        response = client.get("/api/export/?type=patients", headers=admin_headers)
+        assert response.status_code == 200
+
+
+def test_admin_stats_router_budget(client, admin_headers, assert_max_queries, monkeypatch):
+    # The purge runs in its own thread after the request; only the request is budgeted here
+    monkeypatch.setattr(retention_purges, "purge", lambda cutoff, progress: 0)
+    with assert_max_queries(3):
+        response = client.get("/api/stats/activity?days=7", headers=admin_headers)
+        assert response.status_code == 200
+    with assert_max_queries(3):
+        response = client.get("/api/admin/retention", headers=admin_headers)
+        assert response.status_code == 200
+    with assert_max_queries(4):
+        response = client.post("/api/admin/retention", json={"retention_days": 365, "enabled": True}, headers=admin_headers)
+        assert response.status_code == 200
+    with assert_max_queries(4):
+        response = client.get("/api/admin/consent-stats", headers=admin_headers)
+        assert response.status_code == 200
+
+
+def test_gdpr_router_budget(client, admin_headers, assert_max_queries):
+    with assert_max_queries(1):
+        response = client.get("/api/consent/status", headers=admin_headers)
+        assert response.status_code == 200
+    with assert_max_queries(3):
+        response = client.post("/api/consent/accept", json={"accepted": True}, headers=admin_headers)
+        assert response.status_code == 200
+    with assert_max_queries(3):
+        response = client.post("/api/gdpr/consent", json={"consent": False}, headers=admin_headers)
+        assert response.status_code == 200
+
+
+def test_metrics_router_budget(client, admin_headers, assert_max_queries):
+    with assert_max_queries(1):
+        response = client.get("/api/admin/metrics/queries", headers=admin_headers)
+        assert response.status_code == 200
+
+
+def test_server_timing_header(client, admin_headers):
+    response = client.get("/api/logs/", headers=admin_headers)
+    assert response.status_code == 200
+    timing = response.headers["server-timing"]
+    assert timing.startswith("db;dur=")
+    assert "queries" in timing
+
+
+def test_query_metrics_aggregated_per_route(client, admin_headers):
+    client.get("/api/logs/", headers=admin_headers)
+    response = client.get("/api/admin/metrics/queries", headers=admin_headers)
+    assert response.status_code == 200
+    metrics = response.json()["GET /api/logs/"]
+    assert metrics["requests"] >= 1
+    assert metrics["queries"] >= 1
+
+
+def test_patient_search_and_import_budget(client, admin_headers, fernet_key, assert_max_queries):
+    with assert_max_queries(3):
+        response = client.get("/api/patients/search", params={"name": "budget pat"}, headers=admin_headers)
+        assert response.status_code == 200
+    body = "name,contact\n" + "".join(f"Imported {i},555-{i:04d}\n" for i in range(20))
+    # One executemany per batch: the budget does not grow with the row count
+    with assert_max_queries(3):
+        response = client.post(
+            "/api/patients/import", content=body, headers={**admin_headers, "Content-Type": "text/csv"}
+        )
+        assert response.status_code == 200
+        assert response.json()["imported"] == 20
+
+
+def test_patient_stream_and_anonymize_status_budget(client, admin_headers, patient, fernet_key, assert_max_queries, monkeypatch):
+    # Several batches: the stream reads one cursor, not a statement per batch
+    monkeypatch.setattr(settings, "PATIENT_STREAM_BATCH_SIZE", 1)
+    with assert_max_queries(3):
+        response = client.get("/api/patients/", headers={**admin_headers, "Accept": "application/x-ndjson"})
+        assert response.status_code == 200
+    assert client.post("/api/patients/anonymize", json={}, headers=admin_headers).status_code == 200
+    with assert_max_queries(3):
+        response = client.get("/api/patients/anonymize/status", headers=admin_headers)
+        assert response.status_code == 200
+
+
+def test_logs_tail_budget(client, admin_headers, assert_max_queries, monkeypatch):
+    real_tail = logs_api.tail_logs
+
+    async def first_poll(*args, **kwargs):
+        # The stream never ends; budget its setup and first poll (an event or a heartbeat)
+        async for chunk in real_tail(*args, **kwargs):
+            yield chunk
+            if not chunk.startswith("retry:"):
+                return
+
+    monkeypatch.setattr(logs_api, "tail_logs", first_poll)
+    monkeypatch.setattr(settings, "STATS_STREAM_HEARTBEAT_SECONDS", 0)
+    # Auth, the starting log_id, one poll (max(log_id), plus the rows if any arrived) and the audit row
+    with assert_max_queries(5):
+        response = client.get("/api/logs/tail?role=admin", headers=admin_headers)
+        assert response.status_code == 200
+
+
+def test_later_admin_stats_routes_budget(client, admin_headers, assert_max_queries, monkeypatch):
+    monkeypatch.setattr(retention_purges, "purge", lambda cutoff, progress: 0)
+    job_id = client.post(
+        "/api/admin/retention", json={"retention_days": 365, "enabled": True}, headers=admin_headers
+    ).json()["purge_job_id"]
+    # In-memory counters: no reads beyond authentication
+    with assert_max_queries(2):
+        response = client.get("/api/stats/activity/recent?hours=2", headers=admin_headers)
+        assert response.status_code == 200
+    with assert_max_queries(1):
+        response = client.get(f"/api/admin/retention/jobs/{job_id}", headers=admin_headers)
+        assert response.status_code == 200
+    with assert_max_queries(3):
+        response = client.get("/api/admin/consent-stats/history?days=30", headers=admin_headers)
+        assert response.status_code == 200
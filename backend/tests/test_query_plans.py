@@ -0,0 +1,203 @@
+"""
+EXPLAIN QUERY PLAN regression suite for the audit-log queries.
+
+Every statement the endpoints issue against the logs table is captured and
+re-planned. Any "SCAN logs" step fails the test, including scans of the whole
+table through an index or a covering index, unless the statement only walks
+rows in ORDER BY order until its LIMIT (a LIMIT and no WHERE to filter on).
+The statements in KNOWN_SCANS are scans by design and are exempt.
+"""
+import re
+import sqlite3
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import event
+
+from app.api import export
+from app.core.config import settings
+from app.db.session import SessionLocal, async_engine, engine, read_engine
+
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@contextmanager
+def capture_statements():
+    """Collect (sql, params) for every statement executed on the app engines."""
+    statements = []
+
+    def _capture(conn, cursor, statement, parameters, context, executemany):
+        if not executemany:
+            statements.append((statement, parameters))
+
+    targets = [engine, read_engine, async_engine.sync_engine]
+    for target in targets:
+        event.listen(target, "before_cursor_execute", _capture)
+    try:
+        yield statements
+    finally:
+        for target in targets:
+            event.remove(target, "before_cursor_execute", _capture)
+
+
+def query_plan(sql: str, params) -> list[str]:
+    conn = sqlite3.connect(settings.DB_PATH)
+    try:
+        rows = conn.execute(f"EXPLAIN QUERY PLAN {sql}", params or ()).fetchall()
+    finally:
+        conn.close()
+    return [row[3] for row in rows]
+
+
+def full_scans(plan: list[str], sql: str = "", table: str = "logs") -> list[str]:
+    """
+    The unbounded SCAN steps over table in plan: plain, USING INDEX and
+    USING COVERING INDEX alike. A scan is bounded only when the statement has
+    a LIMIT and no WHERE, i.e. it walks an index in ORDER BY order and stops.
+    """
+    if re.search(r"\bLIMIT\b", sql, re.IGNORECASE) and not re.search(r"\bWHERE\b", sql, re.IGNORECASE):
+        return []
+    return [detail for detail in plan if re.match(rf"SCAN {table}\b", detail)]
+
+
+# (pattern, reason) for statements that must scan logs
+KNOWN_SCANS = [
+    (re.compile(r"lower\(logs\.action\) LIKE lower\("),
+     "action is a case-insensitive substring filter; no index can serve it (action_prefix can)"),
+    (re.compile(r"^SELECT count\(\*\).*FROM logs\) AS anon_1$", re.DOTALL),
+     "the unfiltered total counts every row"),
+]
+
+
+def known_scan(sql: str) -> bool:
+    normalized = " ".join(sql.split())
+    return any(pattern.search(normalized) for pattern, _ in KNOWN_SCANS)
+
+
+def assert_no_log_table_scans(statements):
+    checked = 0
+    for sql, params in statements:
+        if not sql.lstrip().upper().startswith(("SELECT", "UPDATE", "DELETE")) or " logs" not in sql:
+            continue
+        if known_scan(sql):
+            continue
+        plan = query_plan(sql, params)
+        checked += 1
+        assert not full_scans(plan, sql), f"Unbounded scan on logs:\n{sql}\nplan: {plan}"
+    assert checked, "No statements against logs were captured"
+
+
+def test_full_scans_flags_index_walks_that_nothing_bounds():
+    assert full_scans(["SCAN logs"]) == ["SCAN logs"]
+    assert full_scans(["SCAN logs USING COVERING INDEX ix_logs_timestamp"], "SELECT count(*) FROM logs")
+    assert full_scans(["SCAN logs USING INDEX ix_logs_timestamp"],
+                      "SELECT * FROM logs WHERE details LIKE ? ORDER BY timestamp DESC LIMIT ?")
+    assert not full_scans(["SCAN logs USING INDEX ix_logs_timestamp"],
+                          "SELECT * FROM logs ORDER BY timestamp DESC LIMIT ? OFFSET ?")
+    assert not full_scans(["SEARCH logs USING INDEX ix_logs_role_timestamp (role=?)"], "SELECT * FROM logs WHERE role = ?")
+    assert not full_scans(["SCAN log_daily_rollup"], "SELECT * FROM log_daily_rollup")
+
+
+@pytest.mark.parametrize(
+    "params",
+    [
+        "",
+        "role=doctor",
+        "user_id=1",
+        "action_prefix=login",
+        "action_prefix=view_",
+        "action_prefix=view&date_from=2024-01-01",
+        "date_from=2024-01-01&date_to=2030-12-31",
+        "role=admin&date_from=2024-01-01",
+        "user_id=1&date_to=2030-12-31",
+        "role=admin&user_id=1&page=2",
+    ],
+)
+def test_list_logs_queries_use_indexes(client, admin_headers, params):
+    with capture_statements() as statements:
+        response = client.get(f"/api/logs?{params}", headers=admin_headers)
+    assert response.status_code == 200
+    assert_no_log_table_scans(statements)
+
+
+@pytest.mark.parametrize("params", ["", "role=admin", "user_id=1", "role=admin&date_from=2024-01-01"])
+def test_export_logs_queries_use_indexes(client, admin_headers, params, monkeypatch):
+    # Small batches so the keyset follow-up statements are planned too
+    monkeypatch.setattr(export, "LOG_EXPORT_BATCH_SIZE", 2)
+    with capture_statements() as statements:
+        response = client.get(f"/api/export?type=logs&{params}", headers=admin_headers)
+    assert response.status_code == 200
+    assert_no_log_table_scans(statements)
+
+
+def test_retention_queries_use_indexes(client, admin_headers):
+    with capture_statements() as statements:
+        response = client.get("/api/admin/retention", headers=admin_headers)
+    assert response.status_code == 200
+    assert_no_log_table_scans(statements)
+
+
+@pytest.mark.parametrize("params", ["days=30", "days=365&granularity=weekly"])
+def test_activity_stats_reads_rollup_by_primary_key(client, admin_headers, params):
+    with capture_statements() as statements:
+        response = client.get(f"/api/stats/activity?{params}", headers=admin_headers)
+    assert response.status_code == 200
+    reads = [(sql, p) for sql, p in statements if sql.lstrip().upper().startswith("SELECT")]
+    assert not any(" logs" in sql for sql, _ in reads), "Activity stats should not read the logs table"
+    rollup_reads = [(sql, p) for sql, p in reads if "log_daily_rollup" in sql]
+    assert rollup_reads
+    for sql, p in rollup_reads:
+        plan = query_plan(sql, p)
+        assert not full_scans(plan, sql, "log_daily_rollup"), plan
+
+
+def test_user_delete_set_null_uses_index():
+    """ON DELETE SET NULL looks logs up by user_id."""
+    sql = "UPDATE logs SET user_id = NULL WHERE user_id = ?"
+    plan = query_plan(sql, (1,))
+    assert not full_scans(plan, sql)
+    assert any("ix_logs_user_id_timestamp" in detail for detail in plan)
+
+
+@pytest.mark.parametrize(
+    "column, index",
+    [
+        ("role", "ix_logs_role_timestamp"),
+        ("user_id", "ix_logs_user_id_timestamp"),
+    ],
+)
+def test_equality_filter_ordered_by_timestamp_uses_composite_index(column, index):
+    plan = query_plan(
+        f"SELECT * FROM logs WHERE {column} = ? ORDER BY timestamp DESC LIMIT 50", ("x",)
+    )
+    assert any(index in detail for detail in plan), plan
+    assert not any("TEMP B-TREE" in detail for detail in plan), plan
+
+
+def test_action_prefix_is_a_range_on_the_action_index(client, admin_headers):
+    """The list endpoint's own action_prefix statements search ix_logs_action_timestamp."""
+    with capture_statements() as statements:
+        response = client.get("/api/logs?action_prefix=view_", headers=admin_headers)
+    assert response.status_code == 200
+    log_reads = [(sql, p) for sql, p in statements if sql.lstrip().upper().startswith("SELECT") and " logs" in sql]
+    assert len(log_reads) == 2  # count and page
+    for sql, params in log_reads:
+        assert "view_" in params
+        plan = query_plan(sql, params)
+        assert any(detail.startswith("SEARCH logs") and "ix_logs_action_timestamp" in detail for detail in plan), plan
+
+
+def test_only_the_substring_action_filter_and_unfiltered_count_are_exempt(client, admin_headers):
+    with capture_statements() as statements:
+        client.get("/api/logs?action=patient&role=admin", headers=admin_headers)
+        client.get("/api/logs", headers=admin_headers)
+    exempt = [sql for sql, _ in statements if " logs" in sql and known_scan(sql)]
+    # Substring count and page, then the unfiltered count; never the role-filtered or paged reads
+    assert len(exempt) == 3, exempt
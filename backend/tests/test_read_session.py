@@ -0,0 +1,103 @@
+import threading
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from app.main import app
+from app.db.session import (
+    ReadSessionLocal, SessionLocal, engine, get_db_session, get_pool_metrics, get_read_session, get_session, read_engine,
+)
+from app.db import models
+from app.services.audit_writer import audit_writer
+
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+def test_read_session_is_query_only():
+    """Read-pool connections reject writes."""
+    session = ReadSessionLocal()
+    try:
+        assert session.execute(text("PRAGMA query_only")).scalar() == 1
+        with pytest.raises(OperationalError):
+            session.execute(text("DELETE FROM logs"))
+    finally:
+        session.close()
+
+
+def test_read_routes_use_read_pool(client, admin_user, admin_headers):
+    """GET endpoints check out from the read pool and still write their audit row."""
+    before = get_pool_metrics()["read"]["checkouts"]
+
+    response = client.get("/api/logs", headers=admin_headers)
+    assert response.status_code == 200
+    response = client.get("/api/admin/consent-stats", headers=admin_headers)
+    assert response.status_code == 200
+
+    assert get_pool_metrics()["read"]["checkouts"] >= before + 2
+
+    audit_writer.flush()
+    session = SessionLocal()
+    try:
+        logged = session.query(models.Log).filter(
+            models.Log.user_id == admin_user.user_id,
+            models.Log.action == "view_logs",
+        ).count()
+    finally:
+        session.close()
+    assert logged == 1
+
+
+def test_pool_metrics_endpoint(client, admin_headers):
+    response = client.get("/api/admin/metrics/db-pools", headers=admin_headers)
+    assert response.status_code == 200
+    data = response.json()
+    assert {"write", "read", "async"} <= set(data)
+    assert "checkouts" in data["read"]
+
+
+@pytest.mark.parametrize("method, bind", [("GET", read_engine), ("HEAD", read_engine), ("POST", engine),
+                                          ("PUT", engine), ("DELETE", engine)])
+def test_sessions_are_routed_by_http_method(method, bind):
+    """Routes depend on get_session; the request method picks the pool."""
+    sessions = get_session(SimpleNamespace(method=method))
+    db = next(sessions)
+    try:
+        assert db.get_bind() is bind
+    finally:
+        sessions.close()
+
+
+def test_api_routes_do_not_pick_a_pool():
+    for route in app.routes:
+        for dependency in getattr(getattr(route, "dependant", None), "dependencies", []):
+            assert dependency.call not in (get_db_session, get_read_session), route.path
+
+
+def test_pool_counters_are_exact_under_concurrency():
+    before = get_pool_metrics()["read"]
+    threads, checkouts = 8, 200
+
+    def hammer():
+        for _ in range(checkouts):
+            with read_engine.connect():
+                pass
+
+    workers = [threading.Thread(target=hammer) for _ in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    after = get_pool_metrics()["read"]
+    assert after["checkouts"] - before["checkouts"] == threads * checkouts
+    assert after["checkins"] - before["checkins"] == threads * checkouts
+    assert after["overflow"] >= 0
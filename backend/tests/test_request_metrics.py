@@ -0,0 +1,122 @@
+import uuid
+
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+
+from app.core import request_metrics
+from app.core.request_metrics import (
+    LATENCY_BUCKETS_MS,
+    LatencyHistogram,
+    RequestMetricsMiddleware,
+    get_request_metrics,
+)
+
+
+@pytest.fixture(autouse=True)
+def clean_metrics():
+    request_metrics.reset_request_metrics()
+    yield
+    request_metrics.reset_request_metrics()
+
+
+def make_app():
+    test_app = FastAPI()
+    test_app.add_middleware(RequestMetricsMiddleware)
+
+    @test_app.post("/echo/{item_id}")
+    async def echo(item_id: int, payload: dict):
+        return {"item_id": item_id, **payload}
+
+    @test_app.get("/stream")
+    async def stream():
+        async def chunks():
+            for i in range(5):
+                yield f"row-{i}\n".encode()
+
+        return StreamingResponse(chunks(), media_type="text/plain")
+
+    @test_app.get("/broken-stream")
+    async def broken_stream():
+        async def chunks():
+            yield b"first\n"
+            raise RuntimeError("export failed")
+
+        return StreamingResponse(chunks(), media_type="text/plain")
+
+    return test_app
+
+
+def test_histogram_buckets_and_quantiles():
+    histogram = LatencyHistogram()
+    for value in (1, 4.9, 5, 7, 300, 20000):
+        histogram.observe(value)
+
+    snapshot = histogram.snapshot()
+    assert snapshot["count"] == 6
+    assert snapshot["buckets"]["le_5"] == 3
+    assert snapshot["buckets"]["le_10"] == 1
+    assert snapshot["buckets"]["le_500"] == 1
+    assert snapshot["buckets"]["le_inf"] == 1
+    assert sum(snapshot["buckets"].values()) == 6
+    assert len(snapshot["buckets"]) == len(LATENCY_BUCKETS_MS) + 1
+    assert snapshot["p50_ms"] == 5
+    assert snapshot["p99_ms"] is None
+    assert snapshot["max_ms"] == 20000
+
+
+def test_records_per_route_template_and_sizes():
+    client = TestClient(make_app())
+    for item_id in (1, 2, 3):
+        response = client.post(f"/echo/{item_id}", json={"name": "x"})
+        assert response.status_code == 200
+
+    metrics = get_request_metrics()
+    route = metrics["routes"]["POST /echo/{item_id}"]
+    assert route["latency"]["count"] == 3
+    assert route["request_bytes"] == 3 * len(b'{"name": "x"}')
+    assert route["response_bytes"] == sum(len(f'{{"item_id":{i},"name":"x"}}') for i in (1, 2, 3))
+    assert route["status"] == {"2xx": 3}
+    assert metrics["in_flight"] == 0
+
+
+def test_streaming_response_passes_through():
+    client = TestClient(make_app())
+    response = client.get("/stream")
+
+    assert response.status_code == 200
+    assert response.text == "".join(f"row-{i}\n" for i in range(5))
+    route = get_request_metrics()["routes"]["GET /stream"]
+    assert route["response_bytes"] == len(response.content)
+    assert route["status"] == {"2xx": 1}
+
+
+def test_aborted_stream_is_recorded_and_releases_in_flight():
+    client = TestClient(make_app())
+    # Starlette may wrap the generator error in an ExceptionGroup
+    with pytest.raises(Exception):
+        client.get("/broken-stream")
+
+    metrics = get_request_metrics()
+    assert metrics["routes"]["GET /broken-stream"]["status"] == {"aborted": 1}
+    assert metrics["in_flight"] == 0
+
+
+def test_unmatched_routes_share_one_key():
+    client = TestClient(make_app())
+    client.get(f"/missing/{uuid.uuid4().hex}")
+    client.get(f"/missing/{uuid.uuid4().hex}")
+
+    route = get_request_metrics()["routes"]["GET <unmatched>"]
+    assert route["status"] == {"4xx": 2}
+
+
+def test_http_metrics_endpoint_requires_admin(client, admin_headers):
+    assert client.get("/api/admin/metrics/http").status_code in (401, 403)
+
+    client.get("/api/health")
+    response = client.get("/api/admin/metrics/http", headers=admin_headers)
+    assert response.status_code == 200
+    routes = response.json()["routes"]
+    assert routes["GET /api/health"]["latency"]["count"] >= 1
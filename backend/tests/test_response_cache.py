@@ -0,0 +1,139 @@
+import uuid
+
+import pytest
+
+from app.core.response_cache import ResponseCache, dashboard_cache, etag_matches
+from app.db.session import SessionLocal
+from app.db import models
+from app.services.audit_writer import audit_writer
+
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def count_logs(db, user, action):
+    audit_writer.flush()
+    return db.query(models.Log).filter(models.Log.user_id == user.user_id, models.Log.action == action).count()
+
+
+def test_entries_expire_after_ttl():
+    clock = FakeClock()
+    cache = ResponseCache(ttl_seconds=30, max_entries=10, clock=clock)
+    cache.set(("stats", (), "admin"), {"total": 1})
+
+    clock.now += 29
+    assert cache.get(("stats", (), "admin")) is not None
+    clock.now += 1
+    assert cache.get(("stats", (), "admin")) is None
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = ResponseCache(ttl_seconds=30, max_entries=2)
+    cache.set(("a", (), "admin"), 1)
+    cache.set(("b", (), "admin"), 2)
+    cache.get(("a", (), "admin"))
+    cache.set(("c", (), "admin"), 3)
+
+    assert cache.get(("b", (), "admin")) is None
+    assert cache.get(("a", (), "admin")) is not None
+    assert cache.get_metrics()["evictions"] == 1
+
+
+def test_etag_matching_accepts_lists_and_weak_validators():
+    assert etag_matches('"abc"', '"abc"')
+    assert etag_matches('"x", W/"abc"', '"abc"')
+    assert etag_matches("*", '"abc"')
+    assert not etag_matches('"other"', '"abc"')
+    assert not etag_matches(None, '"abc"')
+
+
+def test_repeated_polls_hit_cache_and_log_every_poll(client, db, admin_user, admin_headers):
+    hits = dashboard_cache.get_metrics()["hits"]
+    first = client.get("/api/stats/activity?days=7", headers=admin_headers)
+    second = client.get("/api/stats/activity?days=7", headers=admin_headers)
+
+    assert first.status_code == second.status_code == 200
+    assert first.headers["etag"] == second.headers["etag"]
+    assert first.headers["cache-control"] == "private, no-cache"
+    assert first.json() == second.json()
+    assert dashboard_cache.get_metrics()["hits"] == hits + 1
+    assert count_logs(db, admin_user, "view_stats") == 2
+
+
+def test_cache_hits_by_other_admins_are_audited(client, db, admin_user, admin_headers, make_user, auth_headers):
+    other = make_user("admin")
+
+    first = client.get("/api/admin/consent-stats", headers=admin_headers)
+    hits = dashboard_cache.get_metrics()["hits"]
+    second = client.get(
+        "/api/admin/consent-stats", headers={**auth_headers(other), "If-None-Match": first.headers["etag"]}
+    )
+
+    assert second.status_code == 304
+    assert dashboard_cache.get_metrics()["hits"] == hits + 1
+    assert count_logs(db, admin_user, "view_consent_stats") == 1
+    assert count_logs(db, other, "view_consent_stats") == 1
+
+
+def test_registration_and_activation_invalidate_consent_stats(client, db, admin_headers):
+    client.get("/api/admin/consent-stats", headers=admin_headers)
+    client.get("/api/admin/consent-stats/history", headers=admin_headers)
+    total = client.get("/api/admin/consent-stats", headers=admin_headers).json()["total_users"]
+
+    suffix = uuid.uuid4().hex[:8]
+    response = client.post(
+        "/api/auth/register",
+        json={"username": f"cache_reg_{suffix}", "email": f"cache_reg_{suffix}@test.com", "password": "Register123!"},
+    )
+    assert response.status_code == 201
+    assert dashboard_cache.get_metrics()["entries"] == 0
+    assert client.get("/api/admin/consent-stats", headers=admin_headers).json()["total_users"] == total + 1
+
+    client.get("/api/admin/consent-stats/history", headers=admin_headers)
+    response = client.put(f"/api/users/{response.json()['user_id']}/activate", headers=admin_headers)
+    assert response.status_code == 200
+    assert dashboard_cache.get_metrics()["entries"] == 0
+
+
+def test_if_none_match_returns_304(client, admin_headers):
+    etag = client.get("/api/admin/consent-stats", headers=admin_headers).headers["etag"]
+
+    response = client.get("/api/admin/consent-stats", headers={**admin_headers, "If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["etag"] == etag
+
+
+def test_query_params_are_part_of_the_key(client, admin_headers):
+    week = client.get("/api/stats/activity?days=7", headers=admin_headers).json()
+    month = client.get("/api/stats/activity?days=30", headers=admin_headers).json()
+
+    assert len(week["days"]) == 8
+    assert len(month["days"]) == 31
+
+
+def test_retention_update_invalidates_cached_settings(client, admin_headers):
+    client.get("/api/admin/retention", headers=admin_headers)
+    assert dashboard_cache.get_metrics()["entries"] == 1
+
+    response = client.post("/api/admin/retention", json={"retention_days": 365, "enabled": True}, headers=admin_headers)
+    assert response.status_code == 200
+    assert dashboard_cache.get_metrics()["entries"] == 0
+
+    misses = dashboard_cache.get_metrics()["misses"]
+    client.get("/api/admin/retention", headers=admin_headers)
+    assert dashboard_cache.get_metrics()["misses"] == misses + 1
@@ -0,0 +1,86 @@
+from datetime import datetime, timedelta
+
+from app.db.session import SessionLocal
+from app.db import models
+from app.services import retention_service
+from app.services.retention_service import (
+    RetentionPolicyCache,
+    RetentionPolicySnapshot,
+    load_retention_policy,
+    next_scheduled_purge,
+    retention_policy_cache,
+    retention_preview,
+    run_retention_cleanup,
+    save_retention_policy,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_policy_update_is_persisted_and_served(client, admin_headers):
+    response = client.post("/api/admin/retention", json={"retention_days": 120, "enabled": True}, headers=admin_headers)
+    assert response.status_code == 200
+
+    with SessionLocal() as db:
+        policy = load_retention_policy(db)
+    assert (policy.retention_days, policy.enabled) == (120, True)
+
+    # A restarted process (empty cache) reads the stored policy, not the default
+    retention_policy_cache.invalidate()
+    settings_response = client.get("/api/admin/retention", headers=admin_headers)
+    assert settings_response.status_code == 200
+    assert settings_response.json()["retention_days"] == 120
+
+
+def test_cache_serves_policy_until_ttl_expires():
+    clock = FakeClock()
+    cache = RetentionPolicyCache(ttl_seconds=60, clock=clock)
+    with SessionLocal() as db:
+        save_retention_policy(db, 45, True)
+        db.commit()
+        assert cache.get(db).retention_days == 45
+
+        save_retention_policy(db, 200, True)
+        db.commit()
+        clock.now += 59
+        assert cache.get(db).retention_days == 45
+        clock.now += 1
+        assert cache.get(db).retention_days == 200
+
+
+def test_preview_matches_a_direct_count():
+    policy = RetentionPolicySnapshot(retention_days=3, enabled=True)
+    now = datetime.utcnow()
+    with SessionLocal() as db:
+        db.add_all([
+            models.Log(role="admin", action="preview_old", timestamp=now - timedelta(days=10)),
+            models.Log(role="admin", action="preview_cutoff_day", timestamp=now - timedelta(days=3, minutes=1)),
+            models.Log(role="admin", action="preview_recent", timestamp=now - timedelta(days=1)),
+        ])
+        db.commit()
+
+        next_purge_date, logs_to_delete = retention_preview(db, policy, now)
+        expected = db.query(models.Log).filter(models.Log.timestamp < now - timedelta(days=3)).count()
+        assert retention_preview(db, RetentionPolicySnapshot(3, False), now) == (None, 0)
+
+    assert logs_to_delete == expected
+    assert next_purge_date == next_scheduled_purge(now)
+
+
+def test_scheduled_cleanup_honours_a_disabled_policy(monkeypatch):
+    purged = []
+    monkeypatch.setattr(retention_service, "cleanup_old_logs", purged.append)
+    retention_policy_cache.set(RetentionPolicySnapshot(30, False))
+
+    assert run_retention_cleanup() == 0
+    assert purged == []
+
+    retention_policy_cache.set(RetentionPolicySnapshot(30, True))
+    run_retention_cleanup()
+    assert purged == [30]
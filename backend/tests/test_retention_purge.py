@@ -0,0 +1,100 @@
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import func
+
+from app.db.session import SessionLocal
+from app.db import models
+from app.services.retention_service import RetentionPurgeRunner, purge_logs_before, retention_purges
+
+# Far enough in the past that no other test writes logs on these days
+EPOCH = datetime(2001, 1, 1)
+
+
+@pytest.fixture
+def old_logs():
+    role = f"purge_{uuid.uuid4().hex[:8]}"
+    with SessionLocal() as db:
+        db.add_all(
+            models.Log(role=role, action="view_patients", timestamp=EPOCH + timedelta(hours=6 * i))
+            for i in range(20)  # Five days, four rows per day
+        )
+        db.commit()
+    yield role
+    with SessionLocal() as db:
+        db.query(models.Log).filter(models.Log.role == role).delete()
+        db.commit()
+
+
+def remaining(role):
+    with SessionLocal() as db:
+        logs = db.query(models.Log).filter(models.Log.role == role).count()
+        rollup = db.query(func.coalesce(func.sum(models.LogDailyRollup.count), 0)).filter(
+            models.LogDailyRollup.role == role
+        ).scalar()
+    return logs, rollup
+
+
+def test_purge_deletes_in_batches_and_keeps_rollup_consistent(old_logs):
+    batches = []
+    # Cutoff in the middle of the third day
+    deleted = purge_logs_before(EPOCH + timedelta(days=2, hours=12), batch_size=3, pause_seconds=0, progress=batches.append)
+
+    assert deleted == 10
+    assert batches == [3, 3, 3, 1]
+    assert remaining(old_logs) == (10, 10)
+
+
+def test_rollup_matches_logs_at_every_batch_commit(old_logs):
+    """Whatever batch a killed process stops after, the rollup already matches the logs."""
+    states = []
+    purge_logs_before(
+        EPOCH + timedelta(days=4), batch_size=4, pause_seconds=0, progress=lambda count: states.append(remaining(old_logs))
+    )
+
+    assert [logs for logs, _ in states] == [16, 12, 8, 4, 4]
+    assert all(rollup == logs for logs, rollup in states)
+
+
+def test_interrupted_purge_keeps_rollup_for_surviving_logs(old_logs):
+    def fail_after_first_batch(count):
+        raise RuntimeError("disk full")
+
+    with pytest.raises(RuntimeError):
+        purge_logs_before(EPOCH + timedelta(days=4), batch_size=4, pause_seconds=0, progress=fail_after_first_batch)
+
+    logs, rollup = remaining(old_logs)
+    assert logs == 16
+    assert rollup == logs
+
+
+def test_runner_reuses_the_active_job_and_reports_progress():
+    calls = []
+
+    def slow_purge(cutoff, progress):
+        calls.append(cutoff)
+        progress(5)
+        progress(2)
+        return 7
+
+    runner = RetentionPurgeRunner(purge=slow_purge)
+    job = runner.start(30)
+    runner.wait(5)
+
+    assert runner.get(job.job_id).to_dict()["status"] == "completed"
+    assert (job.deleted, job.batches) == (7, 2)
+    assert len(calls) == 1
+    assert runner.start(30).job_id != job.job_id
+
+
+def test_update_returns_job_id_and_status_endpoint_tracks_it(client, admin_headers):
+    response = client.post("/api/admin/retention", json={"retention_days": 365, "enabled": True}, headers=admin_headers)
+    assert response.status_code == 200
+    job_id = response.json()["purge_job_id"]
+    retention_purges.wait(10)
+
+    status_response = client.get(f"/api/admin/retention/jobs/{job_id}", headers=admin_headers)
+    assert status_response.status_code == 200
+    assert status_response.json()["status"] == "completed"
+    assert client.get("/api/admin/retention/jobs/unknown", headers=admin_headers).status_code == 404
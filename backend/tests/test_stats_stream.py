@@ -0,0 +1,160 @@
+import asyncio
+import json
+
+import pytest
+
+from app.db.session import SessionLocal, async_engine
+from app.db import models
+from app.services.stats_stream import (
+    StatsBroadcaster,
+    SubscriberLimitReached,
+    Subscription,
+    compute_stats_snapshot,
+    diff_snapshots,
+    event_stream,
+    stats_broadcaster,
+)
+
+
+def snapshot(day="2026-10-16", total=0, by_role=None, by_type=None, consented=1):
+    return {
+        "activity": {"day": day, "total": total, "by_role": by_role or {}, "by_type": by_type or {}},
+        "consent": {"total_users": 4, "consented_users": consented, "consent_percentage": consented * 25.0},
+    }
+
+
+class FakeStats:
+    """Snapshot source counting how often it is computed."""
+
+    def __init__(self):
+        self.calls = 0
+        self.total = 0
+
+    async def __call__(self):
+        self.calls += 1
+        return snapshot(total=self.total, by_role={"admin": self.total} if self.total else {})
+
+
+def parse_event(chunk: str) -> tuple[str, dict]:
+    fields = dict(line.split(": ", 1) for line in chunk.strip().splitlines() if ": " in line and not line.startswith(":"))
+    return fields["event"], json.loads(fields["data"])
+
+
+def test_diff_reports_increments_and_changed_consent():
+    old = snapshot(total=3, by_role={"admin": 3}, by_type={"view": 3})
+    new = snapshot(total=5, by_role={"admin": 3, "doctor": 2}, by_type={"view": 5}, consented=2)
+
+    delta = diff_snapshots(old, new)
+    assert delta["activity"] == {"day": "2026-10-16", "actions": 2, "by_role": {"doctor": 2}, "by_type": {"view": 2}}
+    assert delta["consent"]["consented_users"] == 2
+    assert diff_snapshots(new, new) is None
+
+
+def test_diff_restarts_from_zero_on_a_new_day():
+    old = snapshot(total=40, by_role={"admin": 40})
+    new = snapshot(day="2026-10-17", total=1, by_role={"admin": 1})
+
+    assert diff_snapshots(old, new)["activity"] == {
+        "day": "2026-10-17", "actions": 1, "by_role": {"admin": 1}, "by_type": {},
+    }
+
+
+def test_slow_subscriber_backlog_is_replaced_by_a_snapshot():
+    async def scenario():
+        subscription = Subscription(queue_size=2)
+        latest = snapshot(total=9)
+        for i in range(5):
+            subscription.push("delta", {"seq": i}, latest)
+        return [subscription.queue.get_nowait() for _ in range(subscription.queue.qsize())], subscription.resyncs
+
+    queued, resyncs = asyncio.run(scenario())
+    # The snapshot already covers every delta it replaced, including the one that overflowed
+    assert queued == [("snapshot", snapshot(total=9))]
+    assert resyncs == 2
+
+
+def test_one_computation_per_tick_is_shared_by_subscribers():
+    async def scenario():
+        source = FakeStats()
+        broadcaster = StatsBroadcaster(compute=source, interval_seconds=0.01, max_subscribers=5)
+        first, _ = await broadcaster.subscribe()
+        second, _ = await broadcaster.subscribe()
+        source.total = 2
+        events = await asyncio.gather(
+            asyncio.wait_for(first.queue.get(), 1), asyncio.wait_for(second.queue.get(), 1)
+        )
+        calls_with_two = source.calls
+        broadcaster.unsubscribe(first)
+        broadcaster.unsubscribe(second)
+        await asyncio.sleep(0.05)
+        return events, calls_with_two, source.calls, broadcaster
+
+    events, calls_with_two, calls_after, broadcaster = asyncio.run(scenario())
+    assert events[0] == events[1] == ("delta", {"activity": {
+        "day": "2026-10-16", "actions": 2, "by_role": {"admin": 2}, "by_type": {},
+    }})
+    # One initial snapshot plus one per tick, not one per subscriber
+    assert calls_with_two <= 3
+    # The producer stops once nobody is listening
+    assert calls_after <= calls_with_two + 1
+    assert broadcaster._task is None
+
+
+def test_subscriber_cap_is_enforced():
+    async def scenario():
+        broadcaster = StatsBroadcaster(compute=FakeStats(), interval_seconds=10, max_subscribers=1)
+        subscription, _ = await broadcaster.subscribe()
+        try:
+            with pytest.raises(SubscriberLimitReached):
+                await broadcaster.subscribe()
+        finally:
+            broadcaster.unsubscribe(subscription)
+            await broadcaster.stop()
+        return broadcaster.get_metrics()
+
+    assert asyncio.run(scenario())["rejected"] == 1
+
+
+def test_event_stream_sends_snapshot_then_heartbeats():
+    async def scenario():
+        broadcaster = StatsBroadcaster(compute=FakeStats(), interval_seconds=10)
+        subscription, first_snapshot = await broadcaster.subscribe()
+        stream = event_stream(broadcaster, subscription, first_snapshot, heartbeat_seconds=0.01)
+        chunks = [await stream.__anext__() for _ in range(2)]
+        subscription.queue.put_nowait(("delta", {"consent": {"total_users": 5}}))
+        chunks.append(await stream.__anext__())
+        await stream.aclose()
+        await broadcaster.stop()
+        return chunks, broadcaster.subscriber_count
+
+    chunks, subscribers_left = asyncio.run(scenario())
+    assert chunks[0].startswith("retry: ")
+    assert parse_event(chunks[0].split("\n", 1)[1]) == ("snapshot", snapshot())
+    assert chunks[1] == ": heartbeat\n\n"
+    assert parse_event(chunks[2]) == ("delta", {"consent": {"total_users": 5}})
+    assert subscribers_left == 0
+
+
+def test_compute_snapshot_counts_active_users():
+    with SessionLocal() as db:
+        active = db.query(models.User).filter(models.User.is_active == True).count()
+
+    async def scenario():
+        try:
+            return await compute_stats_snapshot()
+        finally:
+            # Pooled aiosqlite connections belong to this loop; close them before it ends
+            await async_engine.dispose()
+
+    result = asyncio.run(scenario())
+    assert result["consent"]["total_users"] == active
+    assert set(result["activity"]) == {"day", "total", "by_role", "by_type"}
+
+
+def test_stream_endpoint_rejects_when_full(client, admin_headers, monkeypatch):
+    assert client.get("/api/stats/stream").status_code in (401, 403)
+
+    monkeypatch.setattr(stats_broadcaster, "max_subscribers", 0)
+    response = client.get("/api/stats/stream", headers=admin_headers)
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "30"
@@ -3,7 +3,7 @@ import Button from '../ui/Button'
 import Table from '../ui/Table'
 import Loader from '../ui/Loader'
 
-const AdminAuditLogs = ({ logs, loading, filters, pagination, onFilterChange, onExport, onRefresh, onPaginationChange }) => {
+const AdminAuditLogs = ({ logs, loading, filters, pagination, onFilterChange, onExport, onRefresh, onPaginationChange, live, onToggleLive }) => {
   const columns = [
     { key: 'log_id', header: 'ID' },
     { key: 'user_id', header: 'User ID', render: (row) => row.user_id || 'N/A' },
@@ -33,6 +33,9 @@ const AdminAuditLogs = ({ logs, loading, filters, pagination, onFilterChange, on
           <p className="text-slate-600">View and export system activity logs.</p>
         </div>
         <div className="flex gap-3">
+          <Button onClick={onToggleLive} disabled={pagination.page !== 1} variant={live ? 'primary' : 'secondary'}>
+            {live ? 'Live: On' : 'Live: Off'}
+          </Button>
           <Button onClick={onRefresh} disabled={loading} variant="secondary">
             Refresh
           </Button>
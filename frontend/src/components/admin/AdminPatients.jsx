@@ -2,9 +2,10 @@ import { useEffect } from 'react'
 import Card from '../ui/Card'
 import Button from '../ui/Button'
 import Table from '../ui/Table'
+import LoadMoreButton from '../ui/LoadMoreButton'
 import Loader from '../ui/Loader'
 
-const AdminPatients = ({ patients, loading, rawMode, onToggleRawMode, onAnonymize, onExport, onRefresh }) => {
+const AdminPatients = ({ patients, loading, hasMore, loadingMore, onLoadMore, rawMode, onToggleRawMode, onAnonymize, onExport, onRefresh }) => {
   useEffect(() => {
     const event = new CustomEvent("admin-raw-mode-change", { detail: rawMode })
     window.dispatchEvent(event)
@@ -88,11 +89,14 @@ const AdminPatients = ({ patients, loading, rawMode, onToggleRawMode, onAnonymiz
       {loading ? (
         <Loader message="Loading patient records..." />
       ) : (
-        <Table
-          columns={columns}
-          data={patients}
-          emptyMessage="No patient records found."
-        />
+        <>
+          <Table
+            columns={columns}
+            data={patients}
+            emptyMessage="No patient records found."
+          />
+          <LoadMoreButton hasMore={hasMore} loading={loadingMore} onLoadMore={onLoadMore} />
+        </>
       )}
     </Card>
   )
@@ -40,7 +40,8 @@ const AdminStats = () => {
   const chart2Ref = useRef(null)
   const chart3Ref = useRef(null)
 
-  const { stats, loading: statsLoading } = useActivityStats(daysFilter, 60000)
+  const granularity = daysFilter > 30 ? 'weekly' : 'daily'
+  const { stats, loading: statsLoading } = useActivityStats(daysFilter, 60000, granularity)
   const { settings, loading: retentionLoading, updateSettings } = useRetentionSettings()
   const { stats: consentStats, loading: consentLoading } = useConsentStats(60000)
 
@@ -93,7 +94,7 @@ const AdminStats = () => {
         }),
         datasets: [
           {
-            label: 'Actions per Day',
+            label: granularity === 'weekly' ? 'Actions per Week' : 'Actions per Day',
             data: stats.actions_per_day,
             borderColor: 'rgb(59, 130, 246)',
             backgroundColor: 'rgba(59, 130, 246, 0.1)',
@@ -194,6 +195,13 @@ const AdminStats = () => {
             >
               30 Days
             </Button>
+            <Button
+              variant={daysFilter === 365 ? 'primary' : 'secondary'}
+              size="sm"
+              onClick={() => setDaysFilter(365)}
+            >
+              1 Year
+            </Button>
           </div>
         </div>
 
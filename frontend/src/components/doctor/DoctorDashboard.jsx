@@ -1,8 +1,9 @@
 import Card from '../ui/Card'
 import Table from '../ui/Table'
+import LoadMoreButton from '../ui/LoadMoreButton'
 import Loader from '../ui/Loader'
 
-const DoctorDashboard = ({ patients, loading }) => {
+const DoctorDashboard = ({ patients, loading, hasMore, loadingMore, onLoadMore }) => {
   const columns = [
     { key: 'patient_id', header: 'Patient ID' },
     { key: 'name', header: 'Name (Anonymized)', render: (row) => row.name || 'N/A' },
@@ -24,11 +25,14 @@ const DoctorDashboard = ({ patients, loading }) => {
       {loading ? (
         <Loader message="Loading patients..." />
       ) : (
-        <Table
-          columns={columns}
-          data={patients}
-          emptyMessage="No patients assigned."
-        />
+        <>
+          <Table
+            columns={columns}
+            data={patients}
+            emptyMessage="No patients assigned."
+          />
+          <LoadMoreButton hasMore={hasMore} loading={loadingMore} onLoadMore={onLoadMore} />
+        </>
       )}
     </Card>
   )
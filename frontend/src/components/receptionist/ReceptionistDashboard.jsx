@@ -2,9 +2,10 @@ import { useState } from 'react'
 import Card from '../ui/Card'
 import Button from '../ui/Button'
 import Table from '../ui/Table'
+import LoadMoreButton from '../ui/LoadMoreButton'
 import Loader from '../ui/Loader'
 
-const ReceptionistDashboard = ({ patients, loading, onAddPatient, onUpdatePatient, onRefresh }) => {
+const ReceptionistDashboard = ({ patients, loading, hasMore, loadingMore, onLoadMore, onAddPatient, onUpdatePatient, onRefresh }) => {
   const [showAddForm, setShowAddForm] = useState(false)
   const [editingPatient, setEditingPatient] = useState(null)
   const [formData, setFormData] = useState({
@@ -138,11 +139,14 @@ const ReceptionistDashboard = ({ patients, loading, onAddPatient, onUpdatePatien
       {loading ? (
         <Loader message="Loading patients..." />
       ) : (
-        <Table
-          columns={columns}
-          data={patients}
-          emptyMessage="No patients yet."
-        />
+        <>
+          <Table
+            columns={columns}
+            data={patients}
+            emptyMessage="No patients yet."
+          />
+          <LoadMoreButton hasMore={hasMore} loading={loadingMore} onLoadMore={onLoadMore} />
+        </>
       )}
     </Card>
   )
@@ -0,0 +1,16 @@
+import Button from './Button'
+
+const LoadMoreButton = ({ hasMore, loading, onLoadMore }) => {
+  if (!hasMore) {
+    return null
+  }
+  return (
+    <div className="flex justify-center mt-4">
+      <Button onClick={onLoadMore} disabled={loading} variant="secondary" size="sm">
+        {loading ? 'Loading...' : 'Load more'}
+      </Button>
+    </div>
+  )
+}
+
+export default LoadMoreButton
@@ -1,6 +1,7 @@
 import { useState, useCallback, useEffect, useRef } from 'react'
 import toast from 'react-hot-toast'
 import api from '../services/api'
+import { openLogTail } from '../services/logTail'
 
 export const useAuditLogs = (shouldFetch = false) => {
   const [logs, setLogs] = useState([])
@@ -17,6 +18,7 @@ export const useAuditLogs = (shouldFetch = false) => {
     page_size: 50,
     total: 0,
   })
+  const [live, setLive] = useState(false)
   const hasFetchedRef = useRef(false)
 
   const fetchLogs = useCallback(async () => {
@@ -47,6 +49,24 @@ export const useAuditLogs = (shouldFetch = false) => {
     }
   }, [pagination.page, filters, shouldFetch, fetchLogs])
 
+  // Live mode: prepend rows from the tail stream instead of re-requesting page 1
+  useEffect(() => {
+    if (!shouldFetch || !live || pagination.page !== 1 || loading) return undefined
+    const tailFilters = { role: filters.role, user_id: filters.user_id, action: filters.action }
+    const afterId = logs.reduce((max, entry) => Math.max(max, entry.log_id), 0)
+    return openLogTail({ afterId, filters: tailFilters }, {
+      onLog: (entry) => {
+        setLogs((prev) => [entry, ...prev].slice(0, pagination.page_size))
+        setPagination((prev) => ({ ...prev, total: prev.total + 1 }))
+      },
+      onError: ({ failures }) => {
+        if (failures === 3) toast.error('Live audit log connection lost, retrying')
+      },
+    })
+    // Reconnect only when the view changes, not on every streamed row
+    // eslint-disable-next-line react-hooks/exhaustive-deps
+  }, [shouldFetch, live, pagination.page, filters.role, filters.user_id, filters.action, loading])
+
   const handleFilterChange = (key, value) => {
     setFilters((prev) => ({ ...prev, [key]: value }))
     setPagination((prev) => ({ ...prev, page: 1 }))
@@ -57,9 +77,11 @@ export const useAuditLogs = (shouldFetch = false) => {
     loading,
     filters,
     pagination,
+    live,
     fetchLogs,
     handleFilterChange,
     setPagination,
+    setLive,
   }
 }
 
@@ -2,33 +2,59 @@ import { useState, useEffect, useCallback } from 'react'
 import toast from 'react-hot-toast'
 import api from '../services/api'
 
+const PAGE_SIZE = 50
+
 export const usePatients = (role, rawMode = false) => {
   const [patients, setPatients] = useState([])
+  const [nextCursor, setNextCursor] = useState(null)
   const [loading, setLoading] = useState(false)
+  const [loadingMore, setLoadingMore] = useState(false)
+
+  const canView = role === 'admin' || role === 'doctor' || role === 'receptionist'
+
+  const fetchPage = useCallback(async (cursor) => {
+    const { data } = await api.get('/api/patients', {
+      params: { raw: rawMode && role === 'admin', limit: PAGE_SIZE, ...(cursor ? { cursor } : {}) },
+    })
+    setNextCursor(data.next_cursor)
+    return data.patients
+  }, [role, rawMode])
 
+  // Reload from the newest patient (after edits, role or raw-mode changes)
   const fetchPatients = useCallback(async () => {
-    if (role !== 'admin' && role !== 'doctor' && role !== 'receptionist') {
+    if (!canView) {
       return
     }
     setLoading(true)
     try {
-      const { data } = await api.get('/api/patients', {
-        params: { raw: rawMode && role === 'admin' },
-      })
-      setPatients(data)
+      setPatients(await fetchPage(null))
     } catch (error) {
       toast.error('Failed to fetch patients.')
     } finally {
       setLoading(false)
     }
-  }, [role, rawMode])
+  }, [canView, fetchPage])
+
+  const loadMore = useCallback(async () => {
+    if (!nextCursor || loadingMore) {
+      return
+    }
+    setLoadingMore(true)
+    try {
+      const page = await fetchPage(nextCursor)
+      setPatients((prev) => [...prev, ...page])
+    } catch (error) {
+      toast.error('Failed to fetch more patients.')
+    } finally {
+      setLoadingMore(false)
+    }
+  }, [nextCursor, loadingMore, fetchPage])
 
   useEffect(() => {
-    if (role === 'admin' || role === 'doctor' || role === 'receptionist') {
+    if (canView) {
       fetchPatients()
     }
-  }, [role, rawMode, fetchPatients])
+  }, [canView, rawMode, fetchPatients])
 
-  return { patients, loading, fetchPatients }
+  return { patients, loading, loadingMore, hasMore: Boolean(nextCursor), fetchPatients, loadMore }
 }
-
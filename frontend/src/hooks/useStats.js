@@ -1,8 +1,49 @@
-import { useState, useEffect, useCallback } from 'react'
+import { useState, useEffect, useCallback, useRef } from 'react'
 import toast from 'react-hot-toast'
 import api from '../services/api'
+import { subscribeToStats } from '../services/statsStream'
 
-export const useActivityStats = (days = 7, pollInterval = 60000) => {
+const DAY_MS = 24 * 60 * 60 * 1000
+// Consecutive stream failures before a hook falls back to polling
+const STREAM_FAILURES_BEFORE_POLLING = 3
+
+const addCounts = (base, increments) => {
+  const result = { ...base }
+  Object.entries(increments).forEach(([key, value]) => {
+    result[key] = (result[key] || 0) + value
+  })
+  return result
+}
+
+// Apply a stream delta for one day to the chart data; null when the day falls outside the buckets
+const applyActivityDelta = (stats, delta) => {
+  const bucketDays = stats.granularity === 'weekly' ? 7 : 1
+  const day = new Date(delta.day).getTime()
+  const index = stats.days.findIndex((label) => {
+    const start = new Date(label).getTime()
+    return day >= start && day < start + bucketDays * DAY_MS
+  })
+  if (index === -1) return null
+  const actionsPerDay = [...stats.actions_per_day]
+  actionsPerDay[index] += delta.actions
+  return {
+    ...stats,
+    actions_per_day: actionsPerDay,
+    actions_by_role: addCounts(stats.actions_by_role, delta.by_role),
+    actions_by_type: addCounts(stats.actions_by_type, delta.by_type),
+  }
+}
+
+// Polls only while the statistics stream is unavailable
+const usePollingFallback = (fetchData, pollInterval, streaming) => {
+  useEffect(() => {
+    if (streaming) return undefined
+    const interval = setInterval(fetchData, pollInterval)
+    return () => clearInterval(interval)
+  }, [fetchData, pollInterval, streaming])
+}
+
+export const useActivityStats = (days = 7, pollInterval = 60000, granularity = 'daily') => {
   const [stats, setStats] = useState(null)
   const [loading, setLoading] = useState(false)
 
@@ -10,7 +51,7 @@ export const useActivityStats = (days = 7, pollInterval = 60000) => {
     setLoading(true)
     try {
       const { data } = await api.get('/api/stats/activity', {
-        params: { days },
+        params: { days, granularity },
       })
       setStats(data)
     } catch (error) {
@@ -18,13 +59,37 @@ export const useActivityStats = (days = 7, pollInterval = 60000) => {
     } finally {
       setLoading(false)
     }
-  }, [days])
+  }, [days, granularity])
+
+  const statsRef = useRef(null)
+  const [streaming, setStreaming] = useState(true)
+
+  useEffect(() => {
+    statsRef.current = stats
+  }, [stats])
 
   useEffect(() => {
     fetchStats()
-    const interval = setInterval(fetchStats, pollInterval)
-    return () => clearInterval(interval)
-  }, [fetchStats, pollInterval])
+    let connected = false
+    return subscribeToStats((event, payload) => {
+      if (event === 'error') {
+        if (payload.failures >= STREAM_FAILURES_BEFORE_POLLING) setStreaming(false)
+        return
+      }
+      setStreaming(true)
+      if (event === 'snapshot') {
+        // Sent on reconnect and after a slow-client resync: deltas may have been missed
+        if (connected) fetchStats()
+        connected = true
+      } else if (event === 'delta' && payload.activity && statsRef.current) {
+        const next = applyActivityDelta(statsRef.current, payload.activity)
+        if (next) setStats(next)
+        else fetchStats()
+      }
+    })
+  }, [fetchStats])
+
+  usePollingFallback(fetchStats, pollInterval, streaming)
 
   return { stats, loading, fetchStats }
 }
@@ -86,12 +151,24 @@ export const useConsentStats = (pollInterval = 60000) => {
     }
   }, [])
 
+  const [streaming, setStreaming] = useState(true)
+
   useEffect(() => {
     fetchStats()
-    const interval = setInterval(fetchStats, pollInterval)
-    return () => clearInterval(interval)
-  }, [fetchStats, pollInterval])
+    return subscribeToStats((event, payload) => {
+      if (event === 'error') {
+        if (payload.failures >= STREAM_FAILURES_BEFORE_POLLING) setStreaming(false)
+        return
+      }
+      setStreaming(true)
+      // Snapshots carry the full consent totals, deltas only when they changed
+      if (payload.consent) {
+        setStats((prev) => ({ ...prev, ...payload.consent, last_updated: new Date().toISOString() }))
+      }
+    })
+  }, [fetchStats])
+
+  usePollingFallback(fetchStats, pollInterval, streaming)
 
   return { stats, loading, fetchStats }
 }
-
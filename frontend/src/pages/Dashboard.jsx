@@ -19,9 +19,9 @@ const Dashboard = ({ session, onLogout }) => {
   const [rawMode, setRawMode] = useState(false)
   const [meta, setMeta] = useState(null)
   
-  const { patients, loading: patientsLoading, fetchPatients } = usePatients(session.role, rawMode)
+  const { patients, loading: patientsLoading, loadingMore: patientsLoadingMore, hasMore: hasMorePatients, fetchPatients, loadMore: loadMorePatients } = usePatients(session.role, rawMode)
   const { users, loading: usersLoading, fetchUsers } = useUsers()
-  const { logs, loading: logsLoading, filters, pagination, fetchLogs, handleFilterChange, setPagination } = useAuditLogs(session.role === 'admin' && activeTab === 'audit')
+  const { logs, loading: logsLoading, filters, pagination, live, fetchLogs, handleFilterChange, setPagination, setLive } = useAuditLogs(session.role === 'admin' && activeTab === 'audit')
 
   // Fetch users only when admin tab is active
   useEffect(() => {
@@ -111,6 +111,9 @@ const Dashboard = ({ session, onLogout }) => {
           <AdminPatients
             patients={patients}
             loading={patientsLoading}
+            hasMore={hasMorePatients}
+            loadingMore={patientsLoadingMore}
+            onLoadMore={loadMorePatients}
             rawMode={rawMode}
             onToggleRawMode={setRawMode}
             onAnonymize={handleAnonymize}
@@ -137,18 +140,31 @@ const Dashboard = ({ session, onLogout }) => {
             onExport={() => handleExport('logs')}
             onRefresh={fetchLogs}
             onPaginationChange={setPagination}
+            live={live}
+            onToggleLive={() => setLive((prev) => !prev)}
           />
         )
       } else if (activeTab === 'stats') {
         return <AdminStats />
       }
     } else if (session.role === 'doctor') {
-      return <DoctorDashboard patients={patients} loading={patientsLoading} />
+      return (
+        <DoctorDashboard
+          patients={patients}
+          loading={patientsLoading}
+          hasMore={hasMorePatients}
+          loadingMore={patientsLoadingMore}
+          onLoadMore={loadMorePatients}
+        />
+      )
     } else if (session.role === 'receptionist') {
       return (
         <ReceptionistDashboard
           patients={patients}
           loading={patientsLoading}
+          hasMore={hasMorePatients}
+          loadingMore={patientsLoadingMore}
+          onLoadMore={loadMorePatients}
           onAddPatient={handleAddPatient}
           onUpdatePatient={handleUpdatePatient}
           onRefresh={fetchPatients}
@@ -0,0 +1,76 @@
+import api from './api'
+
+// Live audit-log tail over Server-Sent Events, read with fetch so the Authorization header can be sent.
+const getToken = () => {
+  try {
+    return JSON.parse(window.localStorage.getItem('hospitalSession'))?.token
+  } catch (e) {
+    return null
+  }
+}
+
+const parseBlock = (block) => {
+  let event = 'message'
+  const data = []
+  block.split('\n').forEach((line) => {
+    if (line.startsWith(':')) return // heartbeat comment
+    if (line.startsWith('event:')) event = line.slice(6).trim()
+    else if (line.startsWith('data:')) data.push(line.slice(5).trim())
+  })
+  return data.length ? { event, payload: JSON.parse(data.join('\n')) } : null
+}
+
+// Streams rows after afterId matching the role/user_id/action filters; resumes from the last row on reconnect.
+export const openLogTail = ({ afterId, filters }, { onLog, onError }) => {
+  let controller = null
+  let retryTimer = null
+  let closed = false
+  let lastId = afterId
+  let failures = 0
+
+  const connect = async () => {
+    retryTimer = null
+    controller = new AbortController()
+    const params = new URLSearchParams(
+      Object.entries({ ...filters, after_id: lastId }).filter(([_, v]) => v !== '' && v != null)
+    )
+    try {
+      const response = await fetch(`${api.defaults.baseURL}/api/logs/tail?${params}`, {
+        headers: { Accept: 'text/event-stream', Authorization: `Bearer ${getToken()}` },
+        signal: controller.signal,
+      })
+      if (!response.ok) throw new Error(`Log tail failed with ${response.status}`)
+      failures = 0
+      const reader = response.body.pipeThrough(new TextDecoderStream()).getReader()
+      let buffer = ''
+      for (;;) {
+        const { value, done } = await reader.read()
+        if (done) break
+        buffer += value
+        let boundary = buffer.indexOf('\n\n')
+        while (boundary !== -1) {
+          const parsed = parseBlock(buffer.slice(0, boundary))
+          buffer = buffer.slice(boundary + 2)
+          if (parsed?.event === 'log') {
+            lastId = parsed.payload.log_id
+            onLog(parsed.payload)
+          }
+          boundary = buffer.indexOf('\n\n')
+        }
+      }
+    } catch (error) {
+      if (closed) return
+    }
+    if (closed) return
+    failures += 1
+    onError?.({ failures })
+    retryTimer = setTimeout(connect, Math.min(60000, 1000 * 2 ** Math.min(failures, 6)))
+  }
+
+  connect()
+  return () => {
+    closed = true
+    clearTimeout(retryTimer)
+    controller?.abort()
+  }
+}
@@ -0,0 +1,81 @@
+import api from './api'
+
+// One Server-Sent Events connection per tab, shared by every stats hook.
+// EventSource cannot send the Authorization header, so the stream is read with fetch.
+const listeners = new Set()
+let controller = null
+let retryTimer = null
+let failures = 0
+
+const getToken = () => {
+  try {
+    return JSON.parse(window.localStorage.getItem('hospitalSession'))?.token
+  } catch (e) {
+    return null
+  }
+}
+
+const dispatch = (block) => {
+  let event = 'message'
+  const data = []
+  block.split('\n').forEach((line) => {
+    if (line.startsWith(':')) return // heartbeat comment
+    if (line.startsWith('event:')) event = line.slice(6).trim()
+    else if (line.startsWith('data:')) data.push(line.slice(5).trim())
+  })
+  if (!data.length) return
+  const payload = JSON.parse(data.join('\n'))
+  listeners.forEach((listener) => listener(event, payload))
+}
+
+const scheduleReconnect = () => {
+  // Back off up to a minute; after a few failures, listeners fall back to polling
+  failures += 1
+  listeners.forEach((listener) => listener('error', { failures }))
+  const delay = Math.min(60000, 2000 * 2 ** Math.min(failures, 5))
+  retryTimer = setTimeout(connect, delay)
+}
+
+const connect = async () => {
+  retryTimer = null
+  if (!listeners.size) return
+  controller = new AbortController()
+  try {
+    const response = await fetch(`${api.defaults.baseURL}/api/stats/stream`, {
+      headers: { Accept: 'text/event-stream', Authorization: `Bearer ${getToken()}` },
+      signal: controller.signal,
+    })
+    if (!response.ok) throw new Error(`Stats stream failed with ${response.status}`)
+    failures = 0
+    const reader = response.body.pipeThrough(new TextDecoderStream()).getReader()
+    let buffer = ''
+    for (;;) {
+      const { value, done } = await reader.read()
+      if (done) break
+      buffer += value
+      let boundary = buffer.indexOf('\n\n')
+      while (boundary !== -1) {
+        dispatch(buffer.slice(0, boundary))
+        buffer = buffer.slice(boundary + 2)
+        boundary = buffer.indexOf('\n\n')
+      }
+    }
+  } catch (error) {
+    if (controller?.signal.aborted) return
+  }
+  if (listeners.size) scheduleReconnect()
+}
+
+export const subscribeToStats = (listener) => {
+  listeners.add(listener)
+  if (listeners.size === 1 && !controller && !retryTimer) connect()
+  return () => {
+    listeners.delete(listener)
+    if (!listeners.size) {
+      clearTimeout(retryTimer)
+      retryTimer = null
+      controller?.abort()
+      controller = null
+    }
+  }
+}